@@ -1,11 +1,17 @@
+import time
+
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Sequence
 
+from antareslauncher.use_cases.archive.study_archiver import StudyArchiver
 from antareslauncher.use_cases.check_remote_queue.check_queue_controller import CheckQueueController
 from antareslauncher.use_cases.create_list.study_list_composer import StudyListComposer
-from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillController
+from antareslauncher.use_cases.fetch_results.result_fetcher import ResultFetcher
+from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillController, JobKillFilter
 from antareslauncher.use_cases.launch.launch_controller import LaunchController
+from antareslauncher.use_cases.lifecycle_report.lifecycle_report_controller import LifecycleReportController
 from antareslauncher.use_cases.retrieve.retrieve_controller import RetrieveController
+from antareslauncher.use_cases.sizing_report.sizing_report_controller import SizingReportController
 from antareslauncher.use_cases.wait_loop_controller.wait_controller import WaitController
 
 
@@ -22,6 +28,18 @@ class AntaresLauncher:
     xpansion_mode: str
     check_queue_bool: bool
     job_id_to_kill: Optional[int] = None
+    sizing_report_controller: Optional[SizingReportController] = None
+    sizing_report_bool: bool = False
+    watch_interval: int = 0
+    kill_filter: Optional[JobKillFilter] = None
+    lifecycle_report_controller: Optional[LifecycleReportController] = None
+    lifecycle_report_bool: bool = False
+    result_fetcher: Optional[ResultFetcher] = None
+    fetch_study: Optional[str] = None
+    fetch_patterns: Sequence[str] = ()
+    study_archiver: Optional[StudyArchiver] = None
+    history_pattern: Optional[str] = None
+    compact_db: bool = False
 
     def run_once_mode(self) -> None:
         """Runs antares_launcher only once:
@@ -29,7 +47,11 @@ class AntaresLauncher:
         submit all new studies
         retrieve all the finished studies.
         The code exit even if there are still unfinished jobs
+
+        The old done studies are archived first, so that they are not read by the passes.
         """
+        if self.study_archiver is not None:
+            self.study_archiver.archive_done_studies()
         self.study_list_composer.update_study_database()
         self.launch_controller.launch_all_studies()
         self.retrieve_controller.retrieve_all_studies()
@@ -38,18 +60,51 @@ class AntaresLauncher:
         """Run antares_launcher once then it keeps
         checking the status of the unfinished jobs until all jobs are finished,
         The code exits when all jobs are finished, the results are retrieved and extracted
+
+        If the watch interval is set, the state of the jobs is pushed by a remote watcher
+        instead of being polled: the deferred studies are submitted as soon as a job is finished.
+        The watcher is stopped after the wait time, so that all the studies are still polled
+        at the usual cadence, and the polling is the fallback if the watcher fails.
         """
         self.run_once_mode()
         while not self.retrieve_controller.all_studies_done:
-            self.wait_controller.countdown(seconds_to_wait=self.wait_time)
+            seconds_to_wait = self.wait_time
+            if self.watch_interval > 0:
+                start = time.monotonic()
+                self.retrieve_controller.retrieve_on_job_transitions(
+                    self.watch_interval,
+                    max_duration=self.wait_time,
+                    on_slot_freed=self.launch_controller.launch_deferred_studies,
+                )
+                seconds_to_wait = int(self.wait_time - (time.monotonic() - start))
+                if self.retrieve_controller.all_studies_done:
+                    break
+            if seconds_to_wait > 0:
+                self.wait_controller.countdown(seconds_to_wait=seconds_to_wait)
+            self.launch_controller.launch_deferred_studies()
             self.retrieve_controller.retrieve_all_studies()
 
     def run(self) -> None:
         """Use the options to decide which action to perform"""
         if self.job_id_to_kill:
             self.job_kill_controller.kill_job(self.job_id_to_kill)
+        elif self.kill_filter:
+            self.job_kill_controller.kill_jobs(self.kill_filter)
         elif self.check_queue_bool:
             self.check_queue_controller.check_queue()
+        elif self.sizing_report_bool and self.sizing_report_controller is not None:
+            self.sizing_report_controller.show_report()
+        elif self.lifecycle_report_bool and self.lifecycle_report_controller is not None:
+            self.lifecycle_report_controller.show_report()
+        elif self.fetch_study and self.result_fetcher is not None:
+            if self.fetch_patterns:
+                self.result_fetcher.fetch(self.fetch_study, self.fetch_patterns)
+            else:
+                self.result_fetcher.show_manifest(self.fetch_study)
+        elif self.history_pattern and self.study_archiver is not None:
+            self.study_archiver.show_history(self.history_pattern)
+        elif self.compact_db and self.study_archiver is not None:
+            self.study_archiver.compact()
         elif self.wait_mode:
             self.run_wait_mode()
         else:
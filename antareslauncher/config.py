@@ -163,6 +163,39 @@ class Config:
     - remote_solver_versions: A list of strings representing the available Antares Solver
       versions on the remote server.
     - ssh_config: An `SSHConfig` object representing the SSH configuration.
+    - auto_sizing: A flag indicating whether the resources of the new studies (CPUs, time limit
+      and memory) are predicted from the accounting data of the studies previously simulated.
+    - sizing_safety_margin: The factor applied to the predicted duration and memory
+      to calculate the time limit and the memory to request.
+    - job_watcher_interval: The delay (in seconds) between two checks of the SLURM queue
+      by the remote job watcher used in wait mode (0 to disable the watcher).
+    - max_jobs_in_flight: The maximum number of jobs (pending or running) of the user
+      in the partition and with the QOS used by the launcher (0 for no limit).
+    - use_slurm_submit_limits: A flag indicating whether the maximum number of submitted jobs
+      is also read from the SLURM database (QOS and user association limits).
+    - slurm_rest_url: The URL of the SLURM REST API (`slurmrestd`) used to submit, query and cancel
+      the jobs instead of the SLURM commands run through SSH (empty to use the SLURM commands).
+    - slurm_rest_api_version: The version of the SLURM REST API, e.g.: "v0.0.40".
+    - max_job_attempts: The maximum number of attempts of a job ending with a transient failure
+      (1 to disable the resubmission).
+    - requeue_states: The SLURM job states considered as transient failures.
+    - requeue_time_limit_factor: The factor applied to the time limit of a job resubmitted after a timeout.
+    - requeue_memory_factor: The factor applied to the memory of a job resubmitted after an out-of-memory.
+    - clusters: The additional SLURM clusters on which the studies can be dispatched,
+      each cluster is a mapping of parameters (see the `CLUSTERS` section of the documentation).
+    - output_include: The glob patterns of the output files to retrieve (all the files if empty).
+    - output_exclude: The glob patterns of the output files not to retrieve.
+    - full_results_retention_days: The number of days during which the full results are kept
+      on the remote server, when only a part of the output files is retrieved.
+    - keep_results_remote: Whether the results of the new studies are kept on the remote server
+      and fetched on demand, instead of being downloaded.
+    - results_cache_max_size_mb: The maximum size in MiB of the local cache of the results fetched on demand.
+    - db_backend: The storage of the database of the studies: "tinydb" (JSON file), "sqlite"
+      or "journal" (append-only journal of the changes).
+    - db_flush_interval: The maximum delay in seconds before the studies processed during a pass
+      (launch or retrieval) are written to the database.
+    - archive_after_days: The number of days after which the done studies are moved to the archive
+      of the database (0 to disable the automatic archiving).
     """
 
     config_path: pathlib.Path
@@ -180,6 +213,29 @@ class Config:
 
     ssh_config: SSHConfig
 
+    auto_sizing: bool = False
+    sizing_safety_margin: float = 1.5
+    job_watcher_interval: int = 0
+    max_jobs_in_flight: int = 0
+    use_slurm_submit_limits: bool = False
+    slurm_rest_url: str = ""
+    slurm_rest_api_version: str = "v0.0.40"
+    max_job_attempts: int = 1
+    requeue_states: List[str] = dataclasses.field(
+        default_factory=lambda: ["BOOT_FAIL", "NODE_FAIL", "OUT_OF_MEMORY", "PREEMPTED", "TIMEOUT"]
+    )
+    requeue_time_limit_factor: float = 1.5
+    requeue_memory_factor: float = 1.5
+    clusters: List[Dict[str, Any]] = dataclasses.field(default_factory=list)
+    output_include: List[str] = dataclasses.field(default_factory=list)
+    output_exclude: List[str] = dataclasses.field(default_factory=list)
+    full_results_retention_days: int = 7
+    keep_results_remote: bool = False
+    results_cache_max_size_mb: int = 10240
+    db_backend: str = "tinydb"
+    db_flush_interval: int = 60
+    archive_after_days: int = 0
+
     @classmethod
     def load_config(cls, config_path: pathlib.Path) -> "Config":
         """
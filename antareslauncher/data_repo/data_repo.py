@@ -0,0 +1,264 @@
+"""
+Interface of the repositories of the studies.
+
+The studies are stored in a JSON file (`DataRepoTinydb`), in an append-only journal (`DataRepoJournal`)
+or in a SQLite database (`DataRepoSqlite`), selected with `DB_BACKEND` in the configuration.
+The controllers and the use cases only depend on `DataRepo`.
+"""
+
+import abc
+import contextlib
+import copy
+import logging
+import time
+import typing as t
+
+from pathlib import Path
+
+from antareslauncher.data_repo.study_archive import StudyArchive, get_done_time
+from antareslauncher.study_dto import StudyDTO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 60
+"""Maximum delay in seconds before the studies saved during a unit of work are written to the database."""
+
+
+class DataRepo(abc.ABC):
+    """
+    Repository of the studies, identified by their primary key (e.g. the study name).
+
+    In a unit of work (see `unit_of_work`), the studies are saved in memory and written together,
+    at the end of the unit of work or every `flush_interval` seconds for the long ones.
+
+    The done studies can be moved to an archive (see `archive_done_studies`): they are no longer
+    read nor written, but they are still considered inside the database, so they are not launched again.
+    """
+
+    def __init__(
+        self,
+        database_file_path: Path,
+        db_primary_key: str,
+        *,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        archive: t.Optional[StudyArchive] = None,
+    ) -> None:
+        self.database_file_path = database_file_path
+        self.db_primary_key = db_primary_key
+        self.flush_interval = flush_interval
+        self.archive = archive
+        self._pending: t.Optional[t.Dict[t.Any, StudyDTO]] = None
+        self._last_flush = 0.0
+
+    @contextlib.contextmanager
+    def unit_of_work(self) -> t.Iterator[None]:
+        """
+        Gathers the studies saved in the context and writes them together when the context exits,
+        even on error. The studies are also written every `flush_interval` seconds, and before reading
+        the database. Nested units of work are part of the outermost one.
+
+        The studies changed by a step with side effects on the remote server (e.g. a job submission)
+        must be written at once with `flush`: if the launcher is killed, the step is not done again.
+
+        Usage::
+
+            with repo.unit_of_work():
+                for study in repo.get_list_of_studies():
+                    process(study)
+                    repo.save_study(study)  # not written yet
+        """
+        if self._pending is not None:
+            yield
+            return
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        try:
+            yield
+        finally:
+            try:
+                self.flush()
+            finally:
+                self._pending = None
+
+    def flush(self) -> None:
+        """Writes the studies saved in the current unit of work, if any"""
+        if self._pending:
+            # the studies are kept in the unit of work until they are written
+            self._write_studies(list(self._pending.values()))
+            self._pending.clear()
+        self._last_flush = time.monotonic()
+
+    def _defer(self, studies: t.Iterable[StudyDTO]) -> bool:
+        """Saves the studies in the current unit of work, return False if there is no unit of work"""
+        if self._pending is None:
+            return False
+        for study in studies:
+            # the last version of the study is written
+            self._pending[getattr(study, self.db_primary_key)] = study
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return True
+
+    @abc.abstractmethod
+    def is_study_inside_database(self, study: StudyDTO) -> bool:
+        """Get the study with selected primary key from the database
+
+        Args:
+            study: the study that will be looked for in the DB
+
+        Returns:
+            True if the study has been found and is unique inside the database (or its archive), False otherwise
+        """
+
+    def _is_archived(self, pk_value: t.Any) -> bool:
+        return self.archive is not None and self.archive.contains(pk_value)
+
+    @abc.abstractmethod
+    def is_job_id_inside_database(self, job_id: int) -> bool:
+        """Checks if a study inside the database has the requested job_id
+
+        Args:
+            job_id: int
+
+        Returns:
+            True a study inside the database has the correct job_id, False otherwise
+        """
+
+    @abc.abstractmethod
+    def get_job_ids(self) -> t.AbstractSet[int]:
+        """Returns the set of the job IDs of the studies inside the database"""
+
+    @abc.abstractmethod
+    def all_studies_done(self) -> bool:
+        """Checks if all the studies inside the database are done, without reading the studies"""
+
+    @abc.abstractmethod
+    def get_list_of_studies(self) -> t.Sequence[StudyDTO]:
+        """
+        Returns:
+            List of all studies inside the database
+        """
+
+    @abc.abstractmethod
+    def iter_studies(
+        self,
+        *,
+        done: t.Optional[bool] = None,
+        has_job: t.Optional[bool] = None,
+        state: t.Optional[str] = None,
+        name: t.Optional[str] = None,
+    ) -> t.Iterator[StudyDTO]:
+        """
+        Iterates over the studies matching all the given criteria, in the order of the database.
+        The studies can be saved during the iteration.
+
+        Args:
+            done: Whether the studies are done, or not.
+            has_job: Whether a job has been submitted for the studies (non-zero job ID), or not.
+            state: The job state message of the studies, e.g.: "Pending", "Running".
+            name: The name of the studies.
+
+        Returns:
+            An iterator over the matching studies.
+        """
+
+    def get_archived_studies(self) -> t.Sequence[StudyDTO]:
+        """
+        Returns:
+            List of all studies inside the archive, in the archiving order
+        """
+        if self.archive is None:
+            return []
+        return [StudyDTO.from_dict(doc) for doc in self.archive.iter_documents()]
+
+    def get_study_history(self) -> t.Sequence[StudyDTO]:
+        """
+        Returns:
+            List of all studies inside the archive and the database, e.g. to compute statistics.
+            A study both archived and inside the database (if the archiving was interrupted) is only returned once.
+        """
+        pk_name = self.db_primary_key
+        studies = {getattr(study, pk_name): study for study in self.get_archived_studies()}
+        studies.update((getattr(study, pk_name), study) for study in self.get_list_of_studies())
+        return list(studies.values())
+
+    def archive_done_studies(self, max_age: float, *, now: t.Optional[float] = None) -> t.Sequence[StudyDTO]:
+        """
+        Moves the done studies to the archive, if they are done for at least `max_age` seconds
+        (see `get_done_time`). The studies without lifecycle event are archived whatever their age.
+        The studies whose results are kept on the remote server are not archived: their results
+        can still be fetched (see `StudyDTO.keep_remote`).
+
+        Args:
+            max_age: The minimum age in seconds of the studies to archive, 0 to archive all the done studies.
+            now: The current POSIX timestamp, defaults to the current time.
+
+        Returns:
+            The archived studies.
+        """
+        if self.archive is None:
+            return []
+        now = time.time() if now is None else now
+        studies = []
+        for study in self.get_list_of_studies():
+            if not study.done or study.remote_final_zipfile_path:
+                continue
+            done_time = get_done_time(study)
+            if done_time is None or now - done_time >= max_age:
+                studies.append(study)
+        if studies:
+            pk_values = [getattr(study, self.db_primary_key) for study in studies]
+            # The studies are removed once archived: if the launcher is interrupted, they are archived again
+            self.archive.append(pk_values, [self._to_document(study) for study in studies])
+            logger.info(f"Archiving {len(studies)} done studies: {pk_values!r}")
+            self._remove_studies(pk_values)
+        return studies
+
+    @abc.abstractmethod
+    def _remove_studies(self, pk_values: t.Sequence[t.Any]) -> None:
+        """Removes the studies with the given primary keys from the database"""
+
+    def save_study(self, study: StudyDTO) -> None:
+        """Saves the selected study inside the database. If the study already exists inside the
+        database then the content of the database is updated, otherwise the new study is added to the database
+
+        Args:
+            study: The study data transfer object that will be saved
+        """
+        if not self._defer([study]):
+            self._write_study(study)
+
+    def _write_study(self, study: StudyDTO) -> None:
+        self._write_studies([study])
+
+    def save_studies(self, studies: t.Sequence[StudyDTO]) -> None:
+        """Saves several studies inside the database, with a single write for the updates
+        and a single write for the insertions (see `save_study`)
+
+        Args:
+            studies: The study data transfer objects that will be saved
+        """
+        if not self._defer(studies):
+            self._write_studies(studies)
+
+    @abc.abstractmethod
+    def _write_studies(self, studies: t.Sequence[StudyDTO]) -> None:
+        """
+        Writes the studies: the new studies are inserted, and only the changed fields
+        of the other studies are updated (see `StudyDTO.get_changed_fields`).
+        The unchanged studies are not written.
+
+        The studies written by another process since they were read are detected
+        with their version number (see `StudyDTO.version`): the changes of the other process are kept.
+        """
+
+    @staticmethod
+    def _to_document(study: StudyDTO, field_names: t.Optional[t.Iterable[str]] = None) -> t.Dict[str, t.Any]:
+        """The JSON document of the study, or only of the given fields"""
+        study_dict = study.to_dict()
+        if field_names is not None:
+            study_dict = {name: study_dict[name] for name in field_names}
+        new = copy.deepcopy(study_dict)  # to avoid modifying the study object
+        if "antares_version" in new:
+            new["antares_version"] = f"{new['antares_version']:2d}"
+        return new
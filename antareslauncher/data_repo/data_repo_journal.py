@@ -0,0 +1,289 @@
+"""
+Journaled repository of the studies, selected with `DB_BACKEND: "journal"` in the configuration.
+
+Instead of rewriting the JSON database each time a study is saved, each change is appended to a journal:
+a JSON line with a sequence number, the time, the operation ("insert", "update" or "remove"),
+the primary key of the study and its changed fields (e.g. `job_id`, `started`, `finished`, `logs_downloaded`).
+Saving a study only appends a few bytes, whatever the number of studies.
+
+The JSON database is the snapshot of the studies: the state of the studies is the snapshot
+plus the entries of the journal which are more recent than the snapshot. Every `snapshot_interval` entries,
+the snapshot is rewritten and the journal entries are moved to the journal history (a gzip file),
+so that the journal remains small. The journal and its history are the audit trail of all the changes
+of the studies (see `DataRepoJournal.iter_journal`). If moving the entries to the history was interrupted,
+its last gzip member may be truncated: the history is then renamed with the sequence number of its last
+entry (e.g. "studies.json.journal.12.gz"), and a new history is started.
+
+The entries are written with `fsync`, and an entry interrupted by a crash is ignored (and overwritten
+by the next entry): the state of the studies is recovered exactly, up to the last complete entry.
+"""
+
+import glob
+import gzip
+import itertools
+import logging
+import os
+import time
+import typing as t
+import zlib
+
+from pathlib import Path
+
+from typing_extensions import override
+
+from antareslauncher.data_repo.data_repo import DEFAULT_FLUSH_INTERVAL
+from antareslauncher.data_repo.data_repo_tinydb import (
+    AtomicJSONStorage,
+    DataRepoTinydb,
+    _dumps_json,
+    _get_file_stamp,
+    _loads_json,
+    _StudyIndex,
+)
+from antareslauncher.data_repo.study_archive import StudyArchive
+from antareslauncher.study_dto import StudyDTO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_INTERVAL = 1000
+"""Default number of journal entries after which the snapshot is rewritten."""
+
+_JOURNAL_TABLE = "journal"
+"""TinyDB table of the snapshot holding the sequence number of the last journal entry in the snapshot."""
+
+
+def _iter_lines(content: t.Iterable[bytes]) -> t.Iterator[t.Dict[str, t.Any]]:
+    for line in content:
+        if not line.endswith(b"\n"):
+            break  # incomplete last line
+        if line.strip():
+            yield _loads_json(line)
+
+
+def _iter_journal_file(path: Path) -> t.Iterator[t.Dict[str, t.Any]]:
+    """Streams the entries of a journal file, or of a history file, up to its first incomplete line"""
+    try:
+        with gzip.open(path, mode="rb") if path.suffix == ".gz" else path.open("rb") as journal_file:
+            yield from _iter_lines(journal_file)
+    except FileNotFoundError:
+        pass
+    except (EOFError, zlib.error, gzip.BadGzipFile) as exc:
+        logger.warning(f"Journal history '{path}' is truncated or corrupted ({exc}), the next entries are ignored")
+
+
+class DataRepoJournal(DataRepoTinydb):
+    """
+    Repository of the studies stored in an append-only journal, see `DataRepo`.
+
+    The journal has the name of the JSON database with the ".journal" suffix, and its history
+    the ".journal.gz" suffix. An existing JSON database is the initial snapshot.
+
+    The writes are serialized with the lock file of the database. The other processes read the new
+    entries of the journal incrementally: the studies are only read again from the snapshot
+    when it has been rewritten.
+    """
+
+    def __init__(
+        self,
+        database_file_path: Path,
+        db_primary_key: str,
+        *,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        archive: t.Optional[StudyArchive] = None,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    ) -> None:
+        super().__init__(database_file_path, db_primary_key, flush_interval=flush_interval, archive=archive)
+        self.journal_path = database_file_path.with_name(f"{database_file_path.name}.journal")
+        self.history_path = database_file_path.with_name(f"{database_file_path.name}.journal.gz")
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_seq = 0  # sequence number of the last entry in the snapshot
+        self._journal_seq = 0  # sequence number of the last entry read or written
+        self._journal_offset = 0  # size of the journal entries read or written
+
+    @override
+    def _get_index(self) -> _StudyIndex:
+        """The studies of the snapshot, updated with the new entries of the journal"""
+        while True:
+            index = self._index
+            if index is None or index.file_stamp != _get_file_stamp(self.database_file_path):
+                index = self._load_snapshot()
+            if self._replay_journal(index):
+                self._index = index
+                return index
+            # the snapshot has been rewritten by another process while reading the journal
+            self._index = None
+
+    def _load_snapshot(self) -> _StudyIndex:
+        index = _StudyIndex(_get_file_stamp(self.database_file_path))
+        tables = self.db.storage.read() or {}
+        pk_name = self.db_primary_key
+        for doc in tables.get("_default", {}).values():
+            index.add(doc.get(pk_name), dict(doc))
+        meta = tables.get(_JOURNAL_TABLE, {}).get("1", {})
+        self._snapshot_seq = self._journal_seq = meta.get("seq", 0)
+        self._journal_offset = 0
+        return index
+
+    def _replay_journal(self, index: _StudyIndex) -> bool:
+        """Applies the new entries of the journal, returns False if the snapshot has been rewritten meanwhile"""
+        try:
+            with self.journal_path.open("rb") as journal_file:
+                journal_file.seek(self._journal_offset)
+                content = journal_file.read()
+                size = journal_file.tell()
+        except FileNotFoundError:
+            content, size = b"", 0
+        if size < self._journal_offset:
+            return False  # the journal has been truncated by a snapshot
+        # the last line is ignored until it is complete: it is being written, or was interrupted by a crash
+        end = content.rfind(b"\n") + 1
+        for entry in _iter_lines(content[:end].splitlines(keepends=True)):
+            seq = entry["seq"]
+            if seq <= self._journal_seq:
+                continue  # already in the snapshot
+            if seq != self._journal_seq + 1 and index.file_stamp != _get_file_stamp(self.database_file_path):
+                return False
+            self._apply(index, entry)
+            self._journal_seq = seq
+        self._journal_offset += end
+        return True
+
+    def _apply(self, index: _StudyIndex, entry: t.Mapping[str, t.Any]) -> None:
+        pk_value = entry["pk"]
+        if entry["op"] == "remove":
+            index.remove(pk_value)
+        elif entry["op"] == "insert":
+            index.add(pk_value, entry["fields"])
+        elif pk_value in index.documents:
+            index.add(pk_value, {**index.documents[pk_value], **entry["fields"]})
+        else:
+            logger.warning(f"Journal entry {entry['seq']}: study '{pk_value}' not found, the update is ignored")
+
+    def _append(self, operations: t.Sequence[t.Tuple[str, t.Any, t.Optional[t.Dict[str, t.Any]]]]) -> None:
+        """Appends the entries of the operations `(op, pk_value, fields)` to the journal, while the lock is held"""
+        now = time.time()
+        lines = []
+        for op, pk_value, fields in operations:
+            self._journal_seq += 1
+            entry = {"seq": self._journal_seq, "time": now, "op": op, "pk": pk_value}
+            if fields is not None:
+                entry["fields"] = fields
+            lines.append(_dumps_json(entry) + b"\n")
+        content = b"".join(lines)
+        with self.journal_path.open("ab") as journal_file:
+            if journal_file.tell() != self._journal_offset:
+                # an entry was interrupted by a crash (the journal has been read, see `_get_index`)
+                journal_file.truncate(self._journal_offset)
+            journal_file.write(content)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        self._journal_offset += len(content)
+
+    @override
+    def _invalidate_cache(self) -> None:
+        # The studies are kept: the new entries of the journal are applied, and a rewritten snapshot
+        # is detected with its file stamp (the snapshot is replaced, so its inode changes)
+        storage = self.db.storage
+        if isinstance(storage, AtomicJSONStorage):
+            storage.clear_cache()
+
+    @override
+    def _write_studies(self, studies: t.Sequence[StudyDTO]) -> None:
+        with self._lock():
+            self._write_studies_locked(studies)
+            if self._journal_seq - self._snapshot_seq >= self.snapshot_interval:
+                self._write_snapshot()
+
+    @override
+    def _write_documents(
+        self,
+        inserts: t.Sequence[t.Dict[str, t.Any]],
+        updates: t.Sequence[t.Tuple[t.Any, t.Dict[str, t.Any]]],
+    ) -> None:
+        pk_name = self.db_primary_key
+        operations: t.List[t.Tuple[str, t.Any, t.Optional[t.Dict[str, t.Any]]]] = []
+        operations.extend(("update", pk_value, fields) for pk_value, fields in updates)
+        operations.extend(("insert", doc[pk_name], doc) for doc in inserts)
+        self._append(operations)
+
+    @override
+    def _remove_studies(self, pk_values: t.Sequence[t.Any]) -> None:
+        with self._lock():
+            index = self._get_index()
+            removed = [pk_value for pk_value in pk_values if pk_value in index.documents]
+            if removed:
+                self._append([("remove", pk_value, None) for pk_value in removed])
+                for pk_value in removed:
+                    index.remove(pk_value)
+
+    def snapshot(self) -> None:
+        """Rewrites the snapshot with the current state of the studies, and moves the journal to its history"""
+        self.flush()
+        with self._lock():
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        index = self._get_index()
+        seq = self._journal_seq
+        if seq == self._snapshot_seq:
+            return
+        logger.info(f"Writing the snapshot of {len(index.documents)} studies, up to journal entry {seq}")
+        documents = {str(doc_id): doc for doc_id, doc in enumerate(index.documents.values(), start=1)}
+        self.db.storage.write({"_default": documents, _JOURNAL_TABLE: {"1": {"seq": seq}}})
+        # If the launcher is interrupted from here, the entries are moved to the history again:
+        # the duplicates are skipped by `iter_journal`, and the entries in the snapshot are not applied again
+        with self.journal_path.open("rb") as journal_file:
+            content = journal_file.read(self._journal_offset)
+        self._append_history(content)
+        with self.journal_path.open("r+b") as journal_file:
+            journal_file.truncate(0)
+        self._snapshot_seq = seq
+        self._journal_offset = 0
+        index.file_stamp = _get_file_stamp(self.database_file_path)
+
+    def _append_history(self, content: bytes) -> None:
+        """Appends the journal entries to the history, as a new gzip member"""
+        if content and _loads_json(content[: content.find(b"\n")])["seq"] <= self._snapshot_seq:
+            # The previous move of the entries was interrupted, and its gzip member may be truncated:
+            # the members appended after a truncated member could not be read, a new history is started
+            rotated_path = self.history_path.with_name(f"{self.journal_path.name}.{self._snapshot_seq}.gz")
+            logger.warning(f"Journal history interrupted by a crash, renamed to '{rotated_path}'")
+            if self.history_path.exists():
+                self.history_path.replace(rotated_path)
+        with self.history_path.open("ab") as raw_file:
+            size = raw_file.tell()
+            try:
+                with gzip.GzipFile(fileobj=raw_file, mode="ab") as history_file:
+                    history_file.write(content)
+            except BaseException:
+                raw_file.truncate(size)  # the next entries can be appended to the history
+                raise
+
+    def _get_history_paths(self) -> t.List[Path]:
+        """The history files, the renamed ones first, in the order of the changes"""
+        prefix = f"{self.journal_path.name}."
+        seqs = []
+        for path in self.history_path.parent.glob(f"{glob.escape(prefix)}*.gz"):
+            suffix = path.name[len(prefix) : -len(".gz")]
+            if suffix.isdigit():
+                seqs.append(int(suffix))
+        return [self.history_path.with_name(f"{prefix}{seq}.gz") for seq in sorted(seqs)] + [self.history_path]
+
+    def iter_journal(self) -> t.Iterator[t.Dict[str, t.Any]]:
+        """
+        Iterates over the entries of the journal history and of the journal, in the order of the changes:
+        the audit trail of the studies.
+
+        Returns:
+            An iterator over the entries: dictionaries with the keys "seq" (sequence number), "time"
+            (POSIX timestamp), "op" ("insert", "update" or "remove"), "pk" (primary key of the study)
+            and "fields" (the document of the study, or its changed fields; missing for a removal).
+        """
+        self.flush()
+        files = [*self._get_history_paths(), self.journal_path]
+        last_seq = 0
+        for entry in itertools.chain.from_iterable(_iter_journal_file(path) for path in files):
+            # the entries moved to the history again after an interrupted snapshot are skipped
+            if entry["seq"] > last_seq:
+                last_seq = entry["seq"]
+                yield entry
@@ -0,0 +1,238 @@
+"""
+SQLite repository of the studies, selected with `DB_BACKEND: "sqlite"` in the configuration.
+
+Contrary to the TinyDB repository, which rewrites the whole JSON file each time a study is saved,
+each study is stored in its own row: saving a study only writes this row, and the studies are looked up
+by their primary key, job ID or state with the table indexes. The database is in WAL mode,
+so the readers (e.g. another launcher showing the queue) do not block the writer.
+
+Several processes can write the same database: the write lock of the database is taken before the rows
+are read, and only the changed fields of a study are merged into the current document of its row,
+so the fields written by another process are kept. Each row has a version number, incremented on each write,
+which detects the studies written by another process since they were read.
+"""
+
+import json
+import logging
+import sqlite3
+import typing as t
+
+from pathlib import Path
+
+import tinydb
+
+from typing_extensions import override
+
+from antareslauncher.data_repo.data_repo import DEFAULT_FLUSH_INTERVAL, DataRepo
+from antareslauncher.data_repo.study_archive import StudyArchive
+from antareslauncher.study_dto import StudyDTO
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS studies (
+    pk TEXT PRIMARY KEY NOT NULL,
+    name TEXT NOT NULL,
+    job_id INTEGER NOT NULL,
+    job_state TEXT NOT NULL,
+    done INTEGER NOT NULL,
+    document TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS studies_name ON studies (name);
+CREATE INDEX IF NOT EXISTS studies_job_id ON studies (job_id);
+CREATE INDEX IF NOT EXISTS studies_state ON studies (done, job_state);
+"""
+
+_UPSERT = """\
+INSERT INTO studies (pk, name, job_id, job_state, done, document, version)
+VALUES (:pk, :name, :job_id, :job_state, :done, :document, :version)
+ON CONFLICT (pk) DO UPDATE SET
+    name = excluded.name,
+    job_id = excluded.job_id,
+    job_state = excluded.job_state,
+    done = excluded.done,
+    document = excluded.document,
+    version = excluded.version
+"""
+
+
+class DataRepoSqlite(DataRepo):
+    """
+    Repository of the studies stored in a SQLite database, see `DataRepo`.
+
+    Each study is a row of the `studies` table: the primary key, name, job ID and state
+    of the study are indexed columns, the study itself is a JSON document.
+
+    If the database does not exist yet, it is initialised with the studies of the TinyDB
+    database `json_db_path` (if any), so that the studies in progress are not lost.
+    """
+
+    def __init__(
+        self,
+        database_file_path: Path,
+        db_primary_key: str,
+        *,
+        json_db_path: t.Optional[Path] = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        archive: t.Optional[StudyArchive] = None,
+    ) -> None:
+        super().__init__(database_file_path, db_primary_key, flush_interval=flush_interval, archive=archive)
+        self.json_db_path = json_db_path
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if not hasattr(self, "_connection"):
+            is_new = not self.database_file_path.exists()
+            connection = sqlite3.connect(self.database_file_path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # With WAL, a commit is durable after a checkpoint, which is enough for a cache of the job states
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:
+                connection.executescript(_SCHEMA)
+                columns = {name for (_, name, *_) in connection.execute("PRAGMA table_info(studies)")}
+                if "version" not in columns:
+                    # database created before the version numbers
+                    connection.execute("ALTER TABLE studies ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            setattr(self, "_connection", connection)
+            if is_new and self.json_db_path is not None and self.json_db_path.exists():
+                self._import_json_db(self.json_db_path)
+        sqlite_connection = getattr(self, "_connection")
+        assert isinstance(sqlite_connection, sqlite3.Connection)
+        return sqlite_connection
+
+    def _import_json_db(self, json_db_path: Path) -> None:
+        with tinydb.TinyDB(json_db_path) as json_db:
+            studies = [StudyDTO.from_dict(doc) for doc in json_db.all()]
+        logger.info(f"Importing {len(studies)} studies from '{json_db_path}' in database")
+        self._write_studies(studies)
+
+    def close(self) -> None:
+        """Closes the connection to the database, it is reopened when needed"""
+        if hasattr(self, "_connection"):
+            getattr(self, "_connection").close()
+            delattr(self, "_connection")
+
+    def _to_row(self, doc: t.Mapping[str, t.Any]) -> t.Dict[str, t.Any]:
+        return {
+            "pk": str(doc[self.db_primary_key]),
+            "name": doc["name"],
+            "job_id": doc["job_id"] or 0,
+            "job_state": doc["job_state"],
+            "done": int(doc["done"]),
+            "document": json.dumps(doc, sort_keys=True),
+            "version": doc["version"],
+        }
+
+    @override
+    def is_study_inside_database(self, study: StudyDTO) -> bool:
+        self.flush()
+        pk_value = str(getattr(study, self.db_primary_key))
+        row = self.connection.execute("SELECT 1 FROM studies WHERE pk = ?", (pk_value,)).fetchone()
+        return row is not None or self._is_archived(pk_value)
+
+    @override
+    def is_job_id_inside_database(self, job_id: int) -> bool:
+        if not job_id:
+            return False  # the studies not submitted yet have no job ID
+        self.flush()
+        row = self.connection.execute("SELECT 1 FROM studies WHERE job_id = ? LIMIT 1", (job_id,)).fetchone()
+        return row is not None
+
+    @override
+    def get_job_ids(self) -> t.AbstractSet[int]:
+        self.flush()
+        rows = self.connection.execute("SELECT DISTINCT job_id FROM studies WHERE job_id != 0")
+        return frozenset(job_id for (job_id,) in rows)
+
+    @override
+    def all_studies_done(self) -> bool:
+        self.flush()
+        row = self.connection.execute("SELECT 1 FROM studies WHERE done = 0 LIMIT 1").fetchone()
+        return row is None
+
+    @override
+    def iter_studies(
+        self,
+        *,
+        done: t.Optional[bool] = None,
+        has_job: t.Optional[bool] = None,
+        state: t.Optional[str] = None,
+        name: t.Optional[str] = None,
+    ) -> t.Iterator[StudyDTO]:
+        self.flush()
+        conditions = []
+        params: t.List[t.Any] = []
+        if done is not None:
+            conditions.append("done = ?")
+            params.append(int(done))
+        if has_job is not None:
+            conditions.append("job_id != 0" if has_job else "job_id = 0")
+        if state is not None:
+            conditions.append("job_state = ?")
+            params.append(state)
+        if name is not None:
+            conditions.append("name = ?")
+            params.append(name)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # The rows are fetched before the iteration, so that the studies can be saved during the iteration
+        rows = self.connection.execute(f"SELECT document FROM studies {where} ORDER BY rowid", params).fetchall()
+        for (document,) in rows:
+            study = StudyDTO.from_dict(json.loads(document))
+            study.mark_saved()
+            yield study
+
+    @override
+    def get_list_of_studies(self) -> t.Sequence[StudyDTO]:
+        self.flush()
+        rows = self.connection.execute("SELECT document FROM studies ORDER BY rowid")
+        studies = [StudyDTO.from_dict(json.loads(document)) for (document,) in rows]
+        for study in studies:
+            study.mark_saved()
+        return studies
+
+    @override
+    def _remove_studies(self, pk_values: t.Sequence[t.Any]) -> None:
+        with self.connection:
+            self.connection.executemany("DELETE FROM studies WHERE pk = ?", [(str(pk),) for pk in pk_values])
+
+    @override
+    def _write_studies(self, studies: t.Sequence[StudyDTO]) -> None:
+        # The row of a study is rewritten if one of its fields has changed (see `StudyDTO.get_changed_fields`)
+        changed_studies = [study for study in studies if study.get_changed_fields() != frozenset()]
+        versions = []
+        if changed_studies:
+            with self.connection:
+                # the rows must not be written by another process between their reading and their writing
+                self.connection.execute("BEGIN IMMEDIATE")
+                versions = [self._write_row(study) for study in changed_studies]
+        for study, version in zip(changed_studies, versions):
+            study.version = version
+        for study in studies:
+            study.mark_saved()
+
+    def _write_row(self, study: StudyDTO) -> int:
+        """
+        Writes the row of a study in the current transaction, returns the new version of the study.
+
+        Only the changed fields of a saved study are written: the other fields of the study may be outdated,
+        if its row has been written by another process since the study was read.
+        """
+        changed_fields = study.get_changed_fields()
+        pk_value = str(getattr(study, self.db_primary_key))
+        logger.info(f"Saving study '{pk_value}' in database: {sorted(changed_fields or ['*'])}")
+        doc = self._to_document(study)
+        doc["version"] = study.version + 1
+        row = self.connection.execute("SELECT version, document FROM studies WHERE pk = ?", (pk_value,)).fetchone()
+        if row is not None:
+            version, document = row
+            if changed_fields is not None:
+                if version != study.version:
+                    logger.warning(
+                        f"Study '{pk_value}' written by another process (version {version},"
+                        f" read version {study.version}): only the changed fields are written"
+                    )
+                doc = {**json.loads(document), **self._to_document(study, changed_fields)}
+            doc["version"] = version + 1
+        self.connection.execute(_UPSERT, self._to_row(doc))
+        return int(doc["version"])
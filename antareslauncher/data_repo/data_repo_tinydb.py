@@ -1,11 +1,23 @@
+import contextlib
 import copy
+import dataclasses
+import importlib
+import json
 import logging
+import os
+import tempfile
 import typing as t
 
 from pathlib import Path
 
 import tinydb
+import tinydb.storages
 
+from typing_extensions import override
+
+from antareslauncher.data_repo.data_repo import DEFAULT_FLUSH_INTERVAL, DataRepo
+from antareslauncher.data_repo.file_lock import file_lock
+from antareslauncher.data_repo.study_archive import StudyArchive
 from antareslauncher.study_dto import StudyDTO
 
 logger = logging.getLogger(__name__)
@@ -26,71 +38,382 @@ def _calc_diff(
     return diff_map
 
 
-class DataRepoTinydb:
-    def __init__(self, database_file_path: Path, db_primary_key: str) -> None:
-        super(DataRepoTinydb, self).__init__()
-        self.database_file_path = database_file_path
-        self.db_primary_key = db_primary_key
+try:
+    # Optional dependency: a faster JSON library, installed with `pip install antares-launcher[fast-json]`
+    orjson: t.Any = importlib.import_module("orjson")
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _dumps_json(data: t.Any) -> bytes:
+    """Compact JSON serialization, with `orjson` if it is installed"""
+    if orjson is not None:
+        return t.cast(bytes, orjson.dumps(data))
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads_json(content: bytes) -> t.Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _get_file_stamp(path: Path) -> t.Optional[t.Tuple[int, int, int]]:
+    """
+    The inode, modification time (in ns) and size of a file, `None` if the file does not exist.
+
+    The file is replaced on each write (see `AtomicJSONStorage`): its inode changes
+    even if the modification time and size do not.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class AtomicJSONStorage(tinydb.storages.Storage):
+    """
+    TinyDB storage in a JSON file, which is never left half-written.
+
+    The data is written to a temporary file in the same directory, which then replaces the JSON file:
+    if the launcher is interrupted while writing, the previous version of the database is kept.
+
+    The JSON is compact, and serialized with `orjson` if it is installed (the standard library otherwise),
+    unless `json.dumps` options are given. The parsed data is cached between reads,
+    as long as the file is unchanged (see `_get_file_stamp`): TinyDB reads the whole file before each update.
+    """
+
+    def __init__(self, path: t.Union[str, Path], *, cache: bool = True, **kwargs: t.Any) -> None:
+        super().__init__()
+        self.path = Path(path)
+        self.cache = cache
+        self.kwargs = kwargs  # `json.dumps` options, e.g.: `indent=4`
+        self._cached: t.Optional[t.Tuple[t.Tuple[int, int, int], t.Dict[str, t.Dict[str, t.Any]]]] = None
+
+    def clear_cache(self) -> None:
+        """Forgets the cached data, e.g. if the file may have been written within the same clock tick"""
+        self._cached = None
+
+    def _dumps(self, data: t.Dict[str, t.Dict[str, t.Any]]) -> bytes:
+        if self.kwargs:
+            return json.dumps(data, **self.kwargs).encode("utf-8")
+        return _dumps_json(data)
+
+    @staticmethod
+    def _loads(content: bytes) -> t.Dict[str, t.Dict[str, t.Any]]:
+        return t.cast(t.Dict[str, t.Dict[str, t.Any]], _loads_json(content))
+
+    @override
+    def read(self) -> t.Optional[t.Dict[str, t.Dict[str, t.Any]]]:
+        file_stamp = _get_file_stamp(self.path)
+        if file_stamp is None:
+            return None
+        if self._cached is not None and self._cached[0] == file_stamp:
+            return self._cached[1]
+        try:
+            content = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        if not content:
+            return None  # an empty file is initialized by TinyDB
+        data = self._loads(content)
+        if self.cache:
+            self._cached = (file_stamp, data)
+        return data
+
+    @override
+    def write(self, data: t.Dict[str, t.Dict[str, t.Any]]) -> None:
+        # TinyDB modifies the data in place: the cache is only valid once the data is written
+        self._cached = None
+        serialized = self._dumps(data)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode="wb") as tmp_file:
+                tmp_file.write(serialized)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_name)
+            raise
+        file_stamp = _get_file_stamp(self.path)
+        if self.cache and file_stamp is not None:
+            self._cached = (file_stamp, data)
+
+
+def _copy_document(doc: t.Mapping[str, t.Any]) -> t.Dict[str, t.Any]:
+    # Only the containers (lists of patterns, events, attempts...) are copied: the other values are immutable
+    return {k: copy.deepcopy(v) if isinstance(v, (list, dict)) else v for k, v in doc.items()}
+
+
+@dataclasses.dataclass
+class _StudyIndex:
+    """
+    In-memory indexes of the documents of the database, valid as long as the file stamp is unchanged.
+
+    Attributes:
+        file_stamp: The inode, modification time and size of the database file when the indexes were built.
+        documents: The documents of the studies, by primary key, in the order of the database.
+        job_ids: The primary keys of the studies, by job ID (the studies not submitted are not indexed).
+        not_done: The primary keys of the studies which are not done, in the order of the database
+            (a dictionary is used as an ordered set).
+    """
+
+    file_stamp: t.Optional[t.Tuple[int, int, int]]
+    documents: t.Dict[t.Any, t.Dict[str, t.Any]] = dataclasses.field(default_factory=dict)
+    job_ids: t.Dict[int, t.Any] = dataclasses.field(default_factory=dict)
+    not_done: t.Dict[t.Any, None] = dataclasses.field(default_factory=dict)
+
+    def add(self, pk_value: t.Any, doc: t.Dict[str, t.Any]) -> None:
+        old = self.documents.get(pk_value)
+        if old is not None and self.job_ids.get(old.get("job_id", 0)) == pk_value:
+            # the job ID changes when the job is resubmitted
+            del self.job_ids[old["job_id"]]
+        self.documents[pk_value] = doc
+        if doc.get("job_id"):
+            self.job_ids[doc["job_id"]] = pk_value
+        if doc.get("done"):
+            self.not_done.pop(pk_value, None)
+        else:
+            self.not_done.setdefault(pk_value, None)
+
+    def remove(self, pk_value: t.Any) -> None:
+        old = self.documents.pop(pk_value, None)
+        if old is not None and self.job_ids.get(old.get("job_id", 0)) == pk_value:
+            del self.job_ids[old["job_id"]]
+        self.not_done.pop(pk_value, None)
+
+
+class DataRepoTinydb(DataRepo):
+    """
+    Repository of the studies stored in a JSON file with TinyDB.
+
+    Each write rewrites the whole file: the studies are saved in units of work (see `DataRepo.unit_of_work`).
+
+    The documents are cached in memory, with indexes by primary key and job ID, and the set
+    of the studies which are not done. The cache is updated on each write, and rebuilt
+    if the file is modified by another process (its modification time or size changes).
+
+    Several processes can use the same database (e.g. a launcher in wait mode and a launcher killing a job):
+    the writes are serialized with a lock file, and each study has a version number, incremented
+    on each write. If a study has been written by another process since it was read, only its changed fields
+    are written, so the changes of the other process are kept.
+    """
+
+    def __init__(
+        self,
+        database_file_path: Path,
+        db_primary_key: str,
+        *,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        archive: t.Optional[StudyArchive] = None,
+    ) -> None:
+        super().__init__(database_file_path, db_primary_key, flush_interval=flush_interval, archive=archive)
+        self._index: t.Optional[_StudyIndex] = None
+        self._write_count = 0
 
     @property
     def db(self) -> tinydb.database.TinyDB:
         if not hasattr(self, "_tiny_db"):
-            db = tinydb.TinyDB(self.database_file_path, sort_keys=True, indent=4)
+            db = tinydb.TinyDB(self.database_file_path, storage=AtomicJSONStorage)
             setattr(self, "_tiny_db", db)
         tiny_db = getattr(self, "_tiny_db")
         assert isinstance(tiny_db, tinydb.database.TinyDB)
         return tiny_db
 
-    def is_study_inside_database(self, study: StudyDTO) -> bool:
-        """Get the study with selected primary key from the database
-
-        Args:
-            study: the study that will be looked for in the DB
+    def _get_index(self) -> _StudyIndex:
+        """The indexes of the studies, rebuilt if the database file has been modified by another process"""
+        file_stamp = _get_file_stamp(self.database_file_path)
+        if self._index is None or self._index.file_stamp != file_stamp:
+            index = _StudyIndex(file_stamp)
+            pk_name = self.db_primary_key
+            for doc in self.db.all():
+                index.add(doc.get(pk_name), dict(doc))
+            # the file may have been created by TinyDB
+            index.file_stamp = _get_file_stamp(self.database_file_path)
+            self._index = index
+        return self._index
 
-        Returns:
-            True if the study has been found and is unique inside the database, False otherwise
-        """
+    def _update_index(self, docs: t.Iterable[t.Dict[str, t.Any]]) -> None:
+        """Updates the indexes with the documents just written, if they are still valid"""
+        index = self._index
+        if index is None:
+            return
         pk_name = self.db_primary_key
-        pk_value = getattr(study, pk_name)
-        found_studies = self.db.search(tinydb.where(key=pk_name) == pk_value)
-        return len(found_studies) == 1
+        for doc in docs:
+            index.add(doc[pk_name], doc)
+        # A write of another process just after this one would not be detected until the next write
+        index.file_stamp = _get_file_stamp(self.database_file_path)
 
+    @override
+    def is_study_inside_database(self, study: StudyDTO) -> bool:
+        self.flush()
+        pk_value = getattr(study, self.db_primary_key)
+        return pk_value in self._get_index().documents or self._is_archived(pk_value)
+
+    @override
     def is_job_id_inside_database(self, job_id: int) -> bool:
-        """Checks if a study inside the database has the requested job_id
+        self.flush()
+        return bool(job_id) and job_id in self._get_index().job_ids
 
-        Args:
-            job_id: int
+    @override
+    def get_job_ids(self) -> t.AbstractSet[int]:
+        self.flush()
+        return frozenset(self._get_index().job_ids)
 
-        Returns:
-            True a study inside the database has the correct job_id, False otherwise
-        """
-        studies_list = self.get_list_of_studies()
-        return any(study.job_id == job_id for study in studies_list)
+    @override
+    def all_studies_done(self) -> bool:
+        self.flush()
+        return not self._get_index().not_done
 
+    @override
     def get_list_of_studies(self) -> t.Sequence[StudyDTO]:
+        self.flush()
+        studies = [StudyDTO.from_dict(_copy_document(doc)) for doc in self._get_index().documents.values()]
+        for study in studies:
+            study.mark_saved()
+        return studies
+
+    @override
+    def iter_studies(
+        self,
+        *,
+        done: t.Optional[bool] = None,
+        has_job: t.Optional[bool] = None,
+        state: t.Optional[str] = None,
+        name: t.Optional[str] = None,
+    ) -> t.Iterator[StudyDTO]:
         """
-        Returns:
-            List of all studies inside the database
+        The candidates are read from the indexes: a pass over the studies in progress
+        (`done=False` or `has_job=True`) does not depend on the number of done studies,
+        and a study is found by its `name` directly when the name is the primary key.
+        The studies are created lazily.
         """
-        return [StudyDTO.from_dict(doc) for doc in self.db.all()]
+        self.flush()
+        index = self._get_index()
+        candidates: t.Iterable[t.Any]
+        if name is not None and self.db_primary_key == "name":
+            candidates = [name]
+        elif done is False:
+            candidates = list(index.not_done)
+        elif has_job is True:
+            candidates = list(index.job_ids.values())
+        else:
+            candidates = list(index.documents)
+        for pk_value in candidates:
+            doc = index.documents.get(pk_value)
+            if doc is None:
+                continue
+            if done is not None and bool(doc.get("done")) != done:
+                continue
+            if has_job is not None and bool(doc.get("job_id")) != has_job:
+                continue
+            if state is not None and doc.get("job_state") != state:
+                continue
+            if name is not None and doc.get("name") != name:
+                continue
+            study = StudyDTO.from_dict(_copy_document(doc))
+            study.mark_saved()
+            yield study
+
+    @override
+    def _remove_studies(self, pk_values: t.Sequence[t.Any]) -> None:
+        with self._lock():
+            self.db.remove(tinydb.where(self.db_primary_key).one_of(list(pk_values)))
+        self._index = None  # rebuilt on the next read
 
-    def save_study(self, study: StudyDTO) -> None:
-        """Saves the selected study inside the database. If the study already exists inside the
-        database then the content of the database is updated, otherwise the new study is added to the database
+    @contextlib.contextmanager
+    def _lock(self) -> t.Iterator[None]:
+        """Exclusive lock of the database file, held while reading, modifying and writing the database"""
+        path = self.database_file_path
+        with file_lock(path.with_name(f"{path.name}.lock")) as lock_file:
+            # The lock file holds the number of writes of the database: if another process has written
+            # the database, the indexes are rebuilt (the file stamp may not change within a clock tick)
+            write_count = int(lock_file.read() or 0)
+            if write_count != self._write_count:
+                self._invalidate_cache()
+            try:
+                yield
+            finally:
+                self._write_count = write_count + 1
+                lock_file.seek(0)
+                lock_file.truncate()
+                lock_file.write(str(self._write_count).encode())
 
-        Args:
-            study: The study data transfer object that will be saved
+    def _invalidate_cache(self) -> None:
+        """Forgets the documents read, when another process has written the database since the last write"""
+        self._index = None
+        storage = self.db.storage
+        if isinstance(storage, AtomicJSONStorage):
+            storage.clear_cache()
+
+    @override
+    def _write_studies(self, studies: t.Sequence[StudyDTO]) -> None:
+        """
+        The database is locked while it is read and written, the changed fields are written
+        with `_write_documents`.
         """
+        with self._lock():
+            self._write_studies_locked(studies)
+
+    def _write_studies_locked(self, studies: t.Sequence[StudyDTO]) -> None:
         pk_name = self.db_primary_key
-        pk_value = getattr(study, pk_name)
-        old = self.db.get(tinydb.where(pk_name) == pk_value)
-        study_dict = vars(study)
-        new = copy.deepcopy(study_dict)  # to avoid modifying the study object
-        new["antares_version"] = f"{new['antares_version']:2d}"
-        if old:
-            diff = _calc_diff(old, new)
-            logger.info(f"Updating study '{pk_value}' in database: {diff!r}")
-            self.db.update(new, tinydb.where(pk_name) == pk_value)
-        else:
-            logger.info(f"Inserting study '{pk_value}' in database: {new!r}")
-            self.db.insert(new)
+        # the documents are read again if another process has modified the database
+        existing = self._get_index().documents
+        updates = []
+        inserts = []
+        docs = []
+        saved = []
+        for study in studies:
+            pk_value = getattr(study, pk_name)
+            old = existing.get(pk_value)
+            if old is None:
+                new = self._to_document(study)
+                new["version"] = study.version + 1
+                logger.info(f"Inserting study '{pk_value}' in database: {new!r}")
+                inserts.append(new)
+                docs.append(new)
+            else:
+                changed_fields = study.get_changed_fields()
+                if changed_fields is None:
+                    fields = self._to_document(study)
+                    diff = _calc_diff(old, fields)
+                else:
+                    fields = self._to_document(study, changed_fields)
+                    diff = {"UPD": {k: f"{old.get(k)!r} => {v!r}" for k, v in fields.items() if old.get(k) != v}}
+                if not fields or not any(diff.values()):
+                    logger.debug(f"Study '{pk_value}' unchanged in database")
+                    study.mark_saved()
+                    continue
+                old_version = old.get("version", 0)
+                if old_version != study.version:
+                    logger.warning(
+                        f"Study '{pk_value}' written by another process (version {old_version},"
+                        f" read version {study.version}): only the changed fields are written"
+                    )
+                fields["version"] = old_version + 1
+                logger.info(f"Updating study '{pk_value}' in database: {diff!r}")
+                updates.append((pk_value, fields))
+                docs.append({**old, **fields})
+            saved.append((study, docs[-1]["version"]))
+        if updates or inserts:
+            self._write_documents(inserts, updates)
+        if docs:
+            self._update_index(docs)
+        for study, version in saved:
+            study.version = version
+            study.mark_saved()
+
+    def _write_documents(
+        self,
+        inserts: t.Sequence[t.Dict[str, t.Any]],
+        updates: t.Sequence[t.Tuple[t.Any, t.Dict[str, t.Any]]],
+    ) -> None:
+        """Writes the new documents, and the changed fields of the existing documents (by primary key)"""
+        pk_name = self.db_primary_key
+        if updates:
+            self.db.update_multiple([(fields, tinydb.where(pk_name) == pk_value) for pk_value, fields in updates])
+        if inserts:
+            self.db.insert_multiple(inserts)
@@ -1,10 +1,13 @@
-from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo.data_repo import DataRepo
 from antareslauncher.study_dto import StudyDTO
 
 
 class DataReporter:
-    def __init__(self, data_repo: DataRepoTinydb):
+    def __init__(self, data_repo: DataRepo):
         self._data_repo = data_repo
 
     def save_study(self, study: StudyDTO) -> None:
         self._data_repo.save_study(study)
+
+    def flush(self) -> None:
+        self._data_repo.flush()
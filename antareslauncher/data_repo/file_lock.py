@@ -0,0 +1,44 @@
+import contextlib
+import os
+import sys
+import typing as t
+
+from pathlib import Path
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextlib.contextmanager
+def file_lock(path: Path) -> t.Iterator[t.BinaryIO]:
+    """
+    Exclusive lock shared by the processes using the same lock file, released when the context exits.
+
+    The lock file is created if needed and never removed: removing it while another process
+    is waiting for the lock would let a third process lock a new file. The lock file is opened
+    for reading and writing, so that the lock owner can store data in it.
+
+    Usage::
+
+        with file_lock(Path("database.json.lock")) as lock_file:
+            ...  # read, modify and write the database
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, mode="r+b") as lock_file:
+        if sys.platform == "win32":
+            # The first byte is locked, `LK_LOCK` retries for 10 seconds before raising an `OSError`
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield lock_file
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield lock_file
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,91 @@
+"""
+Archive of the done studies, out of the working set of the repository.
+
+The done studies are moved to the archive once they are old enough (see `DataRepo.archive_done_studies`),
+so that the launch and retrieval passes only read and write the studies in progress.
+The archive is only read by the history command.
+"""
+
+import gzip
+import json
+import typing as t
+
+from pathlib import Path
+
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import get_events
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 0
+"""Default number of days after which the done studies are moved to the archive: 0 disables the automatic archiving."""
+
+
+def get_done_time(study: StudyDTO) -> t.Optional[float]:
+    """
+    The POSIX timestamp of the last lifecycle event of a study (usually the extraction of its results),
+    `None` if the study has no event, e.g. if it was done before the events were recorded.
+    """
+    events = get_events(study)
+    return max(events.values()) if events else None
+
+
+class StudyArchive:
+    """
+    Compressed, append-only archive of the studies.
+
+    The studies are stored as JSON lines in a gzip file: each append adds a gzip member
+    at the end of the file, which is never rewritten. The primary keys of the archived studies
+    are also listed in a small uncompressed file (with the ".keys" suffix), so that checking
+    if a study is archived does not decompress the archive. The keys are read again when the keys file
+    changes, e.g. when another launcher archives studies.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.keys_path = path.with_name(path.name + ".keys")
+        self._keys: t.Set[str] = set()
+        self._keys_stamp: t.Optional[t.Tuple[int, int, int]] = None
+
+    def _get_keys(self) -> t.Set[str]:
+        try:
+            stat = self.keys_path.stat()
+        except FileNotFoundError:
+            return self._keys
+        keys_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if keys_stamp != self._keys_stamp:
+            with self.keys_path.open(encoding="utf-8") as keys_file:
+                self._keys = {line.rstrip("\n") for line in keys_file}
+            self._keys_stamp = keys_stamp
+        return self._keys
+
+    def contains(self, pk_value: t.Any) -> bool:
+        """Checks if a study with the given primary key is archived"""
+        return str(pk_value) in self._get_keys()
+
+    def append(self, pk_values: t.Sequence[t.Any], documents: t.Sequence[t.Mapping[str, t.Any]]) -> None:
+        """
+        Appends the documents of studies to the archive.
+
+        Args:
+            pk_values: The primary keys of the studies.
+            documents: The JSON documents of the studies, in the same order.
+        """
+        if not documents:
+            return
+        lines = "".join(json.dumps(doc, sort_keys=True) + "\n" for doc in documents)
+        with gzip.open(self.path, mode="at", encoding="utf-8") as archive_file:
+            archive_file.write(lines)
+        # The keys are written last: if the launcher is interrupted, the studies are archived again
+        keys = [str(pk_value) for pk_value in pk_values]
+        with self.keys_path.open(mode="a", encoding="utf-8") as keys_file:
+            keys_file.write("".join(f"{key}\n" for key in keys))
+
+    def iter_documents(self) -> t.Iterator[t.Dict[str, t.Any]]:
+        """Iterates over the documents of the archived studies, in the archiving order"""
+        try:
+            archive_file = gzip.open(self.path, mode="rt", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with archive_file:
+            for line in archive_file:
+                if line.strip():
+                    yield json.loads(line)
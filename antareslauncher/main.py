@@ -9,19 +9,49 @@ from antares.study.version import SolverMinorVersion
 
 from antareslauncher import __version__
 from antareslauncher.antares_launcher import AntaresLauncher
+from antareslauncher.data_repo.data_repo import DEFAULT_FLUSH_INTERVAL, DataRepo
+from antareslauncher.data_repo.data_repo_journal import DataRepoJournal
+from antareslauncher.data_repo.data_repo_sqlite import DataRepoSqlite
 from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo.study_archive import DEFAULT_ARCHIVE_AFTER_DAYS, StudyArchive
 from antareslauncher.display.display_terminal import DisplayTerminal
 from antareslauncher.logger_initializer import LoggerInitializer
 from antareslauncher.remote_environnement import ssh_connection
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
-from antareslauncher.remote_environnement.slurm_script_features import SlurmScriptFeatures
+from antareslauncher.remote_environnement.multi_cluster_environment import Cluster, MultiClusterEnvironment
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    RemoteEnvironment,
+    RemoteEnvironmentWithSlurm,
+    SchedulerBackend,
+)
+from antareslauncher.remote_environnement.slurm_rest_backend import (
+    DEFAULT_API_VERSION,
+    RestSchedulerBackend,
+    SlurmRestClient,
+)
+from antareslauncher.remote_environnement.slurm_script_features import (
+    DEFAULT_FULL_RESULTS_RETENTION_DAYS,
+    SlurmScriptFeatures,
+)
+from antareslauncher.use_cases.archive.study_archiver import StudyArchiver
 from antareslauncher.use_cases.check_remote_queue.check_queue_controller import CheckQueueController
 from antareslauncher.use_cases.check_remote_queue.slurm_queue_show import SlurmQueueShow
+from antareslauncher.use_cases.create_list.resource_estimator import DEFAULT_SAFETY_MARGIN
 from antareslauncher.use_cases.create_list.study_list_composer import StudyListComposer, StudyListComposerParameters
-from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillController
+from antareslauncher.use_cases.fetch_results.result_fetcher import (
+    DEFAULT_RESULTS_CACHE_MAX_SIZE_MB,
+    MIB,
+    ResultCache,
+    ResultFetcher,
+)
+from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillController, JobKillFilter
+from antareslauncher.use_cases.launch.cluster_dispatcher import ClusterDispatcher
 from antareslauncher.use_cases.launch.launch_controller import LaunchController
+from antareslauncher.use_cases.launch.submission_governor import SubmissionGovernor
+from antareslauncher.use_cases.lifecycle_report.lifecycle_report_controller import LifecycleReportController
+from antareslauncher.use_cases.retrieve.job_requeuer import DEFAULT_REQUEUE_FACTOR, DEFAULT_REQUEUE_STATES, JobRequeuer
 from antareslauncher.use_cases.retrieve.retrieve_controller import RetrieveController
 from antareslauncher.use_cases.retrieve.state_updater import StateUpdater
+from antareslauncher.use_cases.sizing_report.sizing_report_controller import SizingReportController
 from antareslauncher.use_cases.wait_loop_controller.wait_controller import WaitController
 
 # fmt: off
@@ -39,6 +69,34 @@ ANTARES_LAUNCHER_BANNER = (
 # fmt: on
 
 
+@dataclasses.dataclass
+class ClusterParameters:
+    """
+    Represents the parameters of an additional SLURM cluster on which the studies can be dispatched.
+
+    Attributes:
+        name: Unique name of the cluster, recorded in the database for each study submitted to it.
+        ssh_dict: A dictionary containing the SSH settings of the cluster.
+        slurm_script_path: Path to the SLURM script used to launch studies on the cluster.
+        antares_versions_on_remote_server: A list of available Antares Solver versions on the cluster.
+        partition: Extra `sbatch` option to request a specific partition on the cluster.
+        quality_of_service: Extra `sbatch` option to request a quality of service on the cluster.
+        max_jobs_in_flight: Maximum number of jobs (pending or running) of the user on the cluster.
+            If zero, the number of jobs is not limited by the configuration.
+        full_results_retention_days: Number of days during which the full results are kept on the cluster,
+            when only a part of the output files is retrieved.
+    """
+
+    name: str
+    ssh_dict: t.Mapping[str, t.Any]
+    slurm_script_path: str
+    antares_versions_on_remote_server: t.Sequence[SolverMinorVersion]
+    partition: str = ""
+    quality_of_service: str = ""
+    max_jobs_in_flight: int = 0
+    full_results_retention_days: int = DEFAULT_FULL_RESULTS_RETENTION_DAYS
+
+
 @dataclasses.dataclass
 class MainParameters:
     """
@@ -51,11 +109,47 @@ class MainParameters:
         antares_versions_on_remote_server: A list of available Antares Solver versions on the remote server.
         default_ssh_dict: A dictionary containing the SSH settings read from `ssh_config.json`.
         db_primary_key: The primary key for the database, default to "name".
+        db_backend: Storage of the database: "tinydb" (JSON file), "sqlite" (SQLite file with the same name
+            as the JSON database and the ".sqlite" suffix, initialised with the studies of the JSON database)
+            or "journal" (append-only journal of the changes, with the JSON database as snapshot).
+        db_flush_interval: Maximum delay in seconds before the studies processed during a pass (launch or retrieval)
+            are written to the database: the studies are written together at the end of the pass.
+        archive_after_days: Number of days after which the done studies are moved to the archive of the database,
+            which is only read by the `--history` option. If zero, the studies are only archived by `--compact-db`.
         partition: Extra `sbatch` option to request a specific partition for resource allocation.
             If not specified, the default behavior is to allow the SLURM controller
             to select the default partition as designated by the system administrator.
         quality_of_service: Extra `sbatch` option to request a quality of service for the job.
             QOS values can be defined for each user/cluster/account association in the Slurm database.
+        auto_sizing: Whether the number of CPUs, the time limit and the memory of the new studies
+            are predicted from the accounting data of the studies previously simulated.
+        sizing_safety_margin: Factor applied to the predicted duration and memory
+            to calculate the time limit and the memory to request.
+        job_watcher_interval: Delay in seconds between two checks of the SLURM queue by the remote
+            job watcher used in wait mode. If zero, the job watcher is disabled and the jobs are polled.
+        max_jobs_in_flight: Maximum number of jobs (pending or running) of the user in the partition
+            and with the QOS used by the launcher. The studies in excess are submitted later in wait mode.
+            If zero, the number of jobs is not limited by the configuration.
+        use_slurm_submit_limits: Whether the maximum number of submitted jobs of the QOS and of the
+            user association are read from the SLURM database (with `sacctmgr`) to limit the jobs in flight.
+        slurm_rest_url: URL of the SLURM REST API (`slurmrestd`) used to submit, query and cancel the jobs.
+            If empty, the SLURM commands are run through the SSH connection.
+        slurm_rest_api_version: Version of the SLURM REST API, e.g.: "v0.0.40".
+        max_job_attempts: Maximum number of attempts of a job ending with a transient failure
+            (node failure, preemption, timeout...). If greater than 1, the job is resubmitted.
+        requeue_states: SLURM job states considered as transient failures.
+        requeue_time_limit_factor: Factor applied to the time limit of a job resubmitted after a timeout.
+        requeue_memory_factor: Factor applied to the memory of a job resubmitted after an out-of-memory.
+        clusters: Additional SLURM clusters on which the studies can be dispatched.
+            Each study is submitted to the cluster with the lowest expected start time,
+            the main cluster being the one of the SSH configuration.
+        output_include: Default glob patterns of the output files to retrieve (all the files if empty).
+        output_exclude: Default glob patterns of the output files not to retrieve.
+        full_results_retention_days: Number of days during which the full results are kept on the remote
+            server, when only a part of the output files is retrieved.
+        keep_results_remote: Whether the results of the new studies are kept on the remote server
+            and fetched on demand (with the `--fetch` option), instead of being downloaded.
+        results_cache_max_size_mb: Maximum size in MiB of the local cache of the results fetched on demand.
     """
 
     json_dir: Path
@@ -64,8 +158,28 @@ class MainParameters:
     antares_versions_on_remote_server: t.Sequence[SolverMinorVersion]
     default_ssh_dict: t.Mapping[str, t.Any]
     db_primary_key: str
+    db_backend: str = "tinydb"
+    db_flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    archive_after_days: int = DEFAULT_ARCHIVE_AFTER_DAYS
     partition: str = ""
     quality_of_service: str = ""
+    auto_sizing: bool = False
+    sizing_safety_margin: float = DEFAULT_SAFETY_MARGIN
+    job_watcher_interval: int = 0
+    max_jobs_in_flight: int = 0
+    use_slurm_submit_limits: bool = False
+    slurm_rest_url: str = ""
+    slurm_rest_api_version: str = DEFAULT_API_VERSION
+    max_job_attempts: int = 1
+    requeue_states: t.Sequence[str] = DEFAULT_REQUEUE_STATES
+    requeue_time_limit_factor: float = DEFAULT_REQUEUE_FACTOR
+    requeue_memory_factor: float = DEFAULT_REQUEUE_FACTOR
+    clusters: t.Sequence[ClusterParameters] = ()
+    output_include: t.Sequence[str] = ()
+    output_exclude: t.Sequence[str] = ()
+    full_results_retention_days: int = DEFAULT_FULL_RESULTS_RETENTION_DAYS
+    keep_results_remote: bool = False
+    results_cache_max_size_mb: int = DEFAULT_RESULTS_CACHE_MAX_SIZE_MB
 
 
 def run_with(arguments: argparse.Namespace, parameters: MainParameters, show_banner: bool = False) -> None:
@@ -98,9 +212,42 @@ def run_with(arguments: argparse.Namespace, parameters: MainParameters, show_ban
         parameters.slurm_script_path,
         partition=parameters.partition,
         quality_of_service=parameters.quality_of_service,
+        full_results_retention_days=parameters.full_results_retention_days,
+    )
+    backend: t.Optional[SchedulerBackend] = None
+    if parameters.slurm_rest_url:
+        # The JWT is generated on the remote server with `scontrol token`
+        rest_client = SlurmRestClient(parameters.slurm_rest_url, connection.username, connection=connection)
+        backend = RestSchedulerBackend(
+            rest_client, slurm_script_features, api_version=parameters.slurm_rest_api_version
+        )
+    main_environment = RemoteEnvironmentWithSlurm(connection, slurm_script_features, backend=backend)
+    environment: RemoteEnvironment = main_environment
+    antares_versions = list(parameters.antares_versions_on_remote_server)
+    dispatcher = None
+    if parameters.clusters:
+        clusters = [
+            Cluster(
+                "",
+                main_environment,
+                antares_versions=parameters.antares_versions_on_remote_server,
+                max_jobs_in_flight=parameters.max_jobs_in_flight,
+            )
+        ]
+        for cluster_parameters in parameters.clusters:
+            clusters.append(create_cluster(cluster_parameters, display))
+            antares_versions.extend(cluster_parameters.antares_versions_on_remote_server)
+        multi_cluster_environment = MultiClusterEnvironment(clusters)
+        environment = multi_cluster_environment
+        dispatcher = ClusterDispatcher(
+            multi_cluster_environment, display, use_slurm_limits=parameters.use_slurm_submit_limits
+        )
+    data_repo = create_data_repo(
+        db_json_file_path,
+        parameters.db_primary_key,
+        parameters.db_backend,
+        flush_interval=parameters.db_flush_interval,
     )
-    environment = RemoteEnvironmentWithSlurm(connection, slurm_script_features)
-    data_repo = DataRepoTinydb(database_file_path=db_json_file_path, db_primary_key=parameters.db_primary_key)
     study_list_composer = StudyListComposer(
         repo=data_repo,
         display=display,
@@ -112,19 +259,50 @@ def run_with(arguments: argparse.Namespace, parameters: MainParameters, show_ban
             xpansion_mode=arguments.xpansion_mode,
             output_dir=arguments.output_dir,
             post_processing=arguments.post_processing,
-            antares_versions_on_remote_server=parameters.antares_versions_on_remote_server,
+            antares_versions_on_remote_server=sorted(set(antares_versions)),
             other_options=arguments.other_options or "",
             antares_version=SolverMinorVersion.parse(arguments.antares_version),
             oversubscribe=arguments.oversubscribe,
+            auto_sizing=parameters.auto_sizing,
+            sizing_safety_margin=parameters.sizing_safety_margin,
+            output_include=arguments.output_include or parameters.output_include,
+            output_exclude=arguments.output_exclude or parameters.output_exclude,
+            keep_remote=arguments.keep_remote or parameters.keep_results_remote,
         ),
     )
-    launch_controller = LaunchController(repo=data_repo, env=environment, display=display)
+    governor = None
+    # With several clusters, `MAX_JOBS_IN_FLIGHT` and the SLURM limits are applied per cluster (see `ClusterDispatcher`)
+    if dispatcher is None and (parameters.max_jobs_in_flight or parameters.use_slurm_submit_limits):
+        governor = SubmissionGovernor(
+            env=environment,
+            display=display,
+            max_jobs_in_flight=parameters.max_jobs_in_flight,
+            use_slurm_limits=parameters.use_slurm_submit_limits,
+        )
+    launch_controller = LaunchController(
+        repo=data_repo,
+        env=environment,
+        display=display,
+        governor=governor,
+        dispatcher=dispatcher,
+    )
     state_updater = StateUpdater(env=environment, display=display)
+    job_requeuer = None
+    if parameters.max_job_attempts > 1:
+        job_requeuer = JobRequeuer(
+            env=environment,
+            display=display,
+            max_attempts=parameters.max_job_attempts,
+            requeue_states=parameters.requeue_states,
+            time_limit_factor=parameters.requeue_time_limit_factor,
+            memory_factor=parameters.requeue_memory_factor,
+        )
     retrieve_controller = RetrieveController(
         repo=data_repo,
         env=environment,
         display=display,
         state_updater=state_updater,
+        job_requeuer=job_requeuer,
     )
     slurm_queue_show = SlurmQueueShow(env=environment, display=display)
     check_queue_controller = CheckQueueController(
@@ -138,6 +316,22 @@ def run_with(arguments: argparse.Namespace, parameters: MainParameters, show_ban
         repo=data_repo,
     )
     wait_controller = WaitController(display=display)
+    sizing_report_controller = SizingReportController(repo=data_repo, display=display)
+    lifecycle_report_controller = LifecycleReportController(repo=data_repo, display=display)
+    result_fetcher = ResultFetcher(
+        repo=data_repo,
+        env=environment,
+        display=display,
+        cache=ResultCache(
+            Path(arguments.output_dir) / "REMOTE_RESULTS_CACHE",
+            max_size=parameters.results_cache_max_size_mb * MIB,
+        ),
+    )
+    study_archiver = StudyArchiver(
+        repo=data_repo,
+        display=display,
+        archive_after_days=parameters.archive_after_days,
+    )
 
     launcher = AntaresLauncher(
         study_list_composer=study_list_composer,
@@ -151,10 +345,84 @@ def run_with(arguments: argparse.Namespace, parameters: MainParameters, show_ban
         job_id_to_kill=arguments.job_id_to_kill,
         xpansion_mode=arguments.xpansion_mode,
         check_queue_bool=arguments.check_queue,
+        sizing_report_controller=sizing_report_controller,
+        sizing_report_bool=arguments.sizing_report,
+        watch_interval=parameters.job_watcher_interval,
+        kill_filter=JobKillFilter(
+            job_ids=arguments.job_ids_to_kill or [],
+            name_pattern=arguments.kill_name_pattern or "",
+            states=arguments.kill_states or [],
+            all_jobs=arguments.kill_all,
+        ),
+        lifecycle_report_controller=lifecycle_report_controller,
+        lifecycle_report_bool=arguments.lifecycle_report,
+        result_fetcher=result_fetcher,
+        fetch_study=arguments.fetch_study,
+        fetch_patterns=arguments.fetch_patterns,
+        study_archiver=study_archiver,
+        history_pattern=arguments.history_pattern,
+        compact_db=arguments.compact_db,
     )
     launcher.run()
 
 
+def create_data_repo(
+    db_json_file_path: Path,
+    db_primary_key: str,
+    db_backend: str,
+    *,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+) -> DataRepo:
+    """
+    Opens the database of the studies with the configured backend.
+
+    The archive of the done studies is a gzip file with the name of the JSON database and the ".archive.gz" suffix,
+    it is shared by the backends.
+    """
+    archive = StudyArchive(db_json_file_path.with_suffix(".archive.gz"))
+    if db_backend == "tinydb":
+        return DataRepoTinydb(
+            database_file_path=db_json_file_path,
+            db_primary_key=db_primary_key,
+            flush_interval=flush_interval,
+            archive=archive,
+        )
+    elif db_backend == "journal":
+        return DataRepoJournal(
+            database_file_path=db_json_file_path,
+            db_primary_key=db_primary_key,
+            flush_interval=flush_interval,
+            archive=archive,
+        )
+    elif db_backend == "sqlite":
+        return DataRepoSqlite(
+            database_file_path=db_json_file_path.with_suffix(".sqlite"),
+            db_primary_key=db_primary_key,
+            json_db_path=db_json_file_path,
+            flush_interval=flush_interval,
+            archive=archive,
+        )
+    raise ValueError(f"Unknown database backend '{db_backend}', expected 'tinydb', 'sqlite' or 'journal'")
+
+
+def create_cluster(parameters: ClusterParameters, display: DisplayTerminal) -> Cluster:
+    """Connects to an additional SLURM cluster, the SLURM commands are run through SSH"""
+    connection = ssh_connection.SshConnection(config=parameters.ssh_dict)
+    verify_connection(connection, display)
+    slurm_script_features = SlurmScriptFeatures(
+        parameters.slurm_script_path,
+        partition=parameters.partition,
+        quality_of_service=parameters.quality_of_service,
+        full_results_retention_days=parameters.full_results_retention_days,
+    )
+    return Cluster(
+        parameters.name,
+        RemoteEnvironmentWithSlurm(connection, slurm_script_features),
+        antares_versions=parameters.antares_versions_on_remote_server,
+        max_jobs_in_flight=parameters.max_jobs_in_flight,
+    )
+
+
 def verify_connection(connection: ssh_connection.SshConnection, display: DisplayTerminal) -> None:
     if connection.test_connection():
         display.show_message(f"SSH connection to {connection.host} established", __name__)
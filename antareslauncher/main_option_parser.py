@@ -40,11 +40,24 @@ class MainOptionParser:
             "n_cpu": parameters.default_n_cpu,
             "antares_version": 0,
             "job_id_to_kill": None,
+            "job_ids_to_kill": [],
+            "kill_name_pattern": "",
+            "kill_states": [],
+            "kill_all": False,
             "xpansion_mode": "",
             "version": False,
             "post_processing": False,
             "other_options": None,
             "oversubscribe": False,
+            "sizing_report": False,
+            "lifecycle_report": False,
+            "output_include": [],
+            "output_exclude": [],
+            "keep_remote": False,
+            "fetch_study": None,
+            "fetch_patterns": [],
+            "history_pattern": None,
+            "compact_db": False,
         }
         self.parser.set_defaults(**defaults)
 
@@ -160,6 +173,63 @@ class MainOptionParser:
             help="Other options to pass to the antares launcher script",
         )
 
+        self.parser.add_argument(
+            "--output-include",
+            dest="output_include",
+            action="append",
+            metavar="PATTERN",
+            help=(
+                "Glob pattern of the output files to retrieve, relative to the study directory,\n"
+                'e.g.: "output/*/economy/mc-all/*" (option can be repeated, "*" also matches "/").\n'
+                "The other output files are not compressed, nor downloaded, but they are kept\n"
+                "on the remote server for a while. Overrides the OUTPUT_INCLUDE configuration."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--output-exclude",
+            dest="output_exclude",
+            action="append",
+            metavar="PATTERN",
+            help=(
+                'Glob pattern of the output files not to retrieve, e.g.: "output/*/*/mc-ind/*"\n'
+                "(option can be repeated). Overrides the OUTPUT_EXCLUDE configuration."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--keep-remote",
+            action="store_true",
+            dest="keep_remote",
+            help=(
+                "Keeps the results of the new studies on the remote server: only the list of their files\n"
+                "is recorded, the files are fetched on demand with the --fetch option.\n"
+                "Overrides the KEEP_RESULTS_REMOTE configuration."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--fetch",
+            dest="fetch_study",
+            metavar="STUDY",
+            help=(
+                "Fetches the results of a study kept on the remote server, in a local cache\n"
+                "(the files are listed if no --fetch-path option is given).\n"
+                "If option is given it overrides the -q and the standard execution."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--fetch-path",
+            dest="fetch_patterns",
+            action="append",
+            metavar="PATTERN",
+            help=(
+                "Glob pattern or directory of the result files to fetch with the --fetch option,\n"
+                'relative to the root of the results, e.g.: "*/economy/mc-all/areas" (option can be repeated).'
+            ),
+        )
+
         self.parser.add_argument(
             "-k",
             "--kill-job",
@@ -172,6 +242,49 @@ class MainOptionParser:
             ),
         )
 
+        self.parser.add_argument(
+            "--kill-jobs",
+            dest="job_ids_to_kill",
+            type=int,
+            nargs="+",
+            metavar="JOB_ID",
+            help=(
+                "JobIDs of the runs to be cancelled on the remote server, with a single command.\n"
+                "If option is given it overrides the -q and the standard execution."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--kill-name",
+            dest="kill_name_pattern",
+            metavar="PATTERN",
+            help=(
+                'Cancels the runs of the studies whose name matches the glob pattern, e.g.: "study_*".\n'
+                "If option is given it overrides the -q and the standard execution."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--kill-state",
+            dest="kill_states",
+            action="append",
+            metavar="STATE",
+            help=(
+                'Cancels the runs in the given SLURM state, e.g.: "PENDING" (option can be repeated).\n'
+                "If option is given it overrides the -q and the standard execution."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--kill-all",
+            action="store_true",
+            dest="kill_all",
+            help=(
+                "Cancels all the unfinished runs of the launcher.\n"
+                "If option is given it overrides the -q and the standard execution."
+            ),
+        )
+
         self.parser.add_argument(
             "--solver-version",
             dest="antares_version",
@@ -180,6 +293,52 @@ class MainOptionParser:
             help="Antares Solver version to use for simulation",
         )
 
+        self.parser.add_argument(
+            "--sizing-report",
+            action="store_true",
+            dest="sizing_report",
+            help=(
+                "Displays the predicted resources (time and memory) of the finished studies\n"
+                "against the actual resources recorded by SLURM.\n"
+                "If the option is used, it will override the standard execution."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--lifecycle-report",
+            action="store_true",
+            dest="lifecycle_report",
+            help=(
+                "Displays the percentiles of the duration of each phase of the studies\n"
+                "(compression, upload, pending, running, download...) found in the database.\n"
+                "If the option is used, it will override the standard execution."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--history",
+            dest="history_pattern",
+            nargs="?",
+            const="*",
+            metavar="PATTERN",
+            help=(
+                "Displays the done studies moved to the archive of the database,\n"
+                'whose name matches the glob pattern (all the archived studies by default), e.g.: "study_2023*".\n'
+                "If the option is used, it will override the standard execution."
+            ),
+        )
+
+        self.parser.add_argument(
+            "--compact-db",
+            action="store_true",
+            dest="compact_db",
+            help=(
+                "Moves the done studies of the database to its archive, in one shot:\n"
+                "the studies done for more than ARCHIVE_AFTER_DAYS days (all the done studies if 0).\n"
+                "If the option is used, it will override the standard execution."
+            ),
+        )
+
         return self
 
     def add_advanced_arguments(
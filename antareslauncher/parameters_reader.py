@@ -9,8 +9,15 @@ import yaml
 
 from antares.study.version import SolverMinorVersion
 
-from antareslauncher.main import MainParameters
+from antareslauncher.data_repo.data_repo import DEFAULT_FLUSH_INTERVAL
+from antareslauncher.data_repo.study_archive import DEFAULT_ARCHIVE_AFTER_DAYS
+from antareslauncher.main import ClusterParameters, MainParameters
 from antareslauncher.main_option_parser import ParserParameters
+from antareslauncher.remote_environnement.slurm_rest_backend import DEFAULT_API_VERSION
+from antareslauncher.remote_environnement.slurm_script_features import DEFAULT_FULL_RESULTS_RETENTION_DAYS
+from antareslauncher.use_cases.create_list.resource_estimator import DEFAULT_SAFETY_MARGIN
+from antareslauncher.use_cases.fetch_results.result_fetcher import DEFAULT_RESULTS_CACHE_MAX_SIZE_MB
+from antareslauncher.use_cases.retrieve.job_requeuer import DEFAULT_REQUEUE_FACTOR, DEFAULT_REQUEUE_STATES
 
 ALT2_PARENT = Path.home() / "antares_launcher_settings"
 ALT1_PARENT = Path.cwd()
@@ -58,6 +65,28 @@ class ParametersReader:
             self.db_primary_key = obj["DB_PRIMARY_KEY"]
             self.json_dir = Path(obj["JSON_DIR"]).expanduser()
             self.json_db_name = obj.get("DEFAULT_JSON_DB_NAME", DEFAULT_JSON_DB_NAME)
+            self.db_backend = obj.get("DB_BACKEND", "tinydb")
+            self.db_flush_interval = obj.get("DB_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+            self.archive_after_days = obj.get("ARCHIVE_AFTER_DAYS", DEFAULT_ARCHIVE_AFTER_DAYS)
+            self.auto_sizing = obj.get("AUTO_SIZING", False)
+            self.sizing_safety_margin = obj.get("SIZING_SAFETY_MARGIN", DEFAULT_SAFETY_MARGIN)
+            self.job_watcher_interval = obj.get("JOB_WATCHER_INTERVAL", 0)
+            self.max_jobs_in_flight = obj.get("MAX_JOBS_IN_FLIGHT", 0)
+            self.use_slurm_submit_limits = obj.get("USE_SLURM_SUBMIT_LIMITS", False)
+            self.slurm_rest_url = obj.get("SLURM_REST_URL", "")
+            self.slurm_rest_api_version = obj.get("SLURM_REST_API_VERSION", DEFAULT_API_VERSION)
+            self.max_job_attempts = obj.get("MAX_JOB_ATTEMPTS", 1)
+            self.requeue_states = obj.get("REQUEUE_STATES", list(DEFAULT_REQUEUE_STATES))
+            self.requeue_time_limit_factor = obj.get("REQUEUE_TIME_LIMIT_FACTOR", DEFAULT_REQUEUE_FACTOR)
+            self.requeue_memory_factor = obj.get("REQUEUE_MEMORY_FACTOR", DEFAULT_REQUEUE_FACTOR)
+            self.output_include = obj.get("OUTPUT_INCLUDE", [])
+            self.output_exclude = obj.get("OUTPUT_EXCLUDE", [])
+            self.full_results_retention_days = obj.get(
+                "FULL_RESULTS_RETENTION_DAYS", DEFAULT_FULL_RESULTS_RETENTION_DAYS
+            )
+            self.keep_results_remote = obj.get("KEEP_RESULTS_REMOTE", False)
+            self.results_cache_max_size_mb = obj.get("RESULTS_CACHE_MAX_SIZE_MB", DEFAULT_RESULTS_CACHE_MAX_SIZE_MB)
+            self.clusters = [self._get_cluster_parameters(cluster) for cluster in obj.get("CLUSTERS") or []]
         except KeyError as e:
             raise MissingValueException(yaml_filepath, str(e)) from None
 
@@ -84,11 +113,51 @@ class ParametersReader:
             antares_versions_on_remote_server=self.antares_versions,
             default_ssh_dict=self.default_ssh_dict,
             db_primary_key=self.db_primary_key,
+            db_backend=self.db_backend,
+            db_flush_interval=self.db_flush_interval,
+            archive_after_days=self.archive_after_days,
+            auto_sizing=self.auto_sizing,
+            sizing_safety_margin=self.sizing_safety_margin,
+            job_watcher_interval=self.job_watcher_interval,
+            max_jobs_in_flight=self.max_jobs_in_flight,
+            use_slurm_submit_limits=self.use_slurm_submit_limits,
+            slurm_rest_url=self.slurm_rest_url,
+            slurm_rest_api_version=self.slurm_rest_api_version,
+            max_job_attempts=self.max_job_attempts,
+            requeue_states=self.requeue_states,
+            requeue_time_limit_factor=self.requeue_time_limit_factor,
+            requeue_memory_factor=self.requeue_memory_factor,
+            clusters=self.clusters,
+            output_include=self.output_include,
+            output_exclude=self.output_exclude,
+            full_results_retention_days=self.full_results_retention_days,
+            keep_results_remote=self.keep_results_remote,
+            results_cache_max_size_mb=self.results_cache_max_size_mb,
+        )
+
+    def _get_cluster_parameters(self, obj: t.Mapping[str, t.Any]) -> ClusterParameters:
+        """Reads the parameters of an additional cluster, the missing values are those of the main cluster"""
+        versions = obj.get("ANTARES_VERSIONS_ON_REMOTE_SERVER")
+        return ClusterParameters(
+            name=obj["NAME"],
+            ssh_dict=_read_ssh_dict(Path(obj["SSH_CONFIG_FILE"]).expanduser()),
+            slurm_script_path=obj.get("SLURM_SCRIPT_PATH", self.remote_slurm_script_path),
+            antares_versions_on_remote_server=(
+                self.antares_versions if versions is None else [SolverMinorVersion.parse(v) for v in versions]
+            ),
+            partition=obj.get("PARTITION", ""),
+            quality_of_service=obj.get("QUALITY_OF_SERVICE", ""),
+            max_jobs_in_flight=obj.get("MAX_JOBS_IN_FLIGHT", 0),
+            full_results_retention_days=self.full_results_retention_days,
         )
 
     def _get_ssh_dict_from_json(self) -> t.Dict[str, t.Any]:
-        with open(self.json_ssh_conf) as ssh_connection_json:
-            ssh_dict = json.load(ssh_connection_json)
-        if "private_key_file" in ssh_dict:
-            ssh_dict["private_key_file"] = os.path.expanduser(ssh_dict["private_key_file"])
-        return t.cast(dict[str, t.Any], ssh_dict)
+        return _read_ssh_dict(self.json_ssh_conf)
+
+
+def _read_ssh_dict(json_ssh_conf: Path) -> t.Dict[str, t.Any]:
+    with open(json_ssh_conf) as ssh_connection_json:
+        ssh_dict = json.load(ssh_connection_json)
+    if "private_key_file" in ssh_dict:
+        ssh_dict["private_key_file"] = os.path.expanduser(ssh_dict["private_key_file"])
+    return t.cast(dict[str, t.Any], ssh_dict)
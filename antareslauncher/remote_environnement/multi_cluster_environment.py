@@ -0,0 +1,238 @@
+"""
+Remote environment made of several SLURM clusters, the studies being routed
+to the cluster recorded in their `StudyDTO.cluster` attribute.
+"""
+
+import collections
+import dataclasses
+import logging
+import typing as t
+
+from pathlib import Path
+
+from antares.study.version import SolverMinorVersion, StudyVersion
+from typing_extensions import override
+
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    QUEUE_SNAPSHOT_MAX_AGE,
+    GetQueueError,
+    RemoteEnvBaseError,
+    RemoteEnvironment,
+    RemoteEnvironmentWithSlurm,
+)
+from antareslauncher.remote_environnement.remote_probe import JobTransition
+from antareslauncher.remote_environnement.slurm_queue import CpuCounts, QueueSnapshot
+from antareslauncher.study_dto import StudyDTO
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownClusterError(RemoteEnvBaseError):
+    def __init__(self, cluster_name: str):
+        msg = f"Unknown cluster '{cluster_name}', check the 'CLUSTERS' section of the configuration"
+        super().__init__(msg)
+
+
+@dataclasses.dataclass
+class Cluster:
+    """
+    A SLURM cluster on which the studies can be dispatched.
+
+    Attributes:
+        name: Unique name of the cluster, recorded in the studies submitted to it ("" for the main cluster).
+        env: The remote environment of the cluster, with its own SSH connection and SLURM script.
+        antares_versions: The Antares Solver versions available on the cluster.
+        max_jobs_in_flight: The maximum number of jobs (pending or running) of the user on the cluster,
+            in the partition and with the QOS used by the launcher (0 for no limit).
+    """
+
+    name: str
+    env: RemoteEnvironmentWithSlurm
+    antares_versions: t.Sequence[SolverMinorVersion] = ()
+    max_jobs_in_flight: int = 0
+
+    @property
+    def label(self) -> str:
+        """Name displayed to the user"""
+        return self.name or self.env.connection.host
+
+    def supports(self, antares_version: StudyVersion) -> bool:
+        """Whether the cluster can run a study of the given version"""
+        return SolverMinorVersion.parse(antares_version) in self.antares_versions
+
+
+class MultiClusterEnvironment(RemoteEnvironment):
+    """
+    Remote environment which delegates each operation on a study
+    to the environment of the cluster the study is placed on.
+
+    The operations which are not related to a study (queue reading, job counting...)
+    are applied to all the clusters and their results are merged.
+    The submit limits are applied per cluster by the `ClusterDispatcher`.
+    The first cluster is the main cluster: it is used for the studies without cluster name.
+    """
+
+    def __init__(self, clusters: t.Sequence[Cluster]):
+        if not clusters:
+            raise ValueError("At least one cluster is required")
+        names = [cluster.name for cluster in clusters]
+        if len(set(names)) != len(names):
+            raise ValueError(f"The cluster names must be unique: {names}")
+        self.clusters: t.Dict[str, Cluster] = {cluster.name: cluster for cluster in clusters}
+        self.main_cluster = clusters[0]
+
+    def get_cluster(self, study: StudyDTO) -> Cluster:
+        """The cluster of a study
+
+        Raises:
+            UnknownClusterError: If the cluster of the study is not in the configuration.
+        """
+        cluster_name = study.cluster or self.main_cluster.name
+        try:
+            return self.clusters[cluster_name]
+        except KeyError:
+            raise UnknownClusterError(cluster_name) from None
+
+    def _group_by_env(self, studies: t.Iterable[StudyDTO]) -> t.Dict[str, t.List[StudyDTO]]:
+        groups: t.Dict[str, t.List[StudyDTO]] = collections.defaultdict(list)
+        for study in studies:
+            groups[self.get_cluster(study).name].append(study)
+        return groups
+
+    @override
+    def refresh_job_probes(self, studies: t.Iterable[StudyDTO]) -> bool:
+        groups = self._group_by_env(studies)
+        succeeded = True
+        for cluster in self.clusters.values():
+            # the probes of the other clusters are cleared
+            succeeded &= cluster.env.refresh_job_probes(groups.get(cluster.name, []))
+        return succeeded
+
+    @override
+    def clear_job_probes(self) -> None:
+        for cluster in self.clusters.values():
+            cluster.env.clear_job_probes()
+
+    @override
+    def watch_jobs(
+        self,
+        job_ids: t.Iterable[int],
+        *,
+        interval: float = 10,
+        heartbeat: float = 60,
+        max_duration: float = 86400,
+    ) -> t.Iterator[JobTransition]:
+        if len(self.clusters) > 1:
+            # The job IDs of the clusters may collide: the jobs are polled instead
+            logger.warning("The job watcher is not supported with several clusters, the jobs are polled")
+            return iter(())
+        return self.main_cluster.env.watch_jobs(
+            job_ids, interval=interval, heartbeat=heartbeat, max_duration=max_duration
+        )
+
+    @override
+    def get_queue_snapshot(self, *, max_age: float = QUEUE_SNAPSHOT_MAX_AGE) -> QueueSnapshot:
+        """The merged queues of the clusters, an unavailable cluster is reported and skipped
+
+        Raises:
+            GetQueueError: If the queue of no cluster can be read.
+        """
+        snapshots = []
+        errors = []
+        for cluster in self.clusters.values():
+            try:
+                snapshots.append(cluster.env.get_queue_snapshot(max_age=max_age))
+            except GetQueueError as exc:
+                logger.warning(f'Cluster "{cluster.label}" is unavailable: {exc}')
+                errors.append(f"{cluster.label}: {exc}")
+        if not snapshots:
+            raise GetQueueError("; ".join(errors))
+        return QueueSnapshot(
+            username=self.main_cluster.env.connection.username,
+            host=", ".join(snapshot.host for snapshot in snapshots),
+            records=[record for snapshot in snapshots for record in snapshot],
+            timestamp=min(snapshot.timestamp for snapshot in snapshots),
+        )
+
+    @override
+    def refresh_queue_snapshot(self) -> bool:
+        return all([cluster.env.refresh_queue_snapshot() for cluster in self.clusters.values()])
+
+    @override
+    def clear_queue_snapshot(self) -> None:
+        for cluster in self.clusters.values():
+            cluster.env.clear_queue_snapshot()
+
+    @override
+    def get_queue_info(self) -> str:
+        return "\n\n".join(cluster.env.get_queue_info() for cluster in self.clusters.values())
+
+    @override
+    def count_jobs_in_flight(self) -> t.Optional[int]:
+        counts = [cluster.env.count_jobs_in_flight() for cluster in self.clusters.values()]
+        return None if None in counts else sum(t.cast(t.List[int], counts))
+
+    @override
+    def get_submit_limit(self) -> t.Optional[int]:
+        """The submit limit of the main cluster, the limits of all the clusters are applied by `ClusterDispatcher`"""
+        return self.main_cluster.env.get_submit_limit()
+
+    @override
+    def get_cpu_counts(self) -> t.Optional[CpuCounts]:
+        return self.main_cluster.env.get_cpu_counts()
+
+    @override
+    def kill_study_jobs(self, studies: t.Sequence[StudyDTO]) -> None:
+        """Kills the jobs on the cluster recorded in each study, with a single `scancel` command per cluster
+
+        The job IDs of the clusters may collide: the jobs are never looked up in the queues of the other clusters.
+        """
+        for cluster_name, cluster_studies in self._group_by_env(studies).items():
+            self.clusters[cluster_name].env.kill_study_jobs(cluster_studies)
+
+    @override
+    def submit_job(self, my_study: StudyDTO) -> int:
+        return self.get_cluster(my_study).env.submit_job(my_study)
+
+    @override
+    def get_job_state_flags(
+        self,
+        study: StudyDTO,
+        *,
+        attempts: int = 5,
+        sleep_time: float = 0.5,
+    ) -> t.Tuple[bool, bool, bool]:
+        env = self.get_cluster(study).env
+        return env.get_job_state_flags(study, attempts=attempts, sleep_time=sleep_time)
+
+    @override
+    def upload_input_zipfile(self, study: StudyDTO) -> bool:
+        return self.get_cluster(study).env.upload_input_zipfile(study)
+
+    @override
+    def download_logs(self, study: StudyDTO) -> t.Sequence[Path]:
+        return self.get_cluster(study).env.download_logs(study)
+
+    @override
+    def download_final_zip(self, study: StudyDTO) -> t.Optional[Path]:
+        return self.get_cluster(study).env.download_final_zip(study)
+
+    @override
+    def read_result_manifest(self, study: StudyDTO) -> t.Optional[t.List[t.Dict[str, t.Any]]]:
+        return self.get_cluster(study).env.read_result_manifest(study)
+
+    @override
+    def fetch_result_files(self, study: StudyDTO, paths: t.Iterable[str], dst_dir: Path) -> t.List[Path]:
+        return self.get_cluster(study).env.fetch_result_files(study, paths, dst_dir)
+
+    @override
+    def remove_input_zipfile(self, study: StudyDTO) -> bool:
+        return self.get_cluster(study).env.remove_input_zipfile(study)
+
+    @override
+    def remove_remote_final_zipfile(self, study: StudyDTO) -> bool:
+        return self.get_cluster(study).env.remove_remote_final_zipfile(study)
+
+    @override
+    def clean_remote_server(self, study: StudyDTO) -> bool:
+        return self.get_cluster(study).env.clean_remote_server(study)
@@ -1,18 +1,34 @@
+import abc
+import bisect
+import dataclasses
 import enum
 import getpass
+import io
 import logging
 import re
 import shlex
 import socket
+import tempfile
 import textwrap
 import time
 import typing as t
+import zipfile
 
 from pathlib import Path, PurePosixPath
 from typing import Optional, Tuple
 
 from antares.study.version import SolverMinorVersion
-
+from typing_extensions import override
+
+from antareslauncher.remote_environnement.remote_probe import (
+    PROBE_SCRIPT_NAME,
+    JobProbe,
+    JobTransition,
+    parse_probe_output,
+    parse_watch_line,
+    render_probe_script,
+)
+from antareslauncher.remote_environnement.slurm_queue import SQUEUE_FORMAT, CpuCounts, QueueSnapshot
 from antareslauncher.remote_environnement.slurm_script_features import ScriptParametersDTO, SlurmScriptFeatures
 from antareslauncher.remote_environnement.ssh_connection import SshConnection
 from antareslauncher.study_dto import StudyDTO
@@ -42,8 +58,14 @@ class NoLaunchScriptFoundError(RemoteEnvBaseError):
         super().__init__(msg)
 
 
+class GetQueueError(RemoteEnvBaseError):
+    def __init__(self, reason: str):
+        msg = f"Unable to read the SLURM queue: {reason}"
+        super().__init__(msg)
+
+
 class KillJobError(RemoteEnvBaseError):
-    def __init__(self, job_id: int, reason: str):
+    def __init__(self, job_id: t.Union[int, str], reason: str):
         msg = f"Unable to kill the SLURM job {job_id}: {reason}"
         super().__init__(msg)
 
@@ -54,6 +76,16 @@ class SubmitJobError(RemoteEnvBaseError):
         super().__init__(msg)
 
 
+class SubmitLimitReachedError(SubmitJobError):
+    """Raised when the job is rejected because the user has reached the maximum number of submitted jobs"""
+
+
+class RemoteResultsError(RemoteEnvBaseError):
+    def __init__(self, study_name: str, reason: str):
+        msg = f"Unable to read the remote results of the study '{study_name}': {reason}"
+        super().__init__(msg)
+
+
 class JobStateCodes(enum.Enum):
     # noinspection SpellCheckingInspection
     """
@@ -153,6 +185,221 @@ class JobStateCodes(enum.Enum):
     UPDATE_DB = "UPDATE_DB"
 
 
+# noinspection SpellCheckingInspection
+SACCT_FIELDS = (
+    "JobID",
+    "JobName",
+    "State",
+    "Elapsed",
+    "TotalCPU",
+    "MaxRSS",
+    "AllocCPUS",
+    "Submit",
+    "Start",
+    "End",
+    "ExitCode",
+    "NodeList",
+)
+"""Columns of the `sacct` query used to retrieve the job state and its accounting."""
+
+_MEMORY_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4, "P": 1024**5}
+
+
+def _parse_slurm_duration(value: str) -> float:
+    """
+    Convert a SLURM duration like "[DD-[HH:]]MM:SS[.mmm]" into seconds.
+    Invalid or empty values are converted to 0.
+    """
+    days, _, clock = value.strip().rpartition("-")
+    try:
+        seconds = 0.0
+        for part in clock.split(":"):
+            seconds = seconds * 60 + float(part)
+        return (int(days) if days else 0) * 86400 + seconds
+    except ValueError:
+        return 0
+
+
+def _parse_slurm_memory(value: str) -> int:
+    """
+    Convert a SLURM memory size like "1234K" or "1.5G" into bytes.
+    Invalid or empty values are converted to 0.
+    """
+    match = re.fullmatch(r"([\d.]+)([KMGTP]?)", value.strip(), flags=re.IGNORECASE)
+    if not match:
+        return 0
+    return int(float(match[1]) * _MEMORY_UNITS[match[2].upper()])
+
+
+def _parse_slurm_datetime(value: str) -> str:
+    """Keep the ISO 8601 date/time reported by SLURM, but drop the placeholders like "Unknown" or "None"."""
+    value = value.strip()
+    return value if value[:1].isdigit() else ""
+
+
+@dataclasses.dataclass
+class JobAccounting:
+    """
+    Resource accounting of a SLURM job, as reported by `sacct`.
+
+    The attribute names match the accounting attributes of `StudyDTO`.
+    """
+
+    submit_time: str = ""
+    start_time: str = ""
+    end_time: str = ""
+    elapsed: int = 0
+    total_cpu: float = 0
+    max_rss: int = 0
+    alloc_cpus: int = 0
+    exit_code: str = ""
+    node_list: str = ""
+
+    @classmethod
+    def from_sacct_fields(cls, fields: t.Mapping[str, str]) -> "JobAccounting":
+        """
+        Create the job accounting from a row of the `sacct` output (see `SACCT_FIELDS`).
+        """
+        alloc_cpus = fields.get("AllocCPUS", "").strip()
+        return cls(
+            submit_time=_parse_slurm_datetime(fields.get("Submit", "")),
+            start_time=_parse_slurm_datetime(fields.get("Start", "")),
+            end_time=_parse_slurm_datetime(fields.get("End", "")),
+            elapsed=int(_parse_slurm_duration(fields.get("Elapsed", ""))),
+            total_cpu=_parse_slurm_duration(fields.get("TotalCPU", "")),
+            max_rss=_parse_slurm_memory(fields.get("MaxRSS", "")),
+            alloc_cpus=int(alloc_cpus) if alloc_cpus.isdigit() else 0,
+            exit_code=fields.get("ExitCode", "").strip(),
+            node_list=fields.get("NodeList", "").strip(),
+        )
+
+    def update_study(self, study: StudyDTO) -> None:
+        """Copy the accounting data into the study."""
+        for name, value in dataclasses.asdict(self).items():
+            setattr(study, name, value)
+
+
+QUEUE_SNAPSHOT_MAX_AGE = 30
+"""Maximum age in seconds of the cached SLURM queue snapshot, see `get_queue_snapshot`."""
+
+IN_FLIGHT_JOB_STATES = frozenset(
+    [
+        JobStateCodes.PENDING.value,
+        JobStateCodes.RUNNING.value,
+        JobStateCodes.CONFIGURING.value,
+        JobStateCodes.COMPLETING.value,
+        JobStateCodes.SUSPENDED.value,
+        JobStateCodes.REQUEUED.value,
+    ]
+)
+"""Job states counted by `count_jobs_in_flight`."""
+
+FINISHED_JOB_STATES = frozenset(
+    {
+        JobStateCodes.BOOT_FAIL,
+        JobStateCodes.CANCELLED,
+        JobStateCodes.COMPLETED,
+        JobStateCodes.DEADLINE,
+        JobStateCodes.FAILED,
+        JobStateCodes.LAUNCH_FAILED,
+        JobStateCodes.NODE_FAIL,
+        JobStateCodes.OUT_OF_MEMORY,
+        JobStateCodes.PREEMPTED,
+        JobStateCodes.RECONFIG_FAIL,
+        JobStateCodes.TIMEOUT,
+    }
+)
+"""Job states for which the resource accounting is final."""
+
+
+_NOT_STARTED = (False, False, False)
+_STARTED = (True, False, False)
+_FINISHED_SUCCESSFULLY = (True, True, False)
+_FINISHED_WITH_ERROR = (True, True, True)
+
+JOB_STATE_FLAGS: t.Mapping[JobStateCodes, t.Tuple[bool, bool, bool]] = {
+    # JobStateCodes ------ started, finished, with_error
+    JobStateCodes.BOOT_FAIL: _NOT_STARTED,
+    JobStateCodes.CANCELLED: _FINISHED_WITH_ERROR,
+    JobStateCodes.COMPLETED: _FINISHED_SUCCESSFULLY,
+    JobStateCodes.COMPLETING: _STARTED,
+    JobStateCodes.CONFIGURING: _STARTED,
+    JobStateCodes.DEADLINE: _FINISHED_WITH_ERROR,  # similar to timeout
+    JobStateCodes.EXPEDITING: _NOT_STARTED,
+    JobStateCodes.FAILED: _FINISHED_WITH_ERROR,
+    JobStateCodes.LAUNCH_FAILED: _FINISHED_WITH_ERROR,
+    JobStateCodes.NODE_FAIL: _FINISHED_WITH_ERROR,
+    JobStateCodes.OUT_OF_MEMORY: _FINISHED_WITH_ERROR,
+    JobStateCodes.PENDING: _NOT_STARTED,
+    JobStateCodes.POWER_UP_NODE: _STARTED,
+    JobStateCodes.PREEMPTED: _NOT_STARTED,
+    JobStateCodes.RECONFIG_FAIL: _FINISHED_WITH_ERROR,
+    JobStateCodes.REQUEUE_FED: _NOT_STARTED,
+    JobStateCodes.REQUEUE_HOLD: _NOT_STARTED,
+    JobStateCodes.RUNNING: _STARTED,
+    JobStateCodes.REQUEUED: _NOT_STARTED,
+    JobStateCodes.RESIZING: _NOT_STARTED,
+    JobStateCodes.RESV_DEL_HOLD: _NOT_STARTED,
+    JobStateCodes.REVOKED: _NOT_STARTED,
+    JobStateCodes.SIGNALING: _STARTED,
+    JobStateCodes.SPECIAL_EXIT: _NOT_STARTED,
+    JobStateCodes.STAGE_OUT: _STARTED,
+    JobStateCodes.STOPPED: _STARTED,
+    JobStateCodes.SUSPENDED: _STARTED,
+    JobStateCodes.TIMEOUT: _FINISHED_WITH_ERROR,
+    JobStateCodes.UPDATE_DB: _STARTED,
+}
+"""Job state flags `(started, finished, with_error)` of the SLURM job states, see `get_job_state_flags`."""
+
+
+def _parse_sacct_output(
+    job_id: int,
+    job_name: str,
+    output: str,
+    *,
+    delimiter: str = ",",
+) -> t.Optional[t.Tuple[JobStateCodes, JobAccounting]]:
+    """
+    Parse the output of a `sacct` query made with the `SACCT_FIELDS` columns
+    to extract the job state and the accounting of a job.
+
+    The output must be a CSV-like string without header row:
+    the first row of a job is the job allocation, the next rows are the job steps.
+    The `NodeList` column is the last one because it may contain the delimiter.
+    The rows of other jobs are ignored.
+
+    Returns:
+        The job state and the accounting of the job, or `None` if the job allocation row is not found.
+
+    Raises:
+        GetJobStateError: If the job state cannot be parsed.
+    """
+    job_state: t.Optional[JobStateCodes] = None
+    job_fields: t.Dict[str, str] = {}
+    max_rss = 0
+    for line in output.splitlines():
+        parts = line.split(delimiter, len(SACCT_FIELDS) - 1)
+        if len(parts) != len(SACCT_FIELDS):
+            continue
+        fields = dict(zip(SACCT_FIELDS, parts))
+        if fields["JobID"] == str(job_id) and fields["JobName"] == job_name:
+            # Match the first word only, e.g.: "CANCEL by 123456798"
+            match = re.match(r"(\w+)", fields["State"])
+            if not match:
+                raise GetJobStateError(job_id, job_name, f"Unable to parse the job state: '{fields['State']}'")
+            job_state = JobStateCodes(match[1])
+            job_fields = fields
+        elif fields["JobID"].startswith(f"{job_id}."):
+            max_rss = max(max_rss, _parse_slurm_memory(fields["MaxRSS"]))
+
+    if job_state is None:
+        return None
+
+    accounting = JobAccounting.from_sacct_fields(job_fields)
+    accounting.max_rss = max(accounting.max_rss, max_rss)
+    return job_state, accounting
+
+
 def _execute_with_retry(
     connection: SshConnection, command: str, attempts: int = 5, sleep_time: float = 5
 ) -> Tuple[Optional[str], str]:
@@ -173,13 +420,429 @@ def _execute_with_retry(
     return output, error
 
 
-class RemoteEnvironmentWithSlurm:
+_PREFETCH_BATCH_SIZE = 64 * 1024 * 1024
+"""Maximum size in bytes of the ZIP members read ahead together, see `fetch_result_files`."""
+
+_MAX_LOCAL_HEADER_SIZE = 30 + 2 * 0xFFFF
+"""Maximum size of the local header of a ZIP member: fixed fields, file name and extra field."""
+
+
+class _PrefetchedFile:
+    """
+    Read-only file whose byte ranges read ahead with `prefetch` are served from memory,
+    the other reads are delegated to the underlying file.
+
+    The ranges are read with `readv` when the file supports it (an SFTP file): the read requests
+    are pipelined, instead of a round trip for each block.
+    """
+
+    def __init__(self, file: t.BinaryIO) -> None:
+        self._file = file
+        self._pos = 0
+        self._offsets: t.List[int] = []
+        self._chunks: t.List[bytes] = []
+
+    def prefetch(self, ranges: t.Sequence[Tuple[int, int]]) -> None:
+        """Reads ahead the byte ranges `(offset, size)`, the ranges read ahead previously are discarded"""
+        readv = getattr(self._file, "readv", None)
+        chunks = sorted(zip((offset for offset, _ in ranges), readv(ranges))) if readv else []
+        self._offsets = [offset for offset, _ in chunks]
+        self._chunks = [chunk for _, chunk in chunks]
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = self._file.seek(offset, whence)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        pos = self._pos
+        index = bisect.bisect_right(self._offsets, pos) - 1
+        if index >= 0 and pos < self._offsets[index] + len(self._chunks[index]):
+            start = pos - self._offsets[index]
+            chunk = self._chunks[index][start:] if size < 0 else self._chunks[index][start : start + size]
+            self._pos += len(chunk)
+            if size < 0 or len(chunk) < size:
+                # the read continues past the end of the range
+                chunk += self.read(size if size < 0 else size - len(chunk))
+            return chunk
+        self._file.seek(pos)
+        chunk = self._file.read(size)
+        self._pos += len(chunk)
+        return chunk
+
+
+def _get_member_ranges(zf: zipfile.ZipFile, paths: t.Sequence[str]) -> t.List[Tuple[int, int]]:
+    """Byte ranges `(offset, size)` of the ZIP members: local header, data and data descriptor"""
+    infos = sorted(zf.infolist(), key=lambda info: info.header_offset)
+    next_offsets = {info.header_offset: other.header_offset for info, other in zip(infos, infos[1:])}
+    ranges = []
+    for path in paths:
+        info = zf.getinfo(path)
+        # the size of the local header is unknown: the member ends where the next one begins
+        end = next_offsets.get(info.header_offset, info.header_offset + _MAX_LOCAL_HEADER_SIZE + info.compress_size)
+        ranges.append((info.header_offset, end - info.header_offset))
+    return ranges
+
+
+class SchedulerBackend(abc.ABC):
+    """
+    Interface of the SLURM job scheduler used by the remote environment.
+
+    The backend submits, queries and cancels the jobs, while the files
+    (input ZIP files, logs and results) are always transferred with the SSH connection.
+    """
+
+    @abc.abstractmethod
+    def submit_job(self, remote_launch_dir: str, job_name: str, script_params: ScriptParametersDTO) -> int:
+        """
+        Submit the Antares Solver script.
+
+        Args:
+            remote_launch_dir: remote directory where the script is launched
+            job_name: the job name (the study name)
+            script_params: the parameters of the script
+
+        Returns:
+            The SLURM job ID.
+
+        Raises:
+            SubmitJobError: If the job is not submitted.
+            SubmitLimitReachedError: If the job is rejected because the submit limit is reached.
+        """
+
+    @abc.abstractmethod
+    def read_queue(self, username: str, host: str) -> QueueSnapshot:
+        """
+        Read all the jobs of the user in the SLURM queue, including the recently finished jobs.
+
+        Raises:
+            GetQueueError: If the SLURM queue cannot be read.
+        """
+
+    @abc.abstractmethod
+    def get_job_state(self, job_id: int, job_name: str) -> t.Optional[JobStateCodes]:
+        """
+        Read the state of an active job.
+
+        Returns:
+            The job state, or `None` if the job is no longer active.
+
+        Raises:
+            GetJobStateError: If the job state cannot be read.
+        """
+
+    @abc.abstractmethod
+    def get_job_accounting(
+        self,
+        job_id: int,
+        job_name: str,
+        *,
+        attempts: int,
+        sleep_time: float,
+    ) -> t.Optional[t.Tuple[JobStateCodes, JobAccounting]]:
+        """
+        Read the state and the resource accounting of a job from the SLURM database.
+
+        Returns:
+            The job state and accounting, or `None` if the job is not found.
+
+        Raises:
+            GetJobStateError: If the job accounting cannot be read.
+        """
+
+    @abc.abstractmethod
+    def cancel_jobs(self, job_ids: t.Sequence[int]) -> None:
+        """
+        Cancel several jobs at once.
+
+        Raises:
+            KillJobError: If the jobs cannot be cancelled.
+        """
+
+
+class SshSchedulerBackend(SchedulerBackend):
+    """
+    Scheduler backend running the SLURM commands (`sbatch`, `squeue`, `scontrol`, `sacct`, `scancel`)
+    on the remote server through the SSH connection, and parsing their output.
+    """
+
+    def __init__(
+        self,
+        connection: SshConnection,
+        slurm_script_features: SlurmScriptFeatures,
+        retry_attempts: int = 5,
+        retry_delay: float = 5,
+    ):
+        self.connection = connection
+        self.slurm_script_features = slurm_script_features
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+
+    def _execute_with_retry(self, command: str) -> Tuple[Optional[str], str]:
+        return _execute_with_retry(self.connection, command, self.retry_attempts, self.retry_delay)
+
+    @override
+    def submit_job(self, remote_launch_dir: str, job_name: str, script_params: ScriptParametersDTO) -> int:
+        command = self.slurm_script_features.compose_launch_command(remote_launch_dir, script_params)
+        output, error = self._execute_with_retry(command)
+        if error:
+            reason = f"The command [{command}] failed: {error}"
+            # e.g.: "Batch job submission failed: Job violates accounting/QOS policy
+            # (job submit limit, user's size and/or time limits)"
+            if re.search(r"MaxSubmitJob|submit limit", error, flags=re.IGNORECASE):
+                raise SubmitLimitReachedError(job_name, reason)
+            raise SubmitJobError(job_name, reason)
+
+        # should match "Submitted batch job 123456"
+        assert output is not None
+        if match := re.match(r"Submitted.*?(?P<job_id>\d+)", output, flags=re.IGNORECASE):
+            return int(match["job_id"])
+
+        reason = f"The command [{command}] return an non-parsable output:\n{textwrap.indent(output, 'OUTPUT> ')}"
+        raise SubmitJobError(job_name, reason)
+
+    @override
+    def read_queue(self, username: str, host: str) -> QueueSnapshot:
+        # noinspection SpellCheckingInspection
+        args = ["squeue", "--noheader", f"--user={username}", "--states=all", f"--format={SQUEUE_FORMAT}"]
+        command = " ".join(shlex.quote(arg) for arg in args)
+        output, error = self._execute_with_retry(command)
+        if error or output is None:
+            raise GetQueueError(f"The command [{command}] failed: {error}")
+        return QueueSnapshot.from_squeue_output(username, host, output)
+
+    @override
+    def cancel_jobs(self, job_ids: t.Sequence[int]) -> None:
+        # noinspection SpellCheckingInspection
+        command = "scancel " + " ".join(str(job_id) for job_id in job_ids)
+        _, error = self.connection.execute_command(command)
+        if error:
+            reason = f"The command [{command}] failed: {error}"
+            raise KillJobError(", ".join(str(job_id) for job_id in job_ids), reason)
+
+    @override
+    def get_job_state(
+        self,
+        job_id: int,
+        job_name: str,
+    ) -> t.Optional[JobStateCodes]:
+        """
+        Use the `scontrol` command to retrieve job status information in SLURM.
+        See: https://slurm.schedmd.com/scontrol.html
+        """
+        # Construct the command line arguments used to check alive jobs state.
+        # noinspection SpellCheckingInspection
+        args = ["scontrol", "show", "job", f"{job_id}"]
+        command = " ".join(shlex.quote(arg) for arg in args)
+        output, error = self._execute_with_retry(command)
+        if error:
+            # The command output may include an error message if the job is
+            # no longer active or has been removed
+            if re.search("Invalid job id specified", error):
+                return None
+            reason = f"The command [{command}] failed: {error}"
+            raise GetJobStateError(job_id, job_name, reason)
+
+        # We can retrieve the job state from the output of the command
+        # by extracting the value of the `JobState` field.
+        assert output is not None
+        if match := re.search(r"JobState=(\w+)", output):
+            return JobStateCodes(match[1])
+
+        reason = f"The command [{command}] return an non-parsable output:\n{textwrap.indent(output, 'OUTPUT> ')}"
+        raise GetJobStateError(job_id, job_name, reason)
+
+    @override
+    def get_job_accounting(
+        self,
+        job_id: int,
+        job_name: str,
+        *,
+        attempts: int = 5,
+        sleep_time: float = 0.5,
+    ) -> t.Optional[t.Tuple[JobStateCodes, JobAccounting]]:
+        """
+        Use the `sacct` command to retrieve the job state and its resource accounting.
+        See: https://slurm.schedmd.com/sacct.html
+
+        Returns:
+            The job state and the accounting of the job, or `None` if the job is not found.
+        """
+        # Construct the command line arguments used to check the jobs state.
+        # The job steps are listed too (no `--name` filtering) because
+        # the peak memory (`MaxRSS`) is only reported at the step level.
+        # See the man page: https://slurm.schedmd.com/sacct.html
+        # noinspection SpellCheckingInspection
+        delimiter = ","
+        # noinspection SpellCheckingInspection
+        args = [
+            "sacct",
+            f"--jobs={job_id}",
+            f"--format={','.join(SACCT_FIELDS)}",
+            "--parsable2",
+            f"--delimiter={delimiter}",
+            "--noheader",
+        ]
+        command = " ".join(shlex.quote(arg) for arg in args)
+
+        # Makes several attempts to get the job state.
+        # I don't really know why, but it's better to reproduce the old behavior.
+        output: t.Optional[str]
+        last_error: str = ""
+        for attempt in range(attempts):
+            output, error = self.connection.execute_command(command)
+            if output is not None:
+                break
+            last_error = error
+            time.sleep(sleep_time)
+        else:
+            reason = f"The command [{command}] failed after {attempts} attempts: {last_error}"
+            raise GetJobStateError(job_id, job_name, reason)
+
+        # When the output is empty it mean that the job is not found
+        if not output.strip():
+            return None
+
+        acct_record = _parse_sacct_output(job_id, job_name, output, delimiter=delimiter)
+        if acct_record is None:
+            reason = f"The command [{command}] return an non-parsable output:\n{textwrap.indent(output, 'OUTPUT> ')}"
+            raise GetJobStateError(job_id, job_name, reason)
+        return acct_record
+
+
+class RemoteEnvironment(abc.ABC):
+    """
+    Interface of the remote environment on which the studies are launched, used by the controllers.
+
+    Implemented by `RemoteEnvironmentWithSlurm` for a single SLURM cluster,
+    and by `MultiClusterEnvironment` for several clusters.
+    """
+
+    @abc.abstractmethod
+    def refresh_job_probes(self, studies: t.Iterable[StudyDTO]) -> bool:
+        """Retrieves the state of the jobs of the studies with a single remote command, False on failure"""
+
+    @abc.abstractmethod
+    def clear_job_probes(self) -> None:
+        """Discards the result of the last call to `refresh_job_probes`"""
+
+    @abc.abstractmethod
+    def watch_jobs(
+        self,
+        job_ids: t.Iterable[int],
+        *,
+        interval: float = 10,
+        heartbeat: float = 60,
+        max_duration: float = 86400,
+    ) -> t.Iterator[JobTransition]:
+        """Yields the state transitions of the jobs, pushed by a watcher running on the remote server"""
+
+    @abc.abstractmethod
+    def get_queue_snapshot(self, *, max_age: float = QUEUE_SNAPSHOT_MAX_AGE) -> QueueSnapshot:
+        """Reads all the jobs of the user in the SLURM queue, the snapshot is cached for `max_age` seconds"""
+
+    @abc.abstractmethod
+    def refresh_queue_snapshot(self) -> bool:
+        """Takes a new snapshot of the SLURM queue, False if the SLURM queue cannot be read"""
+
+    @abc.abstractmethod
+    def clear_queue_snapshot(self) -> None:
+        """Invalidates the cached snapshot of the SLURM queue"""
+
+    @abc.abstractmethod
+    def get_queue_info(self) -> str:
+        """Renders the jobs of the user in the SLURM queue"""
+
+    @abc.abstractmethod
+    def count_jobs_in_flight(self) -> t.Optional[int]:
+        """Counts the jobs of the user which are pending or running, `None` if the SLURM queue cannot be read"""
+
+    @abc.abstractmethod
+    def get_submit_limit(self) -> t.Optional[int]:
+        """The maximum number of jobs the user can submit, `None` if there is no limit or if it cannot be read"""
+
+    @abc.abstractmethod
+    def get_cpu_counts(self) -> t.Optional[CpuCounts]:
+        """The number of idle and allocated CPUs of the nodes, `None` if they cannot be read"""
+
+    @abc.abstractmethod
+    def kill_study_jobs(self, studies: t.Sequence[StudyDTO]) -> None:
+        """Kills the jobs of the studies, on the cluster where each study is placed
+
+        Raises:
+            KillJobError: If the jobs cannot be killed.
+        """
+
+    @abc.abstractmethod
+    def submit_job(self, my_study: StudyDTO) -> int:
+        """Submits the Antares job of a study, returns the job ID
+
+        Raises:
+            SubmitJobError: If the job has not been successfully submitted.
+        """
+
+    @abc.abstractmethod
+    def get_job_state_flags(
+        self,
+        study: StudyDTO,
+        *,
+        attempts: int = 5,
+        sleep_time: float = 0.5,
+    ) -> t.Tuple[bool, bool, bool]:
+        """The job state flags of a study: `(started, finished, with_error)`"""
+
+    @abc.abstractmethod
+    def upload_input_zipfile(self, study: StudyDTO) -> bool:
+        """Uploads the input ZIP file of a study, False on failure"""
+
+    @abc.abstractmethod
+    def download_logs(self, study: StudyDTO) -> t.Sequence[Path]:
+        """Downloads the SLURM logs of a study, returns the paths of the downloaded logs"""
+
+    @abc.abstractmethod
+    def download_final_zip(self, study: StudyDTO) -> t.Optional[Path]:
+        """Downloads the final ZIP file of a study, `None` on failure"""
+
+    @abc.abstractmethod
+    def read_result_manifest(self, study: StudyDTO) -> t.Optional[t.List[t.Dict[str, t.Any]]]:
+        """Reads the list of the files of the final ZIP file kept on the remote server, `None` if not found"""
+
+    @abc.abstractmethod
+    def fetch_result_files(self, study: StudyDTO, paths: t.Iterable[str], dst_dir: Path) -> t.List[Path]:
+        """Extracts some files of the final ZIP file kept on the remote server, returns their local paths"""
+
+    @abc.abstractmethod
+    def remove_input_zipfile(self, study: StudyDTO) -> bool:
+        """Removes the input ZIP file of a study from the remote server, False on failure"""
+
+    @abc.abstractmethod
+    def remove_remote_final_zipfile(self, study: StudyDTO) -> bool:
+        """Removes the final ZIP file of a study from the remote server, False on failure"""
+
+    @abc.abstractmethod
+    def clean_remote_server(self, study: StudyDTO) -> bool:
+        """Removes the input and final ZIP files of a study from the remote server, False on failure"""
+
+
+class RemoteEnvironmentWithSlurm(RemoteEnvironment):
     """
     Class that represents the remote environment
 
     Attributes:
         retry_attempts: Number of attempts commands are retried when they output an error.
         retry_delay:    Delay in seconds between command execution retries.
+        backend:        Scheduler backend used to submit, query and cancel the jobs,
+                        by default the SLURM commands are run through the SSH connection.
     """
 
     def __init__(
@@ -188,12 +851,19 @@ class RemoteEnvironmentWithSlurm:
         slurm_script_features: SlurmScriptFeatures,
         retry_attempts: int = 5,
         retry_delay: float = 5,
+        backend: t.Optional[SchedulerBackend] = None,
     ):
         self.connection = _connection
         self.retry_attempts = retry_attempts
         self.retry_delay = retry_delay
         self.slurm_script_features = slurm_script_features
         self.remote_base_path: str = ""
+        self._job_probes: t.Dict[int, JobProbe] = {}
+        self._probe_script_uploaded = False
+        self._queue_snapshot: t.Optional[QueueSnapshot] = None
+        self.backend: SchedulerBackend = backend or SshSchedulerBackend(
+            _connection, slurm_script_features, retry_attempts, retry_delay
+        )
         self._initialise_remote_path()
         self._check_remote_script()
 
@@ -212,16 +882,246 @@ class RemoteEnvironmentWithSlurm:
     def _execute_with_retry(self, command: str) -> Tuple[Optional[str], str]:
         return _execute_with_retry(self.connection, command, self.retry_attempts, self.retry_delay)
 
+    @property
+    def probe_script_path(self) -> str:
+        return f"{self.remote_base_path}/{PROBE_SCRIPT_NAME}"
+
+    def _upload_probe_script(self) -> bool:
+        """Uploads the probe script in the remote base directory if it is missing"""
+        if not self._probe_script_uploaded:
+            if self.connection.check_file_not_empty(self.probe_script_path):
+                self._probe_script_uploaded = True
+            else:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    script_path = Path(tmp_dir).joinpath(PROBE_SCRIPT_NAME)
+                    finished_states = [state.value for state in FINISHED_JOB_STATES]
+                    script_path.write_text(render_probe_script(SACCT_FIELDS, finished_states), encoding="utf-8")
+                    self._probe_script_uploaded = self.connection.upload_file(str(script_path), self.probe_script_path)
+        return self._probe_script_uploaded
+
+    @override
+    def refresh_job_probes(self, studies: t.Iterable[StudyDTO]) -> bool:
+        """
+        Retrieves, with a single remote command, the state of the jobs of the given studies
+        and the presence of their log files and result files.
+
+        The result is cached until the next call to `refresh_job_probes` or `clear_job_probes`,
+        and is used by `get_job_state_flags`, `download_logs` and `download_final_zip`
+        instead of querying the remote server for each study.
+
+        Args:
+            studies: The studies to check, only the submitted studies which are not done are probed.
+
+        Returns:
+            True if the probe succeeded, False otherwise: in that case,
+            the remote server is queried for each study as usual.
+        """
+        self._job_probes = {}
+        job_ids = sorted({study.job_id for study in studies if study.job_id and not study.done})
+        if not job_ids:
+            return True
+        if not self._upload_probe_script():
+            logger.warning(f"Unable to upload the probe script '{self.probe_script_path}'")
+            return False
+        args = ["python3", self.probe_script_path, self.remote_base_path, *map(str, job_ids)]
+        command = " ".join(shlex.quote(arg) for arg in args)
+        output, error = self.connection.execute_command(command)
+        if error or output is None:
+            logger.warning(f"The command [{command}] failed: {error}")
+            return False
+        try:
+            job_probes, probe_errors = parse_probe_output(output)
+        except ValueError as exc:
+            logger.warning(f"The command [{command}] return an non-parsable output: {exc}")
+            return False
+        if probe_errors:
+            logger.warning(f"The command [{command}] reported errors: {probe_errors}")
+            return False
+        self._job_probes = job_probes
+        return True
+
+    @override
+    def clear_job_probes(self) -> None:
+        """Discards the result of the last call to `refresh_job_probes`"""
+        self._job_probes = {}
+
+    @override
+    def watch_jobs(
+        self,
+        job_ids: t.Iterable[int],
+        *,
+        interval: float = 10,
+        heartbeat: float = 60,
+        max_duration: float = 86400,
+    ) -> t.Iterator[JobTransition]:
+        """
+        Starts a long-lived watcher on the remote server, which checks the SLURM queue
+        at a fixed cadence, and yields the job state transitions as soon as they occur.
+
+        The first transition of each job is its current state.
+        The iteration stops when all the jobs are finished, when the maximum duration is reached,
+        or when the connection is lost: the caller should then fall back to polling.
+
+        Args:
+            job_ids: The SLURM job IDs to watch.
+            interval: The delay in seconds between two checks of the SLURM queue.
+            heartbeat: The delay in seconds between two "alive" messages of the watcher, if nothing happens.
+            max_duration: The maximum duration in seconds of the watcher.
+
+        Yields:
+            The job state transitions.
+        """
+        watched_ids = sorted(set(job_ids))
+        if not watched_ids:
+            return
+        if not self._upload_probe_script():
+            logger.warning(f"Unable to upload the probe script '{self.probe_script_path}'")
+            return
+        args = [
+            "python3",
+            self.probe_script_path,
+            f"--watch={interval}",
+            f"--heartbeat={heartbeat}",
+            f"--max-duration={max_duration}",
+            self.remote_base_path,
+            *map(str, watched_ids),
+        ]
+        command = " ".join(shlex.quote(arg) for arg in args)
+        for line in self.connection.stream_command(command, timeout=3 * heartbeat + interval):
+            transition = parse_watch_line(line)
+            if transition is not None:
+                yield transition
+            elif line.strip():
+                logger.debug(f"Watcher: {line}")
+
+    @override
+    def get_queue_snapshot(self, *, max_age: float = QUEUE_SNAPSHOT_MAX_AGE) -> QueueSnapshot:
+        """
+        Reads all the jobs of the user in the SLURM queue, with a single `squeue` command.
+
+        The snapshot is cached, so that the queue display and the job state pollers
+        of a same cycle share it instead of each querying SLURM.
+        The cache is invalidated when a job is submitted or killed.
+
+        Args:
+            max_age: Maximum age in seconds of the cached snapshot, 0 to force a new reading.
+
+        Returns:
+            The snapshot of the SLURM queue, including the recently finished jobs.
+
+        Raises:
+            GetQueueError: If the `squeue` command fails.
+        """
+        snapshot = self._queue_snapshot
+        if snapshot is not None and snapshot.age <= max_age:
+            return snapshot
+        snapshot = self.backend.read_queue(self.connection.username, self.connection.host)
+        self._queue_snapshot = snapshot
+        return snapshot
+
+    @override
+    def refresh_queue_snapshot(self) -> bool:
+        """Takes a new snapshot of the SLURM queue, see `get_queue_snapshot`
+
+        Returns:
+            True if the snapshot is taken, False if the SLURM queue cannot be read
+        """
+        try:
+            self.get_queue_snapshot(max_age=0)
+        except GetQueueError as exc:
+            logger.warning(str(exc))
+            return False
+        return True
+
+    @override
+    def clear_queue_snapshot(self) -> None:
+        """Invalidates the cached snapshot of the SLURM queue"""
+        self._queue_snapshot = None
+
+    def _get_fresh_queue_snapshot(self) -> t.Optional[QueueSnapshot]:
+        """The cached snapshot of the SLURM queue, if it is recent enough to be trusted"""
+        snapshot = self._queue_snapshot
+        if snapshot is not None and snapshot.age <= QUEUE_SNAPSHOT_MAX_AGE:
+            return snapshot
+        return None
+
+    @override
     def get_queue_info(self) -> str:
-        """This function return the information from: squeue -u run-antares
+        """Renders the jobs of the user in the SLURM queue (see `get_queue_snapshot`)
+
+        Returns:
+            The error if the SLURM queue cannot be read, otherwise the slurm queue info
+        """
+        try:
+            snapshot = self.get_queue_snapshot()
+        except GetQueueError as exc:
+            return str(exc)
+        return f"{snapshot.username}@{snapshot.host}\n{snapshot.render()}"
+
+    @override
+    def count_jobs_in_flight(self) -> t.Optional[int]:
+        """Counts the jobs of the user which are pending or running,
+        in the partition and with the QOS used to submit the studies
+
+        Returns:
+            The number of jobs in flight, or `None` if the SLURM queue cannot be read
+        """
+        try:
+            snapshot = self.get_queue_snapshot()
+        except GetQueueError as exc:
+            logger.warning(str(exc))
+            return None
+        in_flight = snapshot.filter(
+            states=IN_FLIGHT_JOB_STATES,
+            partition=self.slurm_script_features.partition,
+            qos=self.slurm_script_features.quality_of_service,
+        )
+        return len(in_flight)
+
+    @override
+    def get_submit_limit(self) -> t.Optional[int]:
+        """Reads from the SLURM database the maximum number of jobs the user can submit,
+        according to the limits of the QOS (`MaxSubmitPU`) and of the user association (`MaxSubmit`)
 
         Returns:
-            The error if connection.execute_command raises an error, otherwise the slurm queue info
+            The lowest limit, or `None` if no limit is defined or if the limits cannot be read
         """
         username = self.connection.username
-        command = f"squeue -u {username} --Format=name:40,state:12,starttime:22,TimeUsed:12,timelimit:12"
-        output, error = self.connection.execute_command(command)
-        return error or f"{username}@{self.connection.host}\n{output}"
+        qos = self.slurm_script_features.quality_of_service
+        partition = self.slurm_script_features.partition
+        # noinspection SpellCheckingInspection
+        queries = [["sacctmgr", "--noheader", "--parsable2", "show", "assoc", f"user={username}", "format=MaxSubmit"]]
+        if partition:
+            queries[0].insert(-1, f"partition={partition}")
+        if qos:
+            queries.append(["sacctmgr", "--noheader", "--parsable2", "show", "qos", qos, "format=MaxSubmitPU"])
+        limits: t.List[int] = []
+        for args in queries:
+            command = " ".join(shlex.quote(arg) for arg in args)
+            output, error = self._execute_with_retry(command)
+            if error or output is None:
+                logger.warning(f"The command [{command}] failed: {error}")
+                continue
+            limits.extend(int(value) for value in re.findall(r"^\s*(\d+)", output, flags=re.MULTILINE))
+        return min(limits) if limits else None
+
+    @override
+    def get_cpu_counts(self) -> t.Optional[CpuCounts]:
+        """Reads the number of idle and allocated CPUs of the nodes of the partition used to submit the studies
+
+        Returns:
+            The CPU counts, or `None` if they cannot be read
+        """
+        # noinspection SpellCheckingInspection
+        args = ["sinfo", "--noheader", "--format=%C"]
+        if self.slurm_script_features.partition:
+            args.append(f"--partition={self.slurm_script_features.partition}")
+        command = " ".join(shlex.quote(arg) for arg in args)
+        output, error = self._execute_with_retry(command)
+        if error or output is None:
+            logger.warning(f"The command [{command}] failed: {error}")
+            return None
+        return CpuCounts.from_sinfo_output(output)
 
     def kill_remote_job(self, job_id: int) -> None:
         """Kills job with ID
@@ -232,12 +1132,28 @@ class RemoteEnvironmentWithSlurm:
         Raises:
             KillJobErrorException if the command raises an error
         """
-        # noinspection SpellCheckingInspection
-        command = f"scancel {job_id}"
-        _, error = self.connection.execute_command(command)
-        if error:
-            reason = f"The command [{command}] failed: {error}"
-            raise KillJobError(job_id, reason)
+        self.kill_remote_jobs([job_id])
+
+    def kill_remote_jobs(self, job_ids: t.Sequence[int]) -> None:
+        """Kills several jobs with a single `scancel` command
+
+        Args:
+            job_ids: IDs of the jobs to kill
+
+        Raises:
+            KillJobErrorException if the command raises an error
+        """
+        if not job_ids:
+            return
+        try:
+            self.backend.cancel_jobs(job_ids)
+        finally:
+            self.clear_queue_snapshot()
+
+    @override
+    def kill_study_jobs(self, studies: t.Sequence[StudyDTO]) -> None:
+        """Kills the jobs of the studies with a single `scancel` command (see `kill_remote_jobs`)"""
+        self.kill_remote_jobs([study.job_id for study in studies])
 
     @staticmethod
     def convert_time_limit_from_seconds_to_minutes(time_limit_seconds: int) -> int:
@@ -259,6 +1175,7 @@ class RemoteEnvironmentWithSlurm:
             script_params,
         )
 
+    @override
     def submit_job(self, my_study: StudyDTO) -> int:
         """Submits the Antares job to slurm
 
@@ -283,22 +1200,17 @@ class RemoteEnvironmentWithSlurm:
             post_processing=my_study.post_processing,
             other_options=my_study.other_options,
             oversubscribe=my_study.oversubscribe,
+            memory_limit=my_study.memory_limit,
+            input_hash=my_study.input_hash,
+            output_include=my_study.output_include,
+            output_exclude=my_study.output_exclude,
         )
-        command = self.compose_launch_command(script_params)
-
-        output, error = self._execute_with_retry(command)
-        if error:
-            reason = f"The command [{command}] failed: {error}"
-            raise SubmitJobError(my_study.name, reason)
-
-        # should match "Submitted batch job 123456"
-        assert output is not None
-        if match := re.match(r"Submitted.*?(?P<job_id>\d+)", output, flags=re.IGNORECASE):
-            return int(match["job_id"])
-
-        reason = f"The command [{command}] return an non-parsable output:\n{textwrap.indent(output, 'OUTPUT> ')}"
-        raise SubmitJobError(my_study.name, reason)
+        try:
+            return self.backend.submit_job(self.remote_base_path, my_study.name, script_params)
+        finally:
+            self.clear_queue_snapshot()
 
+    @override
     def get_job_state_flags(
         self,
         study: StudyDTO,
@@ -320,95 +1232,97 @@ class RemoteEnvironmentWithSlurm:
         Raises:
             GetJobStateErrorException: If the job state cannot be retrieved after
             the specified number of attempts.
+
+        Note:
+            The SLURM job state is stored in the study (see `StudyDTO.slurm_state`).
+            When the job is finished, its resource accounting (elapsed time, CPU time,
+            peak memory...) is read from the SACCT database and stored in the study.
         """
-        job_state = self._retrieve_slurm_control_state(study.job_id, study.name)
+        probe = self._job_probes.get(study.job_id)
+        if probe is not None:
+            job_state = self._read_probed_job_state(study, probe)
+        else:
+            job_state = self._retrieve_job_state(study, attempts=attempts, sleep_time=sleep_time)
+        if job_state is None:
+            # noinspection SpellCheckingInspection
+            logger.warning(
+                f"Job '{study.job_id}' not found in SACCT database."
+                f"Assuming it was recently launched and will start processing soon."
+            )
+            job_state = JobStateCodes.RUNNING
+        else:
+            study.slurm_state = job_state.value
+
+        return JOB_STATE_FLAGS[job_state]
+
+    def _retrieve_job_state(self, study: StudyDTO, *, attempts: int, sleep_time: float) -> t.Optional[JobStateCodes]:
+        """
+        Retrieve the job state from the cached queue snapshot or with `scontrol`,
+        or with `sacct` if the job is no longer active.
+        The accounting is stored in the study when the job is finished.
+        """
+        snapshot = self._get_fresh_queue_snapshot()
+        if snapshot is None:
+            job_state = self._retrieve_slurm_control_state(study.job_id, study.name)
+        elif record := snapshot.get(study.job_id):
+            job_state = JobStateCodes(record.state)
+        else:
+            # The job submissions invalidate the snapshot: a job missing from it left the queue.
+            job_state = None
         if job_state is None:
             # noinspection SpellCheckingInspection
             logger.info(
                 f"Job '{study.job_id}' no longer active in SLURM, the job status is read from the SACCT database..."
             )
-            job_state = self._retrieve_slurm_acct_state(
+            acct_record = self._retrieve_slurm_acct_state(
                 study.job_id,
                 study.name,
                 attempts=attempts,
                 sleep_time=sleep_time,
             )
-        if job_state is None:
-            # noinspection SpellCheckingInspection
-            logger.warning(
-                f"Job '{study.job_id}' not found in SACCT database."
-                f"Assuming it was recently launched and will start processing soon."
-            )
-            job_state = JobStateCodes.RUNNING
+            if acct_record is not None:
+                job_state, accounting = acct_record
+                accounting.update_study(study)
+        elif job_state in FINISHED_JOB_STATES and not study.end_time:
+            # The job is still known by the controller, so the accounting
+            # is harvested with an extra query, only once.
+            self._harvest_job_accounting(study, attempts=attempts, sleep_time=sleep_time)
+        return job_state
 
-        not_started = (False, False, False)
-        started = (True, False, False)
-        finished_successfully = (True, True, False)
-        finished_with_error = (True, True, True)
-
-        return {
-            # JobStateCodes ------ started, finished, with_error
-            JobStateCodes.BOOT_FAIL: not_started,
-            JobStateCodes.CANCELLED: finished_with_error,
-            JobStateCodes.COMPLETED: finished_successfully,
-            JobStateCodes.COMPLETING: started,
-            JobStateCodes.CONFIGURING: started,
-            JobStateCodes.DEADLINE: finished_with_error,  # similar to timeout
-            JobStateCodes.EXPEDITING: not_started,
-            JobStateCodes.FAILED: finished_with_error,
-            JobStateCodes.LAUNCH_FAILED: finished_with_error,
-            JobStateCodes.NODE_FAIL: finished_with_error,
-            JobStateCodes.OUT_OF_MEMORY: finished_with_error,
-            JobStateCodes.PENDING: not_started,
-            JobStateCodes.POWER_UP_NODE: started,
-            JobStateCodes.PREEMPTED: not_started,
-            JobStateCodes.RECONFIG_FAIL: finished_with_error,
-            JobStateCodes.REQUEUE_FED: not_started,
-            JobStateCodes.REQUEUE_HOLD: not_started,
-            JobStateCodes.RUNNING: started,
-            JobStateCodes.REQUEUED: not_started,
-            JobStateCodes.RESIZING: not_started,
-            JobStateCodes.RESV_DEL_HOLD: not_started,
-            JobStateCodes.REVOKED: not_started,
-            JobStateCodes.SIGNALING: started,
-            JobStateCodes.SPECIAL_EXIT: not_started,
-            JobStateCodes.STAGE_OUT: started,
-            JobStateCodes.STOPPED: started,
-            JobStateCodes.SUSPENDED: started,
-            JobStateCodes.TIMEOUT: finished_with_error,
-            JobStateCodes.UPDATE_DB: started,
-        }[job_state]
-
-    def _retrieve_slurm_control_state(
-        self,
-        job_id: int,
-        job_name: str,
-    ) -> t.Optional[JobStateCodes]:
+    @staticmethod
+    def _read_probed_job_state(study: StudyDTO, probe: JobProbe) -> t.Optional[JobStateCodes]:
         """
-        Use the `scontrol` command to retrieve job status information in SLURM.
-        See: https://slurm.schedmd.com/scontrol.html
+        Read the job state from the probe: the queue state prevails over the SACCT database state.
+        The accounting is stored in the study when the job is finished.
         """
-        # Construct the command line arguments used to check alive jobs state.
-        # noinspection SpellCheckingInspection
-        args = ["scontrol", "show", "job", f"{job_id}"]
-        command = " ".join(shlex.quote(arg) for arg in args)
-        output, error = self._execute_with_retry(command)
-        if error:
-            # The command output may include an error message if the job is
-            # no longer active or has been removed
-            if re.search("Invalid job id specified", error):
-                return None
-            reason = f"The command [{command}] failed: {error}"
-            raise GetJobStateError(job_id, job_name, reason)
-
-        # We can retrieve the job state from the output of the command
-        # by extracting the value of the `JobState` field.
-        assert output is not None
-        if match := re.search(r"JobState=(\w+)", output):
-            return JobStateCodes(match[1])
+        acct_record = _parse_sacct_output(study.job_id, study.name, probe.sacct_output)
+        job_state = JobStateCodes(probe.squeue_state) if probe.squeue_state else None
+        if acct_record is not None:
+            job_state = job_state or acct_record[0]
+            if job_state in FINISHED_JOB_STATES:
+                acct_record[1].update_study(study)
+        return job_state
+
+    def _harvest_job_accounting(self, study: StudyDTO, *, attempts: int, sleep_time: float) -> None:
+        """
+        Read the resource accounting of a finished job from the SACCT database and store it in the study.
+        Failures are not critical: the accounting is only used for statistics.
+        """
+        try:
+            acct_record = self._retrieve_slurm_acct_state(
+                study.job_id,
+                study.name,
+                attempts=attempts,
+                sleep_time=sleep_time,
+            )
+        except GetJobStateError as exc:
+            logger.warning(f"Unable to harvest the accounting of job '{study.job_id}': {exc}")
+        else:
+            if acct_record is not None:
+                acct_record[1].update_study(study)
 
-        reason = f"The command [{command}] return an non-parsable output:\n{textwrap.indent(output, 'OUTPUT> ')}"
-        raise GetJobStateError(job_id, job_name, reason)
+    def _retrieve_slurm_control_state(self, job_id: int, job_name: str) -> t.Optional[JobStateCodes]:
+        return self.backend.get_job_state(job_id, job_name)
 
     def _retrieve_slurm_acct_state(
         self,
@@ -417,56 +1331,8 @@ class RemoteEnvironmentWithSlurm:
         *,
         attempts: int = 5,
         sleep_time: float = 0.5,
-    ) -> t.Optional[JobStateCodes]:
-        # Construct the command line arguments used to check the jobs state.
-        # See the man page: https://slurm.schedmd.com/sacct.html
-        # noinspection SpellCheckingInspection
-        delimiter = ","
-        # noinspection SpellCheckingInspection
-        args = [
-            "sacct",
-            f"--jobs={job_id}",
-            f"--name={job_name}",
-            "--format=JobID,JobName,State",
-            "--parsable2",
-            f"--delimiter={delimiter}",
-            "--noheader",
-        ]
-        command = " ".join(shlex.quote(arg) for arg in args)
-
-        # Makes several attempts to get the job state.
-        # I don't really know why, but it's better to reproduce the old behavior.
-        output: t.Optional[str]
-        last_error: str = ""
-        for attempt in range(attempts):
-            output, error = self.connection.execute_command(command)
-            if output is not None:
-                break
-            last_error = error
-            time.sleep(sleep_time)
-        else:
-            reason = f"The command [{command}] failed after {attempts} attempts: {last_error}"
-            raise GetJobStateError(job_id, job_name, reason)
-
-        # When the output is empty it mean that the job is not found
-        if not output.strip():
-            return None
-
-        # Parse the output to extract the job state.
-        # The output must be a CSV-like string without header row.
-        for line in output.splitlines():
-            parts = line.split(delimiter)
-            if len(parts) == 3:
-                out_job_id, out_job_name, out_state = parts
-                if out_job_id == str(job_id) and out_job_name == job_name:
-                    # Match the first word only, e.g.: "CANCEL by 123456798"
-                    match = re.match(r"(\w+)", out_state)
-                    if not match:
-                        raise GetJobStateError(job_id, job_name, f"Unable to parse the job state: '{out_state}'")
-                    return JobStateCodes(match[1])
-
-        reason = f"The command [{command}] return an non-parsable output:\n{textwrap.indent(output, 'OUTPUT> ')}"
-        raise GetJobStateError(job_id, job_name, reason)
+    ) -> t.Optional[t.Tuple[JobStateCodes, JobAccounting]]:
+        return self.backend.get_job_accounting(job_id, job_name, attempts=attempts, sleep_time=sleep_time)
 
     def upload_file(self, src: str) -> bool:
         """Uploads a file to the remote server
@@ -480,6 +1346,19 @@ class RemoteEnvironmentWithSlurm:
         dst = f"{self.remote_base_path}/{Path(src).name}"
         return self.connection.upload_file(src, dst)
 
+    @override
+    def upload_input_zipfile(self, study: StudyDTO) -> bool:
+        """Uploads the input ZIP file of a study to the remote server
+
+        Args:
+            study: The study to upload
+
+        Returns:
+            True if the file has been successfully sent, False otherwise
+        """
+        return self.upload_file(study.zipfile_path)
+
+    @override
     def download_logs(self, study: StudyDTO) -> t.Sequence[Path]:
         """
         Download the slurm logs of a given study.
@@ -492,6 +1371,9 @@ class RemoteEnvironmentWithSlurm:
         Returns:
             The paths of the downloaded logs on the local filesystem.
         """
+        probe = self._job_probes.get(study.job_id)
+        if probe is not None and not probe.log_files:
+            return []
         src_dir = PurePosixPath(self.remote_base_path)
         dst_dir = Path(study.job_log_dir)
         return self.connection.download_files(
@@ -501,6 +1383,7 @@ class RemoteEnvironmentWithSlurm:
             remove=study.finished,
         )
 
+    @override
     def download_final_zip(self, study: StudyDTO) -> t.Optional[Path]:
         """
         Download the final ZIP file for the specified study from the remote
@@ -520,6 +1403,9 @@ class RemoteEnvironmentWithSlurm:
             The downloaded file will be saved to the local output directory
             specified in `study.output_dir`.
         """
+        probe = self._job_probes.get(study.job_id)
+        if probe is not None and not probe.result_files:
+            return None
         src_dir = PurePosixPath(self.remote_base_path)
         dst_dir = Path(study.output_dir)
         downloaded_files = self.connection.download_files(
@@ -530,6 +1416,85 @@ class RemoteEnvironmentWithSlurm:
         )
         return next(iter(downloaded_files), None)
 
+    @override
+    def read_result_manifest(self, study: StudyDTO) -> t.Optional[t.List[t.Dict[str, t.Any]]]:
+        """
+        Reads the list of the files of the final ZIP file of a study, which is kept on the remote server.
+
+        Only the central directory of the ZIP file is transferred. The remote path of the ZIP file
+        is recorded in `study.remote_final_zipfile_path`.
+
+        Args:
+            study: The study whose job is finished.
+
+        Returns:
+            The manifest of the results: a list of mappings with the `path`, the `size`
+            and the `crc32` checksum of each file, or `None` if the final ZIP file is not found.
+
+        Raises:
+            RemoteResultsError: If the final ZIP file cannot be read.
+        """
+        probe = self._job_probes.get(study.job_id)
+        if probe is not None and not probe.result_files:
+            return None
+        for name in [f"finished_{study.name}_{study.job_id}.zip", f"finished_XPANSION_{study.name}_{study.job_id}.zip"]:
+            zip_path = f"{self.remote_base_path}/{name}"
+            if self.connection.check_file_not_empty(zip_path):
+                break
+        else:
+            return None
+        try:
+            with self.connection.open_remote_file(zip_path) as remote_file, zipfile.ZipFile(remote_file) as zf:
+                manifest = [
+                    {"path": info.filename, "size": info.file_size, "crc32": info.CRC}
+                    for info in zf.infolist()
+                    if not info.is_dir()
+                ]
+        except Exception as exc:
+            raise RemoteResultsError(study.name, f"{zip_path}: {exc}") from exc
+        study.remote_final_zipfile_path = zip_path
+        return manifest
+
+    @override
+    def fetch_result_files(self, study: StudyDTO, paths: t.Iterable[str], dst_dir: Path) -> t.List[Path]:
+        """
+        Extracts some files of the final ZIP file kept on the remote server (see `read_result_manifest`).
+
+        Only the extracted files are transferred, their checksums are verified.
+        The members are read ahead with pipelined requests, by batches of 64 MiB at most.
+
+        Args:
+            study: The study whose results are kept on the remote server.
+            paths: The paths of the files to extract, as recorded in the manifest.
+            dst_dir: The local directory where the files are extracted.
+
+        Returns:
+            The paths of the extracted files.
+
+        Raises:
+            RemoteResultsError: If the files cannot be extracted.
+        """
+        try:
+            with self.connection.open_remote_file(study.remote_final_zipfile_path) as remote_file:
+                prefetched_file = _PrefetchedFile(remote_file)
+                with zipfile.ZipFile(t.cast(t.BinaryIO, prefetched_file)) as zf:
+                    members = list(paths)
+                    ranges = _get_member_ranges(zf, members)
+                    extracted: t.List[Path] = []
+                    # the members are read ahead by batches, to bound the memory used
+                    while len(extracted) < len(members):
+                        start = stop = len(extracted)
+                        batch_size = ranges[start][1]
+                        while stop + 1 < len(members) and batch_size + ranges[stop + 1][1] <= _PREFETCH_BATCH_SIZE:
+                            stop += 1
+                            batch_size += ranges[stop][1]
+                        prefetched_file.prefetch(ranges[start : stop + 1])
+                        extracted.extend(Path(zf.extract(path, dst_dir)) for path in members[start : stop + 1])
+                    return extracted
+        except Exception as exc:
+            raise RemoteResultsError(study.name, f"{study.remote_final_zipfile_path}: {exc}") from exc
+
+    @override
     def remove_input_zipfile(self, study: StudyDTO) -> bool:
         """Removes initial zipfile
 
@@ -544,6 +1509,7 @@ class RemoteEnvironmentWithSlurm:
             study.input_zipfile_removed = self.connection.remove_file(f"{self.remote_base_path}/{zip_name}")
         return study.input_zipfile_removed
 
+    @override
     def remove_remote_final_zipfile(self, study: StudyDTO) -> bool:
         """Removes final zipfile
 
@@ -555,6 +1521,7 @@ class RemoteEnvironmentWithSlurm:
         """
         return self.connection.remove_file(f"{self.remote_base_path}/{Path(study.local_final_zipfile_path).name}")
 
+    @override
     def clean_remote_server(self, study: StudyDTO) -> bool:
         """
         Removes the input and the output zipfile from the remote host
@@ -0,0 +1,279 @@
+"""
+Remote status probe.
+
+The probe is a small Python script uploaded to the remote base directory
+of the launcher. Given a list of SLURM job IDs, it prints one JSON document
+describing, for each job:
+
+- the state of the job in the SLURM queue (`squeue`), if the job is still queued,
+- the presence and the sizes of the log files and of the result files.
+
+The accounting of all the jobs (`sacct`) is added to the document as a raw
+CSV-like output, in the same format as the one used by the launcher to read
+the accounting of a single job.
+
+This way, the state of all the jobs of a retrieval cycle can be known from a single SSH command.
+
+With the `--watch INTERVAL` option, the probe becomes a long-lived watcher: it checks
+the SLURM queue every INTERVAL seconds and prints only the job state transitions,
+one JSON document per line, until all the jobs are finished.
+"""
+
+import dataclasses
+import json
+import typing as t
+
+PROBE_SCRIPT_VERSION = "1.1.0"
+"""Version of the probe script, bump it whenever the script changes."""
+
+PROBE_SCRIPT_NAME = f"antares_launcher_probe_v{PROBE_SCRIPT_VERSION}.py"
+"""Name of the probe script in the remote base directory (versioned)."""
+
+# noinspection SpellCheckingInspection
+_PROBE_SCRIPT_TEMPLATE = '''\
+#!/usr/bin/env python3
+"""
+Antares Launcher remote status probe v{version}
+
+usage: python3 {name} [--watch INTERVAL] REMOTE_BASE_DIR JOB_ID...
+"""
+
+import argparse
+import fnmatch
+import getpass
+import json
+import os
+import subprocess
+import sys
+import time
+
+VERSION = "{version}"
+SACCT_FORMAT = "{sacct_format}"
+FINISHED_STATES = {finished_states!r}
+
+
+def run(args):
+    try:
+        proc = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    except OSError as exc:
+        return None, "{{}}: {{}}".format(args[0], exc)
+    if proc.returncode:
+        return None, "{{}}: {{}}".format(args[0], proc.stderr.strip() or "exit code {{}}".format(proc.returncode))
+    return proc.stdout, ""
+
+
+def get_queue_states():
+    output, error = run(["squeue", "--noheader", "--user=" + getpass.getuser(), "--states=all", "--format=%i|%T"])
+    states = {{}}
+    for line in (output or "").splitlines():
+        job_id, _, state = line.strip().partition("|")
+        states[job_id] = state
+    return states, error
+
+
+def probe(base_dir, job_ids):
+    result = {{"version": VERSION, "errors": [], "sacct": "", "jobs": {{}}}}
+
+    states, error = get_queue_states()
+    if error:
+        result["errors"].append(error)
+
+    if job_ids:
+        ids = ",".join(str(job_id) for job_id in job_ids)
+        args = ["sacct", "--jobs=" + ids, "--format=" + SACCT_FORMAT, "--parsable2", "--delimiter=,", "--noheader"]
+        output, error = run(args)
+        if error:
+            result["errors"].append(error)
+        result["sacct"] = output or ""
+
+    sizes = {{}}
+    try:
+        for entry in os.scandir(base_dir):
+            if entry.is_file():
+                sizes[entry.name] = entry.stat().st_size
+    except OSError as exc:
+        result["errors"].append(str(exc))
+
+    for job_id in job_ids:
+        logs_pattern = "*{{}}*.txt".format(job_id)
+        results_suffix = "_{{}}.zip".format(job_id)
+        result["jobs"][str(job_id)] = {{
+            "state": states.get(str(job_id)),
+            "logs": {{n: s for n, s in sizes.items() if fnmatch.fnmatch(n, logs_pattern)}},
+            "results": {{n: s for n, s in sizes.items() if n.startswith("finished_") and n.endswith(results_suffix)}},
+        }}
+
+    json.dump(result, sys.stdout)
+
+
+def emit(obj):
+    sys.stdout.write(json.dumps(obj) + "\\n")
+    sys.stdout.flush()
+
+
+def watch(job_ids, interval, heartbeat, max_duration):
+    known_states = {{}}
+    pending = set(job_ids)
+    start = last_emit = time.time()
+    while pending and time.time() - start < max_duration:
+        queue_states, error = get_queue_states()
+        if error:
+            emit({{"error": error}})
+            last_emit = time.time()
+            time.sleep(interval)
+            continue
+        # The jobs which left the queue are finished: their final state is read from `sacct`
+        left_ids = sorted(job_id for job_id in pending if str(job_id) not in queue_states)
+        final_states = {{}}
+        if left_ids:
+            ids = ",".join(str(job_id) for job_id in left_ids)
+            args = ["sacct", "--jobs=" + ids, "--format=JobID,State", "--parsable2", "--noheader", "--allocations"]
+            output, _ = run(args)
+            for line in (output or "").splitlines():
+                job_id, _, state = line.strip().partition("|")
+                final_states[job_id] = state.split(" ")[0]
+        for job_id in sorted(pending):
+            if str(job_id) in queue_states:
+                state = queue_states[str(job_id)]
+                final = state in FINISHED_STATES
+            else:
+                state = final_states.get(str(job_id)) or None
+                final = True
+            if final or known_states.get(job_id) != state:
+                emit({{"job_id": job_id, "state": state, "final": final}})
+                last_emit = time.time()
+                known_states[job_id] = state
+            if final:
+                pending.discard(job_id)
+        if pending:
+            if time.time() - last_emit >= heartbeat:
+                emit({{"heartbeat": time.time()}})
+                last_emit = time.time()
+            time.sleep(interval)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--watch", type=float, default=0, help="print the job state transitions as JSON lines")
+    parser.add_argument("--heartbeat", type=float, default=60)
+    parser.add_argument("--max-duration", type=float, default=86400)
+    parser.add_argument("base_dir")
+    parser.add_argument("job_ids", type=int, nargs="*")
+    args = parser.parse_args(argv[1:])
+    try:
+        if args.watch > 0:
+            watch(args.job_ids, args.watch, args.heartbeat, args.max_duration)
+        else:
+            probe(args.base_dir, args.job_ids)
+    except BrokenPipeError:
+        # the launcher has closed the connection
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
+'''
+
+
+def render_probe_script(sacct_fields: t.Sequence[str], finished_states: t.Iterable[str] = ()) -> str:
+    """
+    Render the source code of the probe script.
+
+    Args:
+        sacct_fields: Columns of the `sacct` query, see `SACCT_FIELDS`.
+        finished_states: Final job states, see `FINISHED_JOB_STATES`.
+
+    Returns:
+        The source code of the probe script.
+    """
+    return _PROBE_SCRIPT_TEMPLATE.format(
+        version=PROBE_SCRIPT_VERSION,
+        name=PROBE_SCRIPT_NAME,
+        sacct_format=",".join(sacct_fields),
+        finished_states=sorted(finished_states),
+    )
+
+
+@dataclasses.dataclass
+class JobProbe:
+    """
+    State of a SLURM job and of its remote files, as reported by the probe script.
+
+    Attributes:
+        job_id: The SLURM job ID.
+        squeue_state: The job state in the SLURM queue, or `None` if the job is no longer queued.
+        sacct_output: The raw `sacct` output of the probe (shared by all the jobs).
+        log_files: Names and sizes of the log files in the remote base directory.
+        result_files: Names and sizes of the final ZIP files in the remote base directory.
+    """
+
+    job_id: int
+    squeue_state: t.Optional[str] = None
+    sacct_output: str = ""
+    log_files: t.Dict[str, int] = dataclasses.field(default_factory=dict)
+    result_files: t.Dict[str, int] = dataclasses.field(default_factory=dict)
+
+
+def parse_probe_output(output: str) -> t.Tuple[t.Dict[int, JobProbe], t.List[str]]:
+    """
+    Parse the JSON document printed by the probe script.
+
+    Args:
+        output: The standard output of the probe script.
+
+    Returns:
+        The job probes indexed by job ID, and the errors reported by the probe.
+
+    Raises:
+        ValueError: If the output is not a valid probe document.
+    """
+    obj = json.loads(output)
+    if not isinstance(obj, dict) or not isinstance(obj.get("jobs"), dict):
+        raise ValueError(f"Invalid probe document: {output[:200]!r}")
+    sacct_output = obj.get("sacct") or ""
+    probes = {}
+    for job_id, job in obj["jobs"].items():
+        probes[int(job_id)] = JobProbe(
+            job_id=int(job_id),
+            squeue_state=job.get("state") or None,
+            sacct_output=sacct_output,
+            log_files=dict(job.get("logs") or {}),
+            result_files=dict(job.get("results") or {}),
+        )
+    return probes, list(obj.get("errors") or [])
+
+
+@dataclasses.dataclass(frozen=True)
+class JobTransition:
+    """
+    Job state transition, as reported by the probe script in watch mode.
+
+    Attributes:
+        job_id: The SLURM job ID.
+        state: The new job state, or `None` if the job left the queue with an unknown state.
+        final: Whether the job is finished.
+    """
+
+    job_id: int
+    state: t.Optional[str]
+    final: bool
+
+
+def parse_watch_line(line: str) -> t.Optional[JobTransition]:
+    """
+    Parse a line printed by the probe script in watch mode.
+
+    Args:
+        line: A JSON document: a job state transition, a heartbeat or an error.
+
+    Returns:
+        The job state transition, or `None` for the other documents (heartbeats, errors) or invalid lines.
+    """
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(obj, dict) or "job_id" not in obj:
+        return None
+    return JobTransition(job_id=int(obj["job_id"]), state=obj.get("state") or None, final=bool(obj.get("final")))
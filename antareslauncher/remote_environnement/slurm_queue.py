@@ -0,0 +1,190 @@
+"""
+Structured snapshot of the SLURM queue, read with a machine-readable `squeue` format.
+"""
+
+import dataclasses
+import fnmatch
+import time
+import typing as t
+
+# noinspection SpellCheckingInspection
+SQUEUE_FIELDS = (
+    ("job_id", "%i"),
+    ("state", "%T"),
+    ("reason", "%r"),
+    ("start_time", "%S"),
+    ("time_used", "%M"),
+    ("time_limit", "%l"),
+    ("partition", "%P"),
+    ("cpus", "%C"),
+    ("qos", "%q"),
+    ("name", "%j"),  # last column, because the job name may contain the delimiter
+)
+"""Attributes of `QueueRecord` and the corresponding `squeue --format` specifiers."""
+
+SQUEUE_DELIMITER = "|"
+
+SQUEUE_FORMAT = SQUEUE_DELIMITER.join(spec for _, spec in SQUEUE_FIELDS)
+"""Value of the `squeue --format` option used to take a snapshot."""
+
+
+@dataclasses.dataclass(frozen=True)
+class QueueRecord:
+    """
+    A job of the SLURM queue.
+
+    Attributes:
+        job_id: The SLURM job ID (a string, because job arrays IDs are like "123_4").
+        name: The job name (the study name for the jobs of the launcher).
+        state: The job state in extended form, e.g.: "PENDING", "RUNNING", "COMPLETING".
+        reason: The reason why the job is pending, e.g.: "Priority", "Resources", or "None".
+        start_time: The actual or expected start time (ISO 8601), or "N/A".
+        time_used: The time used by the job, e.g.: "1:02:03" or "1-00:00:00".
+        time_limit: The time limit of the job, e.g.: "2-00:00:00" or "UNLIMITED".
+        partition: The partition of the job.
+        cpus: The number of CPUs requested or allocated.
+        qos: The quality of service of the job.
+    """
+
+    job_id: str
+    name: str
+    state: str
+    reason: str = ""
+    start_time: str = ""
+    time_used: str = ""
+    time_limit: str = ""
+    partition: str = ""
+    cpus: int = 0
+    qos: str = ""
+
+    @classmethod
+    def from_squeue_line(cls, line: str) -> t.Optional["QueueRecord"]:
+        """Parse a line of `squeue --format=SQUEUE_FORMAT`, return `None` if the line is invalid"""
+        parts = line.strip("\r\n").split(SQUEUE_DELIMITER, len(SQUEUE_FIELDS) - 1)
+        if len(parts) != len(SQUEUE_FIELDS):
+            return None
+        fields = {name: value.strip() for (name, _), value in zip(SQUEUE_FIELDS, parts)}
+        if not fields["job_id"]:
+            return None
+        cpus = fields.pop("cpus")
+        return cls(cpus=int(cpus) if cpus.isdigit() else 0, **fields)
+
+
+@dataclasses.dataclass
+class QueueSnapshot:
+    """
+    The jobs of a user in the SLURM queue, at a given time.
+
+    Attributes:
+        username: The owner of the jobs.
+        host: The SLURM server.
+        records: The jobs in the queue.
+        timestamp: The time of the snapshot (see `time.time`).
+    """
+
+    username: str
+    host: str
+    records: t.Sequence[QueueRecord]
+    timestamp: float = dataclasses.field(default_factory=time.time)
+    _by_job_id: t.Dict[str, QueueRecord] = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._by_job_id = {record.job_id: record for record in self.records}
+
+    @classmethod
+    def from_squeue_output(cls, username: str, host: str, output: str) -> "QueueSnapshot":
+        records = [r for r in map(QueueRecord.from_squeue_line, output.splitlines()) if r is not None]
+        return cls(username=username, host=host, records=records)
+
+    @property
+    def age(self) -> float:
+        """Age of the snapshot in seconds"""
+        return time.time() - self.timestamp
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> t.Iterator[QueueRecord]:
+        return iter(self.records)
+
+    def get(self, job_id: t.Union[int, str]) -> t.Optional[QueueRecord]:
+        """Find a job by its ID, return `None` if the job is not in the queue"""
+        return self._by_job_id.get(str(job_id))
+
+    def filter(
+        self,
+        *,
+        job_ids: t.Optional[t.Iterable[t.Union[int, str]]] = None,
+        name: str = "",
+        states: t.Optional[t.Iterable[str]] = None,
+        partition: str = "",
+        qos: str = "",
+    ) -> "QueueSnapshot":
+        """
+        Select the jobs matching all the given criteria.
+
+        Args:
+            job_ids: The job IDs to select.
+            name: A glob pattern of the job names to select, e.g.: "study_*".
+            states: The job states to select, e.g.: `["PENDING", "RUNNING"]`.
+            partition: The partition of the jobs to select.
+            qos: The quality of service of the jobs to select.
+
+        Returns:
+            A snapshot containing the selected jobs (with the same timestamp).
+        """
+        selected_ids = None if job_ids is None else {str(job_id) for job_id in job_ids}
+        selected_states = None if states is None else set(states)
+        records = [
+            record
+            for record in self.records
+            if (selected_ids is None or record.job_id in selected_ids)
+            and (not name or fnmatch.fnmatchcase(record.name, name))
+            and (selected_states is None or record.state in selected_states)
+            and (not partition or record.partition == partition)
+            and (not qos or record.qos == qos)
+        ]
+        return QueueSnapshot(username=self.username, host=self.host, records=records, timestamp=self.timestamp)
+
+    def render(self) -> str:
+        """Render the snapshot as a table, one line per job"""
+        lines = [
+            f"{'JOBID':<12}{'NAME':<40}{'STATE':<12}{'REASON':<16}{'START_TIME':<22}"
+            f"{'TIME':<12}{'TIME_LIMIT':<12}{'PARTITION':<12}{'CPUS':>5}"
+        ]
+        for r in self.records:
+            lines.append(
+                f"{r.job_id:<12}{r.name[:39]:<40}{r.state:<12}{r.reason[:15]:<16}{r.start_time:<22}"
+                f"{r.time_used:<12}{r.time_limit:<12}{r.partition[:11]:<12}{r.cpus:>5}"
+            )
+        return "\n".join(lines)
+
+
+@dataclasses.dataclass(frozen=True)
+class CpuCounts:
+    """
+    The CPUs of the nodes of a partition, read with `sinfo --format=%C`.
+
+    Attributes:
+        allocated: The number of CPUs allocated to running jobs.
+        idle: The number of CPUs available for new jobs.
+        other: The number of CPUs of the nodes which are down or drained.
+        total: The total number of CPUs.
+    """
+
+    allocated: int = 0
+    idle: int = 0
+    other: int = 0
+    total: int = 0
+
+    @classmethod
+    def from_sinfo_output(cls, output: str) -> t.Optional["CpuCounts"]:
+        """Parse the lines "allocated/idle/other/total" of `sinfo`, return `None` if there is no valid line"""
+        counts = [0, 0, 0, 0]
+        found = False
+        for line in output.splitlines():
+            parts = line.strip().split("/")
+            if len(parts) == 4 and all(part.isdigit() for part in parts):
+                counts = [count + int(part) for count, part in zip(counts, parts)]
+                found = True
+        return cls(*counts) if found else None
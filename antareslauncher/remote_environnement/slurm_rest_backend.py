@@ -0,0 +1,447 @@
+"""
+Scheduler backend using the SLURM REST API (`slurmrestd`).
+
+The jobs are submitted, queried and cancelled with JSON requests sent over
+a single persistent HTTP connection, instead of parsing the output of the
+SLURM commands run through SSH. The whole queue of the user is read with
+one request, and several jobs are cancelled with one request.
+
+See: https://slurm.schedmd.com/rest_api.html
+"""
+
+import datetime
+import http.client
+import json
+import logging
+import re
+import shlex
+import time
+import typing as t
+import urllib.parse
+
+from typing_extensions import override
+
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    GetJobStateError,
+    GetQueueError,
+    JobAccounting,
+    JobStateCodes,
+    KillJobError,
+    RemoteEnvBaseError,
+    SchedulerBackend,
+    SubmitJobError,
+    SubmitLimitReachedError,
+)
+from antareslauncher.remote_environnement.slurm_queue import QueueRecord, QueueSnapshot
+from antareslauncher.remote_environnement.slurm_script_features import ScriptParametersDTO, SlurmScriptFeatures
+from antareslauncher.remote_environnement.ssh_connection import SshConnection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_VERSION = "v0.0.40"
+
+# noinspection SpellCheckingInspection
+_TOKEN_LIFESPAN = 3600  # seconds, for the tokens generated with `scontrol token`
+
+# The Antares Solver script is run by a wrapper, because `slurmrestd` needs the script content.
+_WRAPPER_SCRIPT = '#!/bin/bash\nexec bash {script_path} "$@"\n'
+
+_DEFAULT_PATH = "/bin:/usr/bin:/usr/local/bin"
+
+# Variables of the SSH session, which are meaningless in the job
+_SESSION_VARIABLES = frozenset({"_", "OLDPWD", "PWD", "SHLVL", "TERM"})
+
+
+class SlurmRestError(RemoteEnvBaseError):
+    def __init__(self, method: str, path: str, reason: str):
+        msg = f"The SLURM REST request [{method} {path}] failed: {reason}"
+        super().__init__(msg)
+
+
+def _number(value: t.Any) -> t.Optional[float]:
+    """
+    Read a number from the JSON document: the recent API versions use objects
+    like `{"set": true, "infinite": false, "number": 42}`, the older ones use plain numbers.
+
+    Returns:
+        The number, `inf` if the value is infinite, or `None` if the value is not set.
+    """
+    if isinstance(value, dict):
+        if value.get("infinite"):
+            return float("inf")
+        if not value.get("set", True):
+            return None
+        value = value.get("number")
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _state(value: t.Any) -> str:
+    """Read a job state, which is a list of flags in the recent API versions, e.g.: `["RUNNING"]`"""
+    if isinstance(value, dict):
+        value = value.get("current")
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    return str(value or "")
+
+
+def _format_datetime(value: t.Any) -> str:
+    """Convert a UNIX timestamp to an ISO 8601 date/time, like `sacct` and `squeue` do"""
+    timestamp = _number(value)
+    if not timestamp or timestamp == float("inf"):
+        return ""
+    return datetime.datetime.fromtimestamp(timestamp).isoformat(timespec="seconds")
+
+
+def _format_duration(seconds: float) -> str:
+    """Format a duration like `squeue` does: "[DD-]HH:MM:SS" or "MM:SS" """
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}-{hours:02d}:{minutes:02d}:{secs:02d}"
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+def _tres_count(tres_list: t.Any, tres_type: str) -> int:
+    """Read a TRES count, e.g.: the number of CPUs in `[{"type": "cpu", "count": 4}]`"""
+    for tres in tres_list or []:
+        if isinstance(tres, dict) and tres.get("type") == tres_type:
+            return int(tres.get("count") or 0)
+    return 0
+
+
+class SlurmRestClient:
+    """
+    Minimal HTTP client for the SLURM REST API, reusing the same connection for all the requests.
+
+    The authentication uses a JSON Web Token (JWT). If no token is given,
+    a token is generated on the remote server with `scontrol token`, using the SSH connection,
+    and is renewed when it expires.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        username: str,
+        *,
+        token: str = "",
+        connection: t.Optional[SshConnection] = None,
+        timeout: float = 30,
+    ):
+        parsed_url = urllib.parse.urlsplit(url)
+        if parsed_url.scheme not in {"http", "https"} or not parsed_url.hostname:
+            raise ValueError(f"Invalid SLURM REST API URL: '{url}'")
+        self.url = url
+        self.username = username
+        self.timeout = timeout
+        self._parsed_url = parsed_url
+        self._token = token
+        self._token_expiry = float("inf") if token else 0.0
+        self._ssh_connection = connection
+        self._http_connection: t.Optional[http.client.HTTPConnection] = None
+        self._user_environment: t.Optional[t.List[str]] = None
+
+    def _get_http_connection(self) -> http.client.HTTPConnection:
+        if self._http_connection is None:
+            host = self._parsed_url.hostname
+            assert host is not None
+            if self._parsed_url.scheme == "https":
+                self._http_connection = http.client.HTTPSConnection(host, self._parsed_url.port, timeout=self.timeout)
+            else:
+                self._http_connection = http.client.HTTPConnection(host, self._parsed_url.port, timeout=self.timeout)
+        return self._http_connection
+
+    def close(self) -> None:
+        if self._http_connection is not None:
+            self._http_connection.close()
+            self._http_connection = None
+
+    def _get_token(self, *, renew: bool = False) -> str:
+        if (renew or time.time() >= self._token_expiry) and self._ssh_connection is not None:
+            # noinspection SpellCheckingInspection
+            command = f"scontrol token lifespan={_TOKEN_LIFESPAN}"
+            output, error = self._ssh_connection.execute_command(command)
+            match = re.search(r"SLURM_JWT=(\S+)", output or "")
+            if error or not match:
+                raise SlurmRestError("POST", "token", f"The command [{command}] failed: {error or output}")
+            self._token = match[1]
+            self._token_expiry = time.time() + _TOKEN_LIFESPAN * 0.9
+        return self._token
+
+    def get_user_environment(self) -> t.List[str]:
+        """
+        Get the environment of the user on the remote server, exported to the jobs like `sbatch` does.
+
+        The environment of a login shell is read once, with the SSH connection: the jobs need
+        `HOME`, `USER` or `MODULEPATH` to load the modules of the Antares Solver.
+        Without SSH connection, only the user name and a default `PATH` are known.
+
+        Returns:
+            The environment variables, as "NAME=value" strings.
+        """
+        if self._user_environment is not None:
+            return self._user_environment
+        environment = [f"PATH={_DEFAULT_PATH}", f"USER={self.username}", f"LOGNAME={self.username}"]
+        if self._ssh_connection is None:
+            return environment
+        command = "bash -lc 'env -0'"
+        output, error = self._ssh_connection.execute_command(command)
+        if not output:
+            logger.warning(f"Unable to read the environment of the user with [{command}]: {error}")
+            return environment
+        self._user_environment = [
+            variable
+            for variable in output.split("\0")
+            if re.match(r"[A-Za-z_]\w*(%%)?=", variable)
+            and variable.split("=", 1)[0] not in _SESSION_VARIABLES
+            and not variable.startswith("SSH_")
+        ]
+        return self._user_environment
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: t.Optional[t.Mapping[str, t.Any]] = None,
+    ) -> t.Dict[str, t.Any]:
+        """
+        Send a request to the SLURM REST API and return the JSON response.
+
+        The request is sent again once if the connection has been closed by the server
+        (the idle keep-alive connections are closed after a while) or if the token has expired.
+
+        Args:
+            method: HTTP method, e.g.: "GET".
+            path: path of the endpoint, relative to the URL of the API, e.g.: "/slurm/v0.0.40/jobs".
+            body: JSON body of the request.
+
+        Returns:
+            The JSON response.
+
+        Raises:
+            SlurmRestError: If the request fails or if the response reports errors.
+        """
+        full_path = self._parsed_url.path.rstrip("/") + path
+        payload = None if body is None else json.dumps(body).encode("utf-8")
+        renew_token = False
+        for attempt in range(2):
+            headers = {
+                "Accept": "application/json",
+                "X-SLURM-USER-NAME": self.username,
+                "X-SLURM-USER-TOKEN": self._get_token(renew=renew_token),
+            }
+            if payload is not None:
+                headers["Content-Type"] = "application/json"
+            conn = self._get_http_connection()
+            try:
+                conn.request(method, full_path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as exc:
+                self.close()
+                if attempt:
+                    raise SlurmRestError(method, path, str(exc)) from None
+                logger.debug(f"SLURM REST connection lost, reconnecting: {exc}")
+                continue
+            if response.status == 401 and not attempt and self._ssh_connection is not None:
+                renew_token = True
+                continue
+            break
+        try:
+            obj = json.loads(data) if data else {}
+        except ValueError:
+            raise SlurmRestError(method, path, f"HTTP {response.status}: {data[:200]!r}") from None
+        errors = [e.get("error") or e.get("description") or str(e) for e in obj.get("errors") or []]
+        if response.status >= 400 or errors:
+            raise SlurmRestError(method, path, f"HTTP {response.status}: {'; '.join(errors) or response.reason}")
+        return t.cast(t.Dict[str, t.Any], obj)
+
+
+class RestSchedulerBackend(SchedulerBackend):
+    """
+    Scheduler backend using the SLURM REST API (`slurmrestd`).
+
+    The SLURM options of the jobs are the ones of the `sbatch` command composed by `SlurmScriptFeatures`.
+    """
+
+    def __init__(
+        self,
+        client: SlurmRestClient,
+        slurm_script_features: SlurmScriptFeatures,
+        *,
+        api_version: str = DEFAULT_API_VERSION,
+    ):
+        self.client = client
+        self.slurm_script_features = slurm_script_features
+        self.api_version = api_version
+
+    @property
+    def _slurm_path(self) -> str:
+        return f"/slurm/{self.api_version}"
+
+    @property
+    def _slurmdb_path(self) -> str:
+        return f"/slurmdb/{self.api_version}"
+
+    def _job_description(
+        self, remote_launch_dir: str, job_name: str, params: ScriptParametersDTO
+    ) -> t.Dict[str, t.Any]:
+        features = self.slurm_script_features
+        job: t.Dict[str, t.Any] = {
+            "name": job_name,
+            "current_working_directory": remote_launch_dir,
+            "environment": self.client.get_user_environment(),
+            "argv": [features.solver_script_path, *features.get_script_arguments(params), params.other_options],
+            # options of the `#SBATCH` directives of the Antares Solver script
+            "tasks": 1,
+            "minimum_nodes": 1,
+            "standard_output": f"{remote_launch_dir}/antares-out-%j.txt",
+            "standard_error": f"{remote_launch_dir}/antares-err-%j.txt",
+        }
+        if features.partition:
+            job["partition"] = features.partition
+        if features.quality_of_service:
+            job["qos"] = features.quality_of_service
+        if params.time_limit:
+            job["time_limit"] = {"set": True, "number": params.time_limit}
+        if params.n_cpu:
+            job["cpus_per_task"] = params.n_cpu
+        if params.memory_limit:
+            job["memory_per_node"] = {"set": True, "number": params.memory_limit}
+        if params.oversubscribe:
+            job["shared"] = ["oversubscribe"]
+        job["argv"].extend(features.get_extra_arguments(params))
+        return job
+
+    @override
+    def submit_job(self, remote_launch_dir: str, job_name: str, script_params: ScriptParametersDTO) -> int:
+        body = {
+            "script": _WRAPPER_SCRIPT.format(script_path=shlex.quote(self.slurm_script_features.solver_script_path)),
+            "job": self._job_description(remote_launch_dir, job_name, script_params),
+        }
+        try:
+            obj = self.client.request("POST", f"{self._slurm_path}/job/submit", body)
+        except SlurmRestError as exc:
+            if re.search(r"MaxSubmitJob|submit limit", str(exc), flags=re.IGNORECASE):
+                raise SubmitLimitReachedError(job_name, str(exc)) from None
+            raise SubmitJobError(job_name, str(exc)) from None
+        job_id = _number(obj.get("job_id"))
+        if not job_id:
+            raise SubmitJobError(job_name, f"No job ID in the response: {obj!r}")
+        return int(job_id)
+
+    @staticmethod
+    def _to_queue_record(job: t.Mapping[str, t.Any], now: float) -> QueueRecord:
+        state = _state(job.get("job_state"))
+        start_time = _number(job.get("start_time"))
+        time_used = 0.0
+        if start_time and state in {"RUNNING", "COMPLETING", "SUSPENDED"}:
+            time_used = max(0.0, now - start_time)
+        time_limit = _number(job.get("time_limit"))  # minutes
+        return QueueRecord(
+            job_id=str(job.get("job_id", "")),
+            name=str(job.get("name", "")),
+            state=state,
+            reason=str(job.get("state_reason", "")),
+            start_time=_format_datetime(start_time) or "N/A",
+            time_used=_format_duration(time_used),
+            time_limit=(
+                "UNLIMITED"
+                if time_limit == float("inf")
+                else _format_duration(time_limit * 60)
+                if time_limit
+                else "N/A"
+            ),
+            partition=str(job.get("partition", "")),
+            cpus=int(_number(job.get("cpus")) or 0),
+            qos=str(job.get("qos", "")),
+        )
+
+    @override
+    def read_queue(self, username: str, host: str) -> QueueSnapshot:
+        try:
+            obj = self.client.request("GET", f"{self._slurm_path}/jobs")
+        except SlurmRestError as exc:
+            raise GetQueueError(str(exc)) from None
+        now = time.time()
+        records = [
+            self._to_queue_record(job, now)
+            for job in obj.get("jobs") or []
+            if job.get("user_name", username) == username
+        ]
+        return QueueSnapshot(username=username, host=host, records=records, timestamp=now)
+
+    @override
+    def get_job_state(self, job_id: int, job_name: str) -> t.Optional[JobStateCodes]:
+        try:
+            obj = self.client.request("GET", f"{self._slurm_path}/job/{job_id}")
+        except SlurmRestError as exc:
+            if re.search("Invalid job id specified", str(exc)):
+                return None
+            raise GetJobStateError(job_id, job_name, str(exc)) from None
+        for job in obj.get("jobs") or []:
+            if str(job.get("job_id")) == str(job_id):
+                return JobStateCodes(_state(job.get("job_state")))
+        return None
+
+    @staticmethod
+    def _to_accounting(job: t.Mapping[str, t.Any]) -> JobAccounting:
+        times = job.get("time") or {}
+        total = times.get("total") or {}
+        exit_code = job.get("exit_code") or {}
+        return_code = int(_number(exit_code.get("return_code")) or 0)
+        signal = exit_code.get("signal") or {}
+        signal_id = int(_number(signal.get("id")) or 0) if isinstance(signal, dict) else 0
+        max_rss = 0
+        for step in job.get("steps") or []:
+            requested = (step.get("tres") or {}).get("requested") or {}
+            max_rss = max(max_rss, _tres_count(requested.get("max"), "mem"))
+        return JobAccounting(
+            submit_time=_format_datetime(times.get("submission")),
+            start_time=_format_datetime(times.get("start")),
+            end_time=_format_datetime(times.get("end")),
+            elapsed=int(_number(times.get("elapsed")) or 0),
+            total_cpu=float(total.get("seconds") or 0) + float(total.get("microseconds") or 0) / 1e6,
+            max_rss=max_rss,
+            alloc_cpus=_tres_count((job.get("tres") or {}).get("allocated"), "cpu"),
+            exit_code=f"{return_code}:{signal_id}",
+            node_list=str(job.get("nodes") or ""),
+        )
+
+    @override
+    def get_job_accounting(
+        self,
+        job_id: int,
+        job_name: str,
+        *,
+        attempts: int = 5,
+        sleep_time: float = 0.5,
+    ) -> t.Optional[t.Tuple[JobStateCodes, JobAccounting]]:
+        last_error = ""
+        for _ in range(attempts):
+            try:
+                obj = self.client.request("GET", f"{self._slurmdb_path}/job/{job_id}")
+                break
+            except SlurmRestError as exc:
+                last_error = str(exc)
+                time.sleep(sleep_time)
+        else:
+            raise GetJobStateError(job_id, job_name, f"Failed after {attempts} attempts: {last_error}")
+        for job in obj.get("jobs") or []:
+            if str(job.get("job_id")) == str(job_id) and job.get("name", job_name) == job_name:
+                # Match the first word only, e.g.: "CANCELLED by 123456798"
+                state = _state(job.get("state")).split(" ")[0]
+                try:
+                    return JobStateCodes(state), self._to_accounting(job)
+                except ValueError:
+                    raise GetJobStateError(job_id, job_name, f"Unable to parse the job state: '{state}'") from None
+        return None
+
+    @override
+    def cancel_jobs(self, job_ids: t.Sequence[int]) -> None:
+        try:
+            self.client.request("DELETE", f"{self._slurm_path}/jobs", {"jobs": [str(job_id) for job_id in job_ids]})
+        except SlurmRestError as exc:
+            raise KillJobError(", ".join(str(job_id) for job_id in job_ids), str(exc)) from None
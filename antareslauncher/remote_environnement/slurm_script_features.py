@@ -1,10 +1,13 @@
 import dataclasses
 import shlex
+import typing as t
 
 from antares.study.version import SolverMinorVersion
 
 from antareslauncher.study_dto import Modes
 
+DEFAULT_FULL_RESULTS_RETENTION_DAYS = 7
+
 
 @dataclasses.dataclass
 class ScriptParametersDTO:
@@ -17,6 +20,10 @@ class ScriptParametersDTO:
     post_processing: bool
     other_options: str
     oversubscribe: bool
+    memory_limit: int = 0  # in MiB, 0 means the SLURM default
+    input_hash: str = ""  # content hash of the study input, "" to disable the input cache of the remote script
+    output_include: t.Sequence[str] = ()  # glob patterns of the output files to put in the final ZIP
+    output_exclude: t.Sequence[str] = ()  # glob patterns of the output files to leave out of the final ZIP
 
 
 class SlurmScriptFeatures:
@@ -29,6 +36,7 @@ class SlurmScriptFeatures:
         *,
         partition: str,
         quality_of_service: str,
+        full_results_retention_days: int = DEFAULT_FULL_RESULTS_RETENTION_DAYS,
     ):
         """
         Initialize the slurm script feature.
@@ -40,10 +48,13 @@ class SlurmScriptFeatures:
                 to select the default partition as designated by the system administrator.
             quality_of_service: Request a quality of service for the job.
                 QOS values can be defined for each user/cluster/account association in the Slurm database.
+            full_results_retention_days: Number of days during which the full results are kept
+                on the remote server, when only a part of the output files is retrieved.
         """
         self.solver_script_path = slurm_script_path
         self.partition = partition
         self.quality_of_service = quality_of_service
+        self.full_results_retention_days = full_results_retention_days
 
     def compose_launch_command(
         self,
@@ -68,29 +79,68 @@ class SlurmScriptFeatures:
             "--job-name": script_params.study_dir_name,  # non-empty string
             "--time": script_params.time_limit,  # greater than 0
             "--cpus-per-task": script_params.n_cpu,  # greater than 0
+            "--mem": f"{script_params.memory_limit}M" if script_params.memory_limit else "",  # non-empty string
         }
 
-        _job_type = {
-            Modes.antares: "ANTARES",  # Mode for Antares Solver
-            Modes.xpansion_r: "ANTARES_XPANSION_R",  # Mode for Old Xpansion implemented in R
-            Modes.xpansion_cpp: "ANTARES_XPANSION_CPP",  # Mode for Xpansion implemented in C++
-            Modes.xpansion_trajectory: "ANTARES_XPANSION_TRAJECTORY",  # Xpansion C++ that run on multiple studies at a time
-        }[script_params.run_mode]
-
         # Construct the `sbatch` command
         args = ["sbatch"]
         if script_params.oversubscribe:
             args.append("--oversubscribe")
         args.extend(f"{k}={shlex.quote(str(v))}" for k, v in _opts.items() if v)
-        args.extend(
-            shlex.quote(arg)
-            for arg in [
-                self.solver_script_path,
-                script_params.input_zipfile_name,
-                f"{script_params.antares_version:2d}",
-                _job_type,
-                str(script_params.post_processing),
-            ]
-        )
+        args.append(shlex.quote(self.solver_script_path))
+        args.extend(shlex.quote(arg) for arg in self.get_script_arguments(script_params))
         launch_cmd = f"cd {remote_launch_dir} && {' '.join(args)} '{script_params.other_options}'"
+        extra_args = self.get_extra_arguments(script_params)
+        if extra_args:
+            launch_cmd += " " + " ".join(shlex.quote(arg) for arg in extra_args)
         return launch_cmd
+
+    @staticmethod
+    def get_script_arguments(script_params: ScriptParametersDTO) -> t.List[str]:
+        """
+        Return the positional arguments of the Antares Solver script
+        (the other options are not included).
+
+        Args:
+            script_params: ScriptFeaturesDTO dataclass container for script parameters
+
+        Returns:
+            The input ZIP file name, the solver version, the job type and the post-processing flag.
+        """
+        _job_type = {
+            Modes.antares: "ANTARES",  # Mode for Antares Solver
+            Modes.xpansion_r: "ANTARES_XPANSION_R",  # Mode for Old Xpansion implemented in R
+            Modes.xpansion_cpp: "ANTARES_XPANSION_CPP",  # Mode for Xpansion implemented in C++
+            Modes.xpansion_trajectory: "ANTARES_XPANSION_TRAJECTORY",  # Xpansion C++ that run on multiple studies at a time
+        }[script_params.run_mode]
+        return [
+            script_params.input_zipfile_name,
+            f"{script_params.antares_version:2d}",
+            _job_type,
+            str(script_params.post_processing),
+        ]
+
+    def get_extra_arguments(self, script_params: ScriptParametersDTO) -> t.List[str]:
+        """
+        Return the positional arguments of the Antares Solver script which follow the other options,
+        they are supported since the script v1.2.0 (the older scripts ignore them).
+
+        Args:
+            script_params: ScriptFeaturesDTO dataclass container for script parameters
+
+        Returns:
+            The input hash, the include and exclude patterns of the output files (separated by commas)
+            and the retention time of the full results in days. The trailing empty arguments are dropped.
+        """
+        args = [script_params.input_hash]
+        if script_params.output_include or script_params.output_exclude:
+            args.extend(
+                [
+                    ",".join(script_params.output_include),
+                    ",".join(script_params.output_exclude),
+                    str(self.full_results_retention_days),
+                ]
+            )
+        while args and not args[-1]:
+            args.pop()
+        return args
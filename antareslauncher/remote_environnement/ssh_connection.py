@@ -363,6 +363,34 @@ class SshConnection:
             self.logger.info(f"SSH command stderr:\n{textwrap.indent(error, 'SSH ERROR> ')}")
             return output, error
 
+    def stream_command(self, command: str, timeout: float = 300) -> t.Iterator[str]:
+        """
+        Runs a long-lived SSH command and yields the lines of its standard output as soon as they arrive.
+
+        Unlike `execute_command`, the command is not retried: the iteration stops
+        when the command ends, or when an SSH error occurs (the error is logged).
+        Stopping the iteration closes the SSH connection.
+
+        Args:
+            command: String containing the command that will be executed through the ssh connection
+            timeout: Maximum delay in seconds between two lines of the standard output.
+
+        Yields:
+            The lines of the standard output (without line separator).
+        """
+        try:
+            with self.ssh_client() as client:
+                self.logger.info(f"Streaming SSH command [{command}]...")
+                _, stdout, _ = client.exec_command(command, timeout=timeout)
+                for line in iter(stdout.readline, ""):
+                    yield line.rstrip("\r\n")
+        except socket.timeout:
+            self.logger.error(f"SSH command timed out: [{command}]")
+        except paramiko.SSHException as e:
+            self.logger.error(f"SSH command failed to execute [{command}]: {e}")
+        except ConnectionFailedException as e:
+            self.logger.error(f"SSH connection failed: {e}")
+
     def upload_file(self, src: str, dst: str) -> bool:
         """Uploads a file to a remote server via sftp protocol
 
@@ -505,6 +533,31 @@ class SshConnection:
                         sftp.remove(str(src_path))
                 return [dst_dir.joinpath(filename) for filename in files_to_download]
 
+    @contextlib.contextmanager
+    def open_remote_file(self, file_path: str, bufsize: int = 32 * 1024) -> t.Iterator[t.BinaryIO]:
+        """Opens a remote file for reading, with random access, via sftp protocol
+
+        The file is read by blocks of `bufsize` bytes: only the blocks that are read
+        are transferred, e.g. the members of a ZIP file which are extracted. Large ranges are
+        better read with `readv`, which pipelines the requests.
+
+        Args:
+            file_path: Pathlike string on the remote server
+            bufsize: Size of the read buffer in bytes (the SFTP requests are limited to 32 KiB)
+
+        Returns:
+            A binary file object, which supports `seek` and `read`
+
+        Raises:
+            ConnectionFailedException if the connection fails
+            IOError if the file cannot be read
+        """
+        self.logger.info(f'Opening remote file "{file_path}"')
+        with self.ssh_client() as client:
+            with contextlib.closing(client.open_sftp()) as sftp:
+                with sftp.open(file_path, mode="rb", bufsize=bufsize) as remote_file:
+                    yield t.cast(t.BinaryIO, remote_file)
+
     def check_file_not_empty(self, file_path: str) -> bool:
         """Checks if a remote file exists and is not empty
 
@@ -1,6 +1,8 @@
+import functools
+import operator
 import typing as t
 
-from dataclasses import dataclass, field
+from dataclasses import MISSING, dataclass, field, fields
 from enum import IntEnum
 from pathlib import Path
 
@@ -14,9 +16,28 @@ class Modes(IntEnum):
     xpansion_trajectory = 4
 
 
-@dataclass
-class StudyDTO:
-    """Study Data Transfer Object"""
+class _ChangeTracking:
+    """Slot of the change tracking data of a study, which is not a field of the study (see `StudyDTO.mark_saved`)"""
+
+    __slots__ = ("_saved_values",)
+
+    _saved_values: t.Tuple[t.Any, ...]
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_version(value: t.Union[int, str]) -> StudyVersion:
+    # The studies share a few versions: the parsed (immutable) versions are shared too
+    return StudyVersion.parse(value)
+
+
+@dataclass(slots=True)
+class StudyDTO(_ChangeTracking):
+    """
+    Study Data Transfer Object
+
+    The class is slotted: thousands of studies are loaded each time the repository is read,
+    and a study without instance `__dict__` is smaller and faster to build.
+    """
 
     path: str
     name: str = field(init=False)
@@ -29,6 +50,7 @@ class StudyDTO:
 
     # Job state message
     job_state: str = "Pending"  # "Running", "Finished", "Ended with error", "Internal error: ..."
+    slurm_state: str = ""  # last SLURM job state, e.g.: "RUNNING", "TIMEOUT"
 
     # Processing stage flags
     zip_is_sent: bool = False
@@ -39,30 +61,104 @@ class StudyDTO:
 
     # Processing stage data
     job_id: int = 0  # sbatch job id
+    cluster: str = ""  # name of the cluster the job is submitted to ("" for the main cluster)
     zipfile_path: str = ""
+    input_hash: str = ""  # SHA-256 of the study input, used by the remote script to cache the unpacked input
     local_final_zipfile_path: str = ""
+    remote_final_zipfile_path: str = ""  # final ZIP file kept on the remote server (see `keep_remote`)
     job_log_dir: str = ""
     output_dir: str = ""
 
     # Simulation stage data
     time_limit: t.Optional[int] = None
     n_cpu: int = 1
+    memory_limit: int = 0  # requested memory in MiB (0 means the SLURM default)
     antares_version: StudyVersion = StudyVersion.parse(0)
     xpansion_mode: str = ""  # "", "r", "cpp", "trajectory"
     run_mode: Modes = Modes.antares
     post_processing: bool = False
     other_options: str = ""
     oversubscribe: bool = False
+    output_include: t.List[str] = field(default_factory=list)  # glob patterns of the output files to retrieve
+    output_exclude: t.List[str] = field(default_factory=list)  # glob patterns of the output files to skip
+    keep_remote: bool = False  # the results stay on the remote server and are fetched on demand
+
+    # Remote results data (see `ResultFetcher`)
+    result_manifest: t.List[t.Dict[str, t.Any]] = field(default_factory=list)  # path, size and crc32 of each file
+
+    # Resource sizing data
+    input_size: int = 0  # size of the study files in bytes (outputs excluded)
+    nb_years: int = 0  # number of Monte-Carlo years
+    predicted_elapsed: int = 0  # predicted wall-clock duration in seconds (0 if unknown)
+    predicted_max_rss: int = 0  # predicted peak memory in bytes (0 if unknown)
+
+    # SLURM accounting data (harvested from `sacct` once the job is finished)
+    submit_time: str = ""  # ISO 8601 date/time, e.g.: "2023-04-01T12:34:56"
+    start_time: str = ""  # ISO 8601 date/time
+    end_time: str = ""  # ISO 8601 date/time
+    elapsed: int = 0  # wall-clock duration in seconds
+    total_cpu: float = 0  # CPU time (user + system) in seconds
+    max_rss: int = 0  # peak resident memory in bytes
+    alloc_cpus: int = 0
+    exit_code: str = ""  # "<exit code>:<signal>", e.g.: "0:0"
+    node_list: str = ""
+
+    # Resubmission data (see `JobRequeuer`)
+    attempts: t.List[t.Dict[str, t.Any]] = field(default_factory=list)  # history of the failed attempts
+
+    # Lifecycle data (see `antareslauncher.study_lifecycle`)
+    events: t.Dict[str, float] = field(default_factory=dict)  # event name => POSIX timestamp
+
+    # Concurrency data
+    version: int = 0  # number of writes of the study in the database, to detect the writes of other processes
 
     def __post_init__(self) -> None:
         self.name = Path(self.path).name
 
+    def mark_saved(self) -> None:
+        """
+        Records that the study is in the same state as in the database, after it is loaded or saved:
+        the next changes are tracked (see `get_changed_fields`).
+        """
+        saved_values = list(_get_field_values(self))
+        # The containers may be modified in place: a shallow copy is kept to detect the changes
+        for index in _CONTAINER_INDEXES:
+            saved_values[index] = type(saved_values[index])(saved_values[index])
+        # the slot is inherited from `_ChangeTracking`, which mypy does not see
+        object.__setattr__(self, "_saved_values", tuple(saved_values))
+
+    def get_changed_fields(self) -> t.Optional[t.AbstractSet[str]]:
+        """
+        The fields changed since the study was loaded or saved (see `mark_saved`),
+        `None` if the study has never been loaded or saved: all its fields must be saved.
+        """
+        saved_values = getattr(self, "_saved_values", None)
+        if saved_values is None:
+            return None
+        return frozenset(
+            name
+            for name, value, saved_value in zip(_FIELD_NAMES, _get_field_values(self), saved_values)
+            if value is not saved_value and value != saved_value
+        )
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """The fields of the study, without the change tracking data"""
+        return {name: getattr(self, name) for name in _FIELD_NAMES}
+
     @classmethod
     def from_dict(cls, doc: t.Mapping[str, t.Any]) -> "StudyDTO":
         """
         Create a Study DTO from a mapping.
         """
-        attrs = dict(**doc)
-        attrs.pop("name", None)  # calculated
-        attrs["antares_version"] = StudyVersion.parse(attrs["antares_version"])
+        attrs = {key: value for key, value in doc.items() if key != "name"}  # the name is calculated
+        version = attrs["antares_version"]
+        if isinstance(version, (int, str)):
+            attrs["antares_version"] = _parse_version(version)
+        else:
+            attrs["antares_version"] = StudyVersion.parse(version)
         return cls(**attrs)
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(StudyDTO))
+_CONTAINER_INDEXES = tuple(i for i, f in enumerate(fields(StudyDTO)) if f.default_factory is not MISSING)
+_get_field_values = operator.attrgetter(*_FIELD_NAMES)
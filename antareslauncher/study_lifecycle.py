@@ -0,0 +1,115 @@
+"""
+Lifecycle events of the studies, used to measure where the wall-clock time goes.
+
+The local phases (compression, upload, submission, download...) are timed by the use cases
+and recorded in `StudyDTO.events` as POSIX timestamps. The remote phases (pending and running)
+are computed from the SLURM accounting data (`Submit`, `Start` and `End` times of `sacct`).
+"""
+
+import contextlib
+import dataclasses
+import datetime
+import time
+import typing as t
+
+from antareslauncher.study_dto import StudyDTO
+
+FINISHED_DETECTED = "finished_detected"
+"""Event recorded when the launcher detects that the job of the study is finished."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Phase:
+    """
+    A phase of the study lifecycle, between two events.
+
+    Attributes:
+        name: The name of the phase, displayed in the report.
+        start: The event starting the phase.
+        end: The event ending the phase.
+    """
+
+    name: str
+    start: str
+    end: str
+
+
+PHASES = (
+    Phase("zip", "zip_start", "zip_end"),
+    Phase("upload", "upload_start", "upload_end"),
+    Phase("submit", "submit_start", "submit_end"),
+    Phase("pending", "job_submit", "job_start"),
+    Phase("running", "job_start", "job_end"),
+    Phase("detection", "job_end", FINISHED_DETECTED),
+    Phase("logs", "logs_start", "logs_end"),
+    Phase("manifest", "manifest_start", "manifest_end"),
+    Phase("download", "download_start", "download_end"),
+    Phase("extract", "extract_start", "extract_end"),
+    Phase("clean", "clean_start", "clean_end"),
+)
+"""Phases of the study lifecycle, in chronological order."""
+
+TOTAL_PHASE = Phase("total", "zip_start", "extract_end")
+"""Whole lifecycle of a study, from the compression to the extraction of the results."""
+
+
+def record_event(study: StudyDTO, event: str) -> None:
+    """Records the current time as the timestamp of an event, replacing the previous one"""
+    study.events[event] = time.time()
+
+
+@contextlib.contextmanager
+def record_phase(study: StudyDTO, name: str) -> t.Iterator[None]:
+    """Records the start and end timestamps of a local phase, even if the phase fails"""
+    record_event(study, f"{name}_start")
+    try:
+        yield
+    finally:
+        record_event(study, f"{name}_end")
+
+
+def _to_timestamp(value: str) -> t.Optional[float]:
+    # The SLURM date/times have no time zone: the local time zone is assumed.
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp() if value else None
+    except ValueError:
+        return None
+
+
+def get_events(study: StudyDTO) -> t.Dict[str, float]:
+    """The local events of a study, completed with the remote events of its last job"""
+    events = dict(study.events)
+    for event, value in [
+        ("job_submit", study.submit_time),
+        ("job_start", study.start_time),
+        ("job_end", study.end_time),
+    ]:
+        timestamp = _to_timestamp(value)
+        if timestamp is not None:
+            events[event] = timestamp
+    return events
+
+
+def get_phase_durations(
+    study: StudyDTO,
+    phases: t.Iterable[Phase] = PHASES + (TOTAL_PHASE,),
+) -> t.Dict[str, float]:
+    """
+    Computes the duration of the lifecycle phases of a study.
+
+    Args:
+        study: The study.
+        phases: The phases to compute.
+
+    Returns:
+        The durations in seconds, indexed by phase name.
+        The incomplete phases and the negative durations (clock drift between
+        the local machine and the SLURM server) are ignored.
+    """
+    events = get_events(study)
+    durations = {}
+    for phase in phases:
+        start, end = events.get(phase.start), events.get(phase.end)
+        if start is not None and end is not None and end >= start:
+            durations[phase.name] = end - start
+    return durations
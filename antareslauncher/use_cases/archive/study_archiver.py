@@ -0,0 +1,66 @@
+import datetime
+import fnmatch
+import typing as t
+
+from dataclasses import dataclass
+
+from antareslauncher.data_repo.data_repo import DataRepo
+from antareslauncher.data_repo.study_archive import DEFAULT_ARCHIVE_AFTER_DAYS, get_done_time
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.study_dto import StudyDTO
+
+LOG_NAME = f"{__name__}.StudyArchiver"
+
+DAY = 24 * 3600
+
+
+@dataclass
+class StudyArchiver:
+    """
+    Moves the done studies out of the working set of the repository, and displays the archived studies.
+
+    Attributes:
+        repo: The repository of the studies, with its archive.
+        display: The terminal display.
+        archive_after_days: Number of days after which the done studies are archived.
+            If zero, the studies are only archived by the compaction (see `compact`).
+    """
+
+    repo: DataRepo
+    display: DisplayTerminal
+    archive_after_days: int = DEFAULT_ARCHIVE_AFTER_DAYS
+
+    def archive_done_studies(self) -> t.Sequence[StudyDTO]:
+        """Archives the studies done for more than `archive_after_days` days, before a launch or retrieval pass"""
+        if self.archive_after_days <= 0:
+            return []
+        return self._archive(self.archive_after_days)
+
+    def compact(self) -> t.Sequence[StudyDTO]:
+        """
+        Archives the done studies of an existing database in one shot:
+        the studies done for more than `archive_after_days` days, or all the done studies if zero.
+        """
+        studies = self._archive(max(self.archive_after_days, 0))
+        if not studies:
+            self.display.show_message("No done study to archive", LOG_NAME)
+        return studies
+
+    def _archive(self, days: int) -> t.Sequence[StudyDTO]:
+        studies = self.repo.archive_done_studies(days * DAY)
+        if studies:
+            self.display.show_message(f"{len(studies)} done studies moved to the archive", LOG_NAME)
+        return studies
+
+    def show_history(self, name_pattern: str = "*") -> None:
+        """Displays the archived studies whose name matches the glob pattern"""
+        studies = [s for s in self.repo.get_archived_studies() if fnmatch.fnmatchcase(s.name, name_pattern)]
+        if not studies:
+            self.display.show_message(f"No archived study matching '{name_pattern}'", LOG_NAME)
+            return
+        lines = [f"{'NAME':<40} {'JOB ID':>10} {'DONE':<19} STATE"]
+        for study in studies:
+            done_time = get_done_time(study)
+            done = datetime.datetime.fromtimestamp(done_time).isoformat(timespec="seconds") if done_time else "-"
+            lines.append(f"{study.name:<40} {study.job_id:>10} {done:<19} {study.job_state}")
+        self.display.show_message(f"{len(studies)} archived studies\n" + "\n".join(lines), LOG_NAME)
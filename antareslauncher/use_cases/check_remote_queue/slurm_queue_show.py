@@ -1,12 +1,12 @@
 from dataclasses import dataclass
 
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
 
 
 @dataclass
 class SlurmQueueShow:
-    env: RemoteEnvironmentWithSlurm
+    env: RemoteEnvironment
     display: DisplayTerminal
 
     def run(self) -> None:
@@ -0,0 +1,183 @@
+"""
+Predict the resources (wall-clock time, CPUs and memory) of a simulation job
+from the SLURM accounting data of the studies previously simulated.
+"""
+
+import configparser
+import dataclasses
+import math
+import os
+import statistics
+import typing as t
+
+from pathlib import Path
+
+from antareslauncher.study_dto import Modes, StudyDTO
+
+MIN_SAMPLES = 3  # minimum number of similar studies required to make a prediction
+MAX_SAMPLES = 10  # number of nearest studies (by input size) used to make a prediction
+MIN_TIME_LIMIT = 600  # seconds
+MIN_MEMORY_LIMIT = 1024  # MiB
+MIB = 1024 * 1024
+
+DEFAULT_SAFETY_MARGIN = 1.5
+
+
+def get_study_input_size(study_dir: Path) -> int:
+    """
+    Calculate the size of the study files, the simulation results are excluded.
+
+    Args:
+        study_dir: Path of the study directory (or of the Xpansion trajectory directory).
+
+    Returns:
+        The total size of the files in bytes.
+    """
+    total_size = 0
+    for dirpath, dirnames, filenames in os.walk(study_dir):
+        if "study.antares" in filenames and "output" in dirnames:
+            dirnames.remove("output")
+        for filename in filenames:
+            try:
+                total_size += os.stat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total_size
+
+
+def get_study_nb_years(study_dir: Path) -> int:
+    """
+    Retrieve the number of Monte-Carlo years from the "settings/generaldata.ini" file.
+
+    Args:
+        study_dir: Path of the study directory.
+
+    Returns:
+        The value of `nbyears` or 0 if the number of years is not found.
+    """
+    config = configparser.ConfigParser(strict=False, interpolation=None)
+    try:
+        config.read(study_dir.joinpath("settings/generaldata.ini"), encoding="utf-8")
+        return config.getint("general", "nbyears", fallback=0)
+    except (configparser.Error, ValueError):
+        return 0
+
+
+@dataclasses.dataclass
+class ResourceEstimate:
+    """
+    Resources to request for a simulation job.
+
+    Attributes:
+        n_cpu: number of CPUs (`--cpus-per-task`).
+        time_limit: time limit in seconds (`--time`).
+        memory_limit: memory in MiB (`--mem`), 0 means the SLURM default.
+        predicted_elapsed: predicted wall-clock duration in seconds, 0 if unknown.
+        predicted_max_rss: predicted peak memory in bytes, 0 if unknown.
+        nb_samples: number of similar studies used to make the prediction.
+    """
+
+    n_cpu: int
+    time_limit: t.Optional[int]
+    memory_limit: int = 0
+    predicted_elapsed: int = 0
+    predicted_max_rss: int = 0
+    nb_samples: int = 0
+
+    def update_study(self, study: StudyDTO) -> None:
+        study.n_cpu = self.n_cpu
+        study.time_limit = self.time_limit
+        study.memory_limit = self.memory_limit
+        study.predicted_elapsed = self.predicted_elapsed
+        study.predicted_max_rss = self.predicted_max_rss
+
+
+def _effective_n_cpu(run_mode: Modes, n_cpu: int, nb_years: int) -> int:
+    # The Antares Solver parallelizes the Monte-Carlo years:
+    # CPUs in excess of the number of years are never used.
+    if run_mode == Modes.antares and nb_years > 0:
+        return max(1, min(n_cpu, nb_years))
+    return max(1, n_cpu)
+
+
+class ResourceEstimator:
+    """
+    Predict the wall-clock duration and the peak memory of a study from
+    the accounting data of the finished studies with the same run mode.
+
+    The prediction assumes that:
+
+    - the duration is proportional to `input_size * nb_years / n_cpu`,
+    - the peak memory is proportional to `input_size * n_cpu`.
+
+    The cost coefficients are the medians of the ones observed for the
+    studies whose input size is the nearest to the study to simulate.
+    """
+
+    def __init__(
+        self,
+        history: t.Iterable[StudyDTO],
+        *,
+        safety_margin: float = DEFAULT_SAFETY_MARGIN,
+    ) -> None:
+        self.safety_margin = safety_margin
+        self._samples: t.Dict[Modes, t.List[StudyDTO]] = {}
+        for study in history:
+            if study.elapsed > 0 and study.input_size > 0 and not study.with_error:
+                self._samples.setdefault(study.run_mode, []).append(study)
+
+    def _nearest_samples(self, study: StudyDTO) -> t.List[StudyDTO]:
+        samples = self._samples.get(study.run_mode, [])
+        if len(samples) < MIN_SAMPLES:
+            return []
+        log_size = math.log(max(study.input_size, 1))
+        samples = sorted(samples, key=lambda s: abs(math.log(s.input_size) - log_size))
+        return samples[:MAX_SAMPLES]
+
+    def estimate(self, study: StudyDTO) -> ResourceEstimate:
+        """
+        Estimate the resources to request for a study.
+
+        The time limit of the study is used as an upper bound, and is kept
+        unchanged if there is not enough history to make a prediction.
+
+        Args:
+            study: The study to simulate, with its `input_size` and `nb_years` measured.
+
+        Returns:
+            The resources to request.
+        """
+        n_cpu = _effective_n_cpu(study.run_mode, study.n_cpu, study.nb_years)
+        samples = self._nearest_samples(study)
+        if not samples or study.input_size <= 0:
+            return ResourceEstimate(n_cpu=n_cpu, time_limit=study.time_limit)
+
+        time_costs = []
+        memory_costs = []
+        for sample in samples:
+            sample_n_cpu = _effective_n_cpu(sample.run_mode, sample.alloc_cpus or sample.n_cpu, sample.nb_years)
+            sample_workload = sample.input_size * max(sample.nb_years, 1)
+            time_costs.append(sample.elapsed * sample_n_cpu / sample_workload)
+            if sample.max_rss > 0:
+                memory_costs.append(sample.max_rss / (sample.input_size * sample_n_cpu))
+
+        workload = study.input_size * max(study.nb_years, 1)
+        predicted_elapsed = math.ceil(statistics.median(time_costs) * workload / n_cpu)
+        time_limit = max(math.ceil(predicted_elapsed * self.safety_margin), MIN_TIME_LIMIT)
+        if study.time_limit:
+            time_limit = min(time_limit, study.time_limit)
+
+        predicted_max_rss = 0
+        memory_limit = 0
+        if memory_costs:
+            predicted_max_rss = math.ceil(statistics.median(memory_costs) * study.input_size * n_cpu)
+            memory_limit = max(math.ceil(predicted_max_rss * self.safety_margin / MIB), MIN_MEMORY_LIMIT)
+
+        return ResourceEstimate(
+            n_cpu=n_cpu,
+            time_limit=time_limit,
+            memory_limit=memory_limit,
+            predicted_elapsed=predicted_elapsed,
+            predicted_max_rss=predicted_max_rss,
+            nb_samples=len(samples),
+        )
@@ -6,9 +6,15 @@ from pathlib import Path
 
 from antares.study.version import SolverMinorVersion, StudyVersion
 
-from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo.data_repo import DataRepo
 from antareslauncher.display.display_terminal import DisplayTerminal
 from antareslauncher.study_dto import Modes, StudyDTO
+from antareslauncher.use_cases.create_list.resource_estimator import (
+    DEFAULT_SAFETY_MARGIN,
+    ResourceEstimator,
+    get_study_input_size,
+    get_study_nb_years,
+)
 
 DEFAULT_VERSION = SolverMinorVersion.parse(0)
 
@@ -60,12 +66,17 @@ class StudyListComposerParameters:
     other_options: str
     antares_version: SolverMinorVersion = DEFAULT_VERSION
     oversubscribe: bool = False
+    auto_sizing: bool = False
+    sizing_safety_margin: float = DEFAULT_SAFETY_MARGIN
+    output_include: t.Sequence[str] = ()
+    output_exclude: t.Sequence[str] = ()
+    keep_remote: bool = False
 
 
 class StudyListComposer:
     def __init__(
         self,
-        repo: DataRepoTinydb,
+        repo: DataRepo,
         display: DisplayTerminal,
         parameters: StudyListComposerParameters,
     ):
@@ -84,6 +95,12 @@ class StudyListComposer:
         self.DEFAULT_JOB_LOG_DIR_PATH = str(Path(self.log_dir) / "JOB_LOGS")
         self.ANTARES_VERSIONS_ON_REMOTE_SERVER = parameters.antares_versions_on_remote_server
         self._oversubscribe = parameters.oversubscribe
+        self.auto_sizing = parameters.auto_sizing
+        self.sizing_safety_margin = parameters.sizing_safety_margin
+        self.output_include = parameters.output_include
+        self.output_exclude = parameters.output_exclude
+        self.keep_remote = parameters.keep_remote
+        self._estimator: t.Optional[ResourceEstimator] = None
 
     def get_list_of_studies(self) -> t.Sequence[StudyDTO]:
         """Retrieve the list of studies from the repo
@@ -112,6 +129,9 @@ class StudyListComposer:
             post_processing=self.post_processing,
             other_options=self.other_options,
             oversubscribe=self._oversubscribe,
+            output_include=list(self.output_include),
+            output_exclude=list(self.output_exclude),
+            keep_remote=self.keep_remote,
         )
         return new_study
 
@@ -125,6 +145,7 @@ class StudyListComposer:
         self._display.show_message(message, f"{__name__}.{self.__class__.__name__}")
 
         self._new_study_added = False
+        self._estimator = None
 
         directories = Path(self._studies_in_dir).iterdir()
         for directory_path in sorted(directories):
@@ -174,7 +195,34 @@ class StudyListComposer:
                 if not self._repo.is_study_inside_database(buffer_study):
                     self._add_study_to_database(buffer_study)
 
+    def _get_estimator(self) -> ResourceEstimator:
+        # The history is loaded lazily, only when a new study is found
+        if self._estimator is None:
+            history = self._repo.get_study_history()
+            self._estimator = ResourceEstimator(history, safety_margin=self.sizing_safety_margin)
+        return self._estimator
+
+    def _size_study(self, study: StudyDTO) -> None:
+        """
+        Measure the study features used to predict the resources of the job,
+        and, if the automatic sizing is enabled, adjust the requested resources.
+        """
+        study_dir = Path(study.path)
+        study.input_size = get_study_input_size(study_dir)
+        study.nb_years = get_study_nb_years(study_dir)
+        if self.auto_sizing:
+            estimate = self._get_estimator().estimate(study)
+            estimate.update_study(study)
+            if estimate.nb_samples:
+                self._display.show_message(
+                    f"Resources estimated from {estimate.nb_samples} similar studies:"
+                    f" n_cpu={estimate.n_cpu}, time_limit={estimate.time_limit}s,"
+                    f" memory_limit={estimate.memory_limit}MiB",
+                    __name__ + "." + self.__class__.__name__,
+                )
+
     def _add_study_to_database(self, buffer_study: StudyDTO) -> None:
+        self._size_study(buffer_study)
         self._repo.save_study(buffer_study)
         self._display.show_message(
             f"New study added "
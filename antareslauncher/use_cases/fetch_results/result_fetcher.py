@@ -0,0 +1,177 @@
+import fnmatch
+import os
+import typing as t
+
+from pathlib import Path
+
+from antareslauncher.data_repo.data_repo import DataRepo
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
+from antareslauncher.study_dto import StudyDTO
+
+LOG_NAME = f"{__name__}.ResultFetcher"
+
+MIB = 1024 * 1024
+
+DEFAULT_RESULTS_CACHE_MAX_SIZE_MB = 10240
+"""Default maximum size in MiB of the local cache of the results fetched on demand."""
+
+
+class ResultCache:
+    """
+    Local cache of the result files fetched from the remote server, with a maximum size.
+
+    The files of a study are stored in a subdirectory named after the study and its job ID.
+    The modification time of a file is its last use time: the least recently used files
+    are evicted first when the cache exceeds its maximum size.
+    """
+
+    def __init__(self, root_dir: Path, max_size: int = DEFAULT_RESULTS_CACHE_MAX_SIZE_MB * MIB):
+        self.root_dir = root_dir
+        self.max_size = max_size
+
+    def get_study_dir(self, study: StudyDTO) -> Path:
+        return self.root_dir / f"{study.name}_{study.job_id}"
+
+    def get(self, study: StudyDTO, entry: t.Mapping[str, t.Any]) -> t.Optional[Path]:
+        """Returns the cached file of a manifest entry, or `None` if the file is not cached (or outdated)"""
+        path: Path = self.get_study_dir(study) / entry["path"]
+        try:
+            if path.stat().st_size != entry["size"]:
+                return None
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return path
+
+    def evict(self, keep: t.Collection[Path] = ()) -> t.List[Path]:
+        """Removes the least recently used files until the cache fits in its maximum size
+
+        Args:
+            keep: The files which must not be removed, e.g. the files just fetched.
+
+        Returns:
+            The paths of the removed files.
+        """
+        if not self.root_dir.is_dir():
+            return []
+        files = [(path, path.stat()) for path in self.root_dir.rglob("*") if path.is_file()]
+        total_size = sum(st.st_size for _, st in files)
+        removed = []
+        for path, st in sorted(files, key=lambda item: item[1].st_mtime):
+            if total_size <= self.max_size:
+                break
+            if path in keep:
+                continue
+            path.unlink()
+            total_size -= st.st_size
+            removed.append(path)
+        return removed
+
+
+def match_entries(
+    manifest: t.Iterable[t.Mapping[str, t.Any]], patterns: t.Iterable[str]
+) -> t.List[t.Mapping[str, t.Any]]:
+    """
+    Selects the entries of a manifest whose path matches one of the patterns.
+
+    A pattern is either a glob pattern (`*` also matches `/`) or the path of a directory,
+    in which case the whole subtree is selected.
+    """
+    patterns = list(patterns)
+    selected = []
+    for entry in manifest:
+        path = entry["path"]
+        for pattern in patterns:
+            if fnmatch.fnmatchcase(path, pattern) or fnmatch.fnmatchcase(path, pattern.rstrip("/") + "/*"):
+                selected.append(entry)
+                break
+    return selected
+
+
+class ResultFetcher:
+    """
+    Fetches on demand the result files of the studies kept on the remote server (see `StudyDTO.keep_remote`).
+
+    Only the requested files are transferred, they are stored in a local cache
+    so that they are not transferred again.
+
+    Usage::
+
+        fetcher = ResultFetcher(repo, env, display, cache=ResultCache(Path("~/.antares_results").expanduser()))
+        paths = fetcher.fetch("my_study", ["*/economy/mc-all/areas/*/values-annual.txt"])
+    """
+
+    def __init__(
+        self,
+        repo: DataRepo,
+        env: RemoteEnvironment,
+        display: DisplayTerminal,
+        cache: ResultCache,
+    ):
+        self.repo = repo
+        self.env = env
+        self.display = display
+        self.cache = cache
+
+    def get_study(self, study_name: str) -> t.Optional[StudyDTO]:
+        """The study whose results are kept on the remote server, `None` if not found"""
+        for study in self.repo.iter_studies(name=study_name):
+            if study.remote_final_zipfile_path:
+                return study
+        self.display.show_error(f'"{study_name}": no result kept on the remote server', LOG_NAME)
+        return None
+
+    def show_manifest(self, study_name: str) -> None:
+        """Displays the files of the results of a study, with their size"""
+        study = self.get_study(study_name)
+        if study is None:
+            return
+        lines = [f"{entry['size']:>14} {entry['path']}" for entry in study.result_manifest]
+        self.display.show_message(
+            f'"{study.name}": {len(lines)} files in {study.remote_final_zipfile_path}\n' + "\n".join(lines),
+            LOG_NAME,
+        )
+
+    def fetch(self, study_name: str, patterns: t.Sequence[str]) -> t.List[Path]:
+        """
+        Fetches the result files of a study, the cached files are not transferred again.
+
+        Args:
+            study_name: The name of the study.
+            patterns: Glob patterns or directories of the files to fetch, relative to the root of the final ZIP file
+                (see `show_manifest`).
+
+        Returns:
+            The local paths of the files, in the cache directory.
+        """
+        study = self.get_study(study_name)
+        if study is None:
+            return []
+        entries = match_entries(study.result_manifest, patterns)
+        if not entries:
+            self.display.show_error(f'"{study.name}": no result file matches {list(patterns)}', LOG_NAME)
+            return []
+
+        paths = []
+        missing = []
+        for entry in entries:
+            cached = self.cache.get(study, entry)
+            if cached is None:
+                missing.append(entry["path"])
+            else:
+                paths.append(cached)
+        if missing:
+            fetched_size = sum(entry["size"] for entry in entries if entry["path"] in missing)
+            self.display.show_message(
+                f'"{study.name}": fetching {len(missing)} files ({fetched_size} bytes)...',
+                LOG_NAME,
+            )
+            paths.extend(self.env.fetch_result_files(study, missing, self.cache.get_study_dir(study)))
+        self.cache.evict(keep=set(paths))
+        self.display.show_message(
+            f'"{study.name}": {len(paths)} files available ({len(paths) - len(missing)} from the cache)\n'
+            + "\n".join(str(path) for path in sorted(paths)),
+            LOG_NAME,
+        )
+        return sorted(paths)
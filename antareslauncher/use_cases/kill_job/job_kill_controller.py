@@ -1,15 +1,47 @@
+import collections
+import fnmatch
+import typing as t
+
 from dataclasses import dataclass
 
-from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo.data_repo import DataRepo
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    GetQueueError,
+    RemoteEnvBaseError,
+    RemoteEnvironment,
+)
+from antareslauncher.study_dto import StudyDTO
+
+LOG_NAME = f"{__name__}.JobKillController"
+
+
+@dataclass
+class JobKillFilter:
+    """
+    Selection of the jobs to kill, the criteria are combined.
+
+    Attributes:
+        job_ids: IDs of the jobs to kill.
+        name_pattern: glob pattern of the names of the studies to kill, e.g.: "study_*".
+        states: SLURM states of the jobs to kill, e.g.: `["PENDING"]`.
+        all_jobs: kill all the unfinished jobs of the launcher (if no other criteria is given).
+    """
+
+    job_ids: t.Sequence[int] = ()
+    name_pattern: str = ""
+    states: t.Sequence[str] = ()
+    all_jobs: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.job_ids or self.name_pattern or self.states or self.all_jobs)
 
 
 @dataclass
 class JobKillController:
-    env: RemoteEnvironmentWithSlurm
+    env: RemoteEnvironment
     display: DisplayTerminal
-    repo: DataRepoTinydb
+    repo: DataRepo
 
     def _check_if_job_is_killable(self, job_id: int) -> bool:
         return self.repo.is_job_id_inside_database(job_id)
@@ -21,10 +53,105 @@ class JobKillController:
             job_id: The ID of the slurm job to be killed
         """
         if self._check_if_job_is_killable(job_id):
+            # the study records the cluster of the job
+            studies = [s for s in self.repo.iter_studies(has_job=True) if s.job_id == job_id]
+            if self._find_ambiguous_job_ids(studies):
+                return
             self.display.show_message(f"Killing job {job_id}", __name__ + "." + self.__class__.__name__)
-            self.env.kill_remote_job(job_id)
+            try:
+                self.env.kill_study_jobs(studies)
+            except RemoteEnvBaseError as exc:
+                self.display.show_error(str(exc), LOG_NAME)
         else:
             self.display.show_message(
                 f"You are not authorized to kill job {job_id}",
                 __name__ + "." + self.__class__.__name__,
             )
+
+    def _find_ambiguous_job_ids(self, studies: t.Iterable[StudyDTO]) -> t.Set[int]:
+        """The job IDs matching studies on several clusters: the job IDs of the clusters may collide"""
+        clusters: t.Dict[int, t.Set[str]] = collections.defaultdict(set)
+        for study in studies:
+            clusters[study.job_id].add(study.cluster)
+        ambiguous = {job_id for job_id, names in clusters.items() if len(names) > 1}
+        for job_id in sorted(ambiguous):
+            self.display.show_error(
+                f"Job {job_id} matches studies on several clusters, select the study by name instead",
+                LOG_NAME,
+            )
+        return ambiguous
+
+    def _select_studies(self, kill_filter: JobKillFilter) -> t.List[StudyDTO]:
+        """Selects the unfinished studies of the database matching the filter"""
+        studies = [s for s in self.repo.iter_studies(done=False, has_job=True) if not s.finished]
+        if kill_filter.job_ids:
+            job_ids = set(kill_filter.job_ids)
+            studies = [s for s in studies if s.job_id in job_ids]
+            ambiguous = self._find_ambiguous_job_ids(studies)
+            studies = [s for s in studies if s.job_id not in ambiguous]
+        if kill_filter.name_pattern:
+            studies = [s for s in studies if fnmatch.fnmatchcase(s.name, kill_filter.name_pattern)]
+        if kill_filter.states:
+            try:
+                snapshot = self.env.get_queue_snapshot()
+            except GetQueueError as exc:
+                self.display.show_error(f"Unable to select the jobs by state: {exc}", LOG_NAME)
+                return []
+            states = {state.upper() for state in kill_filter.states}
+            selected = snapshot.filter(job_ids=[s.job_id for s in studies], states=states)
+            studies = [s for s in studies if selected.get(s.job_id) is not None]
+        return studies
+
+    def kill_jobs(self, kill_filter: JobKillFilter) -> t.Sequence[int]:
+        """Kills the slurm jobs of the launcher selected by the filter, with a single `scancel` command per cluster.
+
+        Only the jobs of the studies inside the database can be killed.
+        A job ID matching studies on several clusters is not killed.
+        If the jobs of a cluster cannot be killed (e.g. the cluster is no longer configured),
+        the error is reported and the jobs of the other clusters are killed.
+        The killed studies are marked as finished with error in the database, with a single write.
+
+        Args:
+            kill_filter: The selection of the jobs to kill
+
+        Returns:
+            The IDs of the killed jobs
+        """
+        if not kill_filter:
+            return []
+
+        # Authorization is checked against the job IDs index of the database
+        known_job_ids = self.repo.get_job_ids()
+        for job_id in kill_filter.job_ids:
+            if job_id not in known_job_ids:
+                self.display.show_message(f"You are not authorized to kill job {job_id}", LOG_NAME)
+
+        studies = self._select_studies(kill_filter)
+        if not studies:
+            self.display.show_message("No job to kill", LOG_NAME)
+            return []
+
+        job_ids = sorted(s.job_id for s in studies)
+        self.display.show_message(f"Killing {len(job_ids)} jobs: {', '.join(map(str, job_ids))}", LOG_NAME)
+        groups: t.Dict[str, t.List[StudyDTO]] = collections.defaultdict(list)
+        for study in studies:
+            groups[study.cluster].append(study)
+        killed: t.List[StudyDTO] = []
+        for cluster_studies in groups.values():
+            try:
+                self.env.kill_study_jobs(cluster_studies)
+            except RemoteEnvBaseError as exc:
+                # Some jobs may have been killed: their state is updated by the next retrieval
+                names = ", ".join(s.name for s in cluster_studies)
+                self.display.show_error(f"Unable to kill the jobs of the studies {names}: {exc}", LOG_NAME)
+            else:
+                killed.extend(cluster_studies)
+        if not killed:
+            return []
+
+        for study in killed:
+            study.finished = True
+            study.with_error = True
+            study.job_state = "Ended with error"
+        self.repo.save_studies(killed)
+        return sorted(s.job_id for s in killed)
@@ -0,0 +1,148 @@
+import dataclasses
+import typing as t
+
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.multi_cluster_environment import Cluster, MultiClusterEnvironment
+from antareslauncher.remote_environnement.remote_environment_with_slurm import IN_FLIGHT_JOB_STATES, GetQueueError
+from antareslauncher.study_dto import StudyDTO
+
+LOG_NAME = f"{__name__}.ClusterDispatcher"
+
+
+@dataclasses.dataclass
+class ClusterLoad:
+    """
+    Load of a cluster, read at the beginning of each launch cycle.
+
+    Attributes:
+        in_flight: The number of jobs of the user which are pending or running.
+        pending_cpus: The number of CPUs requested by the pending jobs of the user.
+        idle_cpus: The number of idle CPUs of the partition.
+        total_cpus: The total number of CPUs of the partition.
+    """
+
+    in_flight: int = 0
+    pending_cpus: int = 0
+    idle_cpus: int = 0
+    total_cpus: int = 0
+
+    def expected_start_delay(self, n_cpu: int) -> float:
+        """
+        Estimates the delay before a new job can start, relatively to the size of the cluster.
+
+        The pending jobs are expected to start first: the new job starts as soon as
+        the CPUs missing to run all of them are released by the running jobs.
+
+        Args:
+            n_cpu: The number of CPUs of the new job.
+
+        Returns:
+            The number of missing CPUs divided by the total number of CPUs,
+            0 if the job can start immediately.
+        """
+        missing_cpus = self.pending_cpus + n_cpu - self.idle_cpus
+        return max(0, missing_cpus) / max(1, self.total_cpus)
+
+
+class ClusterDispatcher:
+    """
+    Places each study on the cluster with the lowest expected start time,
+    among the clusters supporting its Antares version and having free job slots.
+
+    The load of the clusters is read at the beginning of each launch cycle (see `refresh`),
+    and updated by each placement (see `place`), as if the job was pending.
+    The jobs in flight are capped per cluster, by its `max_jobs_in_flight` and, if `use_slurm_limits`
+    is set, by the maximum number of submitted jobs defined in its SLURM database.
+    The chosen cluster is recorded in the study, so that its job is retrieved
+    and killed on the right cluster.
+    """
+
+    def __init__(self, env: MultiClusterEnvironment, display: DisplayTerminal, *, use_slurm_limits: bool = False):
+        self.env = env
+        self.display = display
+        self.use_slurm_limits = use_slurm_limits
+        self._loads: t.Dict[str, ClusterLoad] = {}
+        self._slurm_limits: t.Dict[str, t.Optional[int]] = {}
+
+    def get_limit(self, cluster: Cluster) -> t.Optional[int]:
+        """Maximum number of jobs in flight on a cluster, or `None` if unlimited"""
+        if self.use_slurm_limits and cluster.name not in self._slurm_limits:
+            # The limits of the SLURM database are read only once
+            self._slurm_limits[cluster.name] = cluster.env.get_submit_limit()
+        limits = [n for n in (cluster.max_jobs_in_flight, self._slurm_limits.get(cluster.name)) if n]
+        return min(limits) if limits else None
+
+    def _read_load(self, cluster: Cluster) -> t.Optional[ClusterLoad]:
+        env = cluster.env
+        features = env.slurm_script_features
+        try:
+            snapshot = env.get_queue_snapshot()
+        except GetQueueError as exc:
+            self.display.show_error(f'Cluster "{cluster.label}" is unavailable: {exc}', LOG_NAME)
+            return None
+        jobs = snapshot.filter(partition=features.partition, qos=features.quality_of_service)
+        in_flight = len(jobs.filter(states=IN_FLIGHT_JOB_STATES))
+        pending_cpus = sum(record.cpus for record in jobs.filter(states={"PENDING"}))
+        cpu_counts = env.get_cpu_counts()
+        if cpu_counts is None:
+            # The partition is considered full: the cluster is used if no other cluster is available
+            return ClusterLoad(in_flight=in_flight, pending_cpus=pending_cpus)
+        return ClusterLoad(
+            in_flight=in_flight,
+            pending_cpus=pending_cpus,
+            idle_cpus=cpu_counts.idle,
+            total_cpus=cpu_counts.total,
+        )
+
+    def refresh(self) -> None:
+        """Reads the load of each cluster from its SLURM queue and from the idle CPUs of its partition"""
+        self._loads = {}
+        for cluster in self.env.clusters.values():
+            load = self._read_load(cluster)
+            if load is not None:
+                self._loads[cluster.name] = load
+
+    def _is_available(self, cluster: Cluster) -> bool:
+        load = self._loads.get(cluster.name)
+        if load is None:
+            return False
+        limit = self.get_limit(cluster)
+        return limit is None or load.in_flight < limit
+
+    def place(self, study: StudyDTO) -> bool:
+        """Chooses the cluster of a study and records it in the study
+
+        A study whose ZIP file is already uploaded stays on its cluster.
+
+        Returns:
+            True if the study can be submitted, False if its submission must be deferred
+        """
+        if study.zip_is_sent:
+            candidates = [self.env.get_cluster(study)]
+        else:
+            candidates = [c for c in self.env.clusters.values() if c.supports(study.antares_version)]
+        available = [c for c in candidates if self._is_available(c)]
+        if not available:
+            self.display.show_message(f'"{study.name}": submission deferred, no cluster available', LOG_NAME)
+            return False
+        cluster = min(
+            available,
+            key=lambda c: (self._loads[c.name].expected_start_delay(study.n_cpu), self._loads[c.name].in_flight),
+        )
+        load = self._loads[cluster.name]
+        load.in_flight += 1
+        load.pending_cpus += study.n_cpu
+        study.cluster = cluster.name
+        self.display.show_message(f'"{study.name}": dispatched to cluster "{cluster.label}"', LOG_NAME)
+        return True
+
+    def release(self, study: StudyDTO) -> None:
+        """Cancels the placement of a study whose job could not be submitted, e.g. when the upload failed"""
+        load = self._loads.get(self.env.get_cluster(study).name)
+        if load is not None:
+            load.in_flight -= 1
+            load.pending_cpus -= study.n_cpu
+
+    def saturate(self, study: StudyDTO) -> None:
+        """Marks the cluster of a study as full, e.g. when SLURM rejected a job because the submit limit is reached"""
+        self._loads.pop(self.env.get_cluster(study).name, None)
@@ -1,19 +1,77 @@
 import getpass
+import hashlib
+import typing as t
 import zipfile
 
 from pathlib import Path
 
-from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo.data_repo import DataRepo
 from antareslauncher.data_repo.data_reporter import DataReporter
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    RemoteEnvironment,
+    SubmitLimitReachedError,
+)
 from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import record_phase
+from antareslauncher.use_cases.launch.cluster_dispatcher import ClusterDispatcher
 from antareslauncher.use_cases.launch.study_submitter import StudySubmitter
 from antareslauncher.use_cases.launch.study_zip_uploader import StudyZipfileUploader
+from antareslauncher.use_cases.launch.submission_governor import SubmissionGovernor
 
 LOG_NAME = f"{__name__}.StudyLauncher"
 
 
+_CHUNK_SIZE = 1024 * 1024
+
+
+class InputHasher:
+    """
+    Computes the content hash of the study input, used by the remote script
+    to reuse the input already unpacked on the node (see `launchAntares_v1.2.0.sh`).
+
+    The hash depends on the relative paths and on the content of the files,
+    but not on the name of the study directory nor on the modification times.
+    The files must be added in the order of their paths.
+    """
+
+    def __init__(self, study_dir: Path) -> None:
+        self.study_dir = study_dir
+        self._digest = hashlib.sha256()
+
+    def add_dir(self, path: Path) -> None:
+        relpath = path.relative_to(self.study_dir).as_posix()
+        self._digest.update(f"D {relpath}\0".encode("utf-8"))
+
+    def add_file(self, path: Path, size: int) -> None:
+        """Adds the header of a file, its content is added with `update`"""
+        relpath = path.relative_to(self.study_dir).as_posix()
+        self._digest.update(f"F {relpath} {size}\0".encode("utf-8"))
+
+    def update(self, chunk: bytes) -> None:
+        self._digest.update(chunk)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def _write_to_zip(zf: zipfile.ZipFile, path: Path, root_dir: Path, hasher: InputHasher) -> None:
+    """Compresses a file or a directory of the study, and adds its content to the input hash"""
+    arcname = path.relative_to(root_dir)
+    if path.is_dir():
+        zf.write(path, arcname)
+        hasher.add_dir(path)
+        return
+    # Like `ZipFile.write`, but the content is read once for the ZIP file and the hash
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = zf.compression
+    hasher.add_file(path, zinfo.file_size)
+    with path.open(mode="rb") as src, zf.open(zinfo, mode="w") as dst:
+        while chunk := src.read(_CHUNK_SIZE):
+            dst.write(chunk)
+            hasher.update(chunk)
+
+
 class StudyLauncher:
     def __init__(
         self,
@@ -21,18 +79,36 @@ class StudyLauncher:
         study_submitter: StudySubmitter,
         reporter: DataReporter,
         display: DisplayTerminal,
+        governor: t.Optional[SubmissionGovernor] = None,
+        dispatcher: t.Optional[ClusterDispatcher] = None,
     ):
         self.display = display
         self._study_uploader = study_uploader
         self._study_submitter = study_submitter
         self.reporter = reporter
+        self._governor = governor
+        self._dispatcher = dispatcher
 
     def launch_study(self, study: StudyDTO) -> None:
         if study.job_id:
             # No need to display a user message here; job already exists.
             return
 
+        if self._governor is not None and not self._governor.acquire():
+            # The study stays in the database without job ID: it will be submitted later.
+            self.display.show_message(f'"{study.name}": submission deferred, too many jobs in flight', LOG_NAME)
+            return
+
+        # The slots taken for the study are given back if its job is not submitted
+        placed = False
+        limit_reached = False
         try:
+            # Choose the cluster of the study, before uploading the ZIP file to it.
+            if self._dispatcher is not None and not self._dispatcher.place(study):
+                # The study stays in the database without job ID: it will be submitted later.
+                return
+            placed = self._dispatcher is not None
+
             # Compress the study folder and upload it to the SLURM server.
             study_dir = Path(study.path)
             zip_name = f"{study_dir.name}-{getpass.getuser()}.zip"
@@ -59,17 +135,21 @@ class StudyLauncher:
             # study_files |= set(study_dir.glob(include_pattern)) if include_pattern else set()
 
             # Compress the study directory
-            with zipfile.ZipFile(zip_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-                loading_bar = self.display.generate_progress_bar(sorted(study_files), desc="Compressing files: ")
-                for study_file in loading_bar:
-                    zf.write(study_file, study_file.relative_to(root_dir))
+            with record_phase(study, "zip"):
+                hasher = InputHasher(study_dir)
+                with zipfile.ZipFile(zip_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+                    loading_bar = self.display.generate_progress_bar(sorted(study_files), desc="Compressing files: ")
+                    for study_file in loading_bar:
+                        _write_to_zip(zf, study_file, root_dir, hasher)
+                study.input_hash = hasher.hexdigest()
 
             # Upload the ZIP file to the SLURM server.
             # If the upload is successful, the `zip_is_sent` attribute is updated accordingly.
             # In all cases, the ZIP file is removed from the local machine.
             study.zipfile_path = str(zip_path)
             try:
-                self._study_uploader.upload(study)
+                with record_phase(study, "upload"):
+                    self._study_uploader.upload(study)
                 if not study.zip_is_sent:
                     raise Exception("ZIP upload failed")
             except Exception as e:
@@ -84,36 +164,65 @@ class StudyLauncher:
             # If the launch is successful, the `job_id` attribute is updated accordingly.
             # If the launch fails, remove the ZIP file from the remote server.
             try:
-                self._study_submitter.submit_job(study)
+                with record_phase(study, "submit"):
+                    self._study_submitter.submit_job(study)
                 if not study.job_id:
                     raise Exception("Job submission failed")
             except Exception:
                 self._study_uploader.remove(study)
                 raise
 
+        except SubmitLimitReachedError:
+            # The study is not marked as failed: it will be submitted later.
+            self.display.show_message(f'"{study.name}": submission deferred, submit limit reached', LOG_NAME)
+            limit_reached = True
+            if self._governor is not None:
+                self._governor.saturate()
+            if self._dispatcher is not None:
+                self._dispatcher.saturate(study)
+
         except Exception as e:
             # The exception is not re-raised, but the job is marked as failed with an internal error message.
             study.with_error = True
             study.job_state = f"Internal error: {e}"
 
         finally:
+            if not study.job_id and not limit_reached:
+                if self._governor is not None:
+                    self._governor.release()
+                if placed and self._dispatcher is not None:
+                    self._dispatcher.release(study)
             # Save the study information after processing.
             self.reporter.save_study(study)
+            if study.job_id:
+                # The job ID is written at once, so that the job is not submitted again after a crash
+                self.reporter.flush()
 
 
 class LaunchController:
     def __init__(
         self,
-        repo: DataRepoTinydb,
-        env: RemoteEnvironmentWithSlurm,
+        repo: DataRepo,
+        env: RemoteEnvironment,
         display: DisplayTerminal,
+        governor: t.Optional[SubmissionGovernor] = None,
+        dispatcher: t.Optional[ClusterDispatcher] = None,
     ):
         self.repo = repo
         self.env = env
         self.display = display
+        self.governor = governor
+        self.dispatcher = dispatcher
         study_uploader = StudyZipfileUploader(env, display)
         study_submitter = StudySubmitter(env, display)
-        self.study_launcher = StudyLauncher(study_uploader, study_submitter, DataReporter(repo), display)
+        self.study_launcher = StudyLauncher(
+            study_uploader,
+            study_submitter,
+            DataReporter(repo),
+            display,
+            governor=governor,
+            dispatcher=dispatcher,
+        )
 
     def launch_all_studies(self) -> None:
         """Processes all the studies and send them to the server to process the job
@@ -125,7 +234,35 @@ class LaunchController:
         2. upload the study
 
         3. submit the slurm job
+
+        If a submission governor is used, the studies in excess
+        stay in the database and are submitted later.
+
+        If a cluster dispatcher is used, each study is submitted to the cluster
+        with the lowest expected start time.
+
+        The studies are saved in a single unit of work (see `DataRepo.unit_of_work`).
         """
-        studies = self.repo.get_list_of_studies()
-        for study in studies:
-            self.study_launcher.launch_study(study)
+        # The studies already submitted are skipped
+        studies = self.repo.iter_studies(has_job=False)
+        self._refresh_limits()
+        with self.repo.unit_of_work():
+            for study in studies:
+                self.study_launcher.launch_study(study)
+
+    def _refresh_limits(self) -> None:
+        if self.governor is not None:
+            self.governor.refresh()
+        if self.dispatcher is not None:
+            self.dispatcher.refresh()
+
+    def launch_deferred_studies(self) -> None:
+        """Submits the studies deferred by the submission governor or the cluster dispatcher, if slots are free"""
+        if self.governor is None and self.dispatcher is None:
+            return
+        studies = [s for s in self.repo.iter_studies(done=False, has_job=False) if not s.with_error]
+        if studies:
+            self._refresh_limits()
+            with self.repo.unit_of_work():
+                for study in studies:
+                    self.study_launcher.launch_study(study)
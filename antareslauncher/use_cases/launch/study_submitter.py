@@ -1,14 +1,14 @@
 from pathlib import Path
 
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
 from antareslauncher.study_dto import StudyDTO
 
 LOG_NAME = f"{__name__}.StudySubmitter"
 
 
 class StudySubmitter(object):
-    def __init__(self, env: RemoteEnvironmentWithSlurm, display: DisplayTerminal):
+    def __init__(self, env: RemoteEnvironment, display: DisplayTerminal):
         self.env = env
         self.display = display
 
@@ -1,12 +1,12 @@
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
 from antareslauncher.study_dto import StudyDTO
 
 LOG_NAME = f"{__name__}.StudyZipfileUploader"
 
 
 class StudyZipfileUploader:
-    def __init__(self, env: RemoteEnvironmentWithSlurm, display: DisplayTerminal):
+    def __init__(self, env: RemoteEnvironment, display: DisplayTerminal):
         self.env = env
         self.display = display
 
@@ -15,7 +15,7 @@ class StudyZipfileUploader:
             self.display.show_message(f'"{study.name}": ZIP is already uploaded', LOG_NAME)
             return
         self.display.show_message(f'"{study.name}": uploading study...', LOG_NAME)
-        study.zip_is_sent = self.env.upload_file(study.zipfile_path)
+        study.zip_is_sent = self.env.upload_input_zipfile(study)
         if study.zip_is_sent:
             self.display.show_message(f'"{study.name}": was uploaded', LOG_NAME)
         else:
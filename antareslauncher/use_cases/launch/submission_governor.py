@@ -0,0 +1,90 @@
+import typing as t
+
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
+
+LOG_NAME = f"{__name__}.SubmissionGovernor"
+
+
+class SubmissionGovernor:
+    """
+    Caps the number of jobs in flight (pending or running) of the user,
+    in the partition and with the QOS used to submit the studies.
+
+    The limit is the lowest of:
+
+    - the maximum number of jobs in flight from the configuration (if not zero),
+    - the maximum number of submitted jobs defined in the SLURM database
+      for the QOS and the user association (if `use_slurm_limits` is set).
+
+    The number of free slots is calculated at the beginning of each launch cycle
+    (see `refresh`), and decremented by each submission (see `acquire` and `release`).
+    """
+
+    def __init__(
+        self,
+        env: RemoteEnvironment,
+        display: DisplayTerminal,
+        *,
+        max_jobs_in_flight: int = 0,
+        use_slurm_limits: bool = False,
+    ):
+        self.env = env
+        self.display = display
+        self.max_jobs_in_flight = max_jobs_in_flight
+        self.use_slurm_limits = use_slurm_limits
+        self._slurm_limit: t.Optional[int] = None
+        self._slurm_limit_read = False
+        self._free_slots: t.Optional[int] = None  # `None` means unlimited
+
+    @property
+    def limit(self) -> t.Optional[int]:
+        """Maximum number of jobs in flight, or `None` if unlimited"""
+        if self.use_slurm_limits and not self._slurm_limit_read:
+            # The limits of the SLURM database are read only once
+            self._slurm_limit = self.env.get_submit_limit()
+            self._slurm_limit_read = True
+        limits = [n for n in (self.max_jobs_in_flight, self._slurm_limit) if n]
+        return min(limits) if limits else None
+
+    @property
+    def free_slots(self) -> t.Optional[int]:
+        """Number of jobs which can still be submitted, or `None` if unlimited"""
+        return self._free_slots
+
+    def refresh(self) -> None:
+        """Calculates the number of free slots from the number of jobs in the SLURM queue"""
+        limit = self.limit
+        if limit is None:
+            self._free_slots = None
+            return
+        in_flight = self.env.count_jobs_in_flight()
+        if in_flight is None:
+            # The queue cannot be read: the submissions are deferred to the next cycle
+            self._free_slots = 0
+            self.display.show_error("Unable to count the jobs in flight, submissions are deferred", LOG_NAME)
+        else:
+            self._free_slots = max(0, limit - in_flight)
+            self.display.show_message(f"Jobs in flight: {in_flight}/{limit}", LOG_NAME)
+
+    def acquire(self) -> bool:
+        """Takes a slot to submit a job
+
+        Returns:
+            True if the job can be submitted, False if the job must be deferred
+        """
+        if self._free_slots is None:
+            return True
+        if self._free_slots > 0:
+            self._free_slots -= 1
+            return True
+        return False
+
+    def release(self) -> None:
+        """Gives back a slot taken with `acquire`, when the job could not be submitted"""
+        if self._free_slots is not None:
+            self._free_slots += 1
+
+    def saturate(self) -> None:
+        """Marks all the slots as used, e.g. when SLURM rejected a job because the submit limit is reached"""
+        self._free_slots = 0
@@ -0,0 +1,58 @@
+import statistics
+import typing as t
+
+from dataclasses import dataclass
+
+from antareslauncher.data_repo.data_repo import DataRepo
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.study_lifecycle import PHASES, TOTAL_PHASE, get_phase_durations
+
+
+def _percentiles(values: t.Sequence[float]) -> t.Tuple[float, float, float]:
+    """The 50th, 90th and 99th percentiles of the values"""
+    if len(values) < 2:
+        return values[0], values[0], values[0]
+    cut_points = statistics.quantiles(values, n=100, method="inclusive")
+    return cut_points[49], cut_points[89], cut_points[98]
+
+
+@dataclass
+class LifecycleReportController:
+    repo: DataRepo
+    display: DisplayTerminal
+
+    def get_durations(self) -> t.Dict[str, t.List[float]]:
+        """Retrieve the durations of each lifecycle phase, for all the studies of the database and its archive"""
+        durations: t.Dict[str, t.List[float]] = {phase.name: [] for phase in PHASES + (TOTAL_PHASE,)}
+        for study in self.repo.get_study_history():
+            for name, duration in get_phase_durations(study).items():
+                durations[name].append(duration)
+        return durations
+
+    def show_report(self) -> None:
+        """Displays the percentiles of the duration of each lifecycle phase, in seconds"""
+        durations = self.get_durations()
+        if not any(durations.values()):
+            self.display.show_message(
+                "No study with lifecycle events found",
+                __name__ + "." + self.__class__.__name__,
+            )
+            return
+
+        # The share of a phase is relative to the total time of all the complete lifecycles
+        total_time = sum(durations[TOTAL_PHASE.name])
+        lines = [
+            f"{'PHASE':<10} {'COUNT':>6} {'P50':>10} {'P90':>10} {'P99':>10} {'MAX':>10} {'SHARE':>6}",
+        ]
+        for name, values in durations.items():
+            if not values:
+                continue
+            p50, p90, p99 = _percentiles(values)
+            share = f"{100 * sum(values) / total_time:.0f}%" if total_time else "-"
+            lines.append(
+                f"{name:<10} {len(values):>6} {p50:>10.1f} {p90:>10.1f} {p99:>10.1f} {max(values):>10.1f} {share:>6}"
+            )
+        self.display.show_message(
+            "Study lifecycle report (durations in seconds)\n" + "\n".join(lines),
+            __name__ + "." + self.__class__.__name__,
+        )
@@ -1,6 +1,7 @@
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
 from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import record_phase
 
 LOG_NAME = f"{__name__}.RemoteServerCleaner"
 
@@ -8,7 +9,7 @@ LOG_NAME = f"{__name__}.RemoteServerCleaner"
 class RemoteServerCleaner:
     def __init__(
         self,
-        env: RemoteEnvironmentWithSlurm,
+        env: RemoteEnvironment,
         display: DisplayTerminal,
     ):
         self._display = display
@@ -20,7 +21,8 @@ class RemoteServerCleaner:
             # delete the final ZIP, there's no need to raise an exception.
             # Instead, it's sufficient to issue a warning to alert the user.
             try:
-                removed = self._env.clean_remote_server(study)
+                with record_phase(study, "clean"):
+                    removed = self._env.clean_remote_server(study)
             except Exception as exc:
                 self._display.show_error(
                     f'"{study.name}": Clean remote server raised: {exc}',
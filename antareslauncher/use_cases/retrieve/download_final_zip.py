@@ -1,8 +1,9 @@
 from pathlib import Path
 
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
 from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import record_phase
 
 LOG_NAME = f"{__name__}.FinalZipDownloader"
 
@@ -10,7 +11,7 @@ LOG_NAME = f"{__name__}.FinalZipDownloader"
 class FinalZipDownloader(object):
     def __init__(
         self,
-        env: RemoteEnvironmentWithSlurm,
+        env: RemoteEnvironment,
         display: DisplayTerminal,
     ):
         self._env = env
@@ -35,7 +36,8 @@ class FinalZipDownloader(object):
             )
             dst_dir = Path(study.output_dir)
             dst_dir.mkdir(parents=True, exist_ok=True)
-            zip_path = self._env.download_final_zip(study)
+            with record_phase(study, "download"):
+                zip_path = self._env.download_final_zip(study)
             study.local_final_zipfile_path = str(zip_path) if zip_path else ""
             if study.local_final_zipfile_path:
                 self._display.show_message(
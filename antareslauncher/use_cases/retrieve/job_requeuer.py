@@ -0,0 +1,162 @@
+import math
+import typing as t
+
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    JobStateCodes,
+    RemoteEnvironment,
+    SubmitJobError,
+)
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import FINISHED_DETECTED
+
+LOG_NAME = f"{__name__}.JobRequeuer"
+
+DEFAULT_REQUEUE_STATES = (
+    JobStateCodes.BOOT_FAIL.value,
+    JobStateCodes.NODE_FAIL.value,
+    JobStateCodes.OUT_OF_MEMORY.value,
+    JobStateCodes.PREEMPTED.value,
+    JobStateCodes.TIMEOUT.value,
+)
+"""SLURM job states considered as transient failures, the jobs are resubmitted."""
+
+DEFAULT_REQUEUE_FACTOR = 1.5
+"""Factor applied to the time limit after a TIMEOUT, and to the memory after an OUT_OF_MEMORY."""
+
+MIB = 1024 * 1024
+
+_ACCOUNTING_DEFAULTS = {
+    "submit_time": "",
+    "start_time": "",
+    "end_time": "",
+    "elapsed": 0,
+    "total_cpu": 0,
+    "max_rss": 0,
+    "alloc_cpus": 0,
+    "exit_code": "",
+    "node_list": "",
+}
+
+
+class JobRequeuer:
+    """
+    Resubmits the jobs which ended with a transient failure (node failure, preemption, timeout...).
+
+    The input ZIP file of the study is still on the remote server, so it is not uploaded again.
+    After a TIMEOUT (or DEADLINE), the time limit is increased by `time_limit_factor`;
+    after an OUT_OF_MEMORY, the memory is increased by `memory_factor` from the peak memory of the job.
+
+    Each failed attempt is recorded in `StudyDTO.attempts`, with its job ID, state,
+    requested resources and accounting data. When the maximum number of attempts is reached,
+    the study ends with an error as usual.
+    """
+
+    def __init__(
+        self,
+        env: RemoteEnvironment,
+        display: DisplayTerminal,
+        *,
+        max_attempts: int,
+        requeue_states: t.Iterable[str] = DEFAULT_REQUEUE_STATES,
+        time_limit_factor: float = DEFAULT_REQUEUE_FACTOR,
+        memory_factor: float = DEFAULT_REQUEUE_FACTOR,
+    ):
+        self.env = env
+        self.display = display
+        self.max_attempts = max_attempts
+        self.requeue_states = frozenset(state.upper() for state in requeue_states)
+        self.time_limit_factor = time_limit_factor
+        self.memory_factor = memory_factor
+
+    @staticmethod
+    def _describe_attempt(study: StudyDTO) -> t.Dict[str, t.Any]:
+        return {
+            "job_id": study.job_id,
+            "slurm_state": study.slurm_state,
+            "cluster": study.cluster,
+            "time_limit": study.time_limit,
+            "memory_limit": study.memory_limit,
+            **{name: getattr(study, name) for name in _ACCOUNTING_DEFAULTS},
+        }
+
+    def _increase_resources(self, study: StudyDTO) -> bool:
+        """Increases the resources of the study according to the failure, return False if it is not possible"""
+        if study.slurm_state in {JobStateCodes.TIMEOUT.value, JobStateCodes.DEADLINE.value}:
+            if study.time_limit is None:
+                return False
+            study.time_limit = math.ceil(study.time_limit * self.time_limit_factor)
+        elif study.slurm_state == JobStateCodes.OUT_OF_MEMORY.value:
+            # The memory used by the job is the reference, when the SLURM default is requested
+            memory = max(study.memory_limit, math.ceil(study.max_rss / MIB))
+            if not memory:
+                return False
+            study.memory_limit = math.ceil(memory * self.memory_factor)
+        return True
+
+    @staticmethod
+    def _fail(study: StudyDTO) -> None:
+        # Some failures, like PREEMPTED, are not considered as finished by `get_job_state_flags`
+        study.started = True
+        study.finished = True
+        study.with_error = True
+        study.job_state = "Ended with error"
+
+    def requeue(self, study: StudyDTO) -> bool:
+        """Resubmits the job of the study if it ended with a transient failure
+
+        Args:
+            study: The study, whose job state has just been updated
+
+        Returns:
+            True if a new job is submitted, False otherwise
+        """
+        if not study.job_id or study.done or study.slurm_state not in self.requeue_states:
+            return False
+
+        nb_attempts = len(study.attempts) + 1
+        if nb_attempts >= self.max_attempts:
+            self.display.show_error(
+                f'"{study.name}": job {study.job_id} ended with {study.slurm_state},'
+                f" no more attempt ({nb_attempts}/{self.max_attempts})",
+                LOG_NAME,
+            )
+            self._fail(study)
+            return False
+
+        attempt = self._describe_attempt(study)
+        if not self._increase_resources(study):
+            self.display.show_error(
+                f'"{study.name}": job {study.job_id} ended with {study.slurm_state}, the resources cannot be increased',
+                LOG_NAME,
+            )
+            self._fail(study)
+            return False
+
+        try:
+            job_id = self.env.submit_job(study)
+        except SubmitJobError as exc:
+            study.time_limit, study.memory_limit = attempt["time_limit"], attempt["memory_limit"]
+            self.display.show_error(f'"{study.name}": job {study.job_id} was not resubmitted: {exc}', LOG_NAME)
+            self._fail(study)
+            return False
+
+        # The study is pending again, with a new job
+        study.attempts.append(attempt)
+        study.job_id = job_id
+        study.started = False
+        study.finished = False
+        study.with_error = False
+        study.job_state = "Pending"
+        study.slurm_state = ""
+        study.logs_downloaded = False
+        for name, value in _ACCOUNTING_DEFAULTS.items():
+            setattr(study, name, value)
+        for event in (FINISHED_DETECTED, "logs_start", "logs_end"):
+            study.events.pop(event, None)
+        self.display.show_message(
+            f'"{study.name}": job {attempt["job_id"]} ended with {attempt["slurm_state"]},'
+            f" resubmitted as job {job_id} (attempt {nb_attempts + 1}/{self.max_attempts})",
+            LOG_NAME,
+        )
+        return True
@@ -1,8 +1,9 @@
 from pathlib import Path
 
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
 from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import record_phase
 
 LOG_NAME = f"{__name__}.LogDownloader"
 
@@ -10,7 +11,7 @@ LOG_NAME = f"{__name__}.LogDownloader"
 class LogDownloader:
     def __init__(
         self,
-        env: RemoteEnvironmentWithSlurm,
+        env: RemoteEnvironment,
         display: DisplayTerminal,
     ):
         self.env = env
@@ -35,7 +36,12 @@ class LogDownloader:
             job_log_dir.mkdir(parents=True, exist_ok=True)
 
             # make an attempt to download logs
-            downloaded_logs = self.env.download_logs(study)
+            # (only the last download, once the job is finished, is part of the study lifecycle)
+            if study.finished:
+                with record_phase(study, "logs"):
+                    downloaded_logs = self.env.download_logs(study)
+            else:
+                downloaded_logs = self.env.download_logs(study)
             if downloaded_logs:
                 study.logs_downloaded = True
                 self.display.show_message(
@@ -0,0 +1,49 @@
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import record_phase
+
+LOG_NAME = f"{__name__}.ResultManifestRecorder"
+
+
+class ResultManifestRecorder:
+    """
+    Records the manifest of the results of the studies whose results are kept on the remote server
+    (see `StudyDTO.keep_remote`), instead of downloading their final ZIP file.
+
+    The files are fetched on demand with the `ResultFetcher`.
+    """
+
+    def __init__(
+        self,
+        env: RemoteEnvironment,
+        display: DisplayTerminal,
+    ):
+        self._env = env
+        self._display = display
+
+    def record(self, study: StudyDTO) -> None:
+        """
+        Record the manifest of the final ZIP file of the specified study if it has finished
+        (without error) and has not been recorded yet, then remove the input ZIP file
+        from the remote server.
+
+        Args:
+            study: A data transfer object representing the study.
+        """
+        if not study.finished or study.with_error or study.remote_final_zipfile_path:
+            return
+        with record_phase(study, "manifest"):
+            manifest = self._env.read_result_manifest(study)
+        if manifest is None:
+            self._display.show_error(f'"{study.name}": Final ZIP NOT found on the remote server', LOG_NAME)
+            return
+        study.result_manifest = manifest
+        total_size = sum(entry["size"] for entry in manifest)
+        self._display.show_message(
+            f'"{study.name}": results kept on the remote server ({len(manifest)} files, {total_size} bytes)',
+            LOG_NAME,
+        )
+        # The final ZIP file is kept, only the input ZIP file is removed.
+        if not self._env.remove_input_zipfile(study):
+            self._display.show_error(f'"{study.name}": input ZIP file NOT removed', LOG_NAME)
@@ -1,11 +1,17 @@
-from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+import time
+import typing as t
+
+from antareslauncher.data_repo.data_repo import DataRepo
 from antareslauncher.data_repo.data_reporter import DataReporter
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironment
+from antareslauncher.study_dto import StudyDTO
 from antareslauncher.use_cases.retrieve.clean_remote_server import RemoteServerCleaner
 from antareslauncher.use_cases.retrieve.download_final_zip import FinalZipDownloader
 from antareslauncher.use_cases.retrieve.final_zip_extractor import FinalZipExtractor
+from antareslauncher.use_cases.retrieve.job_requeuer import JobRequeuer
 from antareslauncher.use_cases.retrieve.log_downloader import LogDownloader
+from antareslauncher.use_cases.retrieve.result_manifest_recorder import ResultManifestRecorder
 from antareslauncher.use_cases.retrieve.state_updater import StateUpdater
 from antareslauncher.use_cases.retrieve.study_retriever import StudyRetriever
 
@@ -15,10 +21,11 @@ LOG_NAME = f"{__name__}.RetrieveController"
 class RetrieveController:
     def __init__(
         self,
-        repo: DataRepoTinydb,
-        env: RemoteEnvironmentWithSlurm,
+        repo: DataRepo,
+        env: RemoteEnvironment,
         display: DisplayTerminal,
         state_updater: StateUpdater,
+        job_requeuer: t.Optional[JobRequeuer] = None,
     ):
         self.repo = repo
         self.env = env
@@ -28,6 +35,7 @@ class RetrieveController:
         final_zip_downloader = FinalZipDownloader(env=self.env, display=self.display)
         remote_server_cleaner = RemoteServerCleaner(env=self.env, display=self.display)
         zip_extractor = FinalZipExtractor(display=self.display)
+        manifest_recorder = ResultManifestRecorder(env=self.env, display=self.display)
         self.study_retriever = StudyRetriever(
             state_updater,
             logs_downloader,
@@ -35,6 +43,8 @@ class RetrieveController:
             remote_server_cleaner,
             zip_extractor,
             DataReporter(repo),
+            job_requeuer=job_requeuer,
+            manifest_recorder=manifest_recorder,
         )
 
     @property
@@ -44,8 +54,7 @@ class RetrieveController:
         Returns:
             True if all the studies are done, False otherwise
         """
-        studies = self.repo.get_list_of_studies()
-        return all(study.done for study in studies)
+        return self.repo.all_studies_done()
 
     def retrieve_all_studies(self) -> bool:
         """Retrieves all the studies and logs from the environment and process them
@@ -56,11 +65,101 @@ class RetrieveController:
         3. download results
         4. clean remote server
         5. extract result
+
+        The results of the studies kept on the remote server are not downloaded:
+        the manifest of their final ZIP file is recorded instead.
+
+        The state of the jobs and the presence of their logs and results
+        are probed once for all studies, with a single remote command.
+        If the probe fails, the job states are read from a single snapshot of the SLURM queue.
+        The studies whose submission has been deferred have no job state to poll: they are skipped.
+
+        The studies are saved in a single unit of work (see `DataRepo.unit_of_work`).
         """
-        studies = self.repo.get_list_of_studies()
+        # The done studies are skipped
+        studies = []
+        deferred_count = 0
+        for study in self.repo.iter_studies(done=False):
+            if study.job_id or study.with_error:
+                studies.append(study)
+            else:
+                deferred_count += 1
         self.display.show_message("Retrieving all studies...", LOG_NAME)
-        for study in studies:
-            self.study_retriever.retrieve(study)
-        if self.all_studies_done:
+        if deferred_count:
+            self.display.show_message(f"{deferred_count} studies waiting for a free slot", LOG_NAME)
+        if not self.env.refresh_job_probes(studies):
+            self.env.refresh_queue_snapshot()
+        try:
+            with self.repo.unit_of_work():
+                for study in studies:
+                    self.study_retriever.retrieve(study)
+        finally:
+            self.env.clear_job_probes()
+        all_done = not deferred_count and all(study.done for study in studies)
+        if all_done:
             self.display.show_message("All retrievals are done.", LOG_NAME)
-        return self.all_studies_done
+        return all_done
+
+    def retrieve_on_job_transitions(
+        self,
+        interval: float,
+        *,
+        max_duration: float = 86400,
+        on_slot_freed: t.Optional[t.Callable[[], None]] = None,
+    ) -> bool:
+        """Watches the state of the running jobs and retrieves each study as soon as its job is finished
+
+        The watcher runs on the remote server and pushes the job state transitions,
+        so that the results are downloaded a few seconds after the end of the job.
+        The other transitions (e.g. a pending job which starts) are applied to the study
+        without querying the remote server.
+
+        When a job is finished, `on_slot_freed` is called (e.g. to submit the deferred studies),
+        and the watcher is restarted if new jobs have been submitted (or requeued) meanwhile.
+        The watching stops when all the jobs are finished, when the connection is lost,
+        or after `max_duration` seconds.
+
+        Args:
+            interval: The delay in seconds between two checks of the SLURM queue by the watcher.
+            max_duration: The maximum duration in seconds of the watching.
+            on_slot_freed: Function called each time a job is finished.
+
+        Returns:
+            True if all the studies are done, False otherwise
+        """
+        deadline = time.monotonic() + max_duration
+        watched = {s.job_id: s for s in self.repo.iter_studies(done=False, has_job=True)}
+        while watched and (remaining := deadline - time.monotonic()) > 0:
+            self.display.show_message(f"Watching {len(watched)} jobs...", LOG_NAME)
+            new_jobs: t.Dict[int, StudyDTO] = {}
+            for transition in self.env.watch_jobs(watched, interval=interval, max_duration=remaining):
+                study = watched.get(transition.job_id)
+                if study is None or study.done or study.job_id != transition.job_id:
+                    continue
+                if not transition.final and transition.state:
+                    if self.state_updater.apply_job_state(study, transition.state):
+                        self.repo.save_study(study)
+                        continue
+                self._retrieve_finished_study(study)
+                if on_slot_freed is not None:
+                    on_slot_freed()
+                running = {s.job_id: s for s in self.repo.iter_studies(done=False, has_job=True)}
+                new_jobs = {job_id: s for job_id, s in running.items() if job_id not in watched}
+                if new_jobs:
+                    # the watcher is restarted to watch the new jobs
+                    watched = running
+                    break
+            if not new_jobs:
+                break
+        all_done = self.all_studies_done
+        if all_done:
+            self.display.show_message("All retrievals are done.", LOG_NAME)
+        return all_done
+
+    def _retrieve_finished_study(self, study: StudyDTO) -> None:
+        """Retrieves a study, with the state of its job and its remote files read with a single remote command"""
+        self.env.refresh_job_probes([study])
+        try:
+            self.study_retriever.retrieve(study)
+        finally:
+            self.env.clear_job_probes()
@@ -2,10 +2,13 @@ import typing as t
 
 from antareslauncher.display.display_terminal import DisplayTerminal
 from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    JOB_STATE_FLAGS,
     GetJobStateError,
-    RemoteEnvironmentWithSlurm,
+    JobStateCodes,
+    RemoteEnvironment,
 )
 from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import FINISHED_DETECTED, record_event
 
 LOG_NAME = f"{__name__}.RetrieveController"
 
@@ -13,7 +16,7 @@ LOG_NAME = f"{__name__}.RetrieveController"
 class StateUpdater:
     def __init__(
         self,
-        env: RemoteEnvironmentWithSlurm,
+        env: RemoteEnvironment,
         display: DisplayTerminal,
     ):
         self._env = env
@@ -30,11 +33,17 @@ class StateUpdater:
                 f'"{study.name}": (JOBID={study.job_id}): {study.job_state}',
                 LOG_NAME,
             )
-        else:
+        elif study.with_error:
             self._display.show_error(
                 f'"{study.name}": Job was NOT submitted',
                 LOG_NAME,
             )
+        else:
+            # The submission has been deferred by the submission governor or the cluster dispatcher
+            self._display.show_message(
+                f'"{study.name}": submission deferred, waiting for a free slot',
+                LOG_NAME,
+            )
 
     def run(self, study: StudyDTO) -> None:
         """Gets the job state flags from the environment and update the IStudyDTO flags then save study
@@ -49,6 +58,8 @@ class StateUpdater:
                     s, f, e = self._env.get_job_state_flags(study)
                 else:
                     s, f, e = False, False, False
+                if f and not study.finished:
+                    record_event(study, FINISHED_DETECTED)
                 study.started = s
                 study.finished = f
                 study.with_error = e
@@ -59,6 +70,32 @@ class StateUpdater:
                     LOG_NAME,
                 )
 
+        self._update_job_state(study)
+
+    def apply_job_state(self, study: StudyDTO, slurm_state: str) -> bool:
+        """Updates the study flags with a job state pushed by the job watcher, without querying the remote server
+
+        Args:
+            study: The study data transfer object
+            slurm_state: The SLURM job state, e.g.: "RUNNING"
+
+        Returns:
+            False if the job state is unknown: the study flags are not updated
+        """
+        try:
+            job_state = JobStateCodes(slurm_state)
+        except ValueError:
+            return False
+        if not study.done and not study.with_error:
+            started, finished, with_error = JOB_STATE_FLAGS[job_state]
+            if finished and not study.finished:
+                record_event(study, FINISHED_DETECTED)
+            study.slurm_state = job_state.value
+            study.started, study.finished, study.with_error = started, finished, with_error
+        self._update_job_state(study)
+        return True
+
+    def _update_job_state(self, study: StudyDTO) -> None:
         # set current study job state
         if study.with_error:
             study.job_state = "Ended with error"
@@ -1,9 +1,13 @@
+import typing as t
+
 from antareslauncher.data_repo.data_reporter import DataReporter
 from antareslauncher.study_dto import StudyDTO
 from antareslauncher.use_cases.retrieve.clean_remote_server import RemoteServerCleaner
 from antareslauncher.use_cases.retrieve.download_final_zip import FinalZipDownloader
 from antareslauncher.use_cases.retrieve.final_zip_extractor import FinalZipExtractor
+from antareslauncher.use_cases.retrieve.job_requeuer import JobRequeuer
 from antareslauncher.use_cases.retrieve.log_downloader import LogDownloader
+from antareslauncher.use_cases.retrieve.result_manifest_recorder import ResultManifestRecorder
 from antareslauncher.use_cases.retrieve.state_updater import StateUpdater
 
 
@@ -16,6 +20,8 @@ class StudyRetriever:
         remote_server_cleaner: RemoteServerCleaner,
         zip_extractor: FinalZipExtractor,
         reporter: DataReporter,
+        job_requeuer: t.Optional[JobRequeuer] = None,
+        manifest_recorder: t.Optional[ResultManifestRecorder] = None,
     ):
         self.state_updater = state_updater
         self.logs_downloader = logs_downloader
@@ -23,12 +29,23 @@ class StudyRetriever:
         self.remote_server_cleaner = remote_server_cleaner
         self.zip_extractor = zip_extractor
         self.reporter = reporter
+        self.job_requeuer = job_requeuer
+        self.manifest_recorder = manifest_recorder
 
     def retrieve(self, study: StudyDTO) -> None:
         if not study.done:
+            remote_state = (study.job_id, study.remote_server_is_clean)
             try:
                 self.state_updater.run(study)
                 self.logs_downloader.run(study)
+                if self.job_requeuer is not None and self.job_requeuer.requeue(study):
+                    # The input ZIP file is kept on the remote server for the new job
+                    return
+                if study.keep_remote and self.manifest_recorder is not None:
+                    # The results stay on the remote server, they are fetched on demand
+                    self.manifest_recorder.record(study)
+                    study.done = study.with_error or (study.logs_downloaded and bool(study.remote_final_zipfile_path))
+                    return
                 self.final_zip_downloader.download(study)
                 self.remote_server_cleaner.clean(study)
                 self.zip_extractor.extract_final_zip(study)
@@ -46,3 +63,7 @@ class StudyRetriever:
 
             finally:
                 self.reporter.save_study(study)
+                if (study.job_id, study.remote_server_is_clean) != remote_state:
+                    # A requeued job or a cleaned remote server is written at once:
+                    # after a crash, the job would be submitted again, or the results downloaded again
+                    self.reporter.flush()
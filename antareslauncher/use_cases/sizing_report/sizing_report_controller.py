@@ -0,0 +1,59 @@
+import statistics
+import typing as t
+
+from dataclasses import dataclass
+
+from antareslauncher.data_repo.data_repo import DataRepo
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.study_dto import StudyDTO
+
+MIB = 1024 * 1024
+
+
+def _ratio(actual: float, predicted: float) -> t.Optional[float]:
+    return actual / predicted if actual > 0 and predicted > 0 else None
+
+
+@dataclass
+class SizingReportController:
+    repo: DataRepo
+    display: DisplayTerminal
+
+    def get_sized_studies(self) -> t.Sequence[StudyDTO]:
+        """Retrieve the finished studies for which a prediction was made"""
+        return [s for s in self.repo.get_study_history() if s.predicted_elapsed > 0 and s.elapsed > 0]
+
+    def show_report(self) -> None:
+        """Displays the predicted resources of the finished studies against the actual ones"""
+        studies = self.get_sized_studies()
+        if not studies:
+            self.display.show_message(
+                "No finished study with predicted resources found",
+                __name__ + "." + self.__class__.__name__,
+            )
+            return
+
+        lines = [
+            f"{'NAME':<40} {'CPU':>4} {'ELAPSED':>9} {'PREDICTED':>9} {'LIMIT':>9}"
+            f" {'RSS (MiB)':>10} {'PREDICTED':>10} {'LIMIT':>10}"
+        ]
+        time_ratios = []
+        memory_ratios = []
+        for study in studies:
+            lines.append(
+                f"{study.name[:40]:<40} {study.n_cpu:>4} {study.elapsed:>9} {study.predicted_elapsed:>9}"
+                f" {study.time_limit or 0:>9} {study.max_rss // MIB:>10} {study.predicted_max_rss // MIB:>10}"
+                f" {study.memory_limit:>10}"
+            )
+            if (ratio := _ratio(study.elapsed, study.predicted_elapsed)) is not None:
+                time_ratios.append(ratio)
+            if (ratio := _ratio(study.max_rss, study.predicted_max_rss)) is not None:
+                memory_ratios.append(ratio)
+
+        lines.append(f"Median actual/predicted elapsed time ratio: {statistics.median(time_ratios):.2f}")
+        if memory_ratios:
+            lines.append(f"Median actual/predicted peak memory ratio: {statistics.median(memory_ratios):.2f}")
+        self.display.show_message(
+            "Resource sizing report\n" + "\n".join(lines),
+            __name__ + "." + self.__class__.__name__,
+        )
@@ -0,0 +1,313 @@
+#!/bin/bash
+#SBATCH --ntasks=1                      # Number of MPI ranks
+#SBATCH --nodes=1                       # Number of nodes
+#SBATCH --output=antares-out-%j.txt      # Standard output log
+#SBATCH --error=antares-err-%j.txt       # Standard error log
+
+INPUT_ZIPNAME=$1
+ANTARES_VERSION=$2
+JOB_TYPE=$3
+POST_PROCESSING=$4
+OTHER_OPTIONS=$5
+INPUT_HASH=$6  # content hash of the study input (optional), used by the input cache
+OUTPUT_INCLUDE=$7  # glob patterns of the output files to zip, separated by commas (optional)
+OUTPUT_EXCLUDE=$8  # glob patterns of the output files not to zip, separated by commas (optional)
+FULL_RESULTS_RETENTION_DAYS=${9:-7}  # retention of the full results, when the output files are filtered
+
+# Set Variables and load modules
+# ==============================
+
+if [ "$ANTARES_VERSION" = "610" ]; then
+    export ANTARES_SOLVER_BIN="/path/to/antares/solver/610/antares-6.1-solver"
+elif [ "$ANTARES_VERSION" = "700" ]; then
+    export ANTARES_SOLVER_BIN="/path/to/antares/solver/700/antares-7.0-solver"
+fi
+
+module load xpress/xpress8.8.0
+module load ampl/ampl
+module load R/R-3.6.2
+# Load module xpansion and R_libraries TODO
+export XPANSION_RSCRIPT="/path/to/antares/xpansion/XpansionArgsRun.R"
+export R_LIBS_SITE=/path/to/antares/R-libs/%v
+
+# Set OMP_NUM_THREAD variable for R parallelization
+if [ -n "$SLURM_CPUS_PER_TASK" ]; then
+  export OMP_NUM_THREADS=$SLURM_CPUS_PER_TASK
+else
+  exit 1
+fi
+
+# Use 7-Zip, when available, to (de)compress with all the CPUs of the job.
+# The archives stay in ZIP format (deflate), as expected by Antares Launcher.
+# Set USE_7Z=0 to force the single-threaded `zip`/`unzip` commands.
+if [ -z "$USE_7Z" ]; then
+  if command -v 7z > /dev/null 2>&1; then USE_7Z=1; else USE_7Z=0; fi
+fi
+
+# Node-local cache of the unpacked study inputs, indexed by the input hash.
+# The cached input is copied into the job directory instead of being unzipped again.
+# The least recently used entries are evicted when the cache exceeds its maximum size.
+# Set INPUT_CACHE_MAX_SIZE_MB=0 to disable the cache.
+INPUT_CACHE_DIR=${INPUT_CACHE_DIR:-/scratch/antares_input_cache}
+INPUT_CACHE_MAX_SIZE_MB=${INPUT_CACHE_MAX_SIZE_MB:-51200}
+
+# When the output files are filtered, the full results are kept on the shared storage
+# in FULL_RESULTS_DIR, the results older than FULL_RESULTS_RETENTION_DAYS are removed.
+if [ -n "$OUTPUT_INCLUDE" ] || [ -n "$OUTPUT_EXCLUDE" ]; then
+  FILTER_OUTPUT=1
+else
+  FILTER_OUTPUT=0
+fi
+
+# The Xpansion jobs modify their input (LP files, candidates...): their input is never cached.
+if [ -n "$INPUT_HASH" ] && [ "$JOB_TYPE" = "ANTARES" ] && [ "$INPUT_CACHE_MAX_SIZE_MB" -gt 0 ]; then
+  USE_INPUT_CACHE=1
+else
+  USE_INPUT_CACHE=0
+fi
+
+# Set local variables
+USER_HOME=$PWD
+FULL_RESULTS_DIR=${FULL_RESULTS_DIR:-$USER_HOME/FULL_RESULTS}
+JOB_SCRATCH_DIR=/scratch/antares_${SLURM_JOB_ID}
+STUDY_NAME=$SLURM_JOB_NAME
+STUDY_PATH=$JOB_SCRATCH_DIR/$STUDY_NAME
+SLURM_LOG_FILE=$USER_HOME/${STUDY_NAME}_job_data_${SLURM_JOB_ID}.txt
+DATE_FORMAT="%Y-%m-%d-%H:%M"
+START_TIME=$(date +$DATE_FORMAT)
+POST_PROCESSING_SCRIPT_NAME="post-processing.R"
+
+if [ "$JOB_TYPE" = "ANTARES_XPANSION" ]; then
+  STAT_FILE=$USER_HOME/stats-xpansion-v1.1.txt
+  FINAL_ZIP_FILE=finished_XPANSION_${STUDY_NAME}_${SLURM_JOB_ID}.zip
+else
+  STAT_FILE=$USER_HOME/stats-antares-v1.1.txt
+  FINAL_ZIP_FILE=finished_${STUDY_NAME}_${SLURM_JOB_ID}.zip
+fi
+
+function print_message {
+ echo "$1" >> "$SLURM_LOG_FILE"
+}
+
+function print_timed_message {
+  local MY_TIME
+  MY_TIME=$(date +$DATE_FORMAT)
+  print_message "$MY_TIME >>> $1"
+}
+
+# Copies the cached input into the job directory, returns 1 if the input is not cached.
+# The files are cloned (reflink) when the filesystem supports it, copied otherwise:
+# the solver can write its input without altering the cache.
+function restore_cached_input {
+  local ENTRY="$INPUT_CACHE_DIR/$INPUT_HASH"
+  [ -d "$ENTRY/study" ] || return 1
+  # The modification time of an entry is its last use time (LRU)
+  touch "$ENTRY"
+  if cp -a --reflink=auto "$ENTRY/study" "$STUDY_PATH" 2> /dev/null; then
+    return 0
+  fi
+  # The entry may have been evicted meanwhile
+  rm -rf "$STUDY_PATH"
+  return 1
+}
+
+# Adds a copy of the unpacked input to the cache, the entry is published atomically.
+# The input of the job is not shared with the cache: the solver can modify it.
+function store_input_in_cache {
+  local ENTRY="$INPUT_CACHE_DIR/$INPUT_HASH"
+  local TMP_ENTRY
+  [ -d "$ENTRY" ] && return 0
+  mkdir -p "$INPUT_CACHE_DIR" || return 1
+  TMP_ENTRY=$(mktemp -d "$INPUT_CACHE_DIR/.tmp.XXXXXX") || return 1
+  if cp -a --reflink=auto "$STUDY_PATH" "$TMP_ENTRY/study" 2> /dev/null; then
+    # `mv -T` fails if another job has published the same entry meanwhile
+    mv -T "$TMP_ENTRY" "$ENTRY" 2> /dev/null && return 0
+  fi
+  rm -rf "$TMP_ENTRY"
+  return 1
+}
+
+# Prints the files of the study to zip, relative to the scratch directory.
+# The files of the `output` directory are filtered with the include and exclude patterns,
+# which are relative to the study directory ("*" also matches "/").
+function list_files_to_zip {
+  local INCLUDES=() EXCLUDES=() FILE REL_PATH PATTERN KEEP
+  [ -n "$OUTPUT_INCLUDE" ] && IFS=',' read -r -a INCLUDES <<< "$OUTPUT_INCLUDE"
+  [ -n "$OUTPUT_EXCLUDE" ] && IFS=',' read -r -a EXCLUDES <<< "$OUTPUT_EXCLUDE"
+  find "$STUDY_NAME" -type f | while IFS= read -r FILE; do
+    REL_PATH=${FILE#"$STUDY_NAME"/}
+    if [[ "$REL_PATH" == output/* ]]; then
+      KEEP=1
+      if [ ${#INCLUDES[@]} -gt 0 ]; then
+        KEEP=0
+        for PATTERN in "${INCLUDES[@]}"; do
+          # shellcheck disable=SC2053
+          if [[ "$REL_PATH" == $PATTERN ]]; then KEEP=1; break; fi
+        done
+      fi
+      for PATTERN in "${EXCLUDES[@]}"; do
+        # shellcheck disable=SC2053
+        if [[ "$REL_PATH" == $PATTERN ]]; then KEEP=0; break; fi
+      done
+      [ "$KEEP" = "1" ] || continue
+    fi
+    echo "$FILE"
+  done
+}
+
+# Removes the least recently used entries until the cache fits in its maximum size.
+# Only one job at a time evicts entries on a node, the others skip the eviction.
+function evict_input_cache {
+  local MAX_SIZE_KB=$((INPUT_CACHE_MAX_SIZE_MB * 1024))
+  local ENTRY
+  (
+    flock -n 9 || exit 0
+    # shellcheck disable=SC2012
+    for ENTRY in $(ls -1dtr "$INPUT_CACHE_DIR"/*/ 2> /dev/null); do
+      [ "$(du -sk "$INPUT_CACHE_DIR" | cut -f1)" -le "$MAX_SIZE_KB" ] && break
+      [ "${ENTRY%/}" = "$INPUT_CACHE_DIR/$INPUT_HASH" ] && continue
+      rm -rf "$ENTRY"
+    done
+  ) 9> "$INPUT_CACHE_DIR/.lock"
+}
+
+print_timed_message "START"
+print_message "JOB_TYPE = $JOB_TYPE"
+print_message "INPUT_ZIPNAME as from stdin  = $1"
+print_message "antares_version from stdin  = $ANTARES_VERSION"
+print_message "name of the study: $STUDY_NAME"
+print_message "zipfile: $INPUT_ZIPNAME"
+print_message "home directory: $USER_HOME"
+print_message "hostname: $SLURM_JOB_NODELIST"
+print_message "local directory: $JOB_SCRATCH_DIR"
+print_message "multi-threaded compression (7z): $USE_7Z"
+print_message "input hash: $INPUT_HASH (cache: $USE_INPUT_CACHE)"
+print_message "output include patterns: $OUTPUT_INCLUDE"
+print_message "output exclude patterns: $OUTPUT_EXCLUDE"
+print_message " "
+
+# create job-specific temporary scratch directory
+mkdir "$JOB_SCRATCH_DIR"
+# change pwd to JOB_SCRATCH_DIR
+cd "$JOB_SCRATCH_DIR" || exit
+
+# Unzip input zipfile
+# The archive is extracted directly from the shared filesystem:
+# it is not copied to the scratch directory beforehand.
+SECONDS=0
+print_timed_message "start UNZIP"
+if [ "$USE_INPUT_CACHE" = "1" ] && restore_cached_input; then
+  print_message "input restored from the cache: $INPUT_CACHE_DIR/$INPUT_HASH"
+else
+  if [ "$USE_7Z" = "1" ]; then
+    srun 7z x -y -bd -mmt="${SLURM_CPUS_PER_TASK}" -o"$JOB_SCRATCH_DIR" "${USER_HOME}/${INPUT_ZIPNAME}" > /dev/null 2>&1
+  else
+    srun unzip -q "${USER_HOME}/${INPUT_ZIPNAME}" -d "$JOB_SCRATCH_DIR" > /dev/null 2>&1
+  fi
+  if [ "$USE_INPUT_CACHE" = "1" ] && store_input_in_cache; then
+    print_message "input added to the cache: $INPUT_CACHE_DIR/$INPUT_HASH"
+    evict_input_cache
+  fi
+fi
+print_timed_message "end UNZIP"
+UNZIP_DURATION=$SECONDS
+print_message "unzip duration = $UNZIP_DURATION"
+print_message " "
+
+# Launch ANTARES or ANTARES_XPANSION
+SECONDS=0
+print_timed_message "start $JOB_TYPE"
+if [ "$JOB_TYPE" = "ANTARES_XPANSION" ]; then
+  srun Rscript $XPANSION_RSCRIPT --study="$STUDY_PATH" --path_antares=$ANTARES_SOLVER --n-cpu=${SLURM_CPUS_PER_TASK}
+else
+  srun $ANTARES_SOLVER_BIN --force-parallel=${SLURM_CPUS_PER_TASK} -i "$STUDY_PATH"
+fi
+print_timed_message "end $JOB_TYPE"
+ANTARES_DURATION=$SECONDS
+print_message "$JOB_TYPE duration = $ANTARES_DURATION"
+print_message " "
+
+# Launch post processing
+POST_PROC_DURATION=0
+if [ "$POST_PROCESSING" = "True" ]; then
+  SECONDS=0
+  print_timed_message "start POST-PROCESSING"
+  cd "$STUDY_PATH" || exit
+
+  srun Rscript $POST_PROCESSING_SCRIPT_NAME
+  print_timed_message "end POST-PROCESSING"
+  POST_PROC_DURATION=$SECONDS
+  print_message "post processing duration = $POST_PROC_DURATION"
+  print_message " "
+  cd "$JOB_SCRATCH_DIR" || exit
+fi
+
+# Zip finished study
+# The archive is written under a temporary name, then renamed atomically,
+# so that Antares Launcher never downloads a partially written archive.
+SECONDS=0
+print_timed_message "start ZIP"
+TMP_ZIP_FILE="${USER_HOME}/.${FINAL_ZIP_FILE}.part"
+rm -f "$TMP_ZIP_FILE"
+if [ "$FILTER_OUTPUT" = "1" ]; then
+  ZIP_LIST_FILE="$JOB_SCRATCH_DIR/files_to_zip.txt"
+  list_files_to_zip > "$ZIP_LIST_FILE"
+  print_message "output files filtered: $(wc -l < "$ZIP_LIST_FILE") file(s) to zip"
+  if [ "$USE_7Z" = "1" ]; then
+    srun 7z a -tzip -mx=1 -mmt="${SLURM_CPUS_PER_TASK}" -bd "$TMP_ZIP_FILE" @"$ZIP_LIST_FILE" > /dev/null 2>&1
+  else
+    srun zip -2 "$TMP_ZIP_FILE" -@ < "$ZIP_LIST_FILE" > /dev/null 2>&1
+  fi
+elif [ "$USE_7Z" = "1" ]; then
+  srun 7z a -tzip -mx=1 -mmt="${SLURM_CPUS_PER_TASK}" -bd "$TMP_ZIP_FILE" "$STUDY_NAME" > /dev/null 2>&1
+else
+  srun zip -2 -r "$TMP_ZIP_FILE" "$STUDY_NAME" > /dev/null 2>&1
+fi
+if [ -s "$TMP_ZIP_FILE" ]; then
+  mv -f "$TMP_ZIP_FILE" "${USER_HOME}/${FINAL_ZIP_FILE}"
+else
+  rm -f "$TMP_ZIP_FILE"
+  print_timed_message "ERROR: final zip not created"
+fi
+print_timed_message "finish ZIP"
+ZIP_DURATION=$SECONDS
+print_message "final zip duration = $ZIP_DURATION"
+print_message " "
+
+# Print SLURM environment to file
+SLURM_ENV=$(env | grep SLURM)
+print_message "$SLURM_ENV"
+print_message " "
+
+# Keep the full results, when only a part of them is zipped
+# The output is moved, not copied: the scratch folder is removed just after.
+# The expired full results are purged in the background, while the output is moved.
+PURGE_PID=""
+if [ "$FILTER_OUTPUT" = "1" ] && [ "$FULL_RESULTS_RETENTION_DAYS" -gt 0 ] && [ -d "$STUDY_PATH/output" ]; then
+  mkdir -p "$FULL_RESULTS_DIR"
+  find "$FULL_RESULTS_DIR" -mindepth 1 -maxdepth 1 -mtime +"$FULL_RESULTS_RETENTION_DAYS" -exec rm -rf {} + &
+  PURGE_PID=$!
+  SECONDS=0
+  mv "$STUDY_PATH/output" "$FULL_RESULTS_DIR/${STUDY_NAME}_${SLURM_JOB_ID}"
+  FULL_RESULTS_DURATION=$SECONDS
+  print_message "full results kept for $FULL_RESULTS_RETENTION_DAYS day(s) in $FULL_RESULTS_DIR/${STUDY_NAME}_${SLURM_JOB_ID}"
+  print_message "full results move duration = $FULL_RESULTS_DURATION"
+  print_message " "
+fi
+
+# remove scratch folder
+srun rm -rf ${JOB_SCRATCH_DIR}
+
+# Output job stat to file
+if [[ ! -f "$STAT_FILE" ]]; then
+    echo "START-TIME SLURM_JOB_NAME SLURM_JOB_ID SLURM_CPUS_PER_TASK  UNZIP_DURATION ANTARES_DURATION POST_PROC_DURATION ZIP_DURATION" > ${STAT_FILE}
+fi
+echo $START_TIME $SLURM_JOB_NAME $SLURM_JOB_ID $SLURM_CPUS_PER_TASK $UNZIP_DURATION $ANTARES_DURATION $POST_PROC_DURATION $ZIP_DURATION >> ${STAT_FILE}
+
+# Wait for the purge of the expired full results
+if [ -n "$PURGE_PID" ]; then
+  wait "$PURGE_PID"
+fi
+
+# Goodbye
+print_timed_message "THE END"
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Script used to measure the load time and memory of the studies read from the repository.
+
+The slotted `StudyDTO` (with cached version parsing) is compared with an equivalent
+non-slotted dataclass, whose `from_dict` parses the version of each study.
+
+Usage::
+
+    python scripts/benchmark_study_dto.py --count 50000
+"""
+
+import argparse
+import dataclasses
+import gc
+import time
+import tracemalloc
+import typing as t
+
+from pathlib import Path
+
+from antares.study.version import StudyVersion
+
+from antareslauncher.study_dto import StudyDTO
+
+
+def _make_legacy_class() -> t.Type[t.Any]:
+    # Same fields as `StudyDTO`, without slots
+    def __post_init__(self: t.Any) -> None:
+        self.name = Path(self.path).name
+
+    legacy_fields = [(f.name, f.type, f) for f in dataclasses.fields(StudyDTO)]
+    return dataclasses.make_dataclass(
+        "LegacyStudyDTO",
+        legacy_fields,
+        namespace={"__post_init__": __post_init__},
+    )
+
+
+LegacyStudyDTO = _make_legacy_class()
+
+
+def legacy_from_dict(doc: t.Mapping[str, t.Any]) -> t.Any:
+    attrs = dict(**doc)
+    attrs.pop("name", None)
+    attrs["antares_version"] = StudyVersion.parse(attrs["antares_version"])
+    return LegacyStudyDTO(**attrs)
+
+
+def make_documents(count: int) -> t.List[t.Dict[str, t.Any]]:
+    documents = []
+    for index in range(count):
+        study = StudyDTO(
+            path=f"/path/to/studies/study_{index:06d}",
+            job_id=100000 + index,
+            antares_version=StudyVersion.parse(("8.6", "8.8", "9.2")[index % 3]),
+            events={"zip_start": 1.0 * index, "zip_end": 2.0 * index},
+        )
+        doc = study.to_dict()
+        doc["antares_version"] = f"{doc['antares_version']:2d}"
+        documents.append(doc)
+    return documents
+
+
+def measure(
+    from_dict: t.Callable[[t.Mapping[str, t.Any]], t.Any],
+    documents: t.Sequence[t.Mapping[str, t.Any]],
+) -> t.Tuple[float, int]:
+    """Returns the load time in seconds and the memory in bytes of the loaded studies"""
+    gc.collect()
+    start = time.perf_counter()
+    studies = [from_dict(doc) for doc in documents]
+    duration = time.perf_counter() - start
+    del studies
+    gc.collect()
+    tracemalloc.start()
+    studies = [from_dict(doc) for doc in documents]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del studies
+    return duration, memory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50000, help="number of studies (default: %(default)s)")
+    args = parser.parse_args()
+
+    documents = make_documents(args.count)
+    legacy_time, legacy_memory = measure(legacy_from_dict, documents)
+    slotted_time, slotted_memory = measure(StudyDTO.from_dict, documents)
+
+    print(f"{'STUDIES':<10}{args.count}")
+    print(f"{'':<10}{'LOAD (s)':>10}{'MEMORY (MiB)':>14}")
+    print(f"{'dataclass':<10}{legacy_time:>10.3f}{legacy_memory / 2**20:>14.1f}")
+    print(f"{'slotted':<10}{slotted_time:>10.3f}{slotted_memory / 2**20:>14.1f}")
+    print(f"{'gain':<10}{1 - slotted_time / legacy_time:>10.0%}{1 - slotted_memory / legacy_memory:>14.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Script used to measure the cost of saving a study in a TinyDB database of many studies.
+
+TinyDB reads and rewrites the whole JSON file each time a study is saved. The storage
+of the repository (compact JSON, serialized with `orjson` if installed, parsed data cached
+while the file is unchanged) is compared with the former configuration: indented JSON,
+serialized with the standard library, and parsed again before each save.
+
+Usage::
+
+    python scripts/benchmark_tinydb_storage.py --count 10000 --saves 50
+"""
+
+import argparse
+import functools
+import tempfile
+import time
+import typing as t
+
+from pathlib import Path
+
+import tinydb
+
+from antareslauncher.data_repo import data_repo_tinydb
+from antareslauncher.data_repo.data_repo_tinydb import AtomicJSONStorage, DataRepoTinydb
+from antareslauncher.study_dto import StudyDTO
+
+
+def make_documents(count: int) -> t.List[t.Dict[str, t.Any]]:
+    documents = []
+    for index in range(count):
+        study = StudyDTO(
+            path=f"/path/to/studies/study_{index:06d}",
+            job_id=100000 + index,
+            job_state="Finished",
+            done=True,
+            events={"zip_start": 1.0 * index, "zip_end": 2.0 * index},
+        )
+        documents.append(DataRepoTinydb._to_document(study))
+    return documents
+
+
+def measure(storage: t.Callable[..., tinydb.storages.Storage], documents: t.Sequence[t.Dict[str, t.Any]], saves: int):
+    """Returns the database size in bytes and the mean duration in seconds of saving one study"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir).joinpath("studies.json")
+        with tinydb.TinyDB(path, storage=storage) as db:
+            doc_ids = db.insert_multiple(documents)
+            start = time.perf_counter()
+            for index in range(saves):
+                doc_id = doc_ids[index % len(doc_ids)]
+                db.update({"job_state": f"Running {index}"}, doc_ids=[doc_id])
+            duration = (time.perf_counter() - start) / saves
+            return path.stat().st_size, duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000, help="number of studies (default: %(default)s)")
+    parser.add_argument("--saves", type=int, default=50, help="number of saved studies (default: %(default)s)")
+    args = parser.parse_args()
+
+    documents = make_documents(args.count)
+    legacy_storage = functools.partial(AtomicJSONStorage, cache=False, sort_keys=True, indent=4)
+    legacy_size, legacy_time = measure(legacy_storage, documents, args.saves)
+    new_size, new_time = measure(AtomicJSONStorage, documents, args.saves)
+
+    print(f"{'STUDIES':<10}{args.count}")
+    print(f"{'JSON':<10}{'orjson' if data_repo_tinydb.orjson is not None else 'stdlib'}")
+    print(f"{'':<10}{'SAVE (ms)':>10}{'SIZE (MiB)':>12}")
+    print(f"{'former':<10}{legacy_time * 1000:>10.1f}{legacy_size / 2**20:>12.1f}")
+    print(f"{'storage':<10}{new_time * 1000:>10.1f}{new_size / 2**20:>12.1f}")
+    print(f"{'gain':<10}{1 - new_time / legacy_time:>10.0%}{1 - new_size / legacy_size:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -56,6 +56,12 @@ pyinstaller_requires = [
     "pyinstaller ~= 6.10.0",
 ]
 
+# Extra dependencies used to speed up the reading and writing of the JSON database.
+# Use `pip install -e .[fast-json]` to install.
+fast_json_requires = [
+    "orjson",
+]
+
 
 setup(
     name=__project_name__,
@@ -73,6 +79,7 @@ setup(
         "dev": dev_requires,
         "docs": docs_requires,
         "pyinstaller": pyinstaller_requires,
+        "fast-json": fast_json_requires,
     },
     license="Apache Software License",
     platforms=[
@@ -0,0 +1,208 @@
+"""
+Fake SLURM REST API server (`slurmrestd`) used to test and benchmark
+the REST scheduler backend offline.
+
+The jobs are kept in memory, their states are changed by the tests with `FakeSlurmRestd.set_job_state`.
+
+Usage (benchmark of the queue reading)::
+
+    python -m tests.fake_slurmrestd [NB_JOBS] [NB_REQUESTS]
+"""
+
+import http.server
+import json
+import re
+import sys
+import threading
+import time
+import typing as t
+
+from antareslauncher.remote_environnement.slurm_rest_backend import (
+    DEFAULT_API_VERSION,
+    RestSchedulerBackend,
+    SlurmRestClient,
+)
+from antareslauncher.remote_environnement.slurm_script_features import SlurmScriptFeatures
+
+FINISHED_STATES = {"CANCELLED", "COMPLETED", "FAILED", "NODE_FAIL", "OUT_OF_MEMORY", "PREEMPTED", "TIMEOUT"}
+
+
+class FakeSlurmRestd:
+    """
+    In-memory SLURM controller and database, served with a local HTTP server (keep-alive enabled).
+
+    Attributes:
+        username: the owner of the submitted jobs.
+        token: the expected JWT.
+        jobs: the jobs indexed by job ID.
+        requests: the requests received, as `(method, path)` tuples.
+        nb_connections: the number of HTTP connections accepted.
+    """
+
+    def __init__(self, username: str = "john", token: str = "secret", api_version: str = DEFAULT_API_VERSION):
+        self.username = username
+        self.token = token
+        self.api_version = api_version
+        self.jobs: t.Dict[int, t.Dict[str, t.Any]] = {}
+        self.requests: t.List[t.Tuple[str, str]] = []
+        self.nb_connections = 0
+        self._next_job_id = 1000
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def __enter__(self) -> "FakeSlurmRestd":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_job(self, name: str, state: str = "PENDING", **kwargs: t.Any) -> int:
+        with self._lock:
+            job_id = self._next_job_id
+            self._next_job_id += 1
+            now = int(time.time())
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "name": name,
+                "user_name": self.username,
+                "job_state": [state],
+                "state_reason": "None",
+                "partition": "compute",
+                "qos": "normal",
+                "cpus": {"set": True, "infinite": False, "number": 1},
+                "time_limit": {"set": True, "infinite": False, "number": 60},
+                "submit_time": {"set": True, "infinite": False, "number": now},
+                "start_time": {"set": True, "infinite": False, "number": now},
+                "end_time": {"set": True, "infinite": False, "number": 0},
+                **kwargs,
+            }
+            return job_id
+
+    def set_job_state(self, job_id: int, state: str) -> None:
+        with self._lock:
+            job = self.jobs[job_id]
+            job["job_state"] = [state]
+            if state in FINISHED_STATES:
+                job["end_time"] = {"set": True, "infinite": False, "number": int(time.time())}
+
+    def _accounting(self, job: t.Mapping[str, t.Any]) -> t.Dict[str, t.Any]:
+        start = job["start_time"]["number"]
+        end = job["end_time"]["number"] or int(time.time())
+        cpus = job["cpus"]["number"]
+        return {
+            "job_id": job["job_id"],
+            "name": job["name"],
+            "state": {"current": job["job_state"], "reason": "None"},
+            "time": {
+                "elapsed": end - start,
+                "submission": job["submit_time"]["number"],
+                "start": start,
+                "end": job["end_time"]["number"],
+                "total": {"seconds": (end - start) * cpus, "microseconds": 0},
+            },
+            "exit_code": {
+                "status": ["SUCCESS"],
+                "return_code": {"set": True, "infinite": False, "number": 0},
+                "signal": {"id": {"set": True, "infinite": False, "number": 0}},
+            },
+            "nodes": "node001",
+            "tres": {"allocated": [{"type": "cpu", "count": cpus}, {"type": "mem", "count": 1024}]},
+            "steps": [{"tres": {"requested": {"max": [{"type": "mem", "count": 512 * 1024 * 1024}]}}}],
+        }
+
+    def _dispatch(self, method: str, path: str, body: t.Any) -> t.Tuple[int, t.Dict[str, t.Any]]:
+        version = re.escape(self.api_version)
+        invalid_job_id = {"errors": [{"error_number": 2017, "error": "Invalid job id specified"}]}
+        if method == "POST" and re.fullmatch(rf"/slurm/{version}/job/submit", path):
+            job = body["job"]
+            cpus = job.get("cpus_per_task", 1)
+            time_limit = job.get("time_limit", {"set": True, "number": 60})
+            job_id = self.add_job(
+                job["name"],
+                partition=job.get("partition", "compute"),
+                qos=job.get("qos", "normal"),
+                cpus={"set": True, "infinite": False, "number": cpus},
+                time_limit={"infinite": False, **time_limit},
+                submitted=body,
+            )
+            return 200, {"job_id": job_id, "step_id": "batch", "errors": []}
+        if method == "GET" and re.fullmatch(rf"/slurm/{version}/jobs", path):
+            return 200, {"jobs": list(self.jobs.values()), "errors": []}
+        if method == "DELETE" and re.fullmatch(rf"/slurm/{version}/jobs", path):
+            for job_id in body["jobs"]:
+                if int(job_id) not in self.jobs:
+                    return 500, invalid_job_id
+                self.set_job_state(int(job_id), "CANCELLED")
+            return 200, {"errors": []}
+        if match := re.fullmatch(rf"/slurm/{version}/job/(\d+)", path):
+            job = self.jobs.get(int(match[1]))
+            return (200, {"jobs": [job], "errors": []}) if job else (500, invalid_job_id)
+        if match := re.fullmatch(rf"/slurmdb/{version}/job/(\d+)", path):
+            job = self.jobs.get(int(match[1]))
+            return 200, {"jobs": [self._accounting(job)] if job else [], "errors": []}
+        return 404, {"errors": [{"error": f"Unknown endpoint: {method} {path}"}]}
+
+    def _make_handler(self) -> t.Type[http.server.BaseHTTPRequestHandler]:
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def setup(self) -> None:
+                super().setup()
+                with fake._lock:
+                    fake.nb_connections += 1
+
+            def log_message(self, format: str, *args: t.Any) -> None:
+                pass
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                fake.requests.append((self.command, self.path))
+                if self.headers.get("X-SLURM-USER-TOKEN") != fake.token:
+                    status, obj = 401, {"errors": [{"error": "Authentication failure"}]}
+                else:
+                    status, obj = fake._dispatch(self.command, self.path, body)
+                data = json.dumps(obj).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _handle
+
+        return Handler
+
+
+def main(argv: t.Sequence[str]) -> None:
+    nb_jobs = int(argv[1]) if len(argv) > 1 else 1000
+    nb_requests = int(argv[2]) if len(argv) > 2 else 100
+    with FakeSlurmRestd() as fake:
+        for index in range(nb_jobs):
+            fake.add_job(f"study_{index}", state="RUNNING")
+        client = SlurmRestClient(fake.url, fake.username, token=fake.token)
+        backend = RestSchedulerBackend(
+            client, SlurmScriptFeatures("launchAntares.sh", partition="", quality_of_service="")
+        )
+        start = time.perf_counter()
+        for _ in range(nb_requests):
+            backend.read_queue(fake.username, "localhost")
+        duration = time.perf_counter() - start
+        print(
+            f"{nb_requests} queue readings of {nb_jobs} jobs: {duration:.3f}s"
+            f" ({1000 * duration / nb_requests:.2f} ms/reading, {fake.nb_connections} HTTP connection(s))"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -4,6 +4,7 @@ from unittest import mock
 
 from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
 from antareslauncher.remote_environnement.slurm_script_features import SlurmScriptFeatures
+from antareslauncher.study_dto import StudyDTO
 from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillController
 
 
@@ -16,7 +17,8 @@ class TestIntegrationJobKilController:
         )
         connection = mock.Mock(home_dir="path/to/home")
         env = RemoteEnvironmentWithSlurm(connection, slurm_script_features)
-        self.job_kill_controller = JobKillController(env, mock.Mock(), repo=mock.Mock())
+        repo = mock.Mock(**{"iter_studies.return_value": [StudyDTO(path="path/to/study", job_id=42)]})
+        self.job_kill_controller = JobKillController(env, mock.Mock(), repo=repo)
 
     @pytest.mark.integration_test
     def test_job_kill_controller_kill_job_calls_connection_execute_command(
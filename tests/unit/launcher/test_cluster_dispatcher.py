@@ -0,0 +1,154 @@
+import pytest
+
+import typing as t
+
+from unittest import mock
+
+from antares.study.version import SolverMinorVersion, StudyVersion
+
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.multi_cluster_environment import Cluster, MultiClusterEnvironment
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    GetQueueError,
+    RemoteEnvironmentWithSlurm,
+)
+from antareslauncher.remote_environnement.slurm_queue import CpuCounts, QueueRecord, QueueSnapshot
+from antareslauncher.remote_environnement.slurm_script_features import SlurmScriptFeatures
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.use_cases.launch.cluster_dispatcher import ClusterDispatcher, ClusterLoad
+
+V860 = SolverMinorVersion.parse("8.6")
+V880 = SolverMinorVersion.parse("8.8")
+
+
+def _create_cluster(
+    name: str,
+    *,
+    idle_cpus: int,
+    total_cpus: int = 100,
+    pending_cpus: t.Sequence[int] = (),
+    versions: t.Sequence[SolverMinorVersion] = (V860, V880),
+    max_jobs_in_flight: int = 0,
+) -> Cluster:
+    env = mock.Mock(spec=RemoteEnvironmentWithSlurm, remote_base_path="REMOTE")
+    env.connection = mock.Mock(host=f"{name}.example.com", username="john")
+    env.slurm_script_features = SlurmScriptFeatures("launchAntares.sh", partition="", quality_of_service="")
+    records = [QueueRecord(job_id=str(i), name=f"job_{i}", state="PENDING", cpus=n) for i, n in enumerate(pending_cpus)]
+    env.get_queue_snapshot.return_value = QueueSnapshot("john", env.connection.host, records)
+    env.get_cpu_counts.return_value = CpuCounts(
+        allocated=total_cpus - idle_cpus, idle=idle_cpus, other=0, total=total_cpus
+    )
+    return Cluster(name, env, antares_versions=versions, max_jobs_in_flight=max_jobs_in_flight)
+
+
+def _create_study(name: str, n_cpu: int = 10, version: str = "8.8") -> StudyDTO:
+    study = StudyDTO(path=f"path/to/{name}", n_cpu=n_cpu)
+    study.antares_version = StudyVersion.parse(version)
+    return study
+
+
+@pytest.mark.unit_test
+@pytest.mark.parametrize(
+    "load, n_cpu, expected",
+    [
+        pytest.param(ClusterLoad(idle_cpus=20, total_cpus=100), 10, 0, id="idle-cpus"),
+        pytest.param(ClusterLoad(pending_cpus=10, idle_cpus=20, total_cpus=100), 10, 0, id="idle-cpus-for-all"),
+        pytest.param(ClusterLoad(pending_cpus=30, idle_cpus=20, total_cpus=100), 10, 0.2, id="pending-jobs-first"),
+        pytest.param(ClusterLoad(), 10, 10, id="unknown-cpus"),
+    ],
+)
+def test_expected_start_delay(load: ClusterLoad, n_cpu: int, expected: float) -> None:
+    assert load.expected_start_delay(n_cpu) == pytest.approx(expected)
+
+
+class TestClusterDispatcher:
+    @pytest.mark.unit_test
+    def test_place__lowest_expected_start_time(self) -> None:
+        cluster_a = _create_cluster("", idle_cpus=0, pending_cpus=[20])
+        cluster_b = _create_cluster("cluster_b", idle_cpus=25)
+        dispatcher = ClusterDispatcher(MultiClusterEnvironment([cluster_a, cluster_b]), mock.Mock(spec=DisplayTerminal))
+        dispatcher.refresh()
+
+        studies = [_create_study(f"study_{i}") for i in range(6)]
+        assert all(dispatcher.place(study) for study in studies)
+
+        # the idle CPUs of "cluster_b" are used first, then the studies queued on "cluster_b"
+        # wait less than the pending jobs of the main cluster, until the 6th study
+        assert [study.cluster for study in studies] == ["cluster_b"] * 5 + [""]
+
+    @pytest.mark.unit_test
+    def test_place__supported_versions(self) -> None:
+        cluster_a = _create_cluster("", idle_cpus=0, versions=[V860])
+        cluster_b = _create_cluster("cluster_b", idle_cpus=100, versions=[V880])
+        dispatcher = ClusterDispatcher(MultiClusterEnvironment([cluster_a, cluster_b]), mock.Mock(spec=DisplayTerminal))
+        dispatcher.refresh()
+
+        study = _create_study("study", version="8.6")
+        assert dispatcher.place(study)
+        assert study.cluster == ""
+
+        study = _create_study("study", version="9.2")
+        assert not dispatcher.place(study)
+
+    @pytest.mark.unit_test
+    def test_place__max_jobs_in_flight_and_unavailable_cluster(self) -> None:
+        cluster_a = _create_cluster("", idle_cpus=100)
+        cluster_a.env.get_queue_snapshot.side_effect = GetQueueError("connection lost")
+        cluster_b = _create_cluster("cluster_b", idle_cpus=0, pending_cpus=[10], max_jobs_in_flight=2)
+        display = mock.Mock(spec=DisplayTerminal)
+        dispatcher = ClusterDispatcher(MultiClusterEnvironment([cluster_a, cluster_b]), display)
+        dispatcher.refresh()
+        display.show_error.assert_called_once()
+
+        studies = [_create_study(f"study_{i}") for i in range(2)]
+        assert [dispatcher.place(study) for study in studies] == [True, False]
+        assert studies[0].cluster == "cluster_b"
+
+    @pytest.mark.unit_test
+    def test_place__slurm_limits_per_cluster(self) -> None:
+        # the main cluster has a SLURM submit limit, the other cluster has none
+        cluster_a = _create_cluster("", idle_cpus=100)
+        cluster_a.env.get_submit_limit.return_value = 1
+        cluster_b = _create_cluster("cluster_b", idle_cpus=10)
+        cluster_b.env.get_submit_limit.return_value = None
+        env = MultiClusterEnvironment([cluster_a, cluster_b])
+        dispatcher = ClusterDispatcher(env, mock.Mock(spec=DisplayTerminal), use_slurm_limits=True)
+        dispatcher.refresh()
+
+        studies = [_create_study(f"study_{i}") for i in range(3)]
+        assert all(dispatcher.place(study) for study in studies)
+        assert [study.cluster for study in studies] == ["", "cluster_b", "cluster_b"]
+        assert (dispatcher.get_limit(cluster_a), dispatcher.get_limit(cluster_b)) == (1, None)
+        # the limits are read only once
+        dispatcher.refresh()
+        dispatcher.place(_create_study("study_3"))
+        cluster_a.env.get_submit_limit.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_place__uploaded_study_stays_on_its_cluster(self) -> None:
+        cluster_a = _create_cluster("", idle_cpus=100)
+        cluster_b = _create_cluster("cluster_b", idle_cpus=0)
+        dispatcher = ClusterDispatcher(MultiClusterEnvironment([cluster_a, cluster_b]), mock.Mock(spec=DisplayTerminal))
+        dispatcher.refresh()
+
+        study = _create_study("study")
+        study.cluster = "cluster_b"
+        study.zip_is_sent = True
+        assert dispatcher.place(study)
+        assert study.cluster == "cluster_b"
+
+        dispatcher.saturate(study)
+        assert not dispatcher.place(study)
+
+    @pytest.mark.unit_test
+    def test_release(self) -> None:
+        cluster = _create_cluster("", idle_cpus=100, max_jobs_in_flight=1)
+        dispatcher = ClusterDispatcher(MultiClusterEnvironment([cluster]), mock.Mock(spec=DisplayTerminal))
+        dispatcher.refresh()
+
+        studies = [_create_study(f"study_{i}") for i in range(2)]
+        assert dispatcher.place(studies[0])
+        assert not dispatcher.place(studies[1])
+        # the job of the first study could not be submitted
+        dispatcher.release(studies[0])
+        assert dispatcher.place(studies[1])
@@ -1,17 +1,47 @@
 import pytest
 
+import io
 import zipfile
 
 from pathlib import Path, PurePosixPath
 from unittest import mock
 
 from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo.data_reporter import DataReporter
 from antareslauncher.display.display_terminal import DisplayTerminal
-from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    RemoteEnvironmentWithSlurm,
+    SubmitLimitReachedError,
+)
 from antareslauncher.study_dto import StudyDTO
-from antareslauncher.use_cases.launch.launch_controller import LaunchController, StudyLauncher
+from antareslauncher.use_cases.launch.cluster_dispatcher import ClusterDispatcher
+from antareslauncher.use_cases.launch.launch_controller import (
+    InputHasher,
+    LaunchController,
+    StudyLauncher,
+    _write_to_zip,
+)
 from antareslauncher.use_cases.launch.study_submitter import StudySubmitter
 from antareslauncher.use_cases.launch.study_zip_uploader import StudyZipfileUploader
+from antareslauncher.use_cases.launch.submission_governor import SubmissionGovernor
+
+
+def _iter_studies(studies):
+    """Emulates `DataRepoTinydb.iter_studies` on a list of studies"""
+
+    def iter_studies(*, done=None, has_job=None, state=None, name=None):
+        for study in studies:
+            if done is not None and study.done != done:
+                continue
+            if has_job is not None and bool(study.job_id) != has_job:
+                continue
+            if name is not None and study.name != name:
+                continue
+            if state is None or study.job_state == state:
+                yield study
+
+    return iter_studies
+
 
 # noinspection SpellCheckingInspection
 STUDY_FILES = [
@@ -84,6 +114,30 @@ def study_submitted_fixture(tmp_path: Path) -> StudyDTO:
     return study
 
 
+def _hash_study(study_dir: Path) -> str:
+    """Computes the input hash of a study while compressing it, like `StudyLauncher`"""
+    hasher = InputHasher(study_dir)
+    with zipfile.ZipFile(io.BytesIO(), mode="w") as zf:
+        for path in sorted(study_dir.rglob("*")):
+            _write_to_zip(zf, path, study_dir.parent, hasher)
+    return hasher.hexdigest()
+
+
+@pytest.mark.unit_test
+def test_input_hasher(tmp_path: Path) -> None:
+    """The input hash depends on the content of the study, not on its directory name"""
+    study_dirs = [tmp_path.joinpath("study_a"), tmp_path.joinpath("study_b")]
+    for study_dir in study_dirs:
+        prepare_study_data(study_dir)
+    hash_a, hash_b = (_hash_study(d) for d in study_dirs)
+    assert hash_a == hash_b
+
+    study_dirs[1].joinpath("settings/generaldata.ini").write_text("[general]\nnbyears = 2\n")
+    assert _hash_study(study_dirs[1]) != hash_a
+    study_dirs[0].joinpath("input/empty").mkdir()
+    assert _hash_study(study_dirs[0]) != hash_a
+
+
 class TestStudyLauncher:
     """
     The gaol is to test the launching of a study.
@@ -112,6 +166,8 @@ class TestStudyLauncher:
                 with zipfile.ZipFile(zip_path, mode="r") as zf:
                     # keep only file names, excluding directories
                     self.actual_names = frozenset(name for name in zf.namelist() if "." in name)
+                    assert zf.testzip() is None
+                    assert zf.read(f"{study.name}/settings/generaldata.ini") == b"[general]\nnbyears = 2\n"
                 study.zip_is_sent = True
 
             __call__ = upload
@@ -130,10 +186,12 @@ class TestStudyLauncher:
         study_submitter = mock.Mock(spec=StudySubmitter)
         study_submitter.submit_job = submit_job
 
-        data_repo = mock.Mock(spec=DataRepoTinydb)
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
         display = mock.Mock(spec=DisplayTerminal)
         display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
         study_launcher = StudyLauncher(study_uploader, study_submitter, data_repo, display)
+        study_dir = Path(ready_study.path)
+        study_dir.joinpath("settings/generaldata.ini").write_text("[general]\nnbyears = 2\n")
 
         # When
         study_launcher.launch_study(ready_study)
@@ -147,12 +205,38 @@ class TestStudyLauncher:
         assert ready_study.zip_is_sent, "The ZIP file should have been uploaded"
         assert ready_study.job_id == 40414243, "The job should have been submitted"
         assert not ready_study.with_error, "The study should not be marked as failed"
+        assert ready_study.input_hash == _hash_study(study_dir), (
+            "The input hash should have been computed while compressing the files"
+        )
 
         assert not Path(ready_study.zipfile_path).exists(), "The ZIP file should have been removed"
 
         study_uploader.remove.assert_not_called()
         data_repo.save_study.assert_called_once()
 
+    @pytest.mark.unit_test
+    def test_launch_study__job_id_written_at_once(self, tmp_path: Path, ready_study: StudyDTO) -> None:
+        """The job ID is written in the database before the end of the unit of work"""
+
+        def upload(study: StudyDTO) -> None:
+            study.zip_is_sent = True
+
+        def submit_job(study: StudyDTO) -> None:
+            study.job_id = 40414243
+
+        study_uploader = mock.Mock(spec=StudyZipfileUploader, **{"upload.side_effect": upload})
+        study_submitter = mock.Mock(spec=StudySubmitter, **{"submit_job.side_effect": submit_job})
+        repo = DataRepoTinydb(tmp_path.joinpath("repo.json"), "name", flush_interval=3600)
+        display = mock.Mock(spec=DisplayTerminal)
+        display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
+        study_launcher = StudyLauncher(study_uploader, study_submitter, DataReporter(repo), display)
+
+        with repo.unit_of_work():
+            study_launcher.launch_study(ready_study)
+            # the launcher could be killed here: another process reads the job ID
+            other_repo = DataRepoTinydb(repo.database_file_path, "name")
+            assert other_repo.get_job_ids() == {40414243}
+
     @pytest.mark.parametrize("scenario", ["set_false", "raise_exception"])
     @pytest.mark.unit_test
     def test_launch_study__upload_fails(self, ready_study: StudyDTO, scenario: str) -> None:
@@ -171,7 +255,7 @@ class TestStudyLauncher:
 
         study_submitter = mock.Mock(spec=StudySubmitter)
 
-        data_repo = mock.Mock(spec=DataRepoTinydb)
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
         display = mock.Mock(spec=DisplayTerminal)
         display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
         study_launcher = StudyLauncher(study_uploader, study_submitter, data_repo, display)
@@ -212,7 +296,7 @@ class TestStudyLauncher:
         study_submitter = mock.Mock(spec=StudySubmitter)
         study_submitter.submit_job = submit_job
 
-        data_repo = mock.Mock(spec=DataRepoTinydb)
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
         display = mock.Mock(spec=DisplayTerminal)
         display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
         study_launcher = StudyLauncher(study_uploader, study_submitter, data_repo, display)
@@ -235,11 +319,11 @@ class TestStudyLauncher:
 class TestLaunchController:
     def test_launch_all_studies__nominal_case(self, ready_study: StudyDTO) -> None:
         # Given
-        data_repo = mock.Mock(spec=DataRepoTinydb)
-        data_repo.get_list_of_studies = mock.Mock(return_value=[ready_study])
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
+        data_repo.iter_studies = mock.Mock(side_effect=_iter_studies([ready_study]))
 
         env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
-        env.upload_file = mock.Mock(return_value=True)
+        env.upload_input_zipfile = mock.Mock(return_value=True)
         env.submit_job = mock.Mock(return_value=40414243)
 
         display = mock.Mock(spec=DisplayTerminal)
@@ -271,8 +355,8 @@ class TestLaunchController:
         all valid studies are processed correctly.
         """
 
-        def upload_file(src: str) -> bool:
-            return "upload-failure" not in src
+        def upload_input_zipfile(study: StudyDTO) -> bool:
+            return "upload-failure" not in study.zipfile_path
 
         class JobSubmitter:
             def __init__(self):
@@ -283,12 +367,12 @@ class TestLaunchController:
                 return 0 if study.name == "submit-failure" else self.job_id
 
         # Given
-        data_repo = mock.Mock(spec=DataRepoTinydb)
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
         studies = [study_uploaded, study_submitted, ready_study]
-        data_repo.get_list_of_studies = mock.Mock(return_value=studies)
+        data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(studies))
 
         env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
-        env.upload_file = upload_file
+        env.upload_input_zipfile = upload_input_zipfile
         env.submit_job = JobSubmitter()
         env.remove_input_zipfile = mock.Mock(return_value=True)
 
@@ -313,3 +397,166 @@ class TestLaunchController:
             {"zip_is_sent": True, "job_id": 2, "with_error": False},
         ]
         assert actual_states == expected_states
+
+    def test_launch_all_studies__governor(
+        self,
+        study_uploaded: StudyDTO,
+        study_submitted: StudyDTO,
+        ready_study: StudyDTO,
+    ) -> None:
+        """
+        The studies in excess are deferred, then submitted as slots free up.
+        """
+        # Given
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
+        studies = [study_uploaded, study_submitted, ready_study]
+        data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(studies))
+
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.upload_input_zipfile = mock.Mock(return_value=True)
+        env.submit_job = mock.Mock(side_effect=[101, 102, 103])
+        env.count_jobs_in_flight = mock.Mock(side_effect=[1, 3])
+
+        display = mock.Mock(spec=DisplayTerminal)
+        display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
+
+        governor = SubmissionGovernor(env, display, max_jobs_in_flight=3)
+        launch_controller = LaunchController(data_repo, env, display, governor=governor)
+
+        # When: 2 slots are free
+        launch_controller.launch_all_studies()
+
+        # Then
+        assert [study.job_id for study in studies] == [101, 102, 0]
+        assert not any(study.with_error for study in studies)
+        assert data_repo.save_study.call_count == 2
+
+        # When: no slot is free
+        launch_controller.launch_deferred_studies()
+
+        # Then
+        assert [study.job_id for study in studies] == [101, 102, 0]
+        assert data_repo.save_study.call_count == 2
+
+        # When: one slot is free
+        env.count_jobs_in_flight = mock.Mock(return_value=2)
+        launch_controller.launch_deferred_studies()
+
+        # Then
+        assert [study.job_id for study in studies] == [101, 102, 103]
+        env.count_jobs_in_flight.assert_called_once()
+
+        # When: all studies are submitted, the queue is not checked
+        launch_controller.launch_deferred_studies()
+        env.count_jobs_in_flight.assert_called_once()
+
+    def test_launch_all_studies__governor_slot_released(
+        self,
+        study_uploaded: StudyDTO,
+        study_submitted: StudyDTO,
+        ready_study: StudyDTO,
+    ) -> None:
+        """
+        The slots taken by the studies which failed to be uploaded or submitted are given back:
+        a later study is still submitted in the same cycle.
+        """
+
+        def upload_input_zipfile(study: StudyDTO) -> bool:
+            return "upload-failure" not in study.zipfile_path
+
+        # Given
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
+        studies = [study_uploaded, study_submitted, ready_study]
+        data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(studies))
+
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.upload_input_zipfile = upload_input_zipfile
+        env.remove_input_zipfile = mock.Mock(return_value=True)
+        env.submit_job = mock.Mock(side_effect=[0, 101])
+        env.count_jobs_in_flight = mock.Mock(return_value=2)
+
+        display = mock.Mock(spec=DisplayTerminal)
+        display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
+
+        # When: a single slot is free
+        governor = SubmissionGovernor(env, display, max_jobs_in_flight=3)
+        launch_controller = LaunchController(data_repo, env, display, governor=governor)
+        launch_controller.launch_all_studies()
+
+        # Then
+        assert [(study.job_id, study.with_error) for study in studies] == [(0, True), (0, True), (101, False)]
+        assert governor.free_slots == 0
+
+    def test_launch_all_studies__submit_limit_reached(self, study_submitted: StudyDTO, ready_study: StudyDTO) -> None:
+        """
+        When SLURM rejects a job because the submit limit is reached,
+        the study is not marked as failed, and the next studies are deferred.
+        """
+        # Given
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
+        studies = [study_submitted, ready_study]
+        data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(studies))
+
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.upload_input_zipfile = mock.Mock(return_value=True)
+        env.remove_input_zipfile = mock.Mock(return_value=True)
+        env.submit_job = mock.Mock(side_effect=SubmitLimitReachedError("submit-failure", "QOSMaxSubmitJobPerUserLimit"))
+        env.get_submit_limit = mock.Mock(return_value=None)
+
+        display = mock.Mock(spec=DisplayTerminal)
+        display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
+
+        governor = SubmissionGovernor(env, display, use_slurm_limits=True)
+        launch_controller = LaunchController(data_repo, env, display, governor=governor)
+
+        # When
+        launch_controller.launch_all_studies()
+
+        # Then
+        assert [(study.job_id, study.with_error, study.zip_is_sent) for study in studies] == [
+            (0, False, False),
+            (0, False, False),
+        ]
+        env.submit_job.assert_called_once()
+        env.remove_input_zipfile.assert_called_once()
+
+    def test_launch_all_studies__dispatcher(self, study_submitted: StudyDTO, ready_study: StudyDTO) -> None:
+        """
+        The cluster dispatcher chooses the cluster of each study before its upload,
+        the studies which cannot be placed are deferred.
+        """
+
+        def place(study: StudyDTO) -> bool:
+            study.cluster = "cluster_b"
+            return study is ready_study
+
+        # Given
+        data_repo = mock.MagicMock(spec=DataRepoTinydb)
+        studies = [study_submitted, ready_study]
+        data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(studies))
+
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.upload_input_zipfile = mock.Mock(return_value=True)
+        env.submit_job = mock.Mock(return_value=101)
+
+        display = mock.Mock(spec=DisplayTerminal)
+        display.generate_progress_bar = mock.Mock(side_effect=lambda x, **kwargs: x)
+
+        dispatcher = mock.Mock(spec=ClusterDispatcher)
+        dispatcher.place = mock.Mock(side_effect=place)
+        launch_controller = LaunchController(data_repo, env, display, dispatcher=dispatcher)
+
+        # When
+        launch_controller.launch_all_studies()
+
+        # Then
+        dispatcher.refresh.assert_called_once()
+        assert [(study.job_id, study.cluster, study.with_error) for study in studies] == [
+            (0, "cluster_b", False),
+            (101, "cluster_b", False),
+        ]
+        env.upload_input_zipfile.assert_called_once_with(ready_study)
+
+        # When: the deferred studies are placed again
+        launch_controller.launch_deferred_studies()
+        assert dispatcher.refresh.call_count == 2
@@ -0,0 +1,80 @@
+import pytest
+
+from unittest import mock
+
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.use_cases.launch.submission_governor import SubmissionGovernor
+
+
+class TestSubmissionGovernor:
+    @pytest.mark.unit_test
+    def test_unlimited(self) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        governor = SubmissionGovernor(env, mock.Mock(spec=DisplayTerminal))
+        governor.refresh()
+        assert governor.limit is None
+        assert all(governor.acquire() for _ in range(100))
+        env.count_jobs_in_flight.assert_not_called()
+        env.get_submit_limit.assert_not_called()
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize(
+        "max_jobs_in_flight, slurm_limit, expected",
+        [
+            pytest.param(5, None, 5, id="config-limit"),
+            pytest.param(0, 4, 4, id="slurm-limit"),
+            pytest.param(5, 8, 5, id="lowest-config"),
+            pytest.param(5, 3, 3, id="lowest-slurm"),
+        ],
+    )
+    def test_limit(self, max_jobs_in_flight: int, slurm_limit: int, expected: int) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.get_submit_limit.return_value = slurm_limit
+        env.count_jobs_in_flight.return_value = 1
+        governor = SubmissionGovernor(
+            env,
+            mock.Mock(spec=DisplayTerminal),
+            max_jobs_in_flight=max_jobs_in_flight,
+            use_slurm_limits=True,
+        )
+        governor.refresh()
+        assert governor.limit == expected
+        assert governor.free_slots == expected - 1
+        assert [governor.acquire() for _ in range(expected)] == [True] * (expected - 1) + [False]
+
+        # the SLURM database is queried only once
+        governor.refresh()
+        env.get_submit_limit.assert_called_once()
+        assert env.count_jobs_in_flight.call_count == 2
+
+    @pytest.mark.unit_test
+    def test_refresh__queue_unavailable(self) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.count_jobs_in_flight.return_value = None
+        display = mock.Mock(spec=DisplayTerminal)
+        governor = SubmissionGovernor(env, display, max_jobs_in_flight=5)
+        governor.refresh()
+        assert governor.acquire() is False
+        display.show_error.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_saturate(self) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.count_jobs_in_flight.return_value = 0
+        governor = SubmissionGovernor(env, mock.Mock(spec=DisplayTerminal), max_jobs_in_flight=5)
+        governor.refresh()
+        assert governor.acquire() is True
+        governor.saturate()
+        assert governor.acquire() is False
+
+    @pytest.mark.unit_test
+    def test_release(self) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.count_jobs_in_flight.return_value = 4
+        governor = SubmissionGovernor(env, mock.Mock(spec=DisplayTerminal), max_jobs_in_flight=5)
+        governor.refresh()
+        assert governor.acquire() is True
+        assert governor.acquire() is False
+        governor.release()
+        assert governor.acquire() is True
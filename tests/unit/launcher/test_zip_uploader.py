@@ -16,7 +16,7 @@ class TestStudyZipfileUploader:
         pending_study.zip_is_sent = actual_sent_flag
         display = mock.Mock(spec=DisplayTerminal)
         env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
-        env.upload_file = mock.Mock(return_value=True)
+        env.upload_input_zipfile = mock.Mock(return_value=True)
         uploader = StudyZipfileUploader(env, display)
 
         # When
@@ -24,10 +24,10 @@ class TestStudyZipfileUploader:
 
         # Then
         if actual_sent_flag:
-            env.upload_file.assert_not_called()
+            env.upload_input_zipfile.assert_not_called()
             display.show_message.assert_called_once()
         else:
-            env.upload_file.assert_called_once_with(pending_study.zipfile_path)
+            env.upload_input_zipfile.assert_called_once_with(pending_study)
             assert display.show_message.call_count == 2
         display.show_error.assert_not_called()
         assert pending_study.zip_is_sent
@@ -37,14 +37,14 @@ class TestStudyZipfileUploader:
         # Given
         display = mock.Mock(spec=DisplayTerminal)
         env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
-        env.upload_file = mock.Mock(return_value=False)
+        env.upload_input_zipfile = mock.Mock(return_value=False)
         uploader = StudyZipfileUploader(env, display)
 
         # When
         uploader.upload(pending_study)
 
         # Then
-        env.upload_file.assert_called_once_with(pending_study.zipfile_path)
+        env.upload_input_zipfile.assert_called_once_with(pending_study)
         assert display.show_message.call_count == 1
         assert display.show_error.call_count == 1
         assert not pending_study.zip_is_sent
@@ -0,0 +1,117 @@
+import pytest
+
+from unittest import mock
+
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    RemoteEnvironmentWithSlurm,
+    SubmitJobError,
+)
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.use_cases.retrieve.job_requeuer import JobRequeuer
+
+
+def _fail_study(study: StudyDTO, slurm_state: str) -> StudyDTO:
+    """Sets the state of a study whose job has just failed"""
+    study.time_limit = 3600
+    study.memory_limit = 0
+    study.slurm_state = slurm_state
+    study.started = study.finished = study.with_error = True
+    study.job_state = "Ended with error"
+    study.end_time = "2024-01-01T12:00:00"
+    study.max_rss = 2000 * 1024 * 1024
+    return study
+
+
+@pytest.fixture(name="env")
+def env_fixture() -> mock.Mock:
+    env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+    env.submit_job.return_value = 46505575
+    return env
+
+
+class TestJobRequeuer:
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize(
+        "slurm_state, expected_time_limit, expected_memory_limit",
+        [
+            pytest.param("NODE_FAIL", 3600, 0, id="same-resources"),
+            pytest.param("TIMEOUT", 5400, 0, id="increased-time-limit"),
+            pytest.param("OUT_OF_MEMORY", 3600, 3000, id="increased-memory"),
+        ],
+    )
+    def test_requeue__nominal_case(
+        self,
+        env: mock.Mock,
+        started_study: StudyDTO,
+        slurm_state: str,
+        expected_time_limit: int,
+        expected_memory_limit: int,
+    ) -> None:
+        study = _fail_study(started_study, slurm_state)
+        requeuer = JobRequeuer(env, mock.Mock(spec=DisplayTerminal), max_attempts=3)
+
+        assert requeuer.requeue(study)
+
+        env.submit_job.assert_called_once_with(study)
+        env.upload_input_zipfile.assert_not_called()
+        assert study.job_id == 46505575
+        assert (study.started, study.finished, study.with_error) == (False, False, False)
+        assert study.job_state == "Pending"
+        assert not study.slurm_state
+        assert not study.end_time
+        assert study.zip_is_sent
+        assert (study.time_limit, study.memory_limit) == (expected_time_limit, expected_memory_limit)
+        assert len(study.attempts) == 1
+        attempt = study.attempts[0]
+        assert attempt["job_id"] == 46505574
+        assert attempt["slurm_state"] == slurm_state
+        assert attempt["time_limit"] == 3600
+        assert attempt["end_time"] == "2024-01-01T12:00:00"
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize("slurm_state", ["COMPLETED", "FAILED", "CANCELLED", "RUNNING", ""])
+    def test_requeue__not_a_transient_failure(self, env: mock.Mock, started_study: StudyDTO, slurm_state) -> None:
+        study = _fail_study(started_study, slurm_state)
+        requeuer = JobRequeuer(env, mock.Mock(spec=DisplayTerminal), max_attempts=3)
+        assert not requeuer.requeue(study)
+        env.submit_job.assert_not_called()
+        assert not study.attempts
+
+    @pytest.mark.unit_test
+    def test_requeue__max_attempts(self, env: mock.Mock, started_study: StudyDTO) -> None:
+        study = _fail_study(started_study, "PREEMPTED")
+        study.started = study.finished = study.with_error = False  # PREEMPTED means "not started"
+        study.attempts = [{"job_id": 46505573, "slurm_state": "PREEMPTED"}]
+        display = mock.Mock(spec=DisplayTerminal)
+        requeuer = JobRequeuer(env, display, max_attempts=2)
+
+        assert not requeuer.requeue(study)
+
+        env.submit_job.assert_not_called()
+        display.show_error.assert_called_once()
+        # the study ends with an error, so that the remote server is cleaned
+        assert (study.started, study.finished, study.with_error) == (True, True, True)
+        assert len(study.attempts) == 1
+
+    @pytest.mark.unit_test
+    def test_requeue__submission_error(self, env: mock.Mock, started_study: StudyDTO) -> None:
+        study = _fail_study(started_study, "TIMEOUT")
+        env.submit_job.side_effect = SubmitJobError(study.name, "invalid time limit")
+        requeuer = JobRequeuer(env, mock.Mock(spec=DisplayTerminal), max_attempts=3)
+
+        assert not requeuer.requeue(study)
+
+        assert study.job_id == 46505574
+        assert study.time_limit == 3600
+        assert study.with_error
+        assert not study.attempts
+
+    @pytest.mark.unit_test
+    def test_requeue__unknown_memory(self, env: mock.Mock, started_study: StudyDTO) -> None:
+        study = _fail_study(started_study, "OUT_OF_MEMORY")
+        study.max_rss = 0
+        requeuer = JobRequeuer(env, mock.Mock(spec=DisplayTerminal), max_attempts=3)
+        assert not requeuer.requeue(study)
+        env.submit_job.assert_not_called()
+        assert study.with_error
@@ -0,0 +1,62 @@
+import pytest
+
+from unittest import mock
+
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.use_cases.retrieve.result_manifest_recorder import ResultManifestRecorder
+
+MANIFEST = [
+    {"path": "My Study/output/20230401-1200eco/economy/mc-all/areas/fr/values-annual.txt", "size": 12, "crc32": 1},
+    {"path": "My Study/output/20230401-1200eco/simulation.log", "size": 30, "crc32": 2},
+]
+
+
+class TestResultManifestRecorder:
+    @pytest.mark.unit_test
+    def test_record__finished_study(self, finished_study: StudyDTO) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+
+        def read_result_manifest(study: StudyDTO):
+            study.remote_final_zipfile_path = "/remote/finished_My Study_46505574.zip"
+            return MANIFEST
+
+        env.read_result_manifest.side_effect = read_result_manifest
+        env.remove_input_zipfile.return_value = True
+        display = mock.Mock(spec=DisplayTerminal)
+
+        recorder = ResultManifestRecorder(env, display)
+        recorder.record(finished_study)
+
+        assert finished_study.result_manifest == MANIFEST
+        assert finished_study.remote_final_zipfile_path
+        assert finished_study.events["manifest_start"] <= finished_study.events["manifest_end"]
+        env.remove_input_zipfile.assert_called_once_with(finished_study)
+        env.clean_remote_server.assert_not_called()
+        display.show_error.assert_not_called()
+
+        # reentrancy: the manifest is read only once
+        recorder.record(finished_study)
+        env.read_result_manifest.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_record__no_final_zip(self, finished_study: StudyDTO) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        env.read_result_manifest.return_value = None
+        display = mock.Mock(spec=DisplayTerminal)
+
+        ResultManifestRecorder(env, display).record(finished_study)
+
+        assert not finished_study.result_manifest
+        env.remove_input_zipfile.assert_not_called()
+        display.show_error.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_record__running_study(self, started_study: StudyDTO) -> None:
+        env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        display = mock.Mock(spec=DisplayTerminal)
+
+        ResultManifestRecorder(env, display).record(started_study)
+
+        env.read_result_manifest.assert_not_called()
@@ -4,17 +4,36 @@ from copy import deepcopy
 from unittest import mock
 from unittest.mock import call
 
+from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
 from antareslauncher.display.display_terminal import DisplayTerminal
 from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.remote_probe import JobTransition
 from antareslauncher.study_dto import StudyDTO
 from antareslauncher.use_cases.retrieve.retrieve_controller import RetrieveController
 from antareslauncher.use_cases.retrieve.state_updater import StateUpdater
 
 
+def _iter_studies(studies):
+    """Emulates `DataRepoTinydb.iter_studies` on a list of studies"""
+
+    def iter_studies(*, done=None, has_job=None, state=None, name=None):
+        for study in studies:
+            if done is not None and study.done != done:
+                continue
+            if has_job is not None and bool(study.job_id) != has_job:
+                continue
+            if name is not None and study.name != name:
+                continue
+            if state is None or study.job_state == state:
+                yield study
+
+    return iter_studies
+
+
 class TestRetrieveController:
     def setup_method(self):
         self.env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
-        self.data_repo = mock.Mock()
+        self.data_repo = mock.MagicMock()
         self.display = mock.Mock(spec=DisplayTerminal)
         self.state_updater_mock = StateUpdater(self.env, self.display)
 
@@ -22,7 +41,7 @@ class TestRetrieveController:
     def test_given_one_study_when_retrieve_all_studies_call_then_study_retriever_is_called_once(self, started_study):
         # given
         list_of_studies = [started_study]
-        self.data_repo.get_list_of_studies = mock.Mock(return_value=list_of_studies)
+        self.data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(list_of_studies))
         my_retriever = RetrieveController(self.data_repo, self.env, self.display, self.state_updater_mock)
         my_retriever.study_retriever.retrieve = mock.Mock()
         self.display.show_message = mock.Mock()
@@ -32,21 +51,128 @@ class TestRetrieveController:
         self.display.show_message.assert_called_once_with("Retrieving all studies...", mock.ANY)
         my_retriever.study_retriever.retrieve.assert_called_once_with(started_study)
 
+    @pytest.mark.unit_test
+    def test_retrieve_all_studies__jobs_are_probed_once(self, started_study, finished_study):
+        # given
+        list_of_studies = [started_study, finished_study]
+        self.data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(list_of_studies))
+        my_retriever = RetrieveController(self.data_repo, self.env, self.display, self.state_updater_mock)
+        my_retriever.study_retriever.retrieve = mock.Mock()
+        # when
+        my_retriever.retrieve_all_studies()
+        # then
+        self.env.refresh_job_probes.assert_called_once_with(list_of_studies)
+        assert my_retriever.study_retriever.retrieve.call_count == 2
+        self.env.clear_job_probes.assert_called_once_with()
+        self.env.refresh_queue_snapshot.assert_not_called()
+
+    @pytest.mark.unit_test
+    def test_retrieve_all_studies__queue_snapshot_if_probe_fails(self, started_study, finished_study):
+        # given
+        list_of_studies = [started_study, finished_study]
+        self.data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(list_of_studies))
+        self.env.refresh_job_probes.return_value = False
+        my_retriever = RetrieveController(self.data_repo, self.env, self.display, self.state_updater_mock)
+        my_retriever.study_retriever.retrieve = mock.Mock()
+        # when
+        my_retriever.retrieve_all_studies()
+        # then
+        self.env.refresh_queue_snapshot.assert_called_once_with()
+        assert my_retriever.study_retriever.retrieve.call_count == 2
+
+    @pytest.mark.unit_test
+    def test_retrieve_all_studies__deferred_studies_skipped(self, pending_study, started_study):
+        # given: a study deferred by the submission governor, without job
+        self.data_repo.iter_studies = mock.Mock(side_effect=_iter_studies([pending_study, started_study]))
+        my_retriever = RetrieveController(self.data_repo, self.env, self.display, self.state_updater_mock)
+        my_retriever.study_retriever.retrieve = mock.Mock()
+        # when
+        all_done = my_retriever.retrieve_all_studies()
+        # then: its job state is not polled, and no error is shown
+        assert not all_done
+        self.env.refresh_job_probes.assert_called_once_with([started_study])
+        my_retriever.study_retriever.retrieve.assert_called_once_with(started_study)
+        self.display.show_message.assert_any_call("1 studies waiting for a free slot", mock.ANY)
+        self.display.show_error.assert_not_called()
+
+    @pytest.mark.unit_test
+    def test_retrieve_on_job_transitions(self, pending_study, started_study, finished_study):
+        # given
+        finished_study.job_id = 46505575
+        finished_study.done = True
+        list_of_studies = [pending_study, started_study, finished_study]
+        self.data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(list_of_studies))
+        self.env.watch_jobs.return_value = iter(
+            [
+                JobTransition(job_id=started_study.job_id, state="RUNNING", final=False),
+                JobTransition(job_id=99999999, state="RUNNING", final=False),  # unknown job
+                JobTransition(job_id=started_study.job_id, state="COMPLETED", final=True),
+            ]
+        )
+        my_retriever = RetrieveController(self.data_repo, self.env, self.display, self.state_updater_mock)
+        my_retriever.study_retriever.retrieve = mock.Mock()
+        on_slot_freed = mock.Mock()
+        # when
+        my_retriever.retrieve_on_job_transitions(interval=5, max_duration=600, on_slot_freed=on_slot_freed)
+        # then: only the submitted studies which are not done are watched
+        self.env.watch_jobs.assert_called_once_with(
+            {started_study.job_id: started_study}, interval=5, max_duration=pytest.approx(600, abs=1)
+        )
+        # the pushed state is applied without querying the remote server
+        self.env.get_job_state_flags.assert_not_called()
+        self.data_repo.save_study.assert_called_once_with(started_study)
+        # the finished job is retrieved with a single probe
+        assert my_retriever.study_retriever.retrieve.mock_calls == [call(started_study)]
+        self.env.refresh_job_probes.assert_called_once_with([started_study])
+        on_slot_freed.assert_called_once_with()
+
+    @pytest.mark.unit_test
+    def test_retrieve_on_job_transitions__new_jobs_watched(self, started_study):
+        # given
+        deferred_study = StudyDTO(path="path/to/deferred_study")
+        list_of_studies = [started_study, deferred_study]
+        self.data_repo.iter_studies = mock.Mock(side_effect=_iter_studies(list_of_studies))
+        self.env.watch_jobs.side_effect = [
+            iter([JobTransition(job_id=started_study.job_id, state="COMPLETED", final=True)]),
+            iter([JobTransition(job_id=1234, state="COMPLETED", final=True)]),
+        ]
+        my_retriever = RetrieveController(self.data_repo, self.env, self.display, self.state_updater_mock)
+
+        def retrieve(study: StudyDTO) -> None:
+            study.done = True
+
+        def launch_deferred_studies() -> None:
+            deferred_study.job_id = 1234
+
+        my_retriever.study_retriever.retrieve = mock.Mock(side_effect=retrieve)
+        # when
+        all_done = my_retriever.retrieve_on_job_transitions(interval=5, on_slot_freed=launch_deferred_studies)
+        # then: the deferred study is submitted when the slot is freed, and its job is watched
+        assert all_done is self.data_repo.all_studies_done.return_value
+        assert [c.args[0] for c in self.env.watch_jobs.mock_calls] == [
+            {started_study.job_id: started_study},
+            {1234: deferred_study},
+        ]
+        assert my_retriever.study_retriever.retrieve.mock_calls == [call(started_study), call(deferred_study)]
+
     @pytest.mark.unit_test
     def test_given_a_list_of_done_studies_when_all_studies_done_called_then_return_true(
         self,
+        repo: DataRepoTinydb,
     ):
         # given
-        study = StudyDTO("path")
-        study.done = True
-        study_list = [deepcopy(study), deepcopy(study)]
-        my_retriever = RetrieveController(self.data_repo, self.env, self.display, self.state_updater_mock)
-        my_retriever.repo.get_list_of_studies = mock.Mock(return_value=study_list)
+        study_list = [StudyDTO("path/to/study_a", done=True), StudyDTO("path/to/study_b", done=True)]
+        repo.save_studies(study_list)
+        my_retriever = RetrieveController(repo, self.env, self.display, self.state_updater_mock)
         # when
         output = my_retriever.all_studies_done
         # then
         assert output is True
 
+        # a study which is not done
+        repo.save_study(StudyDTO("path/to/study_c"))
+        assert my_retriever.all_studies_done is False
+
     @pytest.mark.unit_test
     def test_given_a_list_of_done_studies_when_retrieve_all_studies_called_then_message_is_shown(
         self,
@@ -57,7 +183,7 @@ class TestRetrieveController:
         study_list = [deepcopy(study), deepcopy(study)]
         display_mock = mock.Mock(spec=DisplayTerminal)
         my_retriever = RetrieveController(self.data_repo, self.env, display_mock, self.state_updater_mock)
-        my_retriever.repo.get_list_of_studies = mock.Mock(return_value=study_list)
+        my_retriever.repo.iter_studies = mock.Mock(side_effect=_iter_studies(study_list))
         display_mock.show_message = mock.Mock()
         # when
         output = my_retriever.retrieve_all_studies()
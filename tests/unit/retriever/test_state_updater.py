@@ -38,6 +38,7 @@ def test_given_a_submitted_study_then_study_flags_are_updated(started_flag, fini
     assert my_study.finished == finished_flag
     assert my_study.with_error == with_error_flag
     assert my_study.job_state == status
+    assert ("finished_detected" in my_study.events) == bool(finished_flag)
 
 
 @pytest.mark.unit_test
@@ -46,7 +47,7 @@ def test_given_a_non_submitted_study_then_get_job_state_flags_is_not_called():
     env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
     display = mock.Mock(spec=DisplayTerminal)
 
-    my_study = StudyDTO(path="study_path", job_id=None)
+    my_study = StudyDTO(path="study_path", job_id=None, with_error=True)
     state_updater = StateUpdater(env, display)
     state_updater.run(my_study)
 
@@ -55,6 +56,20 @@ def test_given_a_non_submitted_study_then_get_job_state_flags_is_not_called():
     display.show_error.assert_called_once_with(message, mock.ANY)
 
 
+@pytest.mark.unit_test
+def test_given_a_deferred_study_then_no_error_is_shown():
+    env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+    display = mock.Mock(spec=DisplayTerminal)
+
+    my_study = StudyDTO(path="study_path", job_id=None)
+    StateUpdater(env, display).run(my_study)
+
+    message = f'"{my_study.name}": submission deferred, waiting for a free slot'
+    env.get_job_state_flags.assert_not_called()
+    display.show_message.assert_called_once_with(message, mock.ANY)
+    display.show_error.assert_not_called()
+
+
 @pytest.mark.unit_test
 def test_given_a_done_study_then_get_job_state_flags_is_not_called():
     # given
@@ -172,3 +187,30 @@ def test_when_state_retrieval_fails__then_study_flags_are_not_updated():
     assert my_study3.started is True
     assert my_study3.finished is True
     assert my_study3.with_error is False
+
+
+@pytest.mark.unit_test
+@pytest.mark.parametrize(
+    "slurm_state,status",
+    [("PENDING", "Pending"), ("RUNNING", "Running"), ("COMPLETED", "Finished"), ("TIMEOUT", "Ended with error")],
+)
+def test_apply_job_state__remote_server_not_queried(slurm_state, status):
+    env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+    display = mock.Mock(spec=DisplayTerminal)
+    my_study = StudyDTO(path="study_path", job_id=42)
+
+    assert StateUpdater(env, display).apply_job_state(my_study, slurm_state)
+
+    env.get_job_state_flags.assert_not_called()
+    assert my_study.job_state == status
+    assert my_study.slurm_state == slurm_state
+    display.show_message.assert_called_once_with(f'"{my_study.name}": (JOBID=42): {status}', mock.ANY)
+
+
+@pytest.mark.unit_test
+def test_apply_job_state__unknown_state():
+    display = mock.Mock(spec=DisplayTerminal)
+    my_study = StudyDTO(path="study_path", job_id=42, started=True)
+    assert not StateUpdater(mock.Mock(spec=RemoteEnvironmentWithSlurm), display).apply_job_state(my_study, "WEIRD")
+    assert my_study.started
+    display.show_message.assert_not_called()
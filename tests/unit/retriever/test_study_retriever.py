@@ -10,7 +10,9 @@ from antareslauncher.study_dto import StudyDTO
 from antareslauncher.use_cases.retrieve.clean_remote_server import RemoteServerCleaner
 from antareslauncher.use_cases.retrieve.download_final_zip import FinalZipDownloader
 from antareslauncher.use_cases.retrieve.final_zip_extractor import FinalZipExtractor
+from antareslauncher.use_cases.retrieve.job_requeuer import JobRequeuer
 from antareslauncher.use_cases.retrieve.log_downloader import LogDownloader
+from antareslauncher.use_cases.retrieve.result_manifest_recorder import ResultManifestRecorder
 from antareslauncher.use_cases.retrieve.state_updater import StateUpdater
 from antareslauncher.use_cases.retrieve.study_retriever import StudyRetriever
 
@@ -19,8 +21,8 @@ class TestStudyRetriever:
     def setup_method(self):
         env = mock.Mock(spec_set=RemoteEnvironmentWithSlurm)
         display = mock.Mock(spec_set=DisplayTerminal)
-        repo = mock.Mock(spec_set=DataRepoTinydb)
-        self.reporter = DataReporter(repo)
+        self.repo = mock.Mock(spec_set=DataRepoTinydb)
+        self.reporter = DataReporter(self.repo)
         self.state_updater = StateUpdater(env, display)
         self.logs_downloader = LogDownloader(env, display)
         self.final_zip_downloader = FinalZipDownloader(env, display)
@@ -128,3 +130,68 @@ class TestStudyRetriever:
             final_zip_extracted=True,
         )
         self.reporter.save_study.assert_called_once_with(expected)
+        # the remote server is clean: the study is written at once
+        self.repo.flush.assert_called_once_with()
+
+    @pytest.mark.unit_test
+    def test_retrieve_study__requeued(self):
+        """
+        When the job of the study is resubmitted by the requeuer, the results are not downloaded
+        and the remote server is not cleaned: the input ZIP file is used by the new job.
+        """
+        study = StudyDTO(path="hello", job_id=42)
+        self.state_updater.run = mock.Mock()
+        self.logs_downloader.run = mock.Mock()
+        self.final_zip_downloader.download = mock.Mock()
+        self.remote_server_cleaner.clean = mock.Mock()
+        self.zip_extractor.extract_final_zip = mock.Mock()
+        self.reporter.save_study = mock.Mock(return_value=True)
+        job_requeuer = mock.Mock(spec=JobRequeuer)
+        job_requeuer.requeue.return_value = True
+        self.study_retriever.job_requeuer = job_requeuer
+
+        self.study_retriever.retrieve(study)
+
+        self.state_updater.run.assert_called_once_with(study)
+        self.logs_downloader.run.assert_called_once_with(study)
+        job_requeuer.requeue.assert_called_once_with(study)
+        self.final_zip_downloader.download.assert_not_called()
+        self.remote_server_cleaner.clean.assert_not_called()
+        self.zip_extractor.extract_final_zip.assert_not_called()
+        self.reporter.save_study.assert_called_once_with(study)
+        assert not study.done
+
+    @pytest.mark.unit_test
+    def test_retrieve_study__keep_remote(self):
+        """
+        When the results of the study are kept on the remote server, the manifest of the final ZIP file
+        is recorded instead of downloading, cleaning and extracting the results.
+        """
+        study = StudyDTO(path="hello", job_id=42, keep_remote=True)
+
+        def run(study_: StudyDTO) -> None:
+            study_.started = study_.finished = True
+            study_.logs_downloaded = True
+
+        def record(study_: StudyDTO) -> None:
+            study_.remote_final_zipfile_path = "/remote/finished_hello_42.zip"
+
+        self.state_updater.run = mock.Mock(side_effect=run)
+        self.logs_downloader.run = mock.Mock()
+        self.final_zip_downloader.download = mock.Mock()
+        self.remote_server_cleaner.clean = mock.Mock()
+        self.zip_extractor.extract_final_zip = mock.Mock()
+        self.reporter.save_study = mock.Mock(return_value=True)
+        manifest_recorder = mock.Mock(spec=ResultManifestRecorder)
+        manifest_recorder.record.side_effect = record
+        self.study_retriever.manifest_recorder = manifest_recorder
+
+        self.study_retriever.retrieve(study)
+
+        manifest_recorder.record.assert_called_once_with(study)
+        self.final_zip_downloader.download.assert_not_called()
+        self.remote_server_cleaner.clean.assert_not_called()
+        self.zip_extractor.extract_final_zip.assert_not_called()
+        self.reporter.save_study.assert_called_once_with(study)
+        self.repo.flush.assert_not_called()
+        assert study.done
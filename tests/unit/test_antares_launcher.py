@@ -4,6 +4,7 @@ from unittest import mock
 from unittest.mock import Mock, PropertyMock
 
 from antareslauncher.antares_launcher import AntaresLauncher
+from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillFilter
 from antareslauncher.use_cases.wait_loop_controller.wait_controller import WaitController
 
 
@@ -33,6 +34,30 @@ class TestAntaresLauncher:
         # then
         antares_launcher.job_kill_controller.kill_job.assert_called_once_with(job_id_to_kill)
 
+    @pytest.mark.unit_test
+    def test_given_kill_filter_when_run_then_job_kill_controller_kills_selected_jobs(self):
+        # given
+        dummy = Mock()
+        kill_filter = JobKillFilter(name_pattern="study_*")
+        antares_launcher = AntaresLauncher(
+            study_list_composer=dummy,
+            launch_controller=dummy,
+            retrieve_controller=dummy,
+            job_kill_controller=mock.Mock(),
+            check_queue_controller=dummy,
+            wait_controller=dummy,
+            wait_mode=False,
+            wait_time=42,
+            xpansion_mode=None,
+            check_queue_bool=True,
+            kill_filter=kill_filter,
+        )
+        # when
+        antares_launcher.run()
+        # then
+        antares_launcher.job_kill_controller.kill_jobs.assert_called_once_with(kill_filter)
+        antares_launcher.check_queue_controller.check_queue.assert_not_called()
+
     @pytest.mark.unit_test
     def test_given_true_check_queue_bool_when_run_then_check_queue_controller_checks_queue(
         self,
@@ -56,6 +81,147 @@ class TestAntaresLauncher:
         # then
         antares_launcher.check_queue_controller.check_queue.assert_called_once()
 
+    @pytest.mark.unit_test
+    def test_given_true_sizing_report_bool_when_run_then_sizing_report_controller_shows_report(
+        self,
+    ):
+        # given
+        dummy = Mock()
+        antares_launcher = AntaresLauncher(
+            study_list_composer=dummy,
+            launch_controller=dummy,
+            retrieve_controller=dummy,
+            job_kill_controller=dummy,
+            check_queue_controller=dummy,
+            wait_controller=dummy,
+            wait_mode=False,
+            wait_time=42,
+            xpansion_mode=None,
+            check_queue_bool=False,
+            sizing_report_controller=Mock(),
+            sizing_report_bool=True,
+        )
+        # when
+        antares_launcher.run()
+        # then
+        antares_launcher.sizing_report_controller.show_report.assert_called_once()
+        dummy.run_once_mode.assert_not_called()
+        dummy.update_study_database.assert_not_called()
+
+    @pytest.mark.unit_test
+    def test_given_true_lifecycle_report_bool_when_run_then_lifecycle_report_controller_shows_report(
+        self,
+    ):
+        # given
+        dummy = Mock()
+        antares_launcher = AntaresLauncher(
+            study_list_composer=dummy,
+            launch_controller=dummy,
+            retrieve_controller=dummy,
+            job_kill_controller=dummy,
+            check_queue_controller=dummy,
+            wait_controller=dummy,
+            wait_mode=False,
+            wait_time=42,
+            xpansion_mode=None,
+            check_queue_bool=False,
+            lifecycle_report_controller=Mock(),
+            lifecycle_report_bool=True,
+        )
+        # when
+        antares_launcher.run()
+        # then
+        antares_launcher.lifecycle_report_controller.show_report.assert_called_once()
+        dummy.update_study_database.assert_not_called()
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize("fetch_patterns", [[], ["*/mc-all/areas"]])
+    def test_given_fetch_study_when_run_then_result_fetcher_fetches_files(self, fetch_patterns):
+        # given
+        dummy = Mock()
+        antares_launcher = AntaresLauncher(
+            study_list_composer=dummy,
+            launch_controller=dummy,
+            retrieve_controller=dummy,
+            job_kill_controller=dummy,
+            check_queue_controller=dummy,
+            wait_controller=dummy,
+            wait_mode=False,
+            wait_time=42,
+            xpansion_mode=None,
+            check_queue_bool=False,
+            result_fetcher=Mock(),
+            fetch_study="my_study",
+            fetch_patterns=fetch_patterns,
+        )
+        # when
+        antares_launcher.run()
+        # then
+        result_fetcher = antares_launcher.result_fetcher
+        if fetch_patterns:
+            result_fetcher.fetch.assert_called_once_with("my_study", fetch_patterns)
+            result_fetcher.show_manifest.assert_not_called()
+        else:
+            result_fetcher.show_manifest.assert_called_once_with("my_study")
+        dummy.update_study_database.assert_not_called()
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize("history_pattern, compact_db", [("study_*", False), (None, True)])
+    def test_given_archive_options_when_run_then_study_archiver_is_called(self, history_pattern, compact_db):
+        # given
+        dummy = Mock()
+        antares_launcher = AntaresLauncher(
+            study_list_composer=dummy,
+            launch_controller=dummy,
+            retrieve_controller=dummy,
+            job_kill_controller=dummy,
+            check_queue_controller=dummy,
+            wait_controller=dummy,
+            wait_mode=False,
+            wait_time=42,
+            xpansion_mode=None,
+            check_queue_bool=False,
+            study_archiver=Mock(),
+            history_pattern=history_pattern,
+            compact_db=compact_db,
+        )
+        # when
+        antares_launcher.run()
+        # then
+        study_archiver = antares_launcher.study_archiver
+        if history_pattern:
+            study_archiver.show_history.assert_called_once_with(history_pattern)
+            study_archiver.compact.assert_not_called()
+        else:
+            study_archiver.compact.assert_called_once_with()
+        study_archiver.archive_done_studies.assert_not_called()
+        dummy.update_study_database.assert_not_called()
+
+    @pytest.mark.unit_test
+    def test_given_study_archiver_when_run_once_mode_then_done_studies_are_archived_first(self):
+        # given
+        manager = Mock()
+        antares_launcher = AntaresLauncher(
+            study_list_composer=manager.study_list_composer,
+            launch_controller=manager.launch_controller,
+            retrieve_controller=manager.retrieve_controller,
+            job_kill_controller=Mock(),
+            check_queue_controller=Mock(),
+            wait_controller=Mock(),
+            wait_mode=False,
+            wait_time=42,
+            xpansion_mode=None,
+            check_queue_bool=False,
+            study_archiver=manager.study_archiver,
+        )
+        # when
+        antares_launcher.run_once_mode()
+        # then
+        assert manager.mock_calls[:2] == [
+            mock.call.study_archiver.archive_done_studies(),
+            mock.call.study_list_composer.update_study_database(),
+        ]
+
     @pytest.mark.unit_test
     def test_given_true_wait_mode_when_run_then_run_wait_mode_called(self):
         # given
@@ -128,3 +294,64 @@ class TestAntaresLauncher:
         # then
         assert antares_launcher.retrieve_controller.retrieve_all_studies.call_count == 3
         assert wait_controller.countdown.call_count == 2
+
+    @pytest.mark.unit_test
+    def test_given_watch_interval_when_run_wait_mode_then_jobs_are_watched_before_polling(self):
+        # given
+        wait_controller = WaitController(display=mock.Mock())
+        wait_controller.countdown = mock.Mock()
+        antares_launcher = AntaresLauncher(
+            study_list_composer=mock.Mock(),
+            launch_controller=mock.Mock(),
+            retrieve_controller=mock.Mock(),
+            job_kill_controller=None,
+            check_queue_controller=None,
+            wait_controller=wait_controller,
+            wait_mode=True,
+            wait_time=60,
+            xpansion_mode=None,
+            check_queue_bool=None,
+            watch_interval=10,
+        )
+        # the watcher stops before the end of all jobs: the launcher falls back to polling
+        type(antares_launcher.retrieve_controller).all_studies_done = PropertyMock(side_effect=[False, False, True])
+        # when
+        antares_launcher.run()
+        # then
+        antares_launcher.retrieve_controller.retrieve_on_job_transitions.assert_called_once_with(
+            10,
+            max_duration=60,
+            on_slot_freed=antares_launcher.launch_controller.launch_deferred_studies,
+        )
+        assert antares_launcher.retrieve_controller.retrieve_all_studies.call_count == 2
+        # the watcher stopped early: the launcher waits for the rest of the wait time
+        wait_controller.countdown.assert_called_once()
+        assert 58 <= wait_controller.countdown.call_args.kwargs["seconds_to_wait"] <= 60
+        # the deferred studies are submitted at each polling
+        assert antares_launcher.launch_controller.launch_deferred_studies.call_count == 1
+
+    @pytest.mark.unit_test
+    def test_given_watch_interval_when_all_jobs_finished_while_watching_then_no_polling(self):
+        # given
+        wait_controller = WaitController(display=mock.Mock())
+        wait_controller.countdown = mock.Mock()
+        antares_launcher = AntaresLauncher(
+            study_list_composer=mock.Mock(),
+            launch_controller=mock.Mock(),
+            retrieve_controller=mock.Mock(),
+            job_kill_controller=None,
+            check_queue_controller=None,
+            wait_controller=wait_controller,
+            wait_mode=True,
+            wait_time=60,
+            xpansion_mode=None,
+            check_queue_bool=None,
+            watch_interval=10,
+        )
+        type(antares_launcher.retrieve_controller).all_studies_done = PropertyMock(side_effect=[False, True])
+        # when
+        antares_launcher.run()
+        # then
+        antares_launcher.retrieve_controller.retrieve_on_job_transitions.assert_called_once()
+        assert antares_launcher.retrieve_controller.retrieve_all_studies.call_count == 1
+        wait_controller.countdown.assert_not_called()
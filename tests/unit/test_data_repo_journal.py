@@ -0,0 +1,183 @@
+import pytest
+
+import gzip
+import json
+
+from pathlib import Path
+from unittest import mock
+
+from antareslauncher.data_repo.data_repo_journal import DataRepoJournal
+from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.study_dto import StudyDTO
+
+
+@pytest.fixture(name="repo")
+def repo_fixture(tmp_path: Path) -> DataRepoJournal:
+    return DataRepoJournal(
+        database_file_path=tmp_path.joinpath("repo.json"),
+        db_primary_key="name",
+        snapshot_interval=10,
+    )
+
+
+def _reopen(repo: DataRepoJournal) -> DataRepoJournal:
+    return DataRepoJournal(repo.database_file_path, "name", snapshot_interval=repo.snapshot_interval)
+
+
+class TestDataRepoJournal:
+    @pytest.mark.unit_test
+    def test_save_study__appended_to_journal(self, repo: DataRepoJournal):
+        study = StudyDTO(path="path/to/study_a")
+        repo.save_study(study)
+        study.job_id = 42
+        study.started = True
+        repo.save_study(study)
+
+        # the JSON database is not written, only the journal
+        assert not repo.database_file_path.exists()
+        entries = [json.loads(line) for line in repo.journal_path.read_text().splitlines()]
+        assert [(e["seq"], e["op"], e["pk"]) for e in entries] == [(1, "insert", "study_a"), (2, "update", "study_a")]
+        assert entries[1]["fields"] == {"job_id": 42, "started": True, "version": 2}
+
+        other_repo = _reopen(repo)
+        assert other_repo.get_list_of_studies() == [study]
+        assert other_repo.get_job_ids() == {42}
+
+    @pytest.mark.unit_test
+    def test_journal_read_incrementally(self, repo: DataRepoJournal):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        other_repo = _reopen(repo)
+        assert other_repo.get_job_ids() == set()
+
+        study = repo.get_list_of_studies()[0]
+        study.job_id = 42
+        repo.save_study(study)
+        with mock.patch.object(other_repo, "_load_snapshot", wraps=other_repo._load_snapshot) as load_snapshot:
+            assert other_repo.get_job_ids() == {42}
+            load_snapshot.assert_not_called()
+
+    @pytest.mark.unit_test
+    def test_snapshot(self, repo: DataRepoJournal):
+        studies = [StudyDTO(path=f"path/to/study_{i}") for i in range(4)]
+        repo.save_studies(studies)
+        for job_id in range(1, 4):
+            for study in studies:
+                study.job_id = job_id * 10 + int(study.name[-1])
+            repo.save_studies(studies)
+
+        # the snapshot is written after 10 entries, the journal only keeps the newer entries
+        snapshot = json.loads(repo.database_file_path.read_text())
+        assert snapshot["journal"] == {"1": {"seq": 12}}
+        assert len(snapshot["_default"]) == 4
+        assert [json.loads(line)["seq"] for line in repo.journal_path.read_text().splitlines()] == [13, 14, 15, 16]
+        assert [e["seq"] for e in repo.iter_journal()] == list(range(1, 17))
+
+        other_repo = _reopen(repo)
+        assert other_repo.get_list_of_studies() == repo.get_list_of_studies()
+        assert other_repo.get_job_ids() == {30, 31, 32, 33}
+        assert repo.get_job_ids() == {30, 31, 32, 33}
+
+        # a snapshot rewritten by another process is read again
+        other_repo.snapshot()
+        assert other_repo.journal_path.read_bytes() == b""
+        study = other_repo.get_list_of_studies()[0]
+        study.done = True
+        other_repo.save_study(study)
+        assert [s.done for s in repo.get_list_of_studies()] == [True, False, False, False]
+        assert [e["seq"] for e in repo.iter_journal()] == list(range(1, 18))
+
+    @pytest.mark.unit_test
+    def test_crash_recovery__interrupted_entry(self, repo: DataRepoJournal):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        with repo.journal_path.open("ab") as journal_file:
+            journal_file.write(b'{"seq":2,"op":"insert","pk":"study_b","fie')
+
+        # the interrupted entry is ignored, and overwritten by the next entry
+        other_repo = _reopen(repo)
+        assert [s.name for s in other_repo.get_list_of_studies()] == ["study_a"]
+        other_repo.save_study(StudyDTO(path="path/to/study_c"))
+        assert [s.name for s in _reopen(repo).get_list_of_studies()] == ["study_a", "study_c"]
+        assert [(e["seq"], e["pk"]) for e in repo.iter_journal()] == [(1, "study_a"), (2, "study_c")]
+
+    @pytest.mark.unit_test
+    def test_crash_recovery__interrupted_snapshot(self, repo: DataRepoJournal):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+        # the launcher is interrupted before the journal is truncated
+        with mock.patch.object(Path, "open", side_effect=[repo.journal_path.open("rb"), OSError("killed")]):
+            with pytest.raises(OSError):
+                repo.snapshot()
+        assert repo.journal_path.read_bytes() != b""
+
+        # the entries in the snapshot are not applied again, and their duplicates in the history are skipped
+        other_repo = _reopen(repo)
+        study = other_repo.get_list_of_studies()[0]
+        assert (study.job_id, study.version) == (42, 1)
+        study.job_id = 43
+        other_repo.save_study(study)
+        other_repo.snapshot()
+        assert _reopen(repo).get_job_ids() == {43}
+        assert [e["seq"] for e in repo.iter_journal()] == [1, 2]
+
+    @pytest.mark.unit_test
+    def test_json_database__initial_snapshot(self, tmp_path: Path):
+        json_repo = DataRepoTinydb(tmp_path.joinpath("repo.json"), "name")
+        json_repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+
+        repo = DataRepoJournal(tmp_path.joinpath("repo.json"), "name")
+        assert repo.get_job_ids() == {42}
+        repo.save_study(StudyDTO(path="path/to/study_b"))
+        assert [s.name for s in _reopen(repo).get_list_of_studies()] == ["study_a", "study_b"]
+
+    @pytest.mark.unit_test
+    def test_remove_studies(self, repo: DataRepoJournal):
+        repo.save_studies([StudyDTO(path="path/to/study_a", job_id=42), StudyDTO(path="path/to/study_b")])
+        repo._remove_studies(["study_a", "unknown"])
+        assert [s.name for s in repo.get_list_of_studies()] == ["study_b"]
+        assert [s.name for s in _reopen(repo).get_list_of_studies()] == ["study_b"]
+        assert _reopen(repo).get_job_ids() == set()
+        assert [(e["op"], e["pk"]) for e in repo.iter_journal()][-1] == ("remove", "study_a")
+
+    @pytest.mark.unit_test
+    def test_iter_journal__corrupted_history(self, repo: DataRepoJournal):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        repo.snapshot()
+        repo.save_study(StudyDTO(path="path/to/study_b"))
+        with repo.history_path.open("ab") as history_file:
+            history_file.write(b"not a gzip member")
+
+        # the entries are read up to the corrupted data, the journal is still read
+        with mock.patch("antareslauncher.data_repo.data_repo_journal.logger") as logger:
+            assert [(e["seq"], e["pk"]) for e in repo.iter_journal()] == [(1, "study_a"), (2, "study_b")]
+        logger.warning.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_crash_recovery__truncated_history(self, repo: DataRepoJournal):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        journal = repo.journal_path.read_bytes()
+        repo.snapshot()
+        # the launcher is killed while the entries are moved to the history: its gzip member is truncated
+        history = repo.history_path.read_bytes()
+        repo.history_path.write_bytes(history[:-10])
+        repo.journal_path.write_bytes(journal)
+
+        # a new history is started, so that the next entries can be read
+        other_repo = _reopen(repo)
+        other_repo.save_study(StudyDTO(path="path/to/study_b"))
+        other_repo.snapshot()
+        rotated_path = repo.history_path.with_name(f"{repo.journal_path.name}.1.gz")
+        assert rotated_path.read_bytes() == history[:-10]
+        assert [(e["seq"], e["pk"]) for e in repo.iter_journal()] == [(1, "study_a"), (2, "study_b")]
+
+    @pytest.mark.unit_test
+    def test_crash_recovery__failed_history_append(self, repo: DataRepoJournal):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        repo.snapshot()
+        size = repo.history_path.stat().st_size
+        repo.save_study(StudyDTO(path="path/to/study_b"))
+        with mock.patch.object(gzip.GzipFile, "write", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                repo.snapshot()
+
+        # the partial gzip member is removed from the history
+        assert repo.history_path.stat().st_size == size
+        assert [e["seq"] for e in repo.iter_journal()] == [1, 2]
@@ -0,0 +1,188 @@
+import pytest
+
+import sqlite3
+
+from pathlib import Path
+from unittest import mock
+
+from antareslauncher.data_repo.data_repo import DataRepo
+from antareslauncher.data_repo.data_repo_sqlite import DataRepoSqlite
+from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.study_dto import StudyDTO
+
+
+@pytest.fixture(name="repo")
+def repo_fixture(tmp_path: Path) -> DataRepoSqlite:
+    return DataRepoSqlite(
+        database_file_path=tmp_path.joinpath("repo.sqlite"),
+        db_primary_key="name",
+    )
+
+
+class TestDataRepoSqlite:
+    @pytest.mark.unit_test
+    def test_implements_data_repo(self, repo: DataRepoSqlite):
+        # the SQLite repository does not inherit the TinyDB implementation
+        assert isinstance(repo, DataRepo)
+        assert not isinstance(repo, DataRepoTinydb)
+        assert not DataRepoSqlite.__abstractmethods__
+        with pytest.raises(TypeError):
+            DataRepo(repo.database_file_path, "name")  # type: ignore[abstract]
+
+    @pytest.mark.unit_test
+    def test_save_study__insert_and_update(self, repo: DataRepoSqlite):
+        study = StudyDTO(path="path/to/my_study", result_manifest=[{"path": "a.txt", "size": 1, "crc32": 2}])
+        repo.save_study(study)
+        assert repo.is_study_inside_database(study)
+        assert not repo.is_study_inside_database(StudyDTO(path="path/to/other_study"))
+
+        study.started = True
+        repo.save_study(study)
+        studies = repo.get_list_of_studies()
+        assert studies == [study]
+
+    @pytest.mark.unit_test
+    def test_job_ids(self, repo: DataRepoSqlite):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+        repo.save_study(StudyDTO(path="path/to/study_b"))
+        assert repo.get_job_ids() == {42}
+        assert repo.is_job_id_inside_database(42)
+        assert not repo.is_job_id_inside_database(0)
+
+    @pytest.mark.unit_test
+    def test_save_studies__persistence(self, repo: DataRepoSqlite):
+        study_a = StudyDTO(path="path/to/study_a", job_id=42)
+        repo.save_study(study_a)
+        study_a.finished = True
+        study_b = StudyDTO(path="path/to/study_b", job_id=43)
+        repo.save_studies([study_a, study_b])
+        repo.close()
+
+        other_repo = DataRepoSqlite(database_file_path=repo.database_file_path, db_primary_key="name")
+        studies = {s.name: s for s in other_repo.get_list_of_studies()}
+        assert set(studies) == {"study_a", "study_b"}
+        assert studies["study_a"].finished is True
+        assert other_repo.get_job_ids() == {42, 43}
+
+    @pytest.mark.unit_test
+    def test_import_json_db(self, tmp_path: Path):
+        json_repo = DataRepoTinydb(database_file_path=tmp_path.joinpath("repo.json"), db_primary_key="name")
+        json_repo.save_studies([StudyDTO(path="path/to/study_a", job_id=42), StudyDTO(path="path/to/study_b")])
+        json_repo.db.close()
+
+        repo = DataRepoSqlite(
+            database_file_path=tmp_path.joinpath("repo.sqlite"),
+            db_primary_key="name",
+            json_db_path=json_repo.database_file_path,
+        )
+        assert [s.name for s in repo.get_list_of_studies()] == ["study_a", "study_b"]
+        assert repo.get_job_ids() == {42}
+        repo.close()
+
+        # the JSON database is only imported when the SQLite database is created
+        json_repo = DataRepoTinydb(database_file_path=tmp_path.joinpath("repo.json"), db_primary_key="name")
+        json_repo.save_study(StudyDTO(path="path/to/study_c"))
+        json_repo.db.close()
+        assert len(repo.get_list_of_studies()) == 2
+
+    @pytest.mark.unit_test
+    def test_unit_of_work(self, repo: DataRepoSqlite):
+        reader = DataRepoSqlite(database_file_path=repo.database_file_path, db_primary_key="name")
+        with repo.unit_of_work():
+            repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+            assert reader.get_list_of_studies() == []
+            assert repo.get_job_ids() == {42}
+        assert [s.name for s in reader.get_list_of_studies()] == ["study_a"]
+
+    @pytest.mark.unit_test
+    def test_all_studies_done(self, repo: DataRepoSqlite):
+        assert repo.all_studies_done()
+        study = StudyDTO(path="path/to/study_a")
+        repo.save_study(study)
+        assert not repo.all_studies_done()
+        study.done = True
+        repo.save_study(study)
+        assert repo.all_studies_done()
+
+    @pytest.mark.unit_test
+    def test_save_study__unchanged(self, repo: DataRepoSqlite):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        study = repo.get_list_of_studies()[0]
+        with mock.patch.object(repo, "_write_row", wraps=repo._write_row) as write_row:
+            repo.save_studies([study])
+            write_row.assert_not_called()
+            study.done = True
+            repo.save_studies([study])
+            write_row.assert_called_once_with(study)
+        assert repo.all_studies_done()
+
+    @pytest.mark.unit_test
+    def test_save_study__written_by_another_process(self, repo: DataRepoSqlite):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+        other_repo = DataRepoSqlite(database_file_path=repo.database_file_path, db_primary_key="name")
+        study = repo.get_list_of_studies()[0]
+        other_study = other_repo.get_list_of_studies()[0]
+
+        other_study.job_state = "Running"
+        other_repo.save_study(other_study)
+        # the row has been written since the study was read: the changed fields are merged
+        study.started = True
+        repo.save_study(study)
+        other_repo.close()
+
+        actual = DataRepoSqlite(database_file_path=repo.database_file_path, db_primary_key="name")
+        actual_study = actual.get_list_of_studies()[0]
+        assert (actual_study.job_state, actual_study.started, actual_study.version) == ("Running", True, 3)
+        assert study.version == 3
+
+        # the fields written by the other process are still kept on the next save
+        study.time_limit = 3600
+        repo.save_study(study)
+        actual_study = actual.get_list_of_studies()[0]
+        assert (actual_study.job_state, actual_study.started, actual_study.time_limit) == ("Running", True, 3600)
+        assert actual_study.version == study.version == 4
+        actual.close()
+
+    @pytest.mark.unit_test
+    def test_add_version_column(self, tmp_path: Path):
+        db_path = tmp_path.joinpath("repo.sqlite")
+        with sqlite3.connect(db_path) as connection:
+            connection.execute(
+                "CREATE TABLE studies (pk TEXT PRIMARY KEY NOT NULL, name TEXT NOT NULL, job_id INTEGER NOT NULL,"
+                " job_state TEXT NOT NULL, done INTEGER NOT NULL, document TEXT NOT NULL)"
+            )
+        connection.close()
+        repo = DataRepoSqlite(database_file_path=db_path, db_primary_key="name")
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        assert repo.get_list_of_studies()[0].version == 1
+        repo.close()
+
+    @pytest.mark.unit_test
+    def test_iter_studies(self, repo):
+        repo.save_studies(
+            [
+                StudyDTO(path="path/to/pending"),
+                StudyDTO(path="path/to/running", job_id=42, job_state="Running"),
+                StudyDTO(path="path/to/done", job_id=43, job_state="Finished", done=True),
+            ]
+        )
+        assert [s.name for s in repo.iter_studies()] == ["pending", "running", "done"]
+        assert [s.name for s in repo.iter_studies(done=False)] == ["pending", "running"]
+        assert [s.name for s in repo.iter_studies(has_job=True)] == ["running", "done"]
+        assert [s.name for s in repo.iter_studies(has_job=False)] == ["pending"]
+        assert [s.name for s in repo.iter_studies(done=False, has_job=True)] == ["running"]
+        assert [s.name for s in repo.iter_studies(state="Finished")] == ["done"]
+        assert [s.name for s in repo.iter_studies(name="running")] == ["running"]
+        assert [s.name for s in repo.iter_studies(name="running", done=True)] == []
+        assert [s.name for s in repo.iter_studies(name="unknown")] == []
+
+        # the done studies are not read
+        with mock.patch.object(StudyDTO, "from_dict", wraps=StudyDTO.from_dict) as from_dict:
+            assert len(list(repo.iter_studies(done=False))) == 2
+            assert from_dict.call_count == 2
+
+        # the studies can be saved during the iteration
+        for study in repo.iter_studies(done=False):
+            study.done = True
+            repo.save_study(study)
+        assert repo.all_studies_done()
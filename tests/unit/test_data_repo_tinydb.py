@@ -1,10 +1,14 @@
 import pytest
 
+import json
 import random
+import threading
 
 from pathlib import Path
+from unittest import mock
 
-from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo import data_repo_tinydb
+from antareslauncher.data_repo.data_repo_tinydb import AtomicJSONStorage, DataRepoTinydb
 from antareslauncher.study_dto import StudyDTO
 
 
@@ -44,3 +48,257 @@ class TestDataRepoTinydb:
         repo.save_study(study)
         assert repo.is_job_id_inside_database(job_id)
         assert not repo.is_job_id_inside_database(9999)
+
+    @pytest.mark.unit_test
+    def test_get_job_ids__index_kept_up_to_date(self, repo: DataRepoTinydb):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+        repo.save_study(StudyDTO(path="path/to/study_b"))
+        assert repo.get_job_ids() == {42}
+        repo.save_study(StudyDTO(path="path/to/study_c", job_id=43))
+        assert repo.get_job_ids() == {42, 43}
+        # a new repository reads the index from the database file
+        other_repo = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        assert other_repo.get_job_ids() == {42, 43}
+
+    @pytest.mark.unit_test
+    def test_save_studies(self, repo: DataRepoTinydb):
+        study_a = StudyDTO(path="path/to/study_a", job_id=42)
+        repo.save_study(study_a)
+        study_a.finished = True
+        study_b = StudyDTO(path="path/to/study_b", job_id=43)
+        repo.save_studies([study_a, study_b])
+        studies = {s.name: s for s in repo.get_list_of_studies()}
+        assert set(studies) == {"study_a", "study_b"}
+        assert studies["study_a"].finished is True
+        assert studies["study_b"].job_id == 43
+        assert repo.is_job_id_inside_database(43)
+
+    @pytest.mark.unit_test
+    def test_unit_of_work(self, repo: DataRepoTinydb):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+        reader = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        with repo.unit_of_work():
+            study_b = StudyDTO(path="path/to/study_b", job_id=43)
+            repo.save_study(study_b)
+            study_b.started = True
+            repo.save_study(study_b)
+            # nothing is written until the end of the unit of work
+            assert {s.name for s in reader.get_list_of_studies()} == {"study_a"}
+        studies = {s.name: s for s in reader.get_list_of_studies()}
+        assert set(studies) == {"study_a", "study_b"}
+        assert studies["study_b"].started is True
+
+    @pytest.mark.unit_test
+    def test_unit_of_work__read_your_writes_and_errors(self, repo: DataRepoTinydb):
+        with pytest.raises(RuntimeError):
+            with repo.unit_of_work():
+                repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+                assert repo.is_job_id_inside_database(42)
+                repo.save_study(StudyDTO(path="path/to/study_b"))
+                raise RuntimeError("interrupted pass")
+        # the studies saved before the error are written
+        other_repo = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        assert {s.name for s in other_repo.get_list_of_studies()} == {"study_a", "study_b"}
+
+    @pytest.mark.unit_test
+    def test_unit_of_work__flush_interval(self, tmp_path: Path):
+        repo = DataRepoTinydb(tmp_path.joinpath("repo.json"), db_primary_key="name", flush_interval=0)
+        reader = DataRepoTinydb(tmp_path.joinpath("repo.json"), db_primary_key="name")
+        with repo.unit_of_work():
+            repo.save_study(StudyDTO(path="path/to/study_a"))
+            assert {s.name for s in reader.get_list_of_studies()} == {"study_a"}
+
+    @pytest.mark.unit_test
+    def test_atomic_write(self, repo: DataRepoTinydb):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                repo.save_study(StudyDTO(path="path/to/study_b"))
+        # the database file is unchanged, and the temporary file is removed
+        other_repo = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        assert {s.name for s in other_repo.get_list_of_studies()} == {"study_a"}
+        db_name = repo.database_file_path.name
+        assert sorted(p.name for p in repo.database_file_path.parent.iterdir()) == [db_name, f"{db_name}.lock"]
+
+    @pytest.mark.unit_test
+    def test_cache__invalidated_by_another_process(self, repo: DataRepoTinydb):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42, done=True))
+        assert repo.all_studies_done()
+        with mock.patch.object(repo.db, "all", wraps=repo.db.all) as db_all:
+            # the database file is not read again while it is unchanged
+            assert [s.name for s in repo.get_list_of_studies()] == ["study_a"]
+            assert repo.is_job_id_inside_database(42)
+            db_all.assert_not_called()
+
+        other_repo = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        other_repo.save_study(StudyDTO(path="path/to/study_b", job_id=43))
+        assert [s.name for s in repo.get_list_of_studies()] == ["study_a", "study_b"]
+        assert repo.is_job_id_inside_database(43)
+        assert not repo.all_studies_done()
+
+    @pytest.mark.unit_test
+    def test_cache__consistent_with_writes(self, repo: DataRepoTinydb):
+        study = StudyDTO(path="path/to/study_a", job_id=42, events={"zip_start": 1.0})
+        repo.save_study(study)
+        # the studies read are copies of the cached documents
+        repo.get_list_of_studies()[0].events["zip_end"] = 2.0
+        assert repo.get_list_of_studies()[0].events == {"zip_start": 1.0}
+
+        # the job is resubmitted
+        study.job_id = 43
+        study.done = True
+        repo.save_studies([study])
+        assert repo.get_job_ids() == {43}
+        assert repo.all_studies_done()
+        other_repo = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        assert other_repo.get_list_of_studies() == repo.get_list_of_studies()
+
+    @pytest.mark.unit_test
+    def test_save_study__changed_fields_only(self, repo: DataRepoTinydb):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+        study = repo.get_list_of_studies()[0]
+
+        # an unchanged study is not written
+        with mock.patch.object(repo.db, "update_multiple") as update_multiple:
+            repo.save_study(study)
+            update_multiple.assert_not_called()
+
+        # meanwhile, another process changes another field of the study
+        other_repo = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        other_study = other_repo.get_list_of_studies()[0]
+        other_study.job_state = "Running"
+        other_repo.save_study(other_study)
+
+        # only the changed fields are written
+        study.events["zip_start"] = 1.0
+        study.started = True
+        repo.save_study(study)
+        actual = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        actual_study = actual.get_list_of_studies()[0]
+        assert actual_study.started is True
+        assert actual_study.events == {"zip_start": 1.0}
+        assert actual_study.job_state == "Running"
+        assert repo.get_list_of_studies() == [actual_study]
+
+    @pytest.mark.unit_test
+    def test_save_study__written_by_another_process(self, repo: DataRepoTinydb, caplog):
+        repo.save_study(StudyDTO(path="path/to/study_a", job_id=42))
+        other_repo = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        study = repo.get_list_of_studies()[0]
+        other_study = other_repo.get_list_of_studies()[0]
+        assert study.version == other_study.version == 1
+
+        other_study.job_state = "Running"
+        other_repo.save_study(other_study)
+        study.started = True
+        with caplog.at_level("WARNING"):
+            repo.save_study(study)
+        assert "written by another process" in caplog.text
+
+        actual = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+        actual_study = actual.get_list_of_studies()[0]
+        assert (actual_study.job_state, actual_study.started, actual_study.version) == ("Running", True, 3)
+        assert study.version == 3
+
+    @pytest.mark.unit_test
+    def test_save_study__concurrent_writers(self, repo: DataRepoTinydb):
+        repo.save_study(StudyDTO(path="path/to/study_a"))
+
+        def increment(field_name: str) -> None:
+            writer = DataRepoTinydb(database_file_path=repo.database_file_path, db_primary_key="name")
+            for _ in range(20):
+                study = writer.get_list_of_studies()[0]
+                setattr(study, field_name, getattr(study, field_name) + 1)
+                writer.save_study(study)
+
+        threads = [threading.Thread(target=increment, args=(name,)) for name in ["n_cpu", "memory_limit"]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # no write is lost
+        study = repo.get_list_of_studies()[0]
+        assert (study.n_cpu, study.memory_limit, study.version) == (21, 20, 41)
+
+    @pytest.mark.unit_test
+    def test_iter_studies(self, repo):
+        repo.save_studies(
+            [
+                StudyDTO(path="path/to/pending"),
+                StudyDTO(path="path/to/running", job_id=42, job_state="Running"),
+                StudyDTO(path="path/to/done", job_id=43, job_state="Finished", done=True),
+            ]
+        )
+        assert [s.name for s in repo.iter_studies()] == ["pending", "running", "done"]
+        assert [s.name for s in repo.iter_studies(done=False)] == ["pending", "running"]
+        assert [s.name for s in repo.iter_studies(has_job=True)] == ["running", "done"]
+        assert [s.name for s in repo.iter_studies(has_job=False)] == ["pending"]
+        assert [s.name for s in repo.iter_studies(done=False, has_job=True)] == ["running"]
+        assert [s.name for s in repo.iter_studies(state="Finished")] == ["done"]
+        assert [s.name for s in repo.iter_studies(name="running")] == ["running"]
+        assert [s.name for s in repo.iter_studies(name="running", done=True)] == []
+        assert [s.name for s in repo.iter_studies(name="unknown")] == []
+
+        # the done studies are not read
+        with mock.patch.object(StudyDTO, "from_dict", wraps=StudyDTO.from_dict) as from_dict:
+            assert len(list(repo.iter_studies(done=False))) == 2
+            assert from_dict.call_count == 2
+
+        # the studies can be saved during the iteration
+        for study in repo.iter_studies(done=False):
+            study.done = True
+            repo.save_study(study)
+        assert repo.all_studies_done()
+
+
+class TestAtomicJSONStorage:
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize("fast_json", [True, False], ids=["orjson", "stdlib"])
+    def test_read_write__compact(self, tmp_path: Path, fast_json: bool):
+        if fast_json:
+            pytest.importorskip("orjson")
+        data = {"_default": {"1": {"name": "étude", "events": {"zip_start": 1.5}, "done": False}}}
+        path = tmp_path.joinpath("db.json")
+        with mock.patch.object(data_repo_tinydb, "orjson", data_repo_tinydb.orjson if fast_json else None):
+            storage = AtomicJSONStorage(path)
+            assert storage.read() is None
+            storage.write(data)
+            assert AtomicJSONStorage(path).read() == data
+        content = path.read_text(encoding="utf-8")
+        assert json.loads(content) == data
+        assert "\n" not in content and ", " not in content
+
+    @pytest.mark.unit_test
+    def test_read_write__json_options(self, tmp_path: Path):
+        path = tmp_path.joinpath("db.json")
+        AtomicJSONStorage(path, sort_keys=True, indent=4).write({"_default": {"1": {"name": "a"}}})
+        assert path.read_text(encoding="utf-8") == json.dumps({"_default": {"1": {"name": "a"}}}, indent=4)
+
+    @pytest.mark.unit_test
+    def test_read__cached_while_unchanged(self, tmp_path: Path):
+        path = tmp_path.joinpath("db.json")
+        storage = AtomicJSONStorage(path)
+        storage.write({"_default": {"1": {"name": "a"}}})
+        with mock.patch.object(AtomicJSONStorage, "_loads") as loads:
+            assert storage.read() == {"_default": {"1": {"name": "a"}}}
+            loads.assert_not_called()
+
+        # the file is replaced by another process
+        AtomicJSONStorage(path).write({"_default": {"1": {"name": "b"}}})
+        assert storage.read() == {"_default": {"1": {"name": "b"}}}
+
+        # the cache is cleared if the file may have been written within the same clock tick
+        storage.clear_cache()
+        with mock.patch.object(AtomicJSONStorage, "_loads", return_value={}) as loads:
+            assert storage.read() == {}
+            loads.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_read__not_cached(self, tmp_path: Path):
+        path = tmp_path.joinpath("db.json")
+        storage = AtomicJSONStorage(path, cache=False)
+        storage.write({"_default": {}})
+        with mock.patch.object(AtomicJSONStorage, "_loads", return_value={}) as loads:
+            storage.read()
+            storage.read()
+            assert loads.call_count == 2
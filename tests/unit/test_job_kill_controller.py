@@ -2,7 +2,13 @@ import pytest
 
 from unittest import mock
 
-from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillController
+from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.multi_cluster_environment import UnknownClusterError
+from antareslauncher.remote_environnement.remote_environment_with_slurm import KillJobError, RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.slurm_queue import QueueRecord, QueueSnapshot
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.use_cases.kill_job.job_kill_controller import JobKillController, JobKillFilter
 
 
 class TestJobKillController:
@@ -14,7 +20,7 @@ class TestJobKillController:
         job_kill_controller = JobKillController(
             env=mock.Mock(),
             display=mock.Mock(),
-            repo=mock.Mock(),
+            repo=mock.Mock(**{"iter_studies.return_value": []}),
         )
         # when
         job_kill_controller.kill_job(42)
@@ -22,15 +28,124 @@ class TestJobKillController:
         job_kill_controller.display.show_message.assert_called_once()
 
     @pytest.mark.unit_test
-    def test_job_kill_controller_should_call_env_kill_remote_job(self):
+    def test_job_kill_controller_should_call_env_kill_study_jobs(self):
         # given
+        studies = [
+            StudyDTO(path="path/to/study_a", job_id=42, cluster="b"),
+            StudyDTO(path="path/to/study_b", job_id=43),
+        ]
         job_kill_controller = JobKillController(
             env=mock.Mock(),
             display=mock.Mock(),
-            repo=mock.Mock(),
+            repo=mock.Mock(**{"iter_studies.return_value": studies}),
         )
         # when
         job_id = 42
         job_kill_controller.kill_job(job_id)
-        # then
-        job_kill_controller.env.kill_remote_job.assert_called_once_with(job_id)
+        # then: the study is given, so that the job is killed on its cluster
+        job_kill_controller.env.kill_study_jobs.assert_called_once_with(studies[:1])
+
+    @pytest.mark.unit_test
+    def test_kill_job__job_id_on_several_clusters(self):
+        # given: the job IDs of the clusters collide
+        studies = [
+            StudyDTO(path="path/to/study_a", job_id=42, cluster="a"),
+            StudyDTO(path="path/to/study_b", job_id=42, cluster="b"),
+        ]
+        job_kill_controller = JobKillController(
+            env=mock.Mock(),
+            display=mock.Mock(),
+            repo=mock.Mock(**{"iter_studies.return_value": studies}),
+        )
+        # when
+        job_kill_controller.kill_job(42)
+        # then: no job is killed
+        job_kill_controller.env.kill_study_jobs.assert_not_called()
+        job_kill_controller.display.show_error.assert_called_once()
+
+
+class TestJobKillControllerBulk:
+    def setup_method(self):
+        self.studies = [
+            StudyDTO(path="path/to/study_a", job_id=41),
+            StudyDTO(path="path/to/study_b", job_id=42),
+            StudyDTO(path="path/to/other_c", job_id=43),
+            StudyDTO(path="path/to/study_d", job_id=44, finished=True),
+            StudyDTO(path="path/to/study_e"),
+        ]
+        self.repo = mock.Mock(spec=DataRepoTinydb)
+        # the unfinished studies with a job are selected
+        self.repo.iter_studies.side_effect = lambda done, has_job: iter(
+            [s for s in self.studies if s.done == done and bool(s.job_id) == has_job]
+        )
+        self.repo.get_job_ids.return_value = frozenset([41, 42, 43, 44])
+        self.env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+        self.display = mock.Mock(spec=DisplayTerminal)
+        self.controller = JobKillController(env=self.env, display=self.display, repo=self.repo)
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__by_name(self):
+        assert self.controller.kill_jobs(JobKillFilter(name_pattern="study_*")) == [41, 42]
+        self.env.kill_study_jobs.assert_called_once_with(self.studies[:2])
+        self.repo.save_studies.assert_called_once_with(self.studies[:2])
+        assert all(s.with_error and s.finished for s in self.studies[:2])
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__all(self):
+        assert self.controller.kill_jobs(JobKillFilter(all_jobs=True)) == [41, 42, 43]
+        self.env.kill_study_jobs.assert_called_once_with(self.studies[:3])
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__by_id_unauthorized(self):
+        assert self.controller.kill_jobs(JobKillFilter(job_ids=[43, 9999])) == [43]
+        self.display.show_message.assert_any_call("You are not authorized to kill job 9999", mock.ANY)
+        self.env.kill_study_jobs.assert_called_once_with(self.studies[2:3])
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__by_state(self):
+        self.env.get_queue_snapshot.return_value = QueueSnapshot(
+            username="john",
+            host="server",
+            records=[
+                QueueRecord(job_id="41", name="study_a", state="RUNNING"),
+                QueueRecord(job_id="42", name="study_b", state="PENDING"),
+            ],
+        )
+        assert self.controller.kill_jobs(JobKillFilter(states=["pending"])) == [42]
+        self.env.kill_study_jobs.assert_called_once_with(self.studies[1:2])
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__scancel_fails(self):
+        self.env.kill_study_jobs.side_effect = KillJobError("41, 42", "error")
+        assert self.controller.kill_jobs(JobKillFilter(name_pattern="study_*")) == []
+        self.display.show_error.assert_called_once()
+        self.repo.save_studies.assert_not_called()
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__job_id_on_several_clusters(self):
+        self.studies[1].cluster = "b"
+        self.studies[2].job_id = 42
+        assert self.controller.kill_jobs(JobKillFilter(job_ids=[41, 42])) == [41]
+        self.env.kill_study_jobs.assert_called_once_with(self.studies[:1])
+        self.display.show_error.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__unknown_cluster(self):
+        # given: a study recorded with a cluster removed from the configuration
+        def kill_study_jobs(studies):
+            if studies[0].cluster:
+                raise UnknownClusterError(studies[0].cluster)
+
+        self.studies[1].cluster = "removed"
+        self.env.kill_study_jobs.side_effect = kill_study_jobs
+        # when
+        actual = self.controller.kill_jobs(JobKillFilter(name_pattern="study_*"))
+        # then: the jobs of the other clusters are killed
+        assert actual == [41]
+        self.repo.save_studies.assert_called_once_with(self.studies[:1])
+        self.display.show_error.assert_called_once()
+
+    @pytest.mark.unit_test
+    def test_kill_jobs__empty_filter(self):
+        assert self.controller.kill_jobs(JobKillFilter()) == []
+        self.env.kill_study_jobs.assert_not_called()
@@ -0,0 +1,98 @@
+import pytest
+
+import datetime
+
+from unittest import mock
+
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.study_lifecycle import FINISHED_DETECTED, get_phase_durations, record_phase
+from antareslauncher.use_cases.lifecycle_report.lifecycle_report_controller import LifecycleReportController
+
+SUBMIT_TIME = "2023-04-01T12:00:00"
+
+
+def _finished_study(name: str, detection_delay: float) -> StudyDTO:
+    study = StudyDTO(path=f"/path/to/{name}")
+    study.submit_time = SUBMIT_TIME
+    study.start_time = "2023-04-01T12:10:00"
+    study.end_time = "2023-04-01T13:10:00"
+    # the local events are relative to the SLURM submit time
+    submit = datetime.datetime.fromisoformat(SUBMIT_TIME).timestamp()
+    job_end = submit + 4200
+    study.events = {
+        "zip_start": submit - 60,
+        "zip_end": submit - 30,
+        "upload_start": submit - 30,
+        "upload_end": submit - 1,
+        "submit_start": submit - 1,
+        "submit_end": submit,
+        FINISHED_DETECTED: job_end + detection_delay,
+        "download_start": job_end + detection_delay,
+        "download_end": job_end + detection_delay + 60,
+        "extract_start": job_end + detection_delay + 60,
+        "extract_end": job_end + detection_delay + 90,
+    }
+    return study
+
+
+@pytest.mark.unit_test
+def test_record_phase():
+    study = StudyDTO(path="/path/to/study")
+    with pytest.raises(RuntimeError):
+        with record_phase(study, "upload"):
+            raise RuntimeError("upload failed")
+    assert study.events["upload_start"] <= study.events["upload_end"]
+
+
+@pytest.mark.unit_test
+def test_get_phase_durations():
+    study = _finished_study("study", detection_delay=15)
+    study.events["logs_start"] = 10.0  # incomplete phase
+    durations = get_phase_durations(study)
+    assert durations == {
+        "zip": 30,
+        "upload": 29,
+        "submit": 1,
+        "pending": 600,
+        "running": 3600,
+        "detection": 15,
+        "download": 60,
+        "extract": 30,
+        "total": 60 + 4200 + 15 + 90,
+    }
+
+
+@pytest.mark.unit_test
+def test_get_phase_durations__clock_drift():
+    study = _finished_study("study", detection_delay=-5)
+    assert "detection" not in get_phase_durations(study)
+
+
+@pytest.mark.unit_test
+def test_show_report__no_study():
+    repo = mock.Mock()
+    repo.get_study_history.return_value = [StudyDTO(path="/path/to/study")]
+    display = mock.Mock()
+    LifecycleReportController(repo=repo, display=display).show_report()
+    display.show_message.assert_called_once_with("No study with lifecycle events found", mock.ANY)
+
+
+@pytest.mark.unit_test
+def test_show_report():
+    studies = [_finished_study(f"study_{i}", detection_delay=10 * i) for i in range(1, 11)]
+    repo = mock.Mock()
+    repo.get_study_history.return_value = studies + [StudyDTO(path="/path/to/pending")]
+    display = mock.Mock()
+    controller = LifecycleReportController(repo=repo, display=display)
+    assert controller.get_durations()["detection"] == [10 * i for i in range(1, 11)]
+
+    controller.show_report()
+    display.show_message.assert_called_once()
+    lines = display.show_message.call_args[0][0].splitlines()
+    rows = {line.split()[0]: line.split()[1:] for line in lines[2:]}
+    assert set(rows) == {"zip", "upload", "submit", "pending", "running", "detection", "download", "extract", "total"}
+    # COUNT, P50, P90, P99, MAX, SHARE
+    assert rows["detection"][:2] == ["10", "55.0"]
+    assert rows["detection"][4] == "100.0"
+    assert rows["running"][1:5] == ["3600.0", "3600.0", "3600.0", "3600.0"]
+    assert rows["total"][5] == "100%"
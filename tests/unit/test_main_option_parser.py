@@ -29,6 +29,10 @@ class TestMainOptionParser:
             "log_dir": "log_dir",
             "n_cpu": 42,
             "job_id_to_kill": None,
+            "job_ids_to_kill": [],
+            "kill_name_pattern": "",
+            "kill_states": [],
+            "kill_all": False,
             "post_processing": False,
             "json_ssh_config": look_for_default_ssh_conf_file(self.main_options_parameters),
             "oversubscribe": False,
@@ -59,3 +63,53 @@ class TestMainOptionParser:
         parser.add_basic_arguments()
         output = parser.parser.parse_args(["--studies-in-dir=hello"])
         assert output.studies_in == "hello"
+
+    @pytest.mark.unit_test
+    def test_kill_options(self, parser):
+        parser.add_basic_arguments()
+        output = parser.parser.parse_args(
+            ["--kill-jobs", "42", "43", "--kill-name", "study_*", "--kill-state", "PENDING", "--kill-state", "RUNNING"]
+        )
+        assert output.job_ids_to_kill == [42, 43]
+        assert output.kill_name_pattern == "study_*"
+        assert output.kill_states == ["PENDING", "RUNNING"]
+        assert not output.kill_all
+        assert parser.parser.parse_args(["--kill-all"]).kill_all
+
+    @pytest.mark.unit_test
+    def test_output_pattern_options(self, parser):
+        parser.add_basic_arguments()
+        output = parser.parser.parse_args(
+            ["--output-include", "output/*/mc-all/*", "--output-include", "output/*/*-annual.txt"]
+        )
+        assert output.output_include == ["output/*/mc-all/*", "output/*/*-annual.txt"]
+        assert output.output_exclude == []
+
+    @pytest.mark.unit_test
+    def test_lifecycle_report_option(self, parser):
+        parser.add_basic_arguments()
+        assert not parser.parser.parse_args([]).lifecycle_report
+        assert parser.parser.parse_args(["--lifecycle-report"]).lifecycle_report
+
+    @pytest.mark.unit_test
+    def test_fetch_options(self, parser):
+        parser.add_basic_arguments()
+        output = parser.parser.parse_args([])
+        assert not output.keep_remote
+        assert output.fetch_study is None
+        output = parser.parser.parse_args(
+            ["--keep-remote", "--fetch", "my_study", "--fetch-path", "*/mc-all/areas", "--fetch-path", "*.log"]
+        )
+        assert output.keep_remote
+        assert output.fetch_study == "my_study"
+        assert output.fetch_patterns == ["*/mc-all/areas", "*.log"]
+
+    @pytest.mark.unit_test
+    def test_archive_options(self, parser):
+        parser.add_basic_arguments()
+        output = parser.parser.parse_args([])
+        assert output.history_pattern is None
+        assert not output.compact_db
+        assert parser.parser.parse_args(["--history"]).history_pattern == "*"
+        assert parser.parser.parse_args(["--history", "study_2023*"]).history_pattern == "study_2023*"
+        assert parser.parser.parse_args(["--compact-db"]).compact_db
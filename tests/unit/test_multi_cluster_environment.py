@@ -0,0 +1,130 @@
+import pytest
+
+from unittest import mock
+
+from antareslauncher.remote_environnement.multi_cluster_environment import (
+    Cluster,
+    MultiClusterEnvironment,
+    UnknownClusterError,
+)
+from antareslauncher.remote_environnement.remote_environment_with_slurm import GetQueueError, RemoteEnvironmentWithSlurm
+from antareslauncher.remote_environnement.slurm_queue import QueueRecord, QueueSnapshot
+from antareslauncher.remote_environnement.slurm_script_features import SlurmScriptFeatures
+from antareslauncher.study_dto import StudyDTO
+
+
+def _create_env(host: str, job_ids=()) -> mock.Mock:
+    env = mock.Mock(spec=RemoteEnvironmentWithSlurm, remote_base_path=f"/home/john/{host}")
+    env.slurm_script_features = SlurmScriptFeatures("launchAntares.sh", partition="", quality_of_service="")
+    env.connection = mock.Mock(host=host, username="john")
+    records = [QueueRecord(job_id=str(job_id), name=f"study_{job_id}", state="RUNNING") for job_id in job_ids]
+    env.get_queue_snapshot.return_value = QueueSnapshot("john", host, records)
+    env.refresh_job_probes.return_value = True
+    return env
+
+
+@pytest.fixture(name="env")
+def env_fixture() -> MultiClusterEnvironment:
+    return MultiClusterEnvironment(
+        [
+            Cluster("", _create_env("main", job_ids=[1001, 1002])),
+            Cluster("cluster_b", _create_env("server_b", job_ids=[1002, 2001])),
+        ]
+    )
+
+
+class TestMultiClusterEnvironment:
+    @pytest.mark.unit_test
+    def test_init__invalid_clusters(self) -> None:
+        with pytest.raises(ValueError):
+            MultiClusterEnvironment([])
+        with pytest.raises(ValueError, match="unique"):
+            MultiClusterEnvironment([Cluster("a", _create_env("a")), Cluster("a", _create_env("b"))])
+
+    @pytest.mark.unit_test
+    def test_study_operations_are_routed_to_the_cluster_of_the_study(self, env: MultiClusterEnvironment) -> None:
+        main_env = env.clusters[""].env
+        env_b = env.clusters["cluster_b"].env
+        study = StudyDTO(path="path/to/study", job_id=2001, cluster="cluster_b")
+
+        env.upload_input_zipfile(study)
+        env.submit_job(study)
+        env.get_job_state_flags(study, attempts=1, sleep_time=0)
+        env.download_logs(study)
+        env.download_final_zip(study)
+        env.clean_remote_server(study)
+
+        env_b.upload_input_zipfile.assert_called_once_with(study)
+        env_b.submit_job.assert_called_once_with(study)
+        env_b.get_job_state_flags.assert_called_once_with(study, attempts=1, sleep_time=0)
+        env_b.download_logs.assert_called_once_with(study)
+        env_b.download_final_zip.assert_called_once_with(study)
+        env_b.clean_remote_server.assert_called_once_with(study)
+        assert not main_env.method_calls
+
+        # the studies without cluster name are on the main cluster
+        env.submit_job(StudyDTO(path="path/to/other_study"))
+        main_env.submit_job.assert_called_once()
+
+        with pytest.raises(UnknownClusterError, match="cluster_z"):
+            env.submit_job(StudyDTO(path="path/to/study", cluster="cluster_z"))
+
+    @pytest.mark.unit_test
+    def test_refresh_job_probes(self, env: MultiClusterEnvironment) -> None:
+        studies = [
+            StudyDTO(path="path/to/study_a", job_id=1001),
+            StudyDTO(path="path/to/study_b", job_id=2001, cluster="cluster_b"),
+        ]
+        env.clusters["cluster_b"].env.refresh_job_probes.return_value = False
+        assert not env.refresh_job_probes(studies)
+        env.clusters[""].env.refresh_job_probes.assert_called_once_with(studies[:1])
+        env.clusters["cluster_b"].env.refresh_job_probes.assert_called_once_with(studies[1:])
+
+    @pytest.mark.unit_test
+    def test_queue_is_merged(self, env: MultiClusterEnvironment) -> None:
+        env.clusters[""].env.count_jobs_in_flight.return_value = 2
+        env.clusters["cluster_b"].env.count_jobs_in_flight.return_value = 3
+        assert env.count_jobs_in_flight() == 5
+        env.clusters["cluster_b"].env.count_jobs_in_flight.return_value = None
+        assert env.count_jobs_in_flight() is None
+
+        snapshot = env.get_queue_snapshot()
+        assert snapshot.host == "main, server_b"
+        assert [r.job_id for r in snapshot] == ["1001", "1002", "1002", "2001"]
+
+    @pytest.mark.unit_test
+    def test_get_queue_snapshot__unavailable_cluster(self, env: MultiClusterEnvironment) -> None:
+        # the queues of the available clusters are read
+        env.clusters["cluster_b"].env.get_queue_snapshot.side_effect = GetQueueError("timeout")
+        snapshot = env.get_queue_snapshot()
+        assert snapshot.host == "main"
+        assert [r.job_id for r in snapshot] == ["1001", "1002"]
+
+        # no cluster is available
+        env.clusters[""].env.get_queue_snapshot.side_effect = GetQueueError("timeout")
+        with pytest.raises(GetQueueError):
+            env.get_queue_snapshot()
+
+    @pytest.mark.unit_test
+    def test_kill_study_jobs__routed_by_cluster(self, env: MultiClusterEnvironment) -> None:
+        # the job 1002 is queued on both clusters: it is only killed on the cluster of the study
+        studies = [
+            StudyDTO(path="path/to/study_a", job_id=1002, cluster="cluster_b"),
+            StudyDTO(path="path/to/study_b", job_id=1001),
+            StudyDTO(path="path/to/study_c", job_id=2001, cluster="cluster_b"),
+        ]
+        env.kill_study_jobs(studies)
+        env.clusters[""].env.kill_study_jobs.assert_called_once_with(studies[1:2])
+        env.clusters["cluster_b"].env.kill_study_jobs.assert_called_once_with([studies[0], studies[2]])
+        env.clusters[""].env.get_queue_snapshot.assert_not_called()
+
+    @pytest.mark.unit_test
+    def test_implements_the_whole_interface(self) -> None:
+        # no inherited method can reach the attributes of a single cluster environment
+        assert not MultiClusterEnvironment.__abstractmethods__
+        assert not isinstance(MultiClusterEnvironment([Cluster("", _create_env("main"))]), RemoteEnvironmentWithSlurm)
+
+    @pytest.mark.unit_test
+    def test_watch_jobs__disabled_with_several_clusters(self, env: MultiClusterEnvironment) -> None:
+        assert list(env.watch_jobs([1001, 2001])) == []
+        env.clusters[""].env.watch_jobs.assert_not_called()
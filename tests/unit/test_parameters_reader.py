@@ -159,3 +159,81 @@ class TestParametersReader:
 
         main_parameters = ParametersReader(json_ssh_conf=ssh_json, yaml_filepath=config_yaml).get_main_parameters()
         assert main_parameters.default_ssh_dict == self.json_dict
+
+    @pytest.mark.unit_test
+    def test_get_main_parameters_reads_clusters(self, tmp_path):
+        ssh_json = tmp_path / "ssh_config_b.json"
+        ssh_json.write_text(json.dumps(self.json_dict))
+        obj = yaml.safe_load(self.yaml_compulsory_content)
+        obj["CLUSTERS"] = [
+            {"NAME": "cluster_b", "SSH_CONFIG_FILE": str(ssh_json), "PARTITION": "big", "MAX_JOBS_IN_FLIGHT": 10},
+            {"NAME": "cluster_c", "SSH_CONFIG_FILE": str(ssh_json), "ANTARES_VERSIONS_ON_REMOTE_SERVER": ["880"]},
+        ]
+        config_yaml = tmp_path / "dummy.yaml"
+        config_yaml.write_text(yaml.dump(obj))
+        empty_json = tmp_path / "dummy.json"
+        empty_json.write_text("{}")
+
+        main_parameters = ParametersReader(empty_json, config_yaml).get_main_parameters()
+
+        cluster_b, cluster_c = main_parameters.clusters
+        assert cluster_b.name == "cluster_b"
+        assert cluster_b.ssh_dict == self.json_dict
+        assert cluster_b.slurm_script_path == self.SLURM_SCRIPT_PATH
+        assert cluster_b.partition == "big"
+        assert cluster_b.max_jobs_in_flight == 10
+        assert cluster_b.antares_versions_on_remote_server == self.ANTARES_SUPPORTED_VERSIONS
+        assert cluster_c.antares_versions_on_remote_server == ["880"]
+
+    @pytest.mark.unit_test
+    def test_get_main_parameters_reads_output_patterns(self, tmp_path):
+        obj = yaml.safe_load(self.yaml_compulsory_content)
+        obj["OUTPUT_INCLUDE"] = ["output/*/mc-all/*"]
+        obj["FULL_RESULTS_RETENTION_DAYS"] = 3
+        config_yaml = tmp_path / "dummy.yaml"
+        config_yaml.write_text(yaml.dump(obj))
+        empty_json = tmp_path / "dummy.json"
+        empty_json.write_text("{}")
+
+        main_parameters = ParametersReader(empty_json, config_yaml).get_main_parameters()
+
+        assert main_parameters.output_include == ["output/*/mc-all/*"]
+        assert main_parameters.output_exclude == []
+        assert main_parameters.full_results_retention_days == 3
+
+    @pytest.mark.unit_test
+    def test_get_main_parameters_reads_db_backend(self, tmp_path):
+        obj = yaml.safe_load(self.yaml_compulsory_content)
+        config_yaml = tmp_path / "dummy.yaml"
+        config_yaml.write_text(yaml.dump(obj))
+        empty_json = tmp_path / "dummy.json"
+        empty_json.write_text("{}")
+        assert ParametersReader(empty_json, config_yaml).get_main_parameters().db_backend == "tinydb"
+
+        obj["DB_BACKEND"] = "sqlite"
+        config_yaml.write_text(yaml.dump(obj))
+        assert ParametersReader(empty_json, config_yaml).get_main_parameters().db_backend == "sqlite"
+
+    @pytest.mark.unit_test
+    def test_get_main_parameters_reads_archive_after_days(self, tmp_path):
+        obj = yaml.safe_load(self.yaml_compulsory_content)
+        config_yaml = tmp_path / "dummy.yaml"
+        config_yaml.write_text(yaml.dump(obj))
+        empty_json = tmp_path / "dummy.json"
+        empty_json.write_text("{}")
+        assert ParametersReader(empty_json, config_yaml).get_main_parameters().archive_after_days == 0
+
+        obj["ARCHIVE_AFTER_DAYS"] = 30
+        config_yaml.write_text(yaml.dump(obj))
+        assert ParametersReader(empty_json, config_yaml).get_main_parameters().archive_after_days == 30
+
+    @pytest.mark.unit_test
+    def test_get_main_parameters_raises_exception_if_cluster_name_is_missing(self, tmp_path):
+        obj = yaml.safe_load(self.yaml_compulsory_content)
+        obj["CLUSTERS"] = [{"SSH_CONFIG_FILE": "ssh_config_b.json"}]
+        config_yaml = tmp_path / "dummy.yaml"
+        config_yaml.write_text(yaml.dump(obj))
+        empty_json = tmp_path / "dummy.json"
+        empty_json.write_text("{}")
+        with pytest.raises(MissingValueException, match="NAME"):
+            ParametersReader(empty_json, config_yaml)
@@ -1,12 +1,17 @@
 import pytest
 
 import getpass
+import io
+import json
+import os
 import re
 import shlex
 import socket
+import zipfile
+import zlib
 
 from pathlib import Path, PurePosixPath
-from typing import List
+from typing import Iterator, List, Tuple
 from unittest import mock
 from unittest.mock import call
 
@@ -14,13 +19,20 @@ from antares.study.version import StudyVersion
 
 from antareslauncher.remote_environnement.remote_environment_with_slurm import (
     GetJobStateError,
+    GetQueueError,
     KillJobError,
     NoLaunchScriptFoundError,
     NoRemoteBaseDirError,
     RemoteEnvironmentWithSlurm,
+    RemoteResultsError,
     SubmitJobError,
+    SubmitLimitReachedError,
     _execute_with_retry,
+    _parse_slurm_duration,
+    _parse_slurm_memory,
 )
+from antareslauncher.remote_environnement.remote_probe import JobTransition
+from antareslauncher.remote_environnement.slurm_queue import SQUEUE_FORMAT, CpuCounts
 from antareslauncher.remote_environnement.slurm_script_features import ScriptParametersDTO, SlurmScriptFeatures
 from antareslauncher.remote_environnement.ssh_connection import SshConnection
 from antareslauncher.study_dto import Modes, StudyDTO
@@ -68,6 +80,84 @@ def test_retry_command_execution_fail_after_retry():
     assert connection.execute_command.call_count == 2
 
 
+# noinspection SpellCheckingInspection
+def sacct_command(job_id: int) -> str:
+    args = [
+        "sacct",
+        f"--jobs={job_id}",
+        "--format=JobID,JobName,State,Elapsed,TotalCPU,MaxRSS,AllocCPUS,Submit,Start,End,ExitCode,NodeList",
+        "--parsable2",
+        "--delimiter=,",
+        "--noheader",
+    ]
+    return " ".join(shlex.quote(arg) for arg in args)
+
+
+# noinspection SpellCheckingInspection
+def sacct_output(job_id: int, job_name: str, state: str) -> str:
+    return "\n".join(
+        [
+            f"{job_id},{job_name},{state},01:02:03,1-00:00:30,,4,2023-04-01T12:00:00,2023-04-01T12:05:00,"
+            f"2023-04-01T13:07:03,0:0,node[01-02]",
+            f"{job_id}.batch,batch,{state},01:02:03,1-00:00:30,1536M,4,2023-04-01T12:05:00,2023-04-01T12:05:00,"
+            f"2023-04-01T13:07:03,0:0,node01",
+            f"{job_id}.extern,extern,{state},01:02:03,00:00:00,1024K,4,2023-04-01T12:05:00,2023-04-01T12:05:00,"
+            f"2023-04-01T13:07:03,0:0,node[01-02]",
+        ]
+    )
+
+
+@pytest.mark.unit_test
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("", 0),
+        ("00:00:00", 0),
+        ("01:02.500", 62.5),
+        ("12:34:56", 45296),
+        ("2-01:00:00", 176400),
+        ("INVALID", 0),
+    ],
+)
+def test_parse_slurm_duration(value: str, expected: float):
+    assert _parse_slurm_duration(value) == expected
+
+
+@pytest.mark.unit_test
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("", 0),
+        ("0", 0),
+        ("1024", 1024),
+        ("12K", 12 * 1024),
+        ("1.5G", int(1.5 * 1024**3)),
+        ("16m", 16 * 1024**2),
+        ("INVALID", 0),
+    ],
+)
+def test_parse_slurm_memory(value: str, expected: int):
+    assert _parse_slurm_memory(value) == expected
+
+
+class _SftpFile(io.FileIO):
+    """Local file with the `readv` method of an SFTP file, which records the reads"""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path, mode="rb")
+        self.read_offsets: List[int] = []
+        self.readv_calls: List[List[Tuple[int, int]]] = []
+
+    def read(self, size: int = -1) -> bytes:
+        self.read_offsets.append(self.tell())
+        return super().read(size)
+
+    def readv(self, chunks: List[Tuple[int, int]]) -> Iterator[bytes]:
+        self.readv_calls.append(list(chunks))
+        for offset, size in chunks:
+            yield os.pread(self.fileno(), size, offset)
+
+
 class TestRemoteEnvironmentWithSlurm:
     """
     Review all the tests for the Class RemoteEnvironmentWithSlurm
@@ -192,6 +282,7 @@ class TestRemoteEnvironmentWithSlurm:
         with pytest.raises(NoLaunchScriptFoundError):
             RemoteEnvironmentWithSlurm(connection, slurm_script_features)
 
+    # noinspection SpellCheckingInspection
     @pytest.mark.unit_test
     def test_get_queue_info_calls_connection_execute_command_with_correct_argument(self, remote_env):
         # given
@@ -199,14 +290,23 @@ class TestRemoteEnvironmentWithSlurm:
         host = "host"
         remote_env.connection.username = username
         remote_env.connection.host = host
-        command = f"squeue -u {username} --Format=name:40,state:12,starttime:22,TimeUsed:12,timelimit:12"
-        output = "output"
+        output = "4242|RUNNING|None|2024-01-01T10:00:00|1:02:03|2:00:00|compute|12|normal|study_foo\n"
         error = None
         # when
         remote_env.connection.execute_command = mock.Mock(return_value=(output, error))
         # then
-        assert remote_env.get_queue_info() == f"{username}@{host}\n{output}"
-        remote_env.connection.execute_command.assert_called_with(command)
+        queue_info = remote_env.get_queue_info()
+        assert queue_info.startswith(f"{username}@{host}\n")
+        assert "4242" in queue_info
+        assert "study_foo" in queue_info
+        command = remote_env.connection.execute_command.call_args[0][0]
+        assert shlex.split(command) == [
+            "squeue",
+            "--noheader",
+            f"--user={username}",
+            "--states=all",
+            f"--format={SQUEUE_FORMAT}",
+        ]
 
     @pytest.mark.unit_test
     def test_when_connection_exec_command_has_an_error_then_get_queue_info_returns_the_error_string(self, remote_env):
@@ -218,7 +318,33 @@ class TestRemoteEnvironmentWithSlurm:
         error = "error"
         remote_env.connection.execute_command = mock.Mock(return_value=(output, error))
         # then
-        assert remote_env.get_queue_info() == "error"
+        queue_info = remote_env.get_queue_info()
+        assert queue_info.startswith("Unable to read the SLURM queue")
+        assert queue_info.endswith("error")
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    def test_get_queue_snapshot__cached(self, remote_env):
+        remote_env.connection.username = "john"
+        output = "1001|PENDING|Priority|N/A|0:00|1:00:00|compute|4|normal|study_a\n"
+        remote_env.connection.execute_command = mock.Mock(return_value=(output, ""))
+        snapshot = remote_env.get_queue_snapshot()
+        assert [r.job_id for r in snapshot] == ["1001"]
+        assert snapshot.get(1001).reason == "Priority"
+        # the snapshot is shared until it expires...
+        assert remote_env.get_queue_snapshot() is snapshot
+        assert remote_env.connection.execute_command.call_count == 1
+        # ...or until it is refreshed
+        assert remote_env.refresh_queue_snapshot()
+        assert remote_env.connection.execute_command.call_count == 2
+        # a submission or a cancellation invalidates it
+        remote_env.kill_remote_job(1001)
+        assert remote_env.get_queue_snapshot() is not snapshot
+
+        remote_env.connection.execute_command = mock.Mock(return_value=(None, "squeue: error"))
+        with pytest.raises(GetQueueError):
+            remote_env.get_queue_snapshot(max_age=0)
+        assert not remote_env.refresh_queue_snapshot()
 
     # noinspection SpellCheckingInspection
     @pytest.mark.unit_test
@@ -231,6 +357,20 @@ class TestRemoteEnvironmentWithSlurm:
         remote_env.kill_remote_job(job_id)
         remote_env.connection.execute_command.assert_called_with(command)
 
+    @pytest.mark.unit_test
+    def test_kill_remote_jobs_execute_a_single_scancel_command(self, remote_env):
+        remote_env.connection.execute_command = mock.Mock(return_value=(None, None))
+        remote_env.kill_remote_jobs([42, 43, 44])
+        remote_env.connection.execute_command.assert_called_once_with("scancel 42 43 44")
+
+        remote_env.connection.execute_command.reset_mock()
+        remote_env.kill_remote_jobs([])
+        remote_env.connection.execute_command.assert_not_called()
+
+        remote_env.connection.execute_command = mock.Mock(return_value=(None, "error"))
+        with pytest.raises(KillJobError, match="42, 43"):
+            remote_env.kill_remote_jobs([42, 43])
+
     @pytest.mark.unit_test
     def test_when_kill_remote_job_is_called_and_exec_command_returns_error_exception_is_raised(self, remote_env):
         # when
@@ -264,6 +404,71 @@ class TestRemoteEnvironmentWithSlurm:
         command = remote_env.slurm_script_features.compose_launch_command(remote_env.remote_base_path, script_params)
         remote_env.connection.execute_command.assert_called_once_with(command)
 
+    @pytest.mark.unit_test
+    def test_submit_job__submit_limit_reached(self, remote_env, study):
+        error = (
+            "sbatch: error: QOSMaxSubmitJobPerUserLimit\n"
+            "sbatch: error: Batch job submission failed: Job violates accounting/QOS policy"
+            " (job submit limit, user's size and/or time limits)"
+        )
+        remote_env.connection.execute_command = mock.Mock(return_value=("", error))
+        with pytest.raises(SubmitLimitReachedError):
+            remote_env.submit_job(study)
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    def test_count_jobs_in_flight(self, remote_env):
+        remote_env.connection.username = "john"
+        output = (
+            "1001|RUNNING|None|2024-01-01T10:00:00|1:00|1:00:00|fake_partition|4|user1_qos|study_a\n"
+            "1002|PENDING|Priority|N/A|0:00|1:00:00|fake_partition|4|user1_qos|study_b\n"
+            "1003|COMPLETING|None|2024-01-01T09:00:00|59:00|1:00:00|fake_partition|4|user1_qos|study_c\n"
+            "1004|COMPLETED|None|2024-01-01T08:00:00|10:00|1:00:00|fake_partition|4|user1_qos|study_d\n"
+            "1005|RUNNING|None|2024-01-01T10:00:00|1:00|1:00:00|other_partition|4|user1_qos|study_e\n"
+            "1006|RUNNING|None|2024-01-01T10:00:00|1:00|1:00:00|fake_partition|4|other_qos|study_f\n"
+        )
+        remote_env.connection.execute_command = mock.Mock(return_value=(output, ""))
+        assert remote_env.count_jobs_in_flight() == 3
+
+        remote_env.clear_queue_snapshot()
+        remote_env.connection.execute_command = mock.Mock(return_value=(None, "squeue: error"))
+        assert remote_env.count_jobs_in_flight() is None
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize(
+        "assoc_output, qos_output, expected",
+        [
+            pytest.param("\n", "\n", None, id="no-limit"),
+            pytest.param("100\n", "\n", 100, id="assoc-limit"),
+            pytest.param("\n", "20\n", 20, id="qos-limit"),
+            pytest.param("100\n", "20\n", 20, id="lowest-limit"),
+        ],
+    )
+    def test_get_submit_limit(self, remote_env, assoc_output, qos_output, expected):
+        remote_env.connection.username = "john"
+        commands = {
+            "sacctmgr --noheader --parsable2 show assoc user=john partition=fake_partition format=MaxSubmit": (
+                assoc_output
+            ),
+            "sacctmgr --noheader --parsable2 show qos user1_qos format=MaxSubmitPU": qos_output,
+        }
+        remote_env.connection.execute_command = mock.Mock(side_effect=lambda cmd: (commands[cmd], ""))
+        assert remote_env.get_submit_limit() == expected
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    def test_get_cpu_counts(self, remote_env):
+        remote_env.connection.execute_command = mock.Mock(return_value=("120/24/8/152\n", ""))
+        counts = remote_env.get_cpu_counts()
+        remote_env.connection.execute_command.assert_called_once_with(
+            "sinfo --noheader --format=%C --partition=fake_partition"
+        )
+        assert counts == CpuCounts(allocated=120, idle=24, other=8, total=152)
+
+        remote_env.connection.execute_command = mock.Mock(return_value=(None, "sinfo: error"))
+        assert remote_env.get_cpu_counts() is None
+
     @pytest.mark.unit_test
     def test_when_submit_job_is_called_and_receives_submitted_420_returns_job_id_420(self, remote_env, study):
         # when
@@ -315,23 +520,14 @@ class TestRemoteEnvironmentWithSlurm:
     def test_get_job_state_flags__scontrol_dead_job(self, remote_env, study):
         study.job_id = 42
         job_state = "RUNNING"
-        args = [
-            "sacct",
-            f"--jobs={study.job_id}",
-            f"--name={study.name}",
-            "--format=JobID,JobName,State",
-            "--parsable2",
-            "--delimiter=,",
-            "--noheader",
-        ]
-        command = " ".join(shlex.quote(arg) for arg in args)
+        command = sacct_command(study.job_id)
 
         # noinspection SpellCheckingInspection
         def execute_command_mock(cmd: str):
             if cmd == f"scontrol show job {study.job_id}":
                 return "", "Invalid job id specified"
             if cmd == command:
-                return f"{study.job_id},{study.name},{job_state}", None
+                return sacct_output(study.job_id, study.name, job_state), None
             assert False, f"Unknown command: {cmd}"
 
         remote_env.connection.execute_command = execute_command_mock
@@ -363,18 +559,9 @@ class TestRemoteEnvironmentWithSlurm:
     @pytest.mark.unit_test
     def test_get_job_state_flags__sacct_bad_output(self, remote_env, study):
         study.job_id = 42
-        args = [
-            "sacct",
-            f"--jobs={study.job_id}",
-            f"--name={study.name}",
-            "--format=JobID,JobName,State",
-            "--parsable2",
-            "--delimiter=,",
-            "--noheader",
-        ]
-        command = " ".join(shlex.quote(arg) for arg in args)
+        command = sacct_command(study.job_id)
 
-        # the output of `sacct` is not: JobID,JobName,State
+        # the output of `sacct` is not: JobID,JobName,State,Elapsed,...
         output = "the sun is shining"
 
         # noinspection SpellCheckingInspection
@@ -395,16 +582,7 @@ class TestRemoteEnvironmentWithSlurm:
     @pytest.mark.unit_test
     def test_get_job_state_flags__sacct_call_fails(self, remote_env, study):
         study.job_id = 42
-        args = [
-            "sacct",
-            f"--jobs={study.job_id}",
-            f"--name={study.name}",
-            "--format=JobID,JobName,State",
-            "--parsable2",
-            "--delimiter=,",
-            "--noheader",
-        ]
-        command = " ".join(shlex.quote(arg) for arg in args)
+        command = sacct_command(study.job_id)
 
         # noinspection SpellCheckingInspection
         def execute_command_mock(cmd: str):
@@ -467,24 +645,15 @@ class TestRemoteEnvironmentWithSlurm:
         for a SLURM job in a specific state.
         """
         study.job_id = 42
-        args = [
-            "sacct",
-            f"--jobs={study.job_id}",
-            f"--name={study.name}",
-            "--format=JobID,JobName,State",
-            "--parsable2",
-            "--delimiter=,",
-            "--noheader",
-        ]
-        command = " ".join(shlex.quote(arg) for arg in args)
+        command = sacct_command(study.job_id)
 
         # noinspection SpellCheckingInspection
         def execute_command_mock(cmd: str):
             if cmd == f"scontrol show job {study.job_id}":
                 return "", "Invalid job id specified"
             if cmd == command:
-                # the output of `sacct` should be: JobID,JobName,State
-                output = f"{study.job_id},{study.name},{state}" if state else ""
+                # the output of `sacct` should be: JobID,JobName,State,Elapsed,...
+                output = sacct_output(study.job_id, study.name, state) if state else ""
                 return output, None
             assert False, f"Unknown command: {cmd}"
 
@@ -492,6 +661,202 @@ class TestRemoteEnvironmentWithSlurm:
 
         actual = remote_env.get_job_state_flags(study)
         assert actual == expected
+        assert study.slurm_state == (state.split()[0] if state else "")
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    def test_get_job_state_flags__sacct_accounting(self, remote_env, study):
+        """
+        Check that the accounting of a finished job is read from the `sacct` output
+        and stored in the study, the peak memory being read from the job steps.
+        """
+        study.job_id = 42
+        command = sacct_command(study.job_id)
+
+        # noinspection SpellCheckingInspection
+        def execute_command_mock(cmd: str):
+            if cmd == f"scontrol show job {study.job_id}":
+                return "", "Invalid job id specified"
+            if cmd == command:
+                return sacct_output(study.job_id, study.name, "COMPLETED"), None
+            assert False, f"Unknown command: {cmd}"
+
+        remote_env.connection.execute_command = execute_command_mock
+
+        actual = remote_env.get_job_state_flags(study)
+        assert actual == (True, True, False)
+        assert study.submit_time == "2023-04-01T12:00:00"
+        assert study.start_time == "2023-04-01T12:05:00"
+        assert study.end_time == "2023-04-01T13:07:03"
+        assert study.elapsed == 3723
+        assert study.total_cpu == 86430
+        assert study.max_rss == 1536 * 1024**2
+        assert study.alloc_cpus == 4
+        assert study.exit_code == "0:0"
+        assert study.node_list == "node[01-02]"
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    def test_get_job_state_flags__scontrol_finished_job_accounting(self, remote_env, study):
+        """
+        When `scontrol` reports a finished job, the accounting is harvested only once with `sacct`.
+        """
+        study.job_id = 42
+        command = sacct_command(study.job_id)
+
+        # noinspection SpellCheckingInspection
+        def execute_command_mock(cmd: str):
+            if cmd == f"scontrol show job {study.job_id}":
+                return "JobId=42 JobState=COMPLETED Reason=None", None
+            if cmd == command:
+                return sacct_output(study.job_id, study.name, "COMPLETED"), None
+            assert False, f"Unknown command: {cmd}"
+
+        remote_env.connection.execute_command = mock.Mock(side_effect=execute_command_mock)
+
+        assert remote_env.get_job_state_flags(study) == (True, True, False)
+        assert study.elapsed == 3723
+        assert remote_env.connection.execute_command.call_count == 2
+
+        # the accounting is already known: `sacct` is not called again
+        assert remote_env.get_job_state_flags(study) == (True, True, False)
+        assert remote_env.connection.execute_command.call_count == 3
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    def test_get_job_state_flags__queue_snapshot(self, remote_env, study):
+        """
+        When a fresh queue snapshot is cached, the job states are read from it without `scontrol`,
+        and the jobs which left the queue are read from the SACCT database.
+        """
+        study.job_id = 42
+        other_study = StudyDTO(path="path/to/other", job_id=43)
+        command = sacct_command(other_study.job_id)
+        squeue_output = "42|RUNNING|None|2024-01-01T10:00:00|1:00|1:00:00|fake_partition|4|user1_qos|foo\n"
+
+        # noinspection SpellCheckingInspection
+        def execute_command_mock(cmd: str):
+            if cmd.startswith("squeue "):
+                return squeue_output, None
+            if cmd == command:
+                return sacct_output(other_study.job_id, other_study.name, "COMPLETED"), None
+            assert False, f"Unknown command: {cmd}"
+
+        remote_env.connection.username = "john"
+        remote_env.connection.execute_command = mock.Mock(side_effect=execute_command_mock)
+        assert remote_env.refresh_queue_snapshot()
+
+        assert remote_env.get_job_state_flags(study) == (True, False, False)
+        assert remote_env.get_job_state_flags(other_study) == (True, True, False)
+        assert other_study.elapsed == 3723
+        assert remote_env.connection.execute_command.call_count == 2
+
+    # noinspection SpellCheckingInspection
+    @pytest.mark.unit_test
+    def test_refresh_job_probes(self, remote_env, study):
+        """
+        The state of the jobs and the presence of their files are probed
+        with a single command, then no other command is needed.
+        """
+        study.job_id = 42
+        other_study = StudyDTO(path="path/to/other", job_id=43)
+        done_study = StudyDTO(path="path/to/done", job_id=44, done=True)
+        probe_output = {
+            "version": "1.0.0",
+            "errors": [],
+            "sacct": sacct_output(study.job_id, study.name, "COMPLETED"),
+            "jobs": {
+                "42": {"state": None, "logs": {"antares-out-42.txt": 12}, "results": {}},
+                "43": {"state": "RUNNING", "logs": {}, "results": {}},
+            },
+        }
+        remote_env.connection.check_file_not_empty = mock.Mock(return_value=False)
+        remote_env.connection.upload_file = mock.Mock(return_value=True)
+        remote_env.connection.execute_command = mock.Mock(return_value=(json.dumps(probe_output), ""))
+        remote_env.connection.download_files = mock.Mock(return_value=[])
+
+        assert remote_env.refresh_job_probes([study, other_study, done_study]) is True
+
+        # the probe script is uploaded once
+        remote_env.connection.upload_file.assert_called_once_with(mock.ANY, remote_env.probe_script_path)
+        command = remote_env.connection.execute_command.call_args[0][0]
+        assert shlex.split(command) == [
+            "python3",
+            remote_env.probe_script_path,
+            remote_env.remote_base_path,
+            "42",
+            "43",
+        ]
+
+        assert remote_env.get_job_state_flags(study) == (True, True, False)
+        assert study.elapsed == 3723
+        assert remote_env.get_job_state_flags(other_study) == (True, False, False)
+        assert remote_env.download_final_zip(other_study) is None
+        assert remote_env.download_logs(other_study) == []
+        remote_env.download_logs(study)
+        remote_env.connection.execute_command.assert_called_once()
+        remote_env.connection.download_files.assert_called_once()
+
+        # once cleared, the remote server is queried for each study
+        remote_env.clear_job_probes()
+        remote_env.connection.execute_command.return_value = ("JobId=43 JobState=COMPLETED Reason=None", "")
+        remote_env.get_job_state_flags(other_study)
+        remote_env.connection.execute_command.assert_any_call("scontrol show job 43")
+
+    @pytest.mark.unit_test
+    def test_watch_jobs(self, remote_env):
+        remote_env.connection.check_file_not_empty = mock.Mock(return_value=True)
+        lines = [
+            '{"job_id": 42, "state": "RUNNING", "final": false}',
+            '{"heartbeat": 1680000000.0}',
+            '{"error": "squeue: error: slurm_load_jobs"}',
+            '{"job_id": 42, "state": "COMPLETED", "final": true}',
+        ]
+        remote_env.connection.stream_command = mock.Mock(return_value=iter(lines))
+
+        actual = list(remote_env.watch_jobs([42, 42], interval=5, heartbeat=60))
+
+        assert actual == [
+            JobTransition(job_id=42, state="RUNNING", final=False),
+            JobTransition(job_id=42, state="COMPLETED", final=True),
+        ]
+        command = remote_env.connection.stream_command.call_args[0][0]
+        assert shlex.split(command) == [
+            "python3",
+            remote_env.probe_script_path,
+            "--watch=5",
+            "--heartbeat=60",
+            "--max-duration=86400",
+            remote_env.remote_base_path,
+            "42",
+        ]
+        assert remote_env.connection.stream_command.call_args[1] == {"timeout": 185}
+
+    @pytest.mark.unit_test
+    def test_watch_jobs__no_job(self, remote_env):
+        assert list(remote_env.watch_jobs([])) == []
+        remote_env.connection.stream_command.assert_not_called()
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize(
+        "output, error",
+        [
+            pytest.param(None, "python3: command not found", id="command-failed"),
+            pytest.param("Traceback (most recent call last):", "", id="non-parsable"),
+            pytest.param('{"errors": ["squeue: error"], "jobs": {}}', "", id="probe-errors"),
+        ],
+    )
+    def test_refresh_job_probes__failure(self, remote_env, study, output, error):
+        study.job_id = 42
+        remote_env.connection.check_file_not_empty = mock.Mock(return_value=True)
+        remote_env.connection.execute_command = mock.Mock(return_value=(output, error))
+        assert remote_env.refresh_job_probes([study]) is False
+        remote_env.connection.upload_file.assert_not_called()
+
+        # the state is retrieved with `scontrol`
+        remote_env.connection.execute_command = mock.Mock(return_value=("JobId=42 JobState=RUNNING", ""))
+        assert remote_env.get_job_state_flags(study) == (True, False, False)
+        remote_env.connection.execute_command.assert_called_once_with("scontrol show job 42")
 
     @pytest.mark.unit_test
     @pytest.mark.parametrize(
@@ -606,6 +971,81 @@ class TestRemoteEnvironmentWithSlurm:
         expected = tmp_path.joinpath(downloaded_file) if downloaded_file else None
         assert actual == expected
 
+    @pytest.mark.unit_test
+    def test_read_result_manifest__and_fetch_result_files(self, remote_env, study, tmp_path):
+        # given: a final ZIP file "on the remote server", read with random access
+        study.job_id = 999999999
+        zip_path = tmp_path.joinpath("remote.zip")
+        with zipfile.ZipFile(zip_path, mode="w") as zf:
+            zf.writestr("study/output/", "")
+            zf.writestr("study/output/economy/values-annual.txt", "annual values")
+            zf.writestr("study/output/simulation.log", "log")
+        remote_env.connection.check_file_not_empty = mock.Mock(return_value=True)
+        remote_env.connection.open_remote_file = mock.Mock(side_effect=lambda _: zip_path.open("rb"))
+
+        # when
+        manifest = remote_env.read_result_manifest(study)
+
+        # then: the directories are ignored
+        remote_zip = f"{remote_env.remote_base_path}/finished_{study.name}_{study.job_id}.zip"
+        remote_env.connection.open_remote_file.assert_called_once_with(remote_zip)
+        assert study.remote_final_zipfile_path == remote_zip
+        assert manifest == [
+            {"path": "study/output/economy/values-annual.txt", "size": 13, "crc32": zlib.crc32(b"annual values")},
+            {"path": "study/output/simulation.log", "size": 3, "crc32": zlib.crc32(b"log")},
+        ]
+
+        # when: only some files are fetched
+        dst_dir = tmp_path.joinpath("cache")
+        actual = remote_env.fetch_result_files(study, ["study/output/simulation.log"], dst_dir)
+
+        # then
+        assert actual == [dst_dir.joinpath("study/output/simulation.log")]
+        assert actual[0].read_text() == "log"
+        assert not dst_dir.joinpath("study/output/economy").exists()
+
+    @pytest.mark.unit_test
+    def test_fetch_result_files__members_prefetched(self, remote_env, study, tmp_path):
+        # given: a final ZIP file "on the remote server", read with SFTP
+        zip_path = tmp_path.joinpath("remote.zip")
+        contents = {f"study/output/file_{i}.txt": os.urandom(100_000) for i in range(4)}
+        with zipfile.ZipFile(zip_path, mode="w") as zf:
+            for name, content in contents.items():
+                zf.writestr(name, content)
+        with zipfile.ZipFile(zip_path) as zf:
+            offsets = [info.header_offset for info in zf.infolist()]
+        remote_files: List[_SftpFile] = []
+        remote_env.connection.open_remote_file = mock.Mock(
+            side_effect=lambda _: remote_files.append(_SftpFile(zip_path)) or remote_files[-1]
+        )
+        study.remote_final_zipfile_path = "/remote/finished.zip"
+
+        # when
+        paths = ["study/output/file_1.txt", "study/output/file_3.txt"]
+        actual = remote_env.fetch_result_files(study, paths, tmp_path.joinpath("cache"))
+
+        # then: the members are read with a single pipelined request, and not block by block
+        assert [path.read_bytes() for path in actual] == [contents[path] for path in paths]
+        (remote_file,) = remote_files
+        (ranges,) = remote_file.readv_calls
+        assert [offset for offset, _ in ranges] == [offsets[1], offsets[3]]
+        assert ranges[0][1] == offsets[2] - offsets[1]
+        assert not [offset for offset in remote_file.read_offsets if offset < offsets[-1] + 100_000]
+
+    @pytest.mark.unit_test
+    def test_read_result_manifest__errors(self, remote_env, study, tmp_path):
+        remote_env.connection.check_file_not_empty = mock.Mock(return_value=False)
+        assert remote_env.read_result_manifest(study) is None
+        assert not study.remote_final_zipfile_path
+
+        # the final ZIP file is corrupted
+        zip_path = tmp_path.joinpath("remote.zip")
+        zip_path.write_bytes(b"not a ZIP file")
+        remote_env.connection.check_file_not_empty = mock.Mock(return_value=True)
+        remote_env.connection.open_remote_file = mock.Mock(side_effect=lambda _: zip_path.open("rb"))
+        with pytest.raises(RemoteResultsError):
+            remote_env.read_result_manifest(study)
+
     @pytest.mark.unit_test
     def test_given_a_study_with_input_zipfile_removed_when_remove_input_zipfile_then_return_true(
         self, remote_env, study
@@ -790,3 +1230,31 @@ class TestRemoteEnvironmentWithSlurm:
         reference_command = f"{change_dir} && {reference_submit_command}"
         assert command.split() == reference_command.split()
         assert command == reference_command
+
+        # the input hash, if any, is passed after the other options
+        script_params.input_hash = "0123abcd"
+        command = remote_env.compose_launch_command(script_params)
+        assert command == f"{reference_command} 0123abcd"
+
+        # then the output patterns and the retention time of the full results
+        script_params.input_hash = ""
+        script_params.output_include = ["output/*/mc-all/*", "output/*/*-annual.txt"]
+        command = remote_env.compose_launch_command(script_params)
+        assert command == f"{reference_command} '' 'output/*/mc-all/*,output/*/*-annual.txt' '' 7"
+
+    @pytest.mark.unit_test
+    def test_compose_launch_command__memory_limit(self, remote_env, study):
+        script_params = ScriptParametersDTO(
+            study_dir_name=Path(study.path).name,
+            input_zipfile_name=Path(study.zipfile_path).name,
+            time_limit=60,
+            n_cpu=4,
+            antares_version=study.antares_version,
+            run_mode=Modes.antares,
+            post_processing=False,
+            other_options="",
+            oversubscribe=False,
+            memory_limit=2048,
+        )
+        command = remote_env.compose_launch_command(script_params)
+        assert " --cpus-per-task=4 --mem=2048M " in command
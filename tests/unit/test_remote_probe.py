@@ -0,0 +1,139 @@
+import pytest
+
+import json
+import subprocess
+import sys
+
+from pathlib import Path
+
+from antareslauncher.remote_environnement.remote_environment_with_slurm import SACCT_FIELDS
+from antareslauncher.remote_environnement.remote_probe import (
+    PROBE_SCRIPT_NAME,
+    PROBE_SCRIPT_VERSION,
+    JobTransition,
+    parse_probe_output,
+    parse_watch_line,
+    render_probe_script,
+)
+
+FAKE_SQUEUE = """\
+#!/bin/sh
+echo "1001|RUNNING"
+echo "9999|PENDING"
+"""
+
+FAKE_SACCT = """\
+#!/bin/sh
+echo "$@" > "$(dirname "$0")/sacct_args.txt"
+echo "1002,my_study,COMPLETED,00:01:00,00:02:00,,2,2023-04-01T00:00:00,2023-04-01T00:00:01,2023-04-01T00:01:01,0:0,n1"
+"""
+
+
+@pytest.mark.unit_test
+def test_probe_script_name_is_versioned():
+    assert PROBE_SCRIPT_VERSION in PROBE_SCRIPT_NAME
+    script = render_probe_script(SACCT_FIELDS)
+    assert f'VERSION = "{PROBE_SCRIPT_VERSION}"' in script
+    assert ",".join(SACCT_FIELDS) in script
+    compile(script, PROBE_SCRIPT_NAME, "exec")
+
+
+@pytest.mark.unit_test
+@pytest.mark.skipif(sys.platform == "win32", reason="requires a POSIX shell")
+def test_probe_script_execution(tmp_path: Path):
+    # fake SLURM commands
+    bin_dir = tmp_path.joinpath("bin")
+    bin_dir.mkdir()
+    for name, content in [("squeue", FAKE_SQUEUE), ("sacct", FAKE_SACCT)]:
+        path = bin_dir.joinpath(name)
+        path.write_text(content, encoding="utf-8")
+        path.chmod(0o755)
+
+    # remote base directory
+    base_dir = tmp_path.joinpath("REMOTE")
+    base_dir.mkdir()
+    base_dir.joinpath("my_study_1002.zip").write_bytes(b"input")
+    base_dir.joinpath("finished_my_study_1002.zip").write_bytes(b"results")
+    base_dir.joinpath("antares-out-my_study-1002.txt").write_bytes(b"log")
+    base_dir.joinpath("antares-err-my_study-1002.txt").write_bytes(b"")
+
+    script_path = tmp_path.joinpath(PROBE_SCRIPT_NAME)
+    script_path.write_text(render_probe_script(SACCT_FIELDS), encoding="utf-8")
+    env = {"PATH": f"{bin_dir}:/usr/bin:/bin", "USER": "john"}
+    args = [sys.executable, str(script_path), str(base_dir), "1001", "1002"]
+    output = subprocess.run(args, env=env, check=True, capture_output=True, text=True).stdout
+
+    obj = json.loads(output)
+    assert obj["version"] == PROBE_SCRIPT_VERSION
+    assert bin_dir.joinpath("sacct_args.txt").read_text().startswith("--jobs=1001,1002 --format=JobID,")
+
+    probes, errors = parse_probe_output(output)
+    assert errors == []
+    assert set(probes) == {1001, 1002}
+    assert probes[1001].squeue_state == "RUNNING"
+    assert probes[1001].log_files == {}
+    assert probes[1001].result_files == {}
+    assert probes[1002].squeue_state is None
+    assert probes[1002].sacct_output.startswith("1002,my_study,COMPLETED,")
+    assert probes[1002].log_files == {"antares-out-my_study-1002.txt": 3, "antares-err-my_study-1002.txt": 0}
+    assert probes[1002].result_files == {"finished_my_study_1002.zip": 7}
+
+
+@pytest.mark.unit_test
+def test_parse_probe_output__invalid():
+    with pytest.raises(ValueError):
+        parse_probe_output("Traceback (most recent call last):")
+    with pytest.raises(ValueError):
+        parse_probe_output('{"version": "1.0.0"}')
+
+
+FAKE_SQUEUE_WATCH = """\
+#!/bin/sh
+# the job 1001 is pending, then running, then leaves the queue
+count_file="$(dirname "$0")/count.txt"
+count=$(cat "$count_file" 2>/dev/null || echo 0)
+echo $((count + 1)) > "$count_file"
+case $count in
+  0) echo "1001|PENDING" ;;
+  1|2) echo "1001|RUNNING" ;;
+esac
+echo "1002|COMPLETED"
+"""
+
+FAKE_SACCT_WATCH = """\
+#!/bin/sh
+echo "1001|CANCELLED by 12345"
+"""
+
+
+@pytest.mark.unit_test
+@pytest.mark.skipif(sys.platform == "win32", reason="requires a POSIX shell")
+def test_probe_script_watch_mode(tmp_path: Path):
+    bin_dir = tmp_path.joinpath("bin")
+    bin_dir.mkdir()
+    for name, content in [("squeue", FAKE_SQUEUE_WATCH), ("sacct", FAKE_SACCT_WATCH)]:
+        path = bin_dir.joinpath(name)
+        path.write_text(content, encoding="utf-8")
+        path.chmod(0o755)
+
+    script_path = tmp_path.joinpath(PROBE_SCRIPT_NAME)
+    script_path.write_text(render_probe_script(SACCT_FIELDS, ["CANCELLED", "COMPLETED"]), encoding="utf-8")
+    env = {"PATH": f"{bin_dir}:/usr/bin:/bin", "USER": "john"}
+    args = [sys.executable, str(script_path), "--watch=0.01", str(tmp_path), "1001", "1002"]
+    output = subprocess.run(args, env=env, check=True, capture_output=True, text=True, timeout=30).stdout
+
+    transitions = [parse_watch_line(line) for line in output.splitlines()]
+    assert transitions == [
+        JobTransition(job_id=1001, state="PENDING", final=False),
+        JobTransition(job_id=1002, state="COMPLETED", final=True),
+        JobTransition(job_id=1001, state="RUNNING", final=False),
+        JobTransition(job_id=1001, state="CANCELLED", final=True),
+    ]
+
+
+@pytest.mark.unit_test
+def test_parse_watch_line():
+    assert parse_watch_line('{"job_id": 42, "state": "RUNNING", "final": false}') == JobTransition(42, "RUNNING", False)
+    assert parse_watch_line('{"job_id": 42, "state": null, "final": true}') == JobTransition(42, None, True)
+    assert parse_watch_line('{"heartbeat": 1680000000.0}') is None
+    assert parse_watch_line("Traceback (most recent call last):") is None
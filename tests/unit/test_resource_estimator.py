@@ -0,0 +1,105 @@
+import pytest
+
+from pathlib import Path
+
+from antareslauncher.study_dto import Modes, StudyDTO
+from antareslauncher.use_cases.create_list.resource_estimator import (
+    MIB,
+    MIN_TIME_LIMIT,
+    ResourceEstimator,
+    get_study_input_size,
+    get_study_nb_years,
+)
+from antareslauncher.use_cases.create_list.study_list_composer import StudyListComposer
+
+GENERAL_DATA_INI = """\
+[general]
+mode = Economy
+horizon = 2030
+nbyears = 8
+"""
+
+
+def _past_study(name: str, input_size: int, elapsed: int, max_rss: int, **kwargs) -> StudyDTO:
+    study = StudyDTO(path=f"/path/to/{name}", input_size=input_size, nb_years=8, n_cpu=4, alloc_cpus=4, **kwargs)
+    study.elapsed = elapsed
+    study.max_rss = max_rss
+    return study
+
+
+@pytest.mark.unit_test
+def test_get_study_input_size(tmp_path: Path):
+    tmp_path.joinpath("study.antares").write_bytes(b"x" * 10)
+    tmp_path.joinpath("input").mkdir()
+    tmp_path.joinpath("input/data.txt").write_bytes(b"x" * 100)
+    tmp_path.joinpath("output/20230401-1234eco").mkdir(parents=True)
+    tmp_path.joinpath("output/20230401-1234eco/results.txt").write_bytes(b"x" * 1000)
+    assert get_study_input_size(tmp_path) == 110
+
+
+@pytest.mark.unit_test
+def test_get_study_nb_years(tmp_path: Path):
+    assert get_study_nb_years(tmp_path) == 0
+    tmp_path.joinpath("settings").mkdir()
+    tmp_path.joinpath("settings/generaldata.ini").write_text(GENERAL_DATA_INI, encoding="utf-8")
+    assert get_study_nb_years(tmp_path) == 8
+
+
+class TestResourceEstimator:
+    @pytest.mark.unit_test
+    def test_estimate__no_history(self):
+        estimator = ResourceEstimator([])
+        study = StudyDTO(path="/path/to/study", n_cpu=12, time_limit=3600, input_size=1000, nb_years=4)
+        estimate = estimator.estimate(study)
+        # the number of CPUs is limited to the number of years
+        assert estimate.n_cpu == 4
+        assert estimate.time_limit == 3600
+        assert estimate.memory_limit == 0
+        assert estimate.predicted_elapsed == 0
+        assert estimate.nb_samples == 0
+
+    @pytest.mark.unit_test
+    def test_estimate__from_history(self):
+        history = [
+            _past_study("s1", input_size=1000, elapsed=1000, max_rss=400 * MIB),
+            _past_study("s2", input_size=1000, elapsed=1200, max_rss=400 * MIB),
+            _past_study("s3", input_size=1000, elapsed=1400, max_rss=400 * MIB),
+            # ignored: errors, other run modes or missing accounting data
+            _past_study("s4", input_size=1000, elapsed=9999, max_rss=400 * MIB, with_error=True),
+            _past_study("s5", input_size=1000, elapsed=9999, max_rss=400 * MIB, run_mode=Modes.xpansion_r),
+            _past_study("s6", input_size=1000, elapsed=0, max_rss=0),
+        ]
+        estimator = ResourceEstimator(history, safety_margin=2)
+        study = StudyDTO(path="/path/to/study", n_cpu=8, time_limit=48 * 3600, input_size=2000, nb_years=16)
+        estimate = estimator.estimate(study)
+        assert estimate.nb_samples == 3
+        assert estimate.n_cpu == 8
+        # twice the input size, twice the years and twice the CPUs
+        assert estimate.predicted_elapsed == 2400
+        assert estimate.time_limit == 4800
+        # twice the input size and twice the CPUs
+        assert estimate.predicted_max_rss == 1600 * MIB
+        assert estimate.memory_limit == 3200
+
+        # the time limit of the study is an upper bound
+        study.time_limit = 3600
+        assert estimator.estimate(study).time_limit == 3600
+
+        # the time limit has a lower bound
+        study.time_limit = 3600
+        study.input_size = 10
+        assert estimator.estimate(study).time_limit == MIN_TIME_LIMIT
+
+
+@pytest.mark.unit_test
+def test_study_list_composer__auto_sizing(study_list_composer: StudyListComposer):
+    study_list_composer.auto_sizing = True
+    study_list_composer.update_study_database()
+    studies = study_list_composer.get_list_of_studies()
+    assert studies
+    for study in studies:
+        assert study.input_size > 0
+        # no history: the default resources are used
+        assert study.n_cpu == 24
+        assert study.time_limit == 42
+        assert study.memory_limit == 0
@@ -0,0 +1,118 @@
+import pytest
+
+import os
+
+from pathlib import Path
+from unittest import mock
+
+from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.remote_environnement.remote_environment_with_slurm import RemoteEnvironmentWithSlurm
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.use_cases.fetch_results.result_fetcher import ResultCache, ResultFetcher, match_entries
+
+MANIFEST = [
+    {"path": "study/output/eco/economy/mc-all/areas/fr/values-annual.txt", "size": 10, "crc32": 1},
+    {"path": "study/output/eco/economy/mc-all/areas/de/values-annual.txt", "size": 10, "crc32": 2},
+    {"path": "study/output/eco/economy/mc-ind/00001/areas/fr/values-hourly.txt", "size": 20, "crc32": 3},
+    {"path": "study/output/eco/simulation.log", "size": 5, "crc32": 4},
+]
+
+
+@pytest.fixture(name="study")
+def study_fixture() -> StudyDTO:
+    return StudyDTO(
+        path="/path/to/study",
+        job_id=42,
+        finished=True,
+        keep_remote=True,
+        remote_final_zipfile_path="/remote/finished_study_42.zip",
+        result_manifest=MANIFEST,
+    )
+
+
+def _fetch_result_files(study: StudyDTO, paths, dst_dir: Path):
+    extracted = []
+    for path in paths:
+        entry = next(entry for entry in study.result_manifest if entry["path"] == path)
+        dst_path = dst_dir / path
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        dst_path.write_bytes(b"x" * entry["size"])
+        extracted.append(dst_path)
+    return extracted
+
+
+@pytest.mark.unit_test
+def test_match_entries():
+    # a directory selects its subtree, "*" also matches "/"
+    assert match_entries(MANIFEST, ["study/output/eco/economy/mc-all/areas/"]) == MANIFEST[:2]
+    assert match_entries(MANIFEST, ["*/fr/*", "*.log"]) == [MANIFEST[0], MANIFEST[2], MANIFEST[3]]
+    assert match_entries(MANIFEST, ["study/output/eco/econ"]) == []
+
+
+@pytest.mark.unit_test
+def test_fetch__cache(tmp_path: Path, study: StudyDTO):
+    repo = mock.Mock(spec=DataRepoTinydb)
+    repo.iter_studies.side_effect = lambda name: iter([study] if name == study.name else [])
+    env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+    env.fetch_result_files.side_effect = _fetch_result_files
+    display = mock.Mock(spec=DisplayTerminal)
+    fetcher = ResultFetcher(repo, env, display, cache=ResultCache(tmp_path))
+
+    paths = fetcher.fetch("study", ["*/mc-all/areas/fr/*"])
+    assert paths == [tmp_path / "study_42" / MANIFEST[0]["path"]]
+    env.fetch_result_files.assert_called_once_with(study, [MANIFEST[0]["path"]], tmp_path / "study_42")
+
+    # only the files which are not in the cache are fetched
+    env.fetch_result_files.reset_mock()
+    paths = fetcher.fetch("study", ["*/mc-all/areas"])
+    assert paths == sorted(tmp_path / "study_42" / entry["path"] for entry in MANIFEST[:2])
+    env.fetch_result_files.assert_called_once_with(study, [MANIFEST[1]["path"]], tmp_path / "study_42")
+    display.show_error.assert_not_called()
+
+
+@pytest.mark.unit_test
+def test_fetch__unknown_study_or_no_match(tmp_path: Path, study: StudyDTO):
+    repo = mock.Mock(spec=DataRepoTinydb)
+    repo.iter_studies.side_effect = lambda name: iter([study] if name == study.name else [])
+    env = mock.Mock(spec=RemoteEnvironmentWithSlurm)
+    display = mock.Mock(spec=DisplayTerminal)
+    fetcher = ResultFetcher(repo, env, display, cache=ResultCache(tmp_path))
+
+    assert fetcher.fetch("unknown", ["*"]) == []
+    assert fetcher.fetch("study", ["*.xlsx"]) == []
+    assert display.show_error.call_count == 2
+    env.fetch_result_files.assert_not_called()
+
+
+@pytest.mark.unit_test
+def test_show_manifest(tmp_path: Path, study: StudyDTO):
+    repo = mock.Mock(spec=DataRepoTinydb)
+    repo.iter_studies.side_effect = lambda name: iter([study] if name == study.name else [])
+    display = mock.Mock(spec=DisplayTerminal)
+    fetcher = ResultFetcher(repo, mock.Mock(spec=RemoteEnvironmentWithSlurm), display, cache=ResultCache(tmp_path))
+
+    fetcher.show_manifest("study")
+
+    message = display.show_message.call_args[0][0]
+    assert all(entry["path"] in message for entry in MANIFEST)
+
+
+@pytest.mark.unit_test
+def test_cache_evict(tmp_path: Path, study: StudyDTO):
+    cache = ResultCache(tmp_path, max_size=25)
+    paths = _fetch_result_files(study, [entry["path"] for entry in MANIFEST], cache.get_study_dir(study))
+    for mtime, path in enumerate(paths, start=1000):
+        os.utime(path, (mtime, mtime))
+    # the first file is used again: it becomes the most recently used
+    assert cache.get(study, MANIFEST[0]) == paths[0]
+
+    # the least recently used files are removed first, the files to keep are never removed
+    removed = cache.evict(keep={paths[1]})
+    assert removed == [paths[2]]
+    assert cache.get(study, MANIFEST[2]) is None
+    assert cache.get(study, MANIFEST[1]) == paths[1]
+
+    # a cached file whose size differs is outdated
+    paths[3].write_bytes(b"x")
+    assert cache.get(study, MANIFEST[3]) is None
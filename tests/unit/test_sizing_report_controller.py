@@ -0,0 +1,32 @@
+import pytest
+
+from unittest import mock
+
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.use_cases.sizing_report.sizing_report_controller import MIB, SizingReportController
+
+
+@pytest.mark.unit_test
+def test_show_report__no_study():
+    repo = mock.Mock()
+    repo.get_study_history.return_value = [StudyDTO(path="/path/to/study")]
+    display = mock.Mock()
+    SizingReportController(repo=repo, display=display).show_report()
+    display.show_message.assert_called_once_with("No finished study with predicted resources found", mock.ANY)
+
+
+@pytest.mark.unit_test
+def test_show_report():
+    study = StudyDTO(path="/path/to/study", predicted_elapsed=1000, predicted_max_rss=1024 * MIB)
+    study.elapsed = 1500
+    study.max_rss = 512 * MIB
+    repo = mock.Mock()
+    repo.get_study_history.return_value = [study, StudyDTO(path="/path/to/other")]
+    display = mock.Mock()
+    SizingReportController(repo=repo, display=display).show_report()
+    display.show_message.assert_called_once()
+    message = display.show_message.call_args[0][0]
+    assert "study" in message
+    assert "other" not in message
+    assert "elapsed time ratio: 1.50" in message
+    assert "peak memory ratio: 0.50" in message
@@ -0,0 +1,95 @@
+import pytest
+
+from antareslauncher.remote_environnement.slurm_queue import CpuCounts, QueueRecord, QueueSnapshot
+
+# noinspection SpellCheckingInspection
+SQUEUE_OUTPUT = """\
+1001|RUNNING|None|2024-01-01T10:00:00|1:02:03|2:00:00|compute|12|normal|study_a
+1002|PENDING|Priority|N/A|0:00|1-00:00:00|compute|24|high|study_b
+1003|COMPLETED|None|2024-01-01T08:00:00|10:00|2:00:00|debug|1|normal|name|with|pipes
+invalid line
+"""
+
+
+class TestQueueRecord:
+    @pytest.mark.unit_test
+    def test_from_squeue_line(self):
+        record = QueueRecord.from_squeue_line("1002|PENDING|Priority|N/A|0:00|1-00:00:00|compute|24|high|study_b\n")
+        assert record == QueueRecord(
+            job_id="1002",
+            name="study_b",
+            state="PENDING",
+            reason="Priority",
+            start_time="N/A",
+            time_used="0:00",
+            time_limit="1-00:00:00",
+            partition="compute",
+            cpus=24,
+            qos="high",
+        )
+
+    @pytest.mark.unit_test
+    @pytest.mark.parametrize("line", ["", "invalid line", "|RUNNING|None|N/A|0:00|1:00|compute|1|normal|foo"])
+    def test_from_squeue_line__invalid(self, line):
+        assert QueueRecord.from_squeue_line(line) is None
+
+
+class TestQueueSnapshot:
+    @pytest.mark.unit_test
+    def test_from_squeue_output(self):
+        snapshot = QueueSnapshot.from_squeue_output("john", "server", SQUEUE_OUTPUT)
+        assert len(snapshot) == 3
+        assert [r.job_id for r in snapshot] == ["1001", "1002", "1003"]
+        # the job name is the last column, it may contain the delimiter
+        assert snapshot.get(1003).name == "name|with|pipes"
+        assert snapshot.get("1001").cpus == 12
+        assert snapshot.get(9999) is None
+
+    @pytest.mark.unit_test
+    def test_filter(self):
+        snapshot = QueueSnapshot.from_squeue_output("john", "server", SQUEUE_OUTPUT)
+        assert [r.job_id for r in snapshot.filter(states=["PENDING", "RUNNING"])] == ["1001", "1002"]
+        assert [r.job_id for r in snapshot.filter(name="study_*")] == ["1001", "1002"]
+        assert [r.job_id for r in snapshot.filter(partition="debug")] == ["1003"]
+        assert [r.job_id for r in snapshot.filter(qos="normal", job_ids=[1003, 4242])] == ["1003"]
+        filtered = snapshot.filter(job_ids=[])
+        assert len(filtered) == 0
+        assert filtered.timestamp == snapshot.timestamp
+
+    @pytest.mark.unit_test
+    def test_render(self):
+        snapshot = QueueSnapshot.from_squeue_output("john", "server", SQUEUE_OUTPUT)
+        lines = snapshot.render().splitlines()
+        assert len(lines) == 4
+        assert lines[0].split() == [
+            "JOBID",
+            "NAME",
+            "STATE",
+            "REASON",
+            "START_TIME",
+            "TIME",
+            "TIME_LIMIT",
+            "PARTITION",
+            "CPUS",
+        ]
+        assert lines[2].split() == [
+            "1002",
+            "study_b",
+            "PENDING",
+            "Priority",
+            "N/A",
+            "0:00",
+            "1-00:00:00",
+            "compute",
+            "24",
+        ]
+
+
+class TestCpuCounts:
+    @pytest.mark.unit_test
+    def test_from_sinfo_output(self):
+        # one line per partition when several partitions are selected
+        counts = CpuCounts.from_sinfo_output("120/24/8/152\n10/6/0/16\n")
+        assert counts == CpuCounts(allocated=130, idle=30, other=8, total=168)
+        assert CpuCounts.from_sinfo_output("") is None
+        assert CpuCounts.from_sinfo_output("sinfo: error: invalid partition\n") is None
@@ -0,0 +1,226 @@
+import pytest
+
+from unittest import mock
+
+from antares.study.version import SolverMinorVersion
+
+from antareslauncher.remote_environnement.remote_environment_with_slurm import (
+    GetQueueError,
+    JobStateCodes,
+    KillJobError,
+    RemoteEnvironmentWithSlurm,
+    SubmitJobError,
+)
+from antareslauncher.remote_environnement.slurm_rest_backend import (
+    RestSchedulerBackend,
+    SlurmRestClient,
+    SlurmRestError,
+    _format_duration,
+    _number,
+)
+from antareslauncher.remote_environnement.slurm_script_features import ScriptParametersDTO, SlurmScriptFeatures
+from antareslauncher.study_dto import Modes, StudyDTO
+from tests.fake_slurmrestd import FakeSlurmRestd
+
+
+@pytest.fixture(name="fake")
+def fake_fixture():
+    with FakeSlurmRestd() as fake:
+        yield fake
+
+
+@pytest.fixture(name="backend")
+def backend_fixture(fake: FakeSlurmRestd) -> RestSchedulerBackend:
+    client = SlurmRestClient(fake.url, fake.username, token=fake.token)
+    features = SlurmScriptFeatures("/opt/antares/launchAntares.sh", partition="compute", quality_of_service="high")
+    return RestSchedulerBackend(client, features)
+
+
+def _script_params(**kwargs) -> ScriptParametersDTO:
+    params = dict(
+        study_dir_name="my_study",
+        input_zipfile_name="my_study.zip",
+        time_limit=60,
+        n_cpu=4,
+        antares_version=SolverMinorVersion.parse("8.8"),
+        run_mode=Modes.antares,
+        post_processing=False,
+        other_options="",
+        oversubscribe=False,
+    )
+    params.update(kwargs)
+    return ScriptParametersDTO(**params)
+
+
+@pytest.mark.unit_test
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (42, 42),
+        ({"set": True, "infinite": False, "number": 42}, 42),
+        ({"set": False, "infinite": False, "number": 0}, None),
+        ({"set": True, "infinite": True, "number": 0}, float("inf")),
+        (None, None),
+    ],
+)
+def test_number(value, expected):
+    assert _number(value) == expected
+
+
+@pytest.mark.unit_test
+@pytest.mark.parametrize("seconds, expected", [(5, "0:05"), (3723, "1:02:03"), (90061, "1-01:01:01")])
+def test_format_duration(seconds, expected):
+    assert _format_duration(seconds) == expected
+
+
+class TestRestSchedulerBackend:
+    @pytest.mark.unit_test
+    def test_submit_job(self, fake, backend):
+        params = _script_params(memory_limit=2048, oversubscribe=True, other_options="--foo")
+        job_id = backend.submit_job("/home/john/REMOTE", "my_study", params)
+        job = fake.jobs[job_id]
+        assert job["name"] == "my_study"
+        submitted = job["submitted"]
+        assert "/opt/antares/launchAntares.sh" in submitted["script"]
+        assert submitted["job"]["argv"] == [
+            "/opt/antares/launchAntares.sh",
+            "my_study.zip",
+            "8.8",
+            "ANTARES",
+            "False",
+            "--foo",
+        ]
+        assert submitted["job"]["current_working_directory"] == "/home/john/REMOTE"
+        assert submitted["job"]["partition"] == "compute"
+        assert submitted["job"]["qos"] == "high"
+        assert submitted["job"]["cpus_per_task"] == 4
+        assert submitted["job"]["time_limit"] == {"set": True, "number": 60}
+        assert submitted["job"]["memory_per_node"] == {"set": True, "number": 2048}
+        assert submitted["job"]["shared"] == ["oversubscribe"]
+
+    @pytest.mark.unit_test
+    def test_submit_job__user_environment(self, fake, backend):
+        """The job runs with the environment of a login shell of the user, like with `sbatch`"""
+        environment = [
+            "HOME=/home/john",
+            "USER=john",
+            "MODULEPATH=/etc/modulefiles",
+            "BASH_FUNC_module%%=() {  eval $($LMOD_CMD bash $@)\n}",
+            "SSH_CONNECTION=10.0.0.1 22 10.0.0.2 22",
+            "PWD=/home/john",
+        ]
+        connection = mock.Mock()
+        connection.execute_command.side_effect = [
+            ("\0".join(environment) + "\0", ""),
+            (f"SLURM_JWT={fake.token}\n", ""),
+        ]
+        backend.client = SlurmRestClient(fake.url, fake.username, connection=connection)
+        job_id = backend.submit_job("/home/john/REMOTE", "my_study", _script_params())
+        backend.submit_job("/home/john/REMOTE", "my_study", _script_params())
+
+        assert fake.jobs[job_id]["submitted"]["job"]["environment"] == environment[:4]
+        # the environment is read once
+        assert connection.execute_command.call_args_list == [
+            mock.call("bash -lc 'env -0'"),
+            mock.call("scontrol token lifespan=3600"),
+        ]
+
+    @pytest.mark.unit_test
+    def test_submit_job__default_environment(self, fake, backend):
+        backend.slurm_script_features.solver_script_path = "/opt/my antares/launchAntares.sh"
+        job_id = backend.submit_job("/home/john/REMOTE", "my_study", _script_params())
+        submitted = fake.jobs[job_id]["submitted"]
+        assert submitted["job"]["environment"] == [
+            "PATH=/bin:/usr/bin:/usr/local/bin",
+            f"USER={fake.username}",
+            f"LOGNAME={fake.username}",
+        ]
+        assert "exec bash '/opt/my antares/launchAntares.sh' \"$@\"" in submitted["script"]
+
+    @pytest.mark.unit_test
+    def test_submit_job__input_hash(self, fake, backend):
+        job_id = backend.submit_job("/home/john/REMOTE", "my_study", _script_params(input_hash="0123abcd"))
+        assert fake.jobs[job_id]["submitted"]["job"]["argv"][-2:] == ["", "0123abcd"]
+
+    @pytest.mark.unit_test
+    def test_submit_job__error(self, fake, backend):
+        backend.client.request = mock.Mock(side_effect=SlurmRestError("POST", "/job/submit", "invalid partition"))
+        with pytest.raises(SubmitJobError, match="invalid partition"):
+            backend.submit_job("/home/john/REMOTE", "my_study", _script_params())
+
+    @pytest.mark.unit_test
+    def test_read_queue__single_request_and_connection_reuse(self, fake, backend):
+        running_id = fake.add_job("study_a", state="RUNNING")
+        pending_id = fake.add_job("study_b", state="PENDING", state_reason="Priority")
+        fake.add_job("other_user_study", user_name="jane")
+
+        for _ in range(3):
+            snapshot = backend.read_queue("john", "server")
+
+        assert [r.job_id for r in snapshot] == [str(running_id), str(pending_id)]
+        assert snapshot.get(running_id).state == "RUNNING"
+        assert snapshot.get(running_id).time_limit == "1:00:00"
+        assert snapshot.get(pending_id).reason == "Priority"
+        assert len(fake.requests) == 3
+        assert fake.nb_connections == 1
+
+    @pytest.mark.unit_test
+    def test_read_queue__bad_token(self, fake, backend):
+        backend.client = SlurmRestClient(fake.url, fake.username, token="bad token")
+        with pytest.raises(GetQueueError, match="HTTP 401"):
+            backend.read_queue("john", "server")
+
+    @pytest.mark.unit_test
+    def test_read_queue__token_renewed_with_scontrol(self, fake, backend):
+        connection = mock.Mock()
+        connection.execute_command.return_value = (f"SLURM_JWT={fake.token}\n", "")
+        backend.client = SlurmRestClient(fake.url, fake.username, connection=connection)
+        backend.read_queue("john", "server")
+        connection.execute_command.assert_called_once_with("scontrol token lifespan=3600")
+
+    @pytest.mark.unit_test
+    def test_get_job_state(self, fake, backend):
+        job_id = fake.add_job("study_a", state="RUNNING")
+        assert backend.get_job_state(job_id, "study_a") == JobStateCodes.RUNNING
+        assert backend.get_job_state(9999, "unknown") is None
+
+    @pytest.mark.unit_test
+    def test_get_job_accounting(self, fake, backend):
+        job_id = fake.add_job("study_a", state="RUNNING")
+        fake.set_job_state(job_id, "COMPLETED")
+        job_state, accounting = backend.get_job_accounting(job_id, "study_a", attempts=1, sleep_time=0)
+        assert job_state == JobStateCodes.COMPLETED
+        assert accounting.alloc_cpus == 1
+        assert accounting.max_rss == 512 * 1024 * 1024
+        assert accounting.exit_code == "0:0"
+        assert accounting.node_list == "node001"
+        assert accounting.end_time
+        assert backend.get_job_accounting(9999, "unknown", attempts=1, sleep_time=0) is None
+
+    @pytest.mark.unit_test
+    def test_cancel_jobs__single_request(self, fake, backend):
+        job_ids = [fake.add_job(f"study_{i}", state="RUNNING") for i in range(3)]
+        backend.cancel_jobs(job_ids)
+        assert all(fake.jobs[job_id]["job_state"] == ["CANCELLED"] for job_id in job_ids)
+        assert fake.requests == [("DELETE", "/slurm/v0.0.40/jobs")]
+        with pytest.raises(KillJobError):
+            backend.cancel_jobs([9999])
+
+
+@pytest.mark.unit_test
+def test_remote_environment_with_rest_backend(fake, backend):
+    """The remote environment delegates the job management to the REST backend"""
+    connection = mock.Mock(home_dir="/home/john", username="john", host="server")
+    env = RemoteEnvironmentWithSlurm(connection, backend.slurm_script_features, backend=backend)
+    study = StudyDTO(path="path/to/my_study", zipfile_path="path/to/my_study.zip", time_limit=3600, n_cpu=2)
+    study.antares_version = SolverMinorVersion.parse("8.8")
+
+    study.job_id = env.submit_job(study)
+    assert env.count_jobs_in_flight() == 1
+    assert env.get_job_state_flags(study) == (False, False, False)
+
+    fake.set_job_state(study.job_id, "COMPLETED")
+    env.clear_queue_snapshot()
+    assert env.get_job_state_flags(study) == (True, True, False)
+    assert study.alloc_cpus == 2
+    connection.execute_command.assert_not_called()
@@ -151,3 +151,37 @@ class TestSshConnection:
             call("/workspace/foo.txt", str(Path("/path/to/study/foo.txt")), ANY),
         ]
         assert sftp.remove.mock_calls == []
+
+    def test_stream_command(self, ssh_mock):
+        with patch("paramiko.SSHClient", return_value=ssh_mock):
+            config = {
+                "hostname": "slurm-server",
+                "username": "john.doe",
+                "password": "s3cr3T",
+            }
+            connection = SshConnection(config)
+            ssh_mock.exec_command.return_value = (
+                io.StringIO(""),
+                io.StringIO('{"job_id": 42}\n{"heartbeat": 1}\n'),
+                io.StringIO(""),
+            )
+            actual = list(connection.stream_command("python3 probe.py --watch=10", timeout=60))
+
+        assert actual == ['{"job_id": 42}', '{"heartbeat": 1}']
+        ssh_mock.exec_command.assert_called_with("python3 probe.py --watch=10", timeout=60)
+        ssh_mock.close.assert_called()
+
+    def test_stream_command__error(self, ssh_mock, caplog):
+        with patch("paramiko.SSHClient", return_value=ssh_mock):
+            config = {
+                "hostname": "slurm-server",
+                "username": "john.doe",
+                "password": "s3cr3T",
+            }
+            connection = SshConnection(config)
+            ssh_mock.exec_command.side_effect = paramiko.SSHException("channel closed")
+            with caplog.at_level(level=logging.ERROR, logger=LOGGER):
+                actual = list(connection.stream_command("python3 probe.py --watch=10"))
+
+        assert actual == []
+        assert "channel closed" in caplog.text
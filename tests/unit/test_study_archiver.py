@@ -0,0 +1,124 @@
+import pytest
+
+import time
+
+from pathlib import Path
+from unittest import mock
+
+from antareslauncher.data_repo.data_repo_journal import DataRepoJournal
+from antareslauncher.data_repo.data_repo_sqlite import DataRepoSqlite
+from antareslauncher.data_repo.data_repo_tinydb import DataRepoTinydb
+from antareslauncher.data_repo.study_archive import StudyArchive
+from antareslauncher.display.display_terminal import DisplayTerminal
+from antareslauncher.study_dto import StudyDTO
+from antareslauncher.use_cases.archive.study_archiver import DAY, StudyArchiver
+
+NOW = time.time()
+
+
+def _done_study(name: str, days: float) -> StudyDTO:
+    return StudyDTO(path=f"/path/to/{name}", done=True, job_id=len(name), events={"extract_end": NOW - days * DAY})
+
+
+@pytest.fixture(name="archive")
+def archive_fixture(tmp_path: Path) -> StudyArchive:
+    return StudyArchive(tmp_path / "repo.archive.gz")
+
+
+@pytest.fixture(name="repo", params=["tinydb", "sqlite", "journal"])
+def repo_fixture(request, tmp_path: Path, archive: StudyArchive) -> DataRepoTinydb:
+    if request.param == "sqlite":
+        return DataRepoSqlite(tmp_path / "repo.sqlite", "name", archive=archive)
+    if request.param == "journal":
+        return DataRepoJournal(tmp_path / "repo.json", "name", archive=archive)
+    return DataRepoTinydb(tmp_path / "repo.json", "name", archive=archive)
+
+
+@pytest.mark.unit_test
+def test_study_archive__append_only(archive: StudyArchive):
+    assert list(archive.iter_documents()) == []
+    assert not archive.contains("study_a")
+    archive.append(["study_a"], [{"name": "study_a", "job_id": 1}])
+    archive.append(["study_b", "study_c"], [{"name": "study_b"}, {"name": "study_c"}])
+    assert [doc["name"] for doc in archive.iter_documents()] == ["study_a", "study_b", "study_c"]
+    # the keys are read from the keys file, without decompressing the archive
+    other_archive = StudyArchive(archive.path)
+    assert other_archive.contains("study_c")
+    assert not other_archive.contains("study_d")
+
+
+@pytest.mark.unit_test
+def test_archive_done_studies(repo: DataRepoTinydb):
+    old_study = _done_study("old_study", days=40)
+    legacy_study = StudyDTO(path="/path/to/legacy_study", done=True)  # without lifecycle event
+    recent_study = _done_study("recent_study", days=10)
+    running_study = StudyDTO(path="/path/to/running_study", started=True, job_id=42)
+    repo.save_studies([old_study, legacy_study, recent_study, running_study])
+
+    archived = repo.archive_done_studies(30 * DAY, now=NOW)
+    assert [s.name for s in archived] == ["old_study", "legacy_study"]
+    # the archived studies are no longer read, but they are still inside the database
+    assert [s.name for s in repo.get_list_of_studies()] == ["recent_study", "running_study"]
+    assert repo.is_study_inside_database(StudyDTO(path="/other/path/to/old_study"))
+    assert [s.name for s in repo.get_archived_studies()] == ["old_study", "legacy_study"]
+    assert repo.get_archived_studies()[0] == old_study
+
+    assert repo.archive_done_studies(30 * DAY, now=NOW) == []
+    assert [s.name for s in repo.archive_done_studies(0, now=NOW)] == ["recent_study"]
+    assert repo.get_job_ids() == {42}
+
+
+@pytest.mark.unit_test
+def test_archive_done_studies__other_process(repo: DataRepoTinydb, archive: StudyArchive):
+    repo.save_studies([_done_study("study_a", days=40)])
+    other_repo = type(repo)(repo.database_file_path, "name", archive=StudyArchive(archive.path))
+    study = StudyDTO(path="/other/path/to/study_a")
+    assert other_repo.is_study_inside_database(study)
+    assert not other_repo.is_study_inside_database(StudyDTO(path="/path/to/study_b"))
+
+    # the studies archived by another launcher are still inside the database, so they are not launched again
+    repo.archive_done_studies(0, now=NOW)
+    assert other_repo.is_study_inside_database(study)
+
+
+@pytest.mark.unit_test
+def test_archive_done_studies__history(repo: DataRepoTinydb):
+    remote_study = _done_study("remote_study", days=40)
+    remote_study.keep_remote = True
+    remote_study.remote_final_zipfile_path = "/remote/remote_study.zip"
+    repo.save_studies([_done_study("old_study", days=40), remote_study, _done_study("recent_study", days=10)])
+
+    # the results kept on the remote server can still be fetched
+    assert [s.name for s in repo.archive_done_studies(0, now=NOW)] == ["old_study", "recent_study"]
+    assert [s.name for s in repo.get_list_of_studies()] == ["remote_study"]
+    # the archived studies are still used for the statistics
+    assert [s.name for s in repo.get_study_history()] == ["old_study", "recent_study", "remote_study"]
+
+
+@pytest.mark.unit_test
+def test_study_archiver(repo: DataRepoTinydb):
+    repo.save_studies([_done_study("old_study", days=40), _done_study("recent_study", days=10)])
+    display = mock.Mock(spec=DisplayTerminal)
+
+    # the automatic archiving is disabled
+    archiver = StudyArchiver(repo=repo, display=display, archive_after_days=0)
+    assert archiver.archive_done_studies() == []
+
+    archiver = StudyArchiver(repo=repo, display=display, archive_after_days=30)
+    assert [s.name for s in archiver.archive_done_studies()] == ["old_study"]
+
+    # the compaction archives all the done studies if the number of days is zero
+    archiver = StudyArchiver(repo=repo, display=display, archive_after_days=0)
+    assert [s.name for s in archiver.compact()] == ["recent_study"]
+    display.reset_mock()
+    archiver.compact()
+    display.show_message.assert_called_once_with("No done study to archive", mock.ANY)
+
+    display.reset_mock()
+    archiver.show_history("old_*")
+    lines = display.show_message.call_args[0][0].splitlines()
+    assert lines[0] == "1 archived studies"
+    assert lines[2].split()[:2] == ["old_study", "9"]
+    display.reset_mock()
+    archiver.show_history("unknown_*")
+    display.show_message.assert_called_once_with("No archived study matching 'unknown_*'", mock.ANY)
@@ -1,3 +1,5 @@
+import dataclasses
+
 from antares.study.version import StudyVersion
 
 from antareslauncher.study_dto import StudyDTO
@@ -14,3 +16,33 @@ def test_study_dto_from_dict():
     study_dict = {"path": "/path/to/study", "antares_version": "9.0"}
     study_dto = StudyDTO.from_dict(study_dict)
     assert study_dto.antares_version == StudyVersion.parse("9.0")
+
+
+def test_study_dto_changed_fields():
+    study_dto = StudyDTO(path="/path/to/study", events={"zip_start": 1.0})
+    assert study_dto.get_changed_fields() is None  # never saved
+
+    study_dto.mark_saved()
+    assert study_dto.get_changed_fields() == set()
+    study_dto.job_id = 42
+    study_dto.events["zip_end"] = 2.0  # modified in place
+    study_dto.attempts.append({"job_id": 41})
+    assert study_dto.get_changed_fields() == {"job_id", "events", "attempts"}
+
+    study_dto.mark_saved()
+    assert study_dto.get_changed_fields() == set()
+    assert set(study_dto.to_dict()) == {f.name for f in dataclasses.fields(StudyDTO)}
+
+
+def test_study_dto_compact():
+    docs = [{"path": f"/path/to/study_{i}", "antares_version": "8.8", "job_id": i} for i in range(3)]
+    studies = [StudyDTO.from_dict(doc) for doc in docs]
+    assert not hasattr(studies[0], "__dict__")
+    # the parsed versions are shared
+    assert studies[0].antares_version is studies[2].antares_version
+    assert studies[0].antares_version == StudyVersion.parse("8.8")
+    # a field set to its saved value is not changed
+    studies[0].mark_saved()
+    studies[0].job_id = 5
+    studies[0].job_id = 0
+    assert studies[0].get_changed_fields() == set()
@@ -122,3 +122,13 @@ class TestStudyListComposer:
         else:
             expected_versions = {}
         assert actual_versions == {n: expected_versions[n] for n in actual_versions}
+
+    def test_update_study_database__output_patterns(self, study_list_composer: StudyListComposer):
+        study_list_composer.output_include = ("output/*/mc-all/*",)
+        study_list_composer.output_exclude = ("output/*/*-hourly.txt",)
+        study_list_composer.update_study_database()
+        studies = study_list_composer.get_list_of_studies()
+        assert studies
+        for study in studies:
+            assert study.output_include == ["output/*/mc-all/*"]
+            assert study.output_exclude == ["output/*/*-hourly.txt"]